@@ -3,9 +3,10 @@ from __future__ import annotations
 import time
 import math
 from collections import deque, defaultdict
-from typing import Dict, Any, Iterable, List, Optional
+from typing import Dict, Any, Iterable, List, Mapping, Optional
 
 from arbitrage.exchanges.ws_feed_manager import get_feeder
+from arbitrage.utils import http_client as _http
 
 def _summarize(payload: dict) -> dict:
     try:
@@ -421,8 +422,8 @@ class FeatureExtractor:
             try:
                 # attempt to read feeder._books or use get_order_book for known symbols
                 books = getattr(feeder, '_books', None)
-                if isinstance(books, dict) and books:
-                    data[ex] = books
+                if isinstance(books, Mapping) and books:
+                    data[ex] = dict(books)
                     continue
                 # else try to build from tickers/list of symbols
                 data[ex] = {}
@@ -447,14 +448,9 @@ class FeatureExtractor:
         if not self.webhook_url:
             return False
         try:
-            import urllib.request as _urlreq
-            import json, time
-            data = json.dumps(payload).encode('utf-8')
-            req = _urlreq.Request(self.webhook_url, data=data, headers={'Content-Type': 'application/json'})
-            with _urlreq.urlopen(req, timeout=5) as resp:
-                ok = resp.status == 200 or resp.status == 201
-                # Do not persist delivery history - this runtime only posts to the configured URL
-                return ok
+            resp = _http.request_sync('POST', self.webhook_url, json_body=payload, timeout=5)
+            # Do not persist delivery history - this runtime only posts to the configured URL
+            return resp.status_code == 200 or resp.status_code == 201
         except Exception:
             try:
                 import time
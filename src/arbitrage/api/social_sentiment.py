@@ -10,6 +10,9 @@ from typing import Optional, Dict, Any
 import httpx
 from fastapi import APIRouter, HTTPException
 
+from ..utils import http_client
+from ..exchanges.kline_store import get_kline_store
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
@@ -25,6 +28,16 @@ _scanner_cache = {
 }
 CACHE_TTL = 300  # 5 minutes in seconds (matches frontend auto-refresh)
 
+
+
+async def _klines(symbol: str, interval: str, limit: int, market: str = 'spot') -> list:
+    """Klines from the shared kline store; [] when the symbol has none."""
+    try:
+        return await get_kline_store().get_klines_async(symbol, interval, limit, market=market)
+    except Exception as e:
+        logger.debug(f"Kline fetch failed for {symbol} {interval}: {e}")
+        return []
+
 # Rate limiting for LunarCrush API
 _last_api_call = 0
 _api_call_delay = 0.5  # 500ms between calls (120 calls per minute max)
@@ -73,7 +86,7 @@ async def fetch_lunarcrush_data(symbol: str) -> Optional[Dict[str, Any]]:
             "Content-Type": "application/json"
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_client.session(timeout=10.0) as client:
             # Get basic coin data (galaxy score, alt rank)
             coin_url = f"https://lunarcrush.com/api4/public/coins/{symbol}/v1"
             
@@ -277,7 +290,7 @@ async def get_social_traction_predictions(debug: bool = False):
             }
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client.session(timeout=30.0) as client:
             # Step 1: Get all trading pairs from Binance to find new listings
             try:
                 logger.info("Step 1: Fetching Binance exchange info...")
@@ -673,7 +686,7 @@ async def get_volume_surges(
     try:
         results = []
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client.session(timeout=30.0) as client:
             # Step 1: Get current 24h ticker data from Binance
             logger.info("Fetching 24h ticker data from Binance...")
             ticker_url = "https://api.binance.com/api/v3/ticker/24hr"
@@ -745,47 +758,18 @@ async def get_volume_surges(
                     if checked_count == 1:
                         logger.info(f"Starting analysis loop, first symbol: {symbol}")
                     
-                    # Fetch BOTH 1h and 4h klines
-                    klines_1h_url = f"https://api.binance.com/api/v3/klines"
-                    klines_4h_url = f"https://api.binance.com/api/v3/klines"
-                    
-                    # For 1h: Get 168 candles (7 days)
-                    params_1h = {
-                        'symbol': symbol,
-                        'interval': '1h',
-                        'limit': min(lookback_hours, 1000)
-                    }
-                    
-                    # For 4h: Get 42 candles (7 days = 168h / 4h = 42 candles)
-                    params_4h = {
-                        'symbol': symbol,
-                        'interval': '4h',
-                        'limit': min(lookback_hours // 4, 250)
-                    }
-                    
-                    # Fetch both in parallel
-                    klines_1h_response, klines_4h_response = await asyncio.gather(
-                        client.get(klines_1h_url, params=params_1h),
-                        client.get(klines_4h_url, params=params_4h),
-                        return_exceptions=True
+                    # Fetch BOTH 1h and 4h klines (7 days each) from the kline store
+                    klines_1h, klines_4h = await asyncio.gather(
+                        _klines(symbol, '1h', min(lookback_hours, 1000)),
+                        _klines(symbol, '4h', min(lookback_hours // 4, 250)),
                     )
                     
-                    # Check if both requests succeeded
-                    if isinstance(klines_1h_response, Exception) or isinstance(klines_4h_response, Exception):
-                        failed_fetch += 1
-                        if failed_fetch <= 3:
-                            logger.warning(f"{symbol}: API request failed (exception)")
-                        continue
-                    
-                    if klines_1h_response.status_code != 200 or klines_4h_response.status_code != 200:
+                    if not klines_1h or not klines_4h:
                         failed_fetch += 1
                         if failed_fetch <= 3:
-                            logger.warning(f"{symbol}: API returned status {klines_1h_response.status_code}/{klines_4h_response.status_code}")
+                            logger.warning(f"{symbol}: kline fetch failed")
                         continue
                     
-                    klines_1h = klines_1h_response.json()
-                    klines_4h = klines_4h_response.json()
-                    
                     if len(klines_1h) < 24 or len(klines_4h) < 6:  # Need minimum data
                         failed_data += 1
                         if failed_data <= 3:
@@ -1111,7 +1095,7 @@ async def get_breakout_opportunities(
     try:
         results = []
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client.session(timeout=30.0) as client:
             # Step 1: Get current 24h ticker data
             logger.info("Fetching 24h ticker data from Binance...")
             ticker_url = "https://api.binance.com/api/v3/ticker/24hr"
@@ -1235,19 +1219,7 @@ async def get_breakout_opportunities(
                     # Need enough data to detect consolidation period
                     lookback = max(consolidation_hours + 48, 168)  # Extra buffer
                     
-                    klines_url = f"https://api.binance.com/api/v3/klines"
-                    params = {
-                        'symbol': symbol,
-                        'interval': '1h',
-                        'limit': min(lookback, 1000)
-                    }
-                    
-                    klines_response = await client.get(klines_url, params=params)
-                    
-                    if klines_response.status_code != 200:
-                        continue
-                    
-                    klines = klines_response.json()
+                    klines = await _klines(symbol, '1h', min(lookback, 1000))
                     
                     if len(klines) < consolidation_hours + 10:
                         continue
@@ -1524,7 +1496,7 @@ async def get_funding_divergence(
     try:
         results = []
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client.session(timeout=30.0) as client:
             # Step 1: Get current funding rates from Binance Futures
             logger.info("Fetching funding rates from Binance Futures...")
             funding_url = "https://fapi.binance.com/fapi/v1/premiumIndex"
@@ -1660,19 +1632,7 @@ async def get_funding_divergence(
                     current_oi = float(oi_data.get('openInterest', 0))
                     
                     # Get historical klines to check price movement
-                    klines_url = f"https://fapi.binance.com/fapi/v1/klines"
-                    params = {
-                        'symbol': symbol,
-                        'interval': '1h',
-                        'limit': lookback_hours + 1
-                    }
-                    
-                    klines_response = await client.get(klines_url, params=params)
-                    
-                    if klines_response.status_code != 200:
-                        continue
-                    
-                    klines = klines_response.json()
+                    klines = await _klines(symbol, '1h', lookback_hours + 1, market='futures')
                     
                     if len(klines) < 2:
                         continue
@@ -2143,7 +2103,7 @@ async def get_symbol_signals(symbol: str):
             "timestamp": time.time()
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client.session(timeout=30.0) as client:
             # 1. Check Volume Surge
             try:
                 logger.info(f"Analyzing volume surge for {symbol}...")
@@ -2158,37 +2118,33 @@ async def get_symbol_signals(symbol: str):
                     price_change_pct = float(ticker.get('priceChangePercent', 0))
                     
                     # Get historical klines to calculate average volume
-                    klines_url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval=1h&limit=168"
-                    klines_resp = await client.get(klines_url)
-                    
-                    if klines_resp.status_code == 200:
-                        klines = klines_resp.json()
-                        if len(klines) > 0:
-                            volumes = [float(k[7]) for k in klines]  # Quote asset volume
-                            avg_volume = sum(volumes) / len(volumes)
+                    klines = await _klines(symbol, '1h', 168)
+                    if len(klines) > 0:
+                        volumes = [float(k[7]) for k in klines]  # Quote asset volume
+                        avg_volume = sum(volumes) / len(volumes)
                             
-                            if avg_volume > 0:
-                                surge_pct = ((current_volume_usdt / avg_volume) - 1) * 100
+                        if avg_volume > 0:
+                            surge_pct = ((current_volume_usdt / avg_volume) - 1) * 100
                                 
-                                # Determine signal strength
-                                if surge_pct >= 300:
-                                    signal = "VERY_STRONG"
-                                elif surge_pct >= 200:
-                                    signal = "STRONG"
-                                elif surge_pct >= 100:
-                                    signal = "MEDIUM"
-                                else:
-                                    signal = "WEAK"
+                            # Determine signal strength
+                            if surge_pct >= 300:
+                                signal = "VERY_STRONG"
+                            elif surge_pct >= 200:
+                                signal = "STRONG"
+                            elif surge_pct >= 100:
+                                signal = "MEDIUM"
+                            else:
+                                signal = "WEAK"
                                 
-                                result["volume_surge"] = {
-                                    "symbol": symbol,
-                                    "current_volume_usd": current_volume_usdt,
-                                    "avg_volume_usd": avg_volume,
-                                    "volume_surge_percentage": surge_pct,
-                                    "price_change_24h": price_change_pct,
-                                    "signal": signal,
-                                    "reason": f"Volume is {surge_pct:.1f}% above 7-day average"
-                                }
+                            result["volume_surge"] = {
+                                "symbol": symbol,
+                                "current_volume_usd": current_volume_usdt,
+                                "avg_volume_usd": avg_volume,
+                                "volume_surge_percentage": surge_pct,
+                                "price_change_24h": price_change_pct,
+                                "signal": signal,
+                                "reason": f"Volume is {surge_pct:.1f}% above 7-day average"
+                            }
             except Exception as e:
                 logger.warning(f"Volume surge analysis failed for {symbol}: {e}")
             
@@ -2197,82 +2153,78 @@ async def get_symbol_signals(symbol: str):
                 logger.info(f"Analyzing breakout for {symbol}...")
                 
                 # Get 4h klines for breakout analysis
-                klines_url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval=4h&limit=72"
-                klines_resp = await client.get(klines_url)
-                
-                if klines_resp.status_code == 200:
-                    klines = klines_resp.json()
-                    if len(klines) >= 20:
-                        closes = [float(k[4]) for k in klines]
-                        highs = [float(k[2]) for k in klines]
-                        lows = [float(k[3]) for k in klines]
-                        volumes = [float(k[7]) for k in klines]
+                klines = await _klines(symbol, '4h', 72)
+                if len(klines) >= 20:
+                    closes = [float(k[4]) for k in klines]
+                    highs = [float(k[2]) for k in klines]
+                    lows = [float(k[3]) for k in klines]
+                    volumes = [float(k[7]) for k in klines]
                         
-                        current_price = closes[-1]
-                        recent_high = max(highs[-20:])
-                        recent_low = min(lows[-20:])
-                        avg_volume = sum(volumes[:-1]) / len(volumes[:-1])
-                        current_volume = volumes[-1]
+                    current_price = closes[-1]
+                    recent_high = max(highs[-20:])
+                    recent_low = min(lows[-20:])
+                    avg_volume = sum(volumes[:-1]) / len(volumes[:-1])
+                    current_volume = volumes[-1]
                         
-                        # Calculate price range and position
-                        price_range = recent_high - recent_low
-                        if price_range > 0:
-                            position_in_range = ((current_price - recent_low) / price_range) * 100
+                    # Calculate price range and position
+                    price_range = recent_high - recent_low
+                    if price_range > 0:
+                        position_in_range = ((current_price - recent_low) / price_range) * 100
                             
-                            # Check for breakout
-                            volume_increase = (current_volume / avg_volume) if avg_volume > 0 else 0
+                        # Check for breakout
+                        volume_increase = (current_volume / avg_volume) if avg_volume > 0 else 0
                             
-                            breakout_score = 0
-                            direction = "NEUTRAL"
+                        breakout_score = 0
+                        direction = "NEUTRAL"
                             
-                            # More lenient breakout detection - show any significant price position with volume
-                            if position_in_range > 80:  # In upper 20% of range
-                                if volume_increase > 1.2:  # Any volume increase
-                                    breakout_score = min(100, position_in_range * (volume_increase ** 0.5) * 10)
-                                    direction = "LONG"
-                                else:
-                                    # Still show but with lower score if no volume
-                                    breakout_score = position_in_range * 0.8
-                                    direction = "LONG"
-                            elif position_in_range < 20:  # In lower 20% of range  
-                                if volume_increase > 1.2:
-                                    breakout_score = min(100, (100 - position_in_range) * (volume_increase ** 0.5) * 10)
-                                    direction = "SHORT"
-                                else:
-                                    breakout_score = (100 - position_in_range) * 0.8
-                                    direction = "SHORT"
+                        # More lenient breakout detection - show any significant price position with volume
+                        if position_in_range > 80:  # In upper 20% of range
+                            if volume_increase > 1.2:  # Any volume increase
+                                breakout_score = min(100, position_in_range * (volume_increase ** 0.5) * 10)
+                                direction = "LONG"
                             else:
-                                # Middle of range - neutral
-                                direction = "NEUTRAL"
-                                breakout_score = 0
+                                # Still show but with lower score if no volume
+                                breakout_score = position_in_range * 0.8
+                                direction = "LONG"
+                        elif position_in_range < 20:  # In lower 20% of range  
+                            if volume_increase > 1.2:
+                                breakout_score = min(100, (100 - position_in_range) * (volume_increase ** 0.5) * 10)
+                                direction = "SHORT"
+                            else:
+                                breakout_score = (100 - position_in_range) * 0.8
+                                direction = "SHORT"
+                        else:
+                            # Middle of range - neutral
+                            direction = "NEUTRAL"
+                            breakout_score = 0
                             
-                            # Always show breakout data if score > 0 (even weak signals)
-                            if breakout_score > 0 or direction != "NEUTRAL":
-                                # Get 24h price change
-                                ticker_url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}"
-                                ticker_resp = await client.get(ticker_url)
-                                price_change_24h = 0
-                                if ticker_resp.status_code == 200:
-                                    price_change_24h = float(ticker_resp.json().get('priceChangePercent', 0))
+                        # Always show breakout data if score > 0 (even weak signals)
+                        if breakout_score > 0 or direction != "NEUTRAL":
+                            # Get 24h price change
+                            ticker_url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}"
+                            ticker_resp = await client.get(ticker_url)
+                            price_change_24h = 0
+                            if ticker_resp.status_code == 200:
+                                price_change_24h = float(ticker_resp.json().get('priceChangePercent', 0))
                                 
-                                # Build reason
-                                if volume_increase > 1.5:
-                                    reason = f"{direction} breakout with {volume_increase:.1f}x volume - Strong signal"
-                                elif volume_increase > 1.2:
-                                    reason = f"{direction} setup with {volume_increase:.1f}x volume - Moderate signal"
-                                else:
-                                    reason = f"{direction} position at {position_in_range:.1f}% of range - Watch for volume"
+                            # Build reason
+                            if volume_increase > 1.5:
+                                reason = f"{direction} breakout with {volume_increase:.1f}x volume - Strong signal"
+                            elif volume_increase > 1.2:
+                                reason = f"{direction} setup with {volume_increase:.1f}x volume - Moderate signal"
+                            else:
+                                reason = f"{direction} position at {position_in_range:.1f}% of range - Watch for volume"
                                 
-                                result["breakout"] = {
-                                    "symbol": symbol,
-                                    "current_price": current_price,
-                                    "breakout_score": breakout_score,
-                                    "direction": direction,
-                                    "price_change_24h": price_change_24h,
-                                    "volume_increase": volume_increase,
-                                    "position_in_range": position_in_range,
-                                    "reason": reason
-                                }
+                            result["breakout"] = {
+                                "symbol": symbol,
+                                "current_price": current_price,
+                                "breakout_score": breakout_score,
+                                "direction": direction,
+                                "price_change_24h": price_change_24h,
+                                "volume_increase": volume_increase,
+                                "position_in_range": position_in_range,
+                                "reason": reason
+                            }
             except Exception as e:
                 logger.warning(f"Breakout analysis failed for {symbol}: {e}")
             
@@ -2342,7 +2294,7 @@ async def get_reversal_scanner(
     try:
         results = []
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client.session(timeout=30.0) as client:
             # Get all USDT pairs
             exchange_info_url = "https://fapi.binance.com/fapi/v1/exchangeInfo"
             exchange_response = await client.get(exchange_info_url)
@@ -2431,25 +2383,22 @@ async def get_reversal_detection(symbol: str):
             "timestamp": time.time()
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client.session(timeout=30.0) as client:
             # Try futures first, then fall back to spot
             # Get 12h klines for comprehensive analysis (200 periods for 200 MA)
             
             # Try futures endpoint first (USDT-M)
-            klines_url_futures = f"https://fapi.binance.com/fapi/v1/klines?symbol={symbol}&interval=12h&limit=200"
-            klines_resp = await client.get(klines_url_futures)
+            klines = await _klines(symbol, '12h', 200, market='futures')
             
             # If futures fails, try spot
-            if klines_resp.status_code != 200:
+            if not klines:
                 logger.info(f"Futures endpoint failed for {symbol}, trying spot")
-                klines_url_spot = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval=12h&limit=200"
-                klines_resp = await client.get(klines_url_spot)
+                klines = await _klines(symbol, '12h', 200)
             
-            if klines_resp.status_code != 200:
+            if not klines:
                 logger.warning(f"Failed to fetch klines for {symbol} from both futures and spot")
                 return {"success": False, "error": "Failed to fetch price data"}
             
-            klines = klines_resp.json()
             if len(klines) < 50:
                 logger.warning(f"Insufficient data for {symbol}")
                 return {"success": False, "error": "Insufficient price data"}
@@ -0,0 +1,400 @@
+"""Vectorized backtest engine for QuickScalpStrategy + DryRunExecutor.
+
+The tools' bar loops call ``QuickScalpStrategy.decide`` and
+``DryRunExecutor.step`` once per bar. This module computes every indicator
+series the strategy uses (SMA, return volatility, ATR, momentum, HTF
+momentum, trend SMA, SR extremes and pivots) as NumPy arrays over the whole
+run, evaluates the flat-position entry rules as boolean masks in bulk, and
+only walks bars in a scalar loop where state is path dependent: while a
+position is open (partial reduces, targets, stops, holding time) and at the
+few bars where an entry is actually taken.
+
+Trades match the bar loop (same bars, directions, sizes, prices and PnL);
+``run_quickscalp`` takes the strategy and executor instances whose
+parameters it should mirror. numpy is optional; check ``available()``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np  # type: ignore
+    from numpy.lib.stride_tricks import sliding_window_view  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from .executor import DryRunExecutor, Position
+from .strategy import QuickScalpStrategy
+
+# windows up to this length are summed column by column in bar order, which
+# reproduces Python's left-to-right sum(); longer ones use a cumulative sum
+_SEQ_MAX = 64
+
+
+def available() -> bool:
+    """Return True when numpy is importable and the engine can run."""
+    return np is not None
+
+
+def _padded_windows(x, w: int, fill: float):
+    """(n, w) view whose row t holds x[t-w+1 .. t], front-padded with ``fill``."""
+    xp = np.concatenate([np.full(w - 1, fill, dtype=np.float64), x])
+    return sliding_window_view(xp, w)
+
+
+def _rolling_sum_count(x, w: int):
+    """Sum and count of the non-NaN values among the last ``w`` entries."""
+    valid = ~np.isnan(x)
+    x0 = np.where(valid, x, 0.0)
+    if w <= _SEQ_MAX:
+        win = _padded_windows(x0, w, 0.0)
+        s = np.zeros(len(x), dtype=np.float64)
+        for j in range(w):
+            s += win[:, j]
+    else:
+        cs = np.concatenate([[0.0], np.cumsum(x0)])
+        lo = np.maximum(np.arange(len(x)) - w + 1, 0)
+        s = cs[1:] - cs[lo]
+    cc = np.concatenate([[0], np.cumsum(valid)])
+    lo = np.maximum(np.arange(len(x)) - w + 1, 0)
+    return s, cc[1:] - cc[lo]
+
+
+def _rolling_mean(x, w: int):
+    s, cnt = _rolling_sum_count(x, w)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cnt > 0, s / np.maximum(cnt, 1), np.nan), cnt
+
+
+def _rolling_std(x, w: int):
+    """Sample std (ddof=1) of the non-NaN values among the last ``w`` entries."""
+    mean, cnt = _rolling_mean(x, w)
+    win = _padded_windows(x, w, np.nan)
+    ss = np.zeros(len(x), dtype=np.float64)
+    for j in range(w):
+        d = win[:, j] - mean
+        ss += np.where(np.isnan(d), 0.0, d * d)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cnt >= 2, np.sqrt(ss / np.maximum(cnt - 1, 1)), np.nan)
+
+
+def _width_extremes(c, max_width: int, fn):
+    """ext[m][i] = fn-reduce of c[i : i+m] for every width m <= max_width."""
+    ext = [None, c]
+    for m in range(2, max_width + 1):
+        ext.append(fn(ext[-1][:-1], c[m - 1:]))
+    return ext
+
+
+def _latest_pivots(c, lookback: int, radius: int, min_distance: int, prominence: float):
+    """Latest pivot high / low of the window ending at each bar (NaN if none).
+
+    Mirrors ``indicators.latest_pivots`` applied to c[t-lookback+1 .. t]:
+    within a window, offset j's neighbourhood is clipped to the window, so it
+    is the same for every bar, and the max / min of its left and right parts
+    are slices of precomputed fixed-width rolling extremes.
+    """
+    n = len(c)
+    hi_out = np.full(n, np.nan)
+    lo_out = np.full(n, np.nan)
+    if n < lookback or lookback < 2 or radius < 1:
+        return hi_out, lo_out
+    rows = n - lookback + 1
+    width = min(radius, lookback - 1)
+    emax = _width_extremes(c, width, np.maximum)
+    emin = _width_extremes(c, width, np.minimum)
+    last_hi_j = np.full(rows, -(10 ** 9))
+    last_lo_j = np.full(rows, -(10 ** 9))
+    last_hi = np.full(rows, np.nan)
+    last_lo = np.full(rows, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for j in range(lookback):
+            lo, hi = max(0, j - radius), min(lookback, j + radius + 1)
+            mx = mn = None
+            if lo < j:
+                mx, mn = emax[j - lo][lo:lo + rows], emin[j - lo][lo:lo + rows]
+            if j + 1 < hi:
+                rx, rn = emax[hi - j - 1][j + 1:j + 1 + rows], emin[hi - j - 1][j + 1:j + 1 + rows]
+                mx = rx if mx is None else np.maximum(mx, rx)
+                mn = rn if mn is None else np.minimum(mn, rn)
+            if mx is None:
+                continue
+            val = c[j:j + rows]
+            is_hi = (val > mx) & ((val - mx) / mx >= prominence) & (j - last_hi_j >= min_distance)
+            is_lo = (val < mn) & ((mn - val) / mn >= prominence) & (j - last_lo_j >= min_distance)
+            last_hi_j = np.where(is_hi, j, last_hi_j)
+            last_hi = np.where(is_hi, val, last_hi)
+            last_lo_j = np.where(is_lo, j, last_lo_j)
+            last_lo = np.where(is_lo, val, last_lo)
+    hi_out[lookback - 1:] = last_hi
+    lo_out[lookback - 1:] = last_lo
+    return hi_out, lo_out
+
+
+def quickscalp_signals(closes: Sequence[float], funding: Optional[Sequence[Optional[float]]],
+                       strat: QuickScalpStrategy) -> Dict[str, Any]:
+    """Indicator series and the flat-position entry signal for every bar.
+
+    ``entry`` is +1 (long), -1 (short) or 0 where ``decide`` with no position
+    and ``recent_closes = closes[:t+1]`` returns ``enter`` / something else.
+    """
+    if np is None:
+        raise ImportError('numpy is required for the backtest engine')
+    s = strat
+    c = np.asarray(closes, dtype=np.float64)
+    n = len(c)
+    L = np.arange(1, n + 1)
+    if funding is None:
+        fr = np.zeros(n)
+    else:
+        fr = np.array([0.0 if f is None else f for f in funding], dtype=np.float64)
+        fr = np.where(np.isnan(fr), 0.0, fr)
+
+    prev = np.concatenate([[np.nan], c[:-1]])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ret = np.where(prev != 0, (c - prev) / prev, np.nan)
+    ret[0] = np.nan
+
+    sma, sma_n = _rolling_mean(c, s.sma_window)
+    sma = np.where(sma_n >= 2, sma, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(sma == 0, 0.0, (c - sma) / sma)
+    eff = slope + s.funding_influence * fr
+    vol = _rolling_std(ret, s.vol_window)
+
+    full = L >= max(s.trend_window, s.sr_lookback, s.vol_window)
+    trend, trend_n = _rolling_mean(c, s.trend_window)
+    trend = np.where(full & (trend_n >= 2), trend, np.nan)
+    eps = 1e-6
+    trend_up = (trend != 0) & (c > trend * (1.0 + eps))
+    trend_down = (trend != 0) & (c < trend * (1.0 - eps))
+
+    atr_w = max(s.vol_window, 3)
+    atr_all, _ = _rolling_mean(np.abs(ret), atr_w)
+    atr_all = np.where(np.arange(n) >= 2, atr_all, np.nan)  # needs two return slots
+    atr = np.where(full, atr_all, np.nan)
+    mom, _ = _rolling_mean(ret, s.momentum_window)
+    mom = np.where(full, mom, np.nan)
+    htf12, _ = _rolling_mean(ret, s.htf_12h_bars)
+    htf12 = np.where(L >= s.htf_12h_bars + 1, htf12, np.nan)
+    htf24, _ = _rolling_mean(ret, s.htf_24h_bars)
+    htf24 = np.where(L >= s.htf_24h_bars + 1, htf24, np.nan)
+
+    sr_w = max(1, s.sr_lookback)
+    sr_high = np.max(_padded_windows(c, sr_w, -np.inf), axis=1)
+    sr_low = np.min(_padded_windows(c, sr_w, np.inf), axis=1)
+    piv_hi, piv_lo = _latest_pivots(c, s.sr_lookback, max(1, s.sr_lookback // 2),
+                                    s.pivot_min_distance, s.pivot_prominence_pct)
+    piv_hi = np.where(full, piv_hi, np.nan)
+    piv_lo = np.where(full, piv_lo, np.nan)
+
+    # --- entry rules with no open position -------------------------------------
+    long_ = eff > 0
+    ok = ~np.isnan(sma) & (np.abs(eff) >= s.entry_threshold)
+    if s.trend_filter:
+        ok &= ~(trend_up & ~long_) & ~(trend_down & long_)
+
+    # long-only momentum / higher-timeframe gates
+    blk = mom <= -abs(s.momentum_threshold)
+    has12 = ~np.isnan(htf12)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        htf_slope = np.where((L >= s.htf_12h_bars + 2) & (sma != 0), (c - sma) / sma, np.nan)
+    htf_vol = np.where(L >= s.htf_12h_bars + 2, vol, np.nan)
+    confirmed = (htf_vol <= s.htf_volatility_max) | (htf_slope <= s.htf_sma_slope_min)
+    blk |= has12 & ~(htf12 <= -abs(s.htf_momentum_threshold))
+    blk |= has12 & ~confirmed
+    blk |= has12 & (np.isnan(mom) | (mom <= s.short_momentum_min))
+    blk |= htf24 <= -abs(s.htf_momentum_threshold)
+    ok &= ~(long_ & blk)
+
+    # support / resistance gating: pivots when any was found, else window extremes
+    use_piv = ~np.isnan(piv_hi) | ~np.isnan(piv_lo)
+    r_high = np.where(use_piv, piv_hi, sr_high)
+    r_low = np.where(use_piv, piv_lo, sr_low)
+    gated = ~np.isnan(r_high) & ~np.isnan(r_low)
+    thr = s.sr_threshold_pct
+    lower_band = c * (1.0 - s.atr_multiplier * atr)
+    upper_band = c * (1.0 + s.atr_multiplier * atr)
+    near_support = (c <= r_low * (1.0 + thr)) | (c <= lower_band * (1.0 + thr))
+    near_resist = (c >= r_high * (1.0 - thr)) | (c >= upper_band * (1.0 - thr))
+    ok &= ~gated | np.where(long_, near_support, near_resist)
+
+    entry = np.where(ok, np.where(long_, 1, -1), 0).astype(np.int8)
+    return {
+        'close': c, 'sma': sma, 'vol': vol, 'atr': atr, 'atr_all': atr_all, 'momentum': mom,
+        'trend_sma': trend, 'htf12': htf12, 'htf24': htf24, 'pivot_high': piv_hi,
+        'pivot_low': piv_lo, 'entry': entry,
+    }
+
+
+@dataclass
+class BacktestResult:
+    closed: List[Position] = field(default_factory=list)
+    entries: List[int] = field(default_factory=list)  # bar index of each entry
+    exits: List[int] = field(default_factory=list)    # bar index of each close
+
+    @property
+    def total_pnl(self) -> float:
+        return sum(p.pnl for p in self.closed)
+
+
+def run_quickscalp(closes: Sequence[float], funding: Optional[Sequence[Optional[float]]] = None,
+                   strat: Optional[QuickScalpStrategy] = None, execer: Optional[DryRunExecutor] = None,
+                   symbol: str = 'BTC/USDT', timestamps: Optional[Sequence[float]] = None,
+                   sizing: str = 'vol', liquidate: bool = True) -> BacktestResult:
+    """Backtest ``strat`` on ``closes`` with ``execer``'s fee/slippage model.
+
+    ``sizing='vol'`` uses the decision's own size (``_size_by_vol``);
+    ``'risk'`` re-sizes entries with ``size_by_risk`` on the ungated ATR and
+    skips them when it returns None, as the walk-forward tools do. Trade
+    times are ``timestamps[t]`` (bar index when omitted).
+    """
+    if np is None:
+        raise ImportError('numpy is required for the backtest engine')
+    strat = strat or QuickScalpStrategy()
+    ex = execer or DryRunExecutor()
+    sig = quickscalp_signals(closes, funding, strat)
+    # plain lists: scalar indexing into numpy arrays is several times slower
+    c = sig['close'].tolist()
+    n = len(c)
+    sma_ok = (~np.isnan(sig['sma'])).tolist()
+    entry = sig['entry'].tolist()
+    vol = sig['vol'].tolist()
+    atr_all = sig['atr_all'].tolist()
+    cand = np.flatnonzero(sig['entry']).tolist()
+    ts = (lambda t: float(timestamps[t])) if timestamps is not None else float
+    slip = ex.slippage_bps
+    res = BacktestResult()
+
+    def _round(notional: float) -> float:
+        return ex._round_notional(notional)
+
+    def _realize(pos: Position, qty: float, exit_price: float) -> float:
+        # exit-side fee only, as in DryRunExecutor.step
+        if pos.direction == 'long':
+            gross = qty * (exit_price - pos.entry_price)
+        else:
+            gross = qty * (pos.entry_price - exit_price)
+        return gross - (qty * exit_price) * ex.exit_fee_rate
+
+    def _finish(pos: Position, exit_price: float, t: int) -> None:
+        pos.exit_price = exit_price
+        pos.exit_time = ts(t)
+        res.closed.append(pos)
+        res.exits.append(t)
+
+    pos: Optional[Position] = None
+    reduces = 0
+    bars_held = 0
+    t = 0
+    k = 0
+    while t < n:
+        if pos is None:
+            # jump to the next bar where decide() would enter
+            while k < len(cand) and cand[k] < t:
+                k += 1
+            if k >= len(cand):
+                break
+            t = cand[k]
+            price = c[t]
+            direction = 'long' if entry[t] > 0 else 'short'
+            if sizing == 'risk':
+                a = atr_all[t]
+                raw = strat.size_by_risk(price, None if a != a else a, direction)
+                if raw is None:
+                    t += 1
+                    continue
+            else:
+                v = vol[t]
+                raw = strat._size_by_vol(None if v != v else v)
+            size = _round(float(raw or 0))
+            if size < ex.min_notional:
+                t += 1
+                continue
+            exec_price = price + price * slip if direction == 'long' else price - price * slip
+            qty = size / exec_price if exec_price > 0 else 0.0
+            pos = Position(symbol=symbol, direction=direction, entry_price=exec_price,
+                           size=size, qty=qty, entry_time=ts(t))
+            res.entries.append(t)
+            reduces = 0
+            bars_held = 0
+            t += 1
+            continue
+
+        price = c[t]
+        if not sma_ok[t]:
+            bars_held += 1
+            t += 1
+            continue
+        if pos.direction == 'long':
+            pct = (price - pos.entry_price) / pos.entry_price
+        else:
+            pct = (pos.entry_price - price) / pos.entry_price
+        exit_price = price - price * slip if pos.direction == 'long' else price + price * slip
+        if pct >= strat.partial_target:
+            reduces += 1
+            if ex.max_partial_reduces and reduces > ex.max_partial_reduces:
+                pos.pnl = pos.pnl + _realize(pos, pos.qty, exit_price)
+                _finish(pos, exit_price, t)
+                pos = None
+            else:
+                close_qty = pos.qty * 0.5
+                realized = _realize(pos, close_qty, exit_price)
+                pos.qty -= close_qty
+                pos.size = pos.qty * pos.entry_price
+                pos.pnl += realized
+                if pos.qty <= 1e-12:
+                    _finish(pos, exit_price, t)
+                    pos = None
+        elif pct >= strat.exit_target or pct <= -strat.stop_loss or bars_held >= strat.max_holding_bars:
+            pos.pnl = pos.pnl + _realize(pos, pos.qty, exit_price)
+            _finish(pos, exit_price, t)
+            pos = None
+            bars_held = 0
+        else:
+            bars_held += 1
+        t += 1
+
+    if liquidate and pos is not None and n:
+        price = c[-1]
+        exit_price = price - price * slip if pos.direction == 'long' else price + price * slip
+        pos.pnl = pos.pnl + _realize(pos, pos.qty, exit_price)
+        _finish(pos, exit_price, n - 1)
+    return res
+
+
+def run_quickscalp_loop(closes: Sequence[float], funding: Optional[Sequence[Optional[float]]] = None,
+                        strat: Optional[QuickScalpStrategy] = None, execer: Optional[DryRunExecutor] = None,
+                        symbol: str = 'BTC/USDT', sizing: str = 'vol') -> List[Position]:
+    """Reference bar-by-bar loop (as in tools/backtest_quickscalp.py); returns
+    the executor's closed positions. Used for parity checks and benchmarks."""
+    strat = strat or QuickScalpStrategy()
+    execer = execer or DryRunExecutor()
+    funding = funding if funding is not None else [None] * len(closes)
+    recent: List[float] = []
+    bars_held = 0
+    for close, fr in zip(closes, funding):
+        recent.append(close)
+        position = execer.get_active().get(symbol)
+        decision = strat.decide(close, recent, fr, position=position, bars_held=bars_held)
+        if decision.action == 'enter':
+            if sizing == 'risk':
+                size = strat.size_by_risk(close, strat.compute_atr_like(recent), decision.direction)
+                if size is None:
+                    continue
+                decision.size = size
+            execer.step(symbol, close, decision)
+            bars_held = 0
+        elif decision.action in ('exit', 'reduce'):
+            execer.step(symbol, close, decision)
+            if decision.action == 'exit':
+                bars_held = 0
+        elif position is not None:
+            bars_held += 1
+    if len(closes):
+        execer.liquidate_all({symbol: closes[-1]})
+    return execer.closed
+
+
+__all__ = ['BacktestResult', 'available', 'quickscalp_signals', 'run_quickscalp', 'run_quickscalp_loop']
@@ -0,0 +1,154 @@
+"""Concurrent order-book fetch stage for the scanner's phase 2.
+
+Phase 2 used to walk the candidate list and call ``get_order_book`` for the
+buy and sell leg of every candidate in turn, so with REST-backed adapters
+(``CCXTExchange.get_order_book``) the scan took the *sum* of all fetch
+latencies and fetched the same (exchange, symbol) book once per candidate.
+
+``fetch_order_books`` takes the full list of (adapter, symbol) requests,
+dedupes them, and runs the unique fetches on a shared thread pool with a
+per-exchange concurrency cap and a single overall deadline. Callers then
+read every book (and compute every VWAP) from the returned snapshot, so a
+scan over N candidates costs roughly the slowest single fetch.
+
+A fetch is only handed to the pool once its exchange has a free slot, so a
+slow venue queues its own requests instead of parking pool workers, and the
+other venues keep the pool. Requests still queued at the deadline are
+dropped; a fetch that starts after it returns without calling the adapter.
+Fetches already running cannot be interrupted: their results are ignored,
+but they keep their exchange slot (also across scans) until they return.
+
+Tunables (environment):
+- ARB_BOOK_FETCH_WORKERS: shared pool size (default 32)
+- ARB_BOOK_FETCH_PER_EXCHANGE: concurrent fetches per exchange (default 4,
+  fixed the first time an exchange is seen)
+- ARB_BOOK_FETCH_DEADLINE_S: overall deadline per stage (default 3.0)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .utils.env import env_float
+
+BookResult = Tuple[Optional[dict], Optional[str]]
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+# exchange name -> (fetch slots, fetches in the pool); guarded by _SLOTS
+_LIMITS: Dict[str, int] = {}
+_IN_FLIGHT: Dict[str, int] = {}
+# notified whenever a fetch returns its exchange slot
+_SLOTS = threading.Condition()
+
+# stats from the most recent stage run (for /debug endpoints and logging)
+last_stats: Dict[str, float] = {}
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            workers = int(env_float('ARB_BOOK_FETCH_WORKERS', 32))
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='book-fetch')
+        return _EXECUTOR
+
+
+def _free_slot(exchange: str, limit: int) -> bool:
+    """Take a fetch slot for ``exchange`` if one is free (hold ``_SLOTS``)."""
+    cap = _LIMITS.setdefault(exchange, max(1, limit))
+    if _IN_FLIGHT.get(exchange, 0) >= cap:
+        return False
+    _IN_FLIGHT[exchange] = _IN_FLIGHT.get(exchange, 0) + 1
+    return True
+
+
+def _release_slot(exchange: str) -> None:
+    with _SLOTS:
+        _IN_FLIGHT[exchange] = max(0, _IN_FLIGHT.get(exchange, 0) - 1)
+        _SLOTS.notify_all()
+
+
+def fetch_order_books(
+    requests: List[Tuple[object, str]],
+    fetch: Callable[[object, str], BookResult],
+    *,
+    per_exchange_limit: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+) -> Dict[Tuple[int, str], BookResult]:
+    """Fetch the unique (adapter, symbol) books in ``requests`` concurrently.
+
+    - fetch: callable(adapter, symbol) -> (orderbook, used_symbol); it should
+      handle symbol variants itself (see ``scanner._try_order_book_for``)
+    - per_exchange_limit: max in-flight fetches per exchange name
+    - deadline_s: overall wall-clock budget; fetches still running (or still
+      waiting for their exchange slot) at the deadline resolve to (None, None)
+
+    Returns a mapping (id(adapter), symbol) -> (orderbook, used_symbol).
+    """
+    if per_exchange_limit is None:
+        per_exchange_limit = int(env_float('ARB_BOOK_FETCH_PER_EXCHANGE', 4))
+    if deadline_s is None:
+        deadline_s = env_float('ARB_BOOK_FETCH_DEADLINE_S', 3.0)
+
+    unique: Dict[Tuple[int, str], Tuple[object, str]] = {}
+    for obj, sym in requests:
+        unique.setdefault((id(obj), sym), (obj, sym))
+
+    results: Dict[Tuple[int, str], BookResult] = {key: (None, None) for key in unique}
+    if not unique:
+        return results
+
+    t0 = time.time()
+    deadline = t0 + deadline_s
+
+    def _task(obj: object, sym: str) -> BookResult:
+        if time.time() >= deadline:
+            return None, None
+        return fetch(obj, sym)
+
+    queued: Dict[str, Deque[Tuple[Tuple[int, str], object, str]]] = {}
+    for key, (obj, sym) in unique.items():
+        name = str(getattr(obj, 'name', id(obj))).lower()
+        queued.setdefault(name, deque()).append((key, obj, sym))
+
+    exe = _executor()
+    futures: Dict[Future, Tuple[int, str]] = {}
+    running = 0
+    with _SLOTS:
+        while True:
+            for name, items in queued.items():
+                while items and _free_slot(name, per_exchange_limit):
+                    key, obj, sym = items.popleft()
+                    fut = exe.submit(_task, obj, sym)
+                    futures[fut] = key
+                    fut.add_done_callback(lambda _f, n=name: _release_slot(n))
+            running = sum(1 for fut in futures if not fut.done())
+            remaining = deadline - time.time()
+            if (not running and not any(queued.values())) or remaining <= 0:
+                break
+            _SLOTS.wait(remaining)
+
+    completed = 0
+    for fut, key in futures.items():
+        if not fut.done():
+            continue
+        completed += 1
+        try:
+            results[key] = fut.result()
+        except Exception:
+            results[key] = (None, None)
+
+    last_stats.clear()
+    last_stats.update({
+        'requested': float(len(requests)),
+        'unique': float(len(unique)),
+        'completed': float(completed),
+        'timed_out': float(len(unique) - completed),
+        'never_started': float(sum(len(items) for items in queued.values())),
+        'elapsed_s': time.time() - t0,
+    })
+    return results
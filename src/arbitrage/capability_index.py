@@ -0,0 +1,302 @@
+"""Withdraw/deposit capability index consulted by the scanner.
+
+The scanner used to call ``supports_withdraw``/``supports_deposit`` on the
+adapters for every candidate pair, each call wrapped in a fresh
+ThreadPoolExecutor so a slow ``fetch_currencies`` could not stall the scan.
+This module replaces that with an index keyed by (exchange, base asset)
+that is compiled from data the process already holds in memory:
+
+- adapters' cached ``fetch_currencies`` maps (``CCXTExchange._currency_cache``,
+  ``MEXCExchange._currency_cache``), interpreted with the adapter's own
+  ``_currency_allows`` when available
+- status caches registered via ``register_status_source`` (web.py registers
+  its ``_deposit_withdraw_cache``)
+- exchange-wide ``withdraw_enabled``/``deposit_enabled`` flags (MockExchange)
+
+Lookups are O(1) dict hits and never perform I/O. A daemon thread refreshes
+the adapters' currency metadata on a schedule and resolves keys that were
+missing from every source by calling the adapter methods off the scan path.
+Those resolved answers expire after ``ARB_CAPABILITY_RESOLVED_TTL_S``
+(default: the refresh interval) and are then looked up again; a refresh
+also drops them once a source covers their key. Exchanges whose status was
+never loaded always fail open.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# status source: returns {exchange_name: {asset: {'withdraw': bool, 'deposit': bool, ...}}}
+StatusSource = Callable[[], Dict[str, Dict[str, dict]]]
+
+_STATUS_SOURCES: List[StatusSource] = []
+
+
+def register_status_source(fn: StatusSource) -> None:
+    """Register a callable returning an exchange -> asset -> flags mapping."""
+    if fn not in _STATUS_SOURCES:
+        _STATUS_SOURCES.append(fn)
+
+
+def normalize_exchange(name: str) -> str:
+    """Map adapter ids and display names ('Gate.io', 'gateio', 'gate') to one key."""
+    n = (name or '').strip().lower().replace('.io', '').replace(' ', '')
+    if n == 'gateio':
+        n = 'gate'
+    return n
+
+
+def base_asset(symbol: str) -> str:
+    """Return the upper-cased base asset of 'BASE/QUOTE', 'BASE-QUOTE' or 'BASE'."""
+    s = symbol or ''
+    if '/' in s:
+        s = s.split('/')[0]
+    elif '-' in s:
+        s = s.split('-')[0]
+    return s.upper()
+
+
+def _fail_open_default() -> bool:
+    return os.getenv('ARB_FAIL_OPEN_WITHDRAW', '1') != '0'
+
+
+def _adapter_flags(adapter: object) -> Optional[Dict[str, bool]]:
+    """Exchange-wide flags for adapters that model capabilities globally."""
+    if getattr(adapter, '_mock', False):
+        # MEXCExchange in mock mode reports everything as enabled
+        return {'withdraw': True, 'deposit': True}
+    if hasattr(adapter, 'withdraw_enabled') or hasattr(adapter, 'deposit_enabled'):
+        return {
+            'withdraw': bool(getattr(adapter, 'withdraw_enabled', True)),
+            'deposit': bool(getattr(adapter, 'deposit_enabled', True)),
+        }
+    return None
+
+
+class CapabilityIndex:
+    """In-memory (exchange, base) -> (withdraw, deposit) index.
+
+    ``track(exchanges)`` is called once per scan; it remembers the adapters
+    for background refreshes and compiles the index from in-memory caches the
+    first time it sees an exchange. ``allows()`` answers from the current
+    snapshot: True/False when known, otherwise (while the key is queued for
+    resolution) the ARB_FAIL_OPEN_WITHDRAW policy for exchanges whose
+    currency map is loaded and True for the others.
+    """
+
+    def __init__(self, refresh_interval: Optional[float] = None, resolved_ttl: Optional[float] = None):
+        if refresh_interval is None:
+            try:
+                refresh_interval = float(os.environ.get('ARB_CAPABILITY_REFRESH_S', '300'))
+            except Exception:
+                refresh_interval = 300.0
+        self.refresh_interval = refresh_interval
+        if resolved_ttl is None:
+            try:
+                resolved_ttl = float(os.environ.get('ARB_CAPABILITY_RESOLVED_TTL_S', str(refresh_interval)))
+            except Exception:
+                resolved_ttl = refresh_interval
+        self.resolved_ttl = resolved_ttl
+        # (exchange, BASE) -> {'withdraw': bool|None, 'deposit': bool|None}; entries the
+        # background worker resolved also carry '_resolved': the time they were resolved
+        self._entries: Dict[Tuple[str, str], Dict[str, Optional[bool]]] = {}
+        # exchange -> {'withdraw': bool, 'deposit': bool} for exchange-wide flags
+        self._flags: Dict[str, Dict[str, bool]] = {}
+        # exchanges whose currency map was loaded (misses there are real misses)
+        self._loaded: set = set()
+        self._adapters: Dict[str, object] = {}
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.built_ts: Optional[float] = None
+        self.refreshed_ts: Optional[float] = None
+
+    # -- scan-path API (no I/O) ------------------------------------------------
+    def track(self, exchanges: List[object]) -> None:
+        """Register the scan's adapters and make sure the index covers them."""
+        needs_rebuild = self.built_ts is None
+        for ex in exchanges:
+            key = normalize_exchange(getattr(ex, 'name', ''))
+            if not key or self._adapters.get(key) is ex:
+                continue
+            self._adapters[key] = ex
+            if isinstance(getattr(ex, '_currency_cache', None), dict):
+                needs_rebuild = True
+            else:
+                # cheap path for adapters recreated every tick (mocks): only
+                # their exchange-wide flags can change
+                flags = _adapter_flags(ex)
+                if flags is not None:
+                    with self._lock:
+                        self._flags = {**self._flags, key: flags}
+        if needs_rebuild:
+            self.rebuild()
+        self.start()
+
+    def allows(self, exchange: str, base: str, action: str) -> bool:
+        """Return whether `action` ('withdraw'/'deposit') is allowed for base on exchange."""
+        ex = normalize_exchange(exchange)
+        b = base_asset(base)
+        entry = self._entries.get((ex, b))
+        if entry is not None and not self._expired(entry):
+            v = entry.get(action)
+            if v is not None:
+                return v
+        flags = self._flags.get(ex)
+        if flags is not None and action in flags:
+            return flags[action]
+        if ex in self._adapters:
+            with self._lock:
+                self._pending.add((ex, b))
+            self._wake.set()
+        if ex in self._loaded:
+            return _fail_open_default()
+        # status never loaded for this exchange: fail open whatever the policy
+        return True
+
+    def _expired(self, entry: Dict[str, Optional[bool]]) -> bool:
+        resolved = entry.get('_resolved')
+        return bool(resolved) and time.time() - resolved >= self.resolved_ttl
+
+    def invalidate(self, exchange: Optional[str] = None) -> None:
+        """Forget resolved answers (for one exchange, or all) so they are looked up again."""
+        ex = normalize_exchange(exchange) if exchange else None
+        with self._lock:
+            self._entries = {key: val for key, val in self._entries.items()
+                             if not (val.get('_resolved') and (ex is None or key[0] == ex))}
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, Optional[bool]]]:
+        return dict(self._entries)
+
+    # -- compilation ------------------------------------------------------------
+    def rebuild(self) -> None:
+        """Recompile the index from in-memory caches only; swaps atomically."""
+        entries: Dict[Tuple[str, str], Dict[str, Optional[bool]]] = {}
+        flags: Dict[str, Dict[str, bool]] = {}
+        loaded: set = set()
+
+        # registered status caches first so adapter data overrides them
+        for src in list(_STATUS_SOURCES):
+            try:
+                data = src() or {}
+            except Exception:
+                continue
+            for ex_name, assets in list(data.items()):
+                ex = normalize_exchange(ex_name)
+                if not isinstance(assets, dict):
+                    continue
+                for asset, st in list(assets.items()):
+                    if not isinstance(st, dict):
+                        continue
+                    entries[(ex, base_asset(asset))] = {
+                        'withdraw': None if st.get('withdraw') is None else bool(st.get('withdraw')),
+                        'deposit': None if st.get('deposit') is None else bool(st.get('deposit')),
+                    }
+
+        for ex, adapter in list(self._adapters.items()):
+            ex_flags = _adapter_flags(adapter)
+            if ex_flags is not None:
+                flags[ex] = ex_flags
+            cur = getattr(adapter, '_currency_cache', None)
+            if not isinstance(cur, dict) or not cur:
+                continue
+            loaded.add(ex)
+            interpret = getattr(adapter, '_currency_allows', None)
+            for code, entry in list(cur.items()):
+                if not isinstance(entry, dict):
+                    continue
+                try:
+                    if callable(interpret):
+                        w = bool(interpret(entry, 'withdraw'))
+                        d = bool(interpret(entry, 'deposit'))
+                    else:
+                        w = bool(entry.get('withdraw', True))
+                        d = bool(entry.get('deposit', True))
+                except Exception:
+                    continue
+                entries[(ex, str(code).upper())] = {'withdraw': w, 'deposit': d}
+
+        with self._lock:
+            # keep unexpired keys resolved by the background worker that no source covers
+            for key, val in self._entries.items():
+                if key not in entries and val.get('_resolved') and not self._expired(val):
+                    entries[key] = val
+            self._entries = entries
+            self._flags = flags
+            self._loaded = loaded
+            self.built_ts = time.time()
+
+    # -- background refresh -----------------------------------------------------
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='capability-index', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._wake.set()
+
+    def refresh(self) -> None:
+        """Refresh adapters' currency metadata (network) and recompile."""
+        for adapter in list(self._adapters.values()):
+            prewarm = getattr(adapter, 'prewarm_currency_metadata', None)
+            if callable(prewarm):
+                try:
+                    prewarm()
+                except Exception:
+                    pass
+        self.rebuild()
+        self.refreshed_ts = time.time()
+
+    def _resolve_pending(self) -> None:
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for ex, base in pending:
+            adapter = self._adapters.get(ex)
+            if adapter is None:
+                continue
+            resolved: Dict[str, Optional[bool]] = {'withdraw': None, 'deposit': None}
+            for action in ('withdraw', 'deposit'):
+                meth = getattr(adapter, f'supports_{action}', None)
+                if not callable(meth):
+                    continue
+                try:
+                    resolved[action] = bool(meth(base))
+                except Exception:
+                    resolved[action] = None
+            resolved['_resolved'] = time.time()
+            with self._lock:
+                entries = dict(self._entries)
+                entries[(ex, base)] = resolved
+                self._entries = entries
+
+    def _run(self) -> None:
+        last_refresh = self.refreshed_ts or 0.0
+        while self._running:
+            try:
+                if time.time() - last_refresh >= self.refresh_interval:
+                    self.refresh()
+                    last_refresh = time.time()
+                self._resolve_pending()
+            except Exception:
+                pass
+            self._wake.wait(timeout=1.0)
+            self._wake.clear()
+
+
+_INDEX: Optional[CapabilityIndex] = None
+
+
+def get_capability_index() -> CapabilityIndex:
+    """Return the process-wide capability index (created on first use)."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = CapabilityIndex()
+    return _INDEX
@@ -3,32 +3,67 @@ from __future__ import annotations
 import asyncio
 import json
 import time
-import threading
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 try:
     import websockets
 except Exception:
     websockets = None
 
+from . import recorder
+from .feeder_runtime import FeederHandle, run_blocking, spawn_feeder
+from .book_events import get_bus
+from .symbol_registry import canonical
+from .l2_book import APPLIED, GAP, BookViews, L2Book
+from ..utils import http_client as _http
+
+
+def _int_or_none(v) -> Optional[int]:
+    try:
+        return None if v is None else int(v)
+    except Exception:
+        return None
+
+
 class BinanceDepthFeeder:
-    """Feeder that maintains a lightweight L2 snapshot for Binance symbols.
+    """Feeder that maintains local L2 books for Binance symbols.
+
+    It subscribes to the combined ``@depth@100ms`` diff streams and keeps a
+    proper local book per symbol, following Binance's documented procedure:
+
+    - diffs are buffered per symbol until a REST snapshot
+      (``/api/v3/depth``) has been loaded
+    - buffered diffs with ``u <= lastUpdateId`` are dropped; the first one
+      applied must straddle ``lastUpdateId + 1``
+    - afterwards every diff must continue from the previous ``u``; a gap
+      clears the book and triggers a resync from a fresh snapshot
 
-    It subscribes to the combined depth streams (e.g. symbol@depth) and
-    updates an in-memory orderbook. For simplicity it treats incoming
-    depth update messages as full snapshots for the symbol's top of book.
-    This is sufficient to provide fast approximate VWAP and available notional
-    for scanner candidate validation.
+    Levels live in an incremental ``L2Book`` ladder, so the scanner's VWAP
+    and hotcoins depth estimates see real depth without per-message sorts.
+    A symbol's book reads as empty while it is (re)syncing.
     """
 
+    # REST snapshot depth; Binance charges 50 weight per request at 1000 levels
+    SNAPSHOT_LIMIT = 1000
+    SNAPSHOT_WEIGHT = 50
+    # gap between the snapshots of a full resync (after a reconnect): one
+    # per second is 50 weight/s, half of the spot budget
+    RESYNC_SPACING_S = 1.0
+    # cap on diffs buffered per symbol while a snapshot is in flight
+    MAX_BUFFERED = 2000
+
     def __init__(self, symbols: List[str]):
         # store normalized symbol names (e.g. BTCUSDT)
         self.symbols = [s.upper().replace('/', '').replace('-', '') for s in symbols]
-        self._books: Dict[str, Dict[str, List]] = {}
+        self._l2: Dict[str, L2Book] = {}
+        # read-only {'asks','bids','timestamp'} views over _l2 (top 200 levels)
+        self._books = BookViews(self._l2, depth=200)
+        # symbols waiting for a snapshot, with the diffs received meanwhile
+        self._pending: Dict[str, List[dict]] = {}
+        self.resync_count = 0
         self._ts = 0.0
         self._running = False
-        self._thread: threading.Thread | None = None
-        self._loop = None
+        self._handle: Optional[FeederHandle] = None
 
     def start(self):
         if websockets is None:
@@ -36,84 +71,170 @@ class BinanceDepthFeeder:
         if self._running:
             return
         self._running = True
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        # hosted as a task on the shared feeder loop (see feeder_runtime)
+        self._handle = spawn_feeder('binance-depth', self._ws_main)
 
     def stop(self):
         self._running = False
         try:
-            if self._thread is not None:
-                self._thread.join(timeout=2.0)
+            if self._handle is not None:
+                self._handle.stop(timeout=2.0)
         except Exception:
             pass
 
-    def _run_loop(self):
-        self._loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self._loop)
+    # -- book synchronisation -----------------------------------------------------
+    def _book(self, sym: str) -> L2Book:
+        book = self._l2.get(sym)
+        if book is None:
+            book = L2Book(sym, max_levels=self.SNAPSHOT_LIMIT)
+            self._l2[sym] = book
+        return book
+
+    def _mark_unsynced(self, sym: str) -> None:
+        """Clear the symbol's book and start buffering diffs for a resync."""
+        self._book(sym).clear()
+        self._pending.setdefault(sym, [])
+
+    def _handle_event(self, data: dict) -> Optional[str]:
+        """Apply or buffer one depth diff; return the symbol if it needs a snapshot."""
+        sym = (data.get('s') or '').upper()
+        if not sym:
+            return None
+        pending = self._pending.get(sym)
+        if pending is not None:
+            pending.append(data)
+            if len(pending) > self.MAX_BUFFERED:
+                del pending[:len(pending) - self.MAX_BUFFERED]
+            return None
+        book = self._book(sym)
+        if not book.seq:
+            # never synced (e.g. symbol not in the subscription list)
+            self._mark_unsynced(sym)
+            self._pending[sym].append(data)
+            return sym
+        status = book.apply_diff(
+            data.get('a') or [],
+            data.get('b') or [],
+            first_seq=_int_or_none(data.get('U')),
+            last_seq=_int_or_none(data.get('u')),
+        )
+        if status == GAP:
+            self.resync_count += 1
+            self._mark_unsynced(sym)
+            self._pending[sym].append(data)
+            return sym
+        if status == APPLIED:
+            self._ts = book.timestamp or recorder.now()
+            get_bus().publish_book('binance', book)
+        return None
+
+    def _install_snapshot(self, sym: str, snapshot: dict) -> bool:
+        """Load a REST snapshot and replay buffered diffs.
+
+        Returns False when the snapshot is older than the first buffered diff
+        (a gap between them), in which case the caller should fetch again.
+        """
         try:
-            self._loop.run_until_complete(self._ws_main())
+            last_id = int(snapshot.get('lastUpdateId'))
         except Exception:
-            pass
+            return False
+        pending = [ev for ev in self._pending.get(sym, []) if (_int_or_none(ev.get('u')) or 0) > last_id]
+        book = self._book(sym)
+        book.load_snapshot(snapshot.get('asks') or [], snapshot.get('bids') or [], seq=last_id)
+        for ev in pending:
+            status = book.apply_diff(
+                ev.get('a') or [],
+                ev.get('b') or [],
+                first_seq=_int_or_none(ev.get('U')),
+                last_seq=_int_or_none(ev.get('u')),
+            )
+            if status == GAP:
+                book.clear()
+                self._pending[sym] = pending
+                return False
+        self._pending.pop(sym, None)
+        self._ts = book.timestamp or recorder.now()
+        get_bus().publish_book('binance', book)
+        return True
+
+    def _fetch_snapshot(self, sym: str) -> Optional[dict]:
+        # charged to the shared api.binance.com rate limiter
+        try:
+            resp = _http.request_sync('GET', 'https://api.binance.com/api/v3/depth',
+                                      params={'symbol': sym, 'limit': self.SNAPSHOT_LIMIT},
+                                      headers={'User-Agent': 'arb-binance-feeder/1.0'},
+                                      timeout=5, weight=self.SNAPSHOT_WEIGHT)
+            if not (200 <= resp.status_code < 300):
+                return None
+            return resp.json()
+        except Exception:
+            return None
+
+    async def _sync_symbol(self, sym: str, delay: float = 0.0) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        backoff = 0.5
+        while self._running and sym in self._pending:
+            snap = await run_blocking(self._fetch_snapshot, sym)
+            if snap and self._install_snapshot(sym, snap):
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
 
     async def _ws_main(self):
         streams = '/'.join([f"{s.lower()}@depth@100ms" for s in self.symbols])
         uri = f"wss://stream.binance.com:9443/stream?streams={streams}"
-        try:
-            async with websockets.connect(uri, max_size=None) as ws:
-                while self._running:
-                    try:
-                        msg = await asyncio.wait_for(ws.recv(), timeout=1.0)
-                    except asyncio.TimeoutError:
-                        continue
-                    try:
-                        obj = json.loads(msg)
-                        data = obj.get('data', {})
-                        sym = (data.get('s') or '').upper()
-                        asks = data.get('a') or []
-                        bids = data.get('b') or []
-                        ts = time.time()
-                        if sym:
-                            # convert asks/bids into [(price,size), ...]
-                            a_list = []
-                            b_list = []
-                            for a in asks:
-                                try:
-                                    p = float(a[0])
-                                    q = float(a[1])
-                                    a_list.append((p, q))
-                                except Exception:
-                                    continue
-                            for b in bids:
-                                try:
-                                    p = float(b[0])
-                                    q = float(b[1])
-                                    b_list.append((p, q))
-                                except Exception:
-                                    continue
-                            # sort asks ascending and bids descending
-                            a_list = sorted(a_list, key=lambda x: x[0])
-                            b_list = sorted(b_list, key=lambda x: x[0], reverse=True)
-                            self._books[sym] = {'asks': a_list, 'bids': b_list, 'timestamp': ts}
-                            self._ts = ts
-                    except Exception:
-                        continue
-        except Exception:
-            return
+        backoff = 1.0
+        while self._running:
+            syncing: Dict[str, asyncio.Task] = {}
+
+            def _schedule(sym: str, delay: float = 0.0) -> None:
+                task = syncing.get(sym)
+                if task is None or task.done():
+                    syncing[sym] = asyncio.create_task(self._sync_symbol(sym, delay))
+
+            try:
+                async with recorder.connect('binance-depth', uri, max_size=None) as ws:
+                    backoff = 1.0
+                    # books from a previous connection missed diffs: resync
+                    # all, staggered so the snapshots do not land as one burst
+                    for i, sym in enumerate(self.symbols):
+                        self._mark_unsynced(sym)
+                        _schedule(sym, i * self.RESYNC_SPACING_S)
+                    while self._running:
+                        try:
+                            msg = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        try:
+                            obj = json.loads(msg)
+                            need = self._handle_event(obj.get('data', {}))
+                            if need:
+                                _schedule(need)
+                        except Exception:
+                            continue
+            except Exception:
+                pass
+            finally:
+                for task in syncing.values():
+                    task.cancel()
+            if not self._running:
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
 
     def get_order_book(self, symbol: str, depth: int = 10) -> dict:
         # Accept 'BASE/QUOTE' or 'BASE-QUOTE' or 'BASEQUOTE' forms
         key = symbol.upper().replace('/', '').replace('-', '')
-        b = self._books.get(key)
-        if not b:
+        book = self._l2.get(key)
+        if book is None:
             return {'asks': [], 'bids': []}
-        asks = b.get('asks', [])[:depth]
-        bids = b.get('bids', [])[:depth]
-        return {'asks': asks, 'bids': bids}
+        return book.order_book(depth)
 
     def get_tickers(self) -> Dict[str, Any]:
         # provide ticker-like last prices derived from top of book
         out = {}
-        for key, v in self._books.items():
+        for key, v in list(self._books.items()):
             try:
                 asks = v.get('asks', [])
                 bids = v.get('bids', [])
@@ -124,20 +245,8 @@ class BinanceDepthFeeder:
                     last = asks[0][0]
                 if last is None:
                     continue
-                # format symbol back to BASE/QUOTE
-                s = key
-                common_quotes = ['USDT', 'USDC', 'BUSD', 'BTC', 'ETH', 'USD']
-                quote = None
-                base = None
-                for q in common_quotes:
-                    if s.endswith(q) and len(s) > len(q):
-                        quote = q
-                        base = s[:-len(q)]
-                        break
-                if quote is None:
-                    quote = s[-3:]
-                    base = s[:-3]
-                symbol_std = f"{base}/{quote}"
+                # BTCUSDT -> BTC/USDT (resolved once per symbol by the registry)
+                symbol_std = canonical(key, 'binance')
                 out[symbol_std] = {'last': last, 'timestamp': v.get('timestamp')}
             except Exception:
                 continue
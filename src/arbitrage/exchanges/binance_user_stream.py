@@ -0,0 +1,530 @@
+"""Binance USD-M futures user data stream and the account mirror it keeps.
+
+The dashboard used to learn about the account by polling: ``api_dashboard``
+reconciled positions through ``fetch_positions`` at most once a minute, and
+balance and positions sat behind 2-5s REST caches, so between polls it
+showed stale state and every poll cost heavy endpoint weight.
+``BinanceUserStream`` instead keeps an ``AccountMirror`` current from the
+account's private stream:
+
+- a listenKey from ``POST /fapi/v1/listenKey``, renewed with ``PUT`` every
+  ``ARB_USER_STREAM_KEEPALIVE_S`` (default 1800s; keys expire after 60min)
+- ``ACCOUNT_UPDATE`` replaces the balances and per-side positions it
+  carries, ``ORDER_TRADE_UPDATE`` maintains open orders and recent fills, and
+  ``ACCOUNT_CONFIG_UPDATE`` the per-symbol leverage
+- REST reconciliation (``GET /fapi/v2/account``, weight 5) runs when the
+  stream (re)connects; buffered events older than the snapshot are skipped,
+  newer ones apply on top of it
+- ``ACCOUNT_UPDATE`` only fires when a balance or position changes, so
+  position uPnL (and with it the balance total) is recomputed from the kline
+  store's ``markPrice@1s`` stream for the symbols with open positions
+- ``availableBalance`` is not pushed at all; it is derived from the stream as
+  cross wallet + cross uPnL - cross position initial margin (notional at the
+  mark / leverage), anchored to the last REST snapshot so that what the
+  formula leaves out (open order margin, other assets) carries over. No REST
+  poll runs between reconnects
+- ``listenKeyExpired`` or a dropped socket reconnects with a fresh key
+
+The socket is opened with ``websockets.connect``, not ``recorder.connect``:
+it carries private account data and the listenKey in its url, which must not
+end up in market data recordings, and a replay has nothing to serve it (its
+REST calls are signed and not recorded).
+
+Readers get views the mirror rebuilds on each update, shaped like the REST
+helpers they replace (ccxt-style positions, the balance dict of
+``_get_binance_futures_balance``). Use them while ``synced`` is true and fall
+back to REST otherwise.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from urllib import parse as _urllib_parse
+
+try:
+    import websockets
+except Exception:  # pragma: no cover - optional dependency
+    websockets = None
+
+from ..utils import http_client as _http
+from ..utils.env import env_float
+from .feeder_runtime import FeederHandle, spawn_feeder
+
+REST_BASE = 'https://fapi.binance.com'
+WS_BASE = 'wss://fstream.binance.com/ws/'
+
+
+def _f(v, default: float = 0.0) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+def unified_symbol(symbol: str) -> str:
+    """BTCUSDT -> BTC/USDT:USDT (ccxt linear futures symbol)."""
+    for quote in ('USDT', 'USDC', 'BUSD'):
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return f'{symbol[:-len(quote)]}/{quote}:{quote}'
+    return symbol
+
+
+class AccountMirror:
+    """In-memory futures account state built from REST snapshots and stream events."""
+
+    FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+
+    def __init__(self, quote: str = 'USDT'):
+        self.quote = quote
+        self._lock = threading.Lock()
+        self.balances: Dict[str, Dict[str, float]] = {}
+        # (symbol, positionSide) -> position fields; flat positions are dropped
+        self.positions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.fills: deque = deque(maxlen=200)
+        self.leverage: Dict[str, int] = {}
+        # availableBalance of the last snapshot, and what the stream formula missed then
+        self.available: Optional[float] = None
+        self.available_offset = 0.0
+        # symbol -> (mark price, event ms) from the mark price stream
+        self.marks: Dict[str, Tuple[float, float]] = {}
+        self.updated_ms = 0
+        # newest change reflected in the last REST snapshot; older events are stale
+        self.snapshot_ms = 0
+        self.stale_events = 0
+        self.version = 0
+        self._positions_view: List[Dict[str, Any]] = []
+        self._balance_view: Dict[str, Any] = {'success': False, 'error': 'not synced', 'balance': 0.0, 'available': 0.0}
+
+    # -- writers -------------------------------------------------------------------------
+    def load_account(self, account: Dict[str, Any], open_orders: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Replace the state with a ``GET /fapi/v2/account`` (and openOrders) snapshot."""
+        with self._lock:
+            self.balances = {
+                a['asset']: {'wallet_balance': _f(a.get('walletBalance')),
+                             'cross_wallet': _f(a.get('crossWalletBalance', a.get('walletBalance'))),
+                             'unrealized_pnl': _f(a.get('unrealizedProfit')),
+                             'available': _f(a.get('availableBalance'))}
+                for a in account.get('assets') or [] if a.get('asset')
+            }
+            self.positions = {}
+            for p in account.get('positions') or []:
+                if p.get('leverage'):
+                    self.leverage[p['symbol']] = int(_f(p['leverage'], 1))
+                self._set_position(p['symbol'], p.get('positionSide') or 'BOTH', _f(p.get('positionAmt')),
+                                   _f(p.get('entryPrice')), _f(p.get('unrealizedProfit')),
+                                   'isolated' if p.get('isolated') else 'cross')
+            self.snapshot_ms = _snapshot_ms(account)
+            self._mark_pnl()
+            # not carried by ACCOUNT_UPDATE: derived from the stream, anchored here
+            self.available = _f(account['availableBalance']) if 'availableBalance' in account else None
+            bal = self.balances.get(self.quote)
+            derived = self._derived_available(bal) if bal is not None else None
+            self.available_offset = self.available - derived if self.available is not None and derived is not None else 0.0
+            if open_orders is not None:
+                self.orders = {}
+                for o in open_orders:
+                    self._put_order(str(o.get('orderId')), o.get('symbol'), o.get('side'), o.get('type'),
+                                    o.get('status'), o.get('price'), o.get('origQty'), o.get('executedQty'),
+                                    o.get('avgPrice'), o.get('positionSide'), o.get('stopPrice'),
+                                    o.get('updateTime') or o.get('time'))
+            self.updated_ms = int(account.get('updateTime') or time.time() * 1000)
+            self._rebuild()
+
+    def apply_mark(self, symbol: str, price: float, ts_ms: Optional[float] = None) -> bool:
+        """Revalue the positions in ``symbol`` at a new mark price."""
+        with self._lock:
+            self.marks[symbol] = (price, ts_ms or time.time() * 1000)
+            changed = False
+            for pos in self.positions.values():
+                if pos['symbol'] == symbol:
+                    pos['unrealized_pnl'] = pos['amount'] * (price - pos['entry_price'])
+                    changed = True
+            if changed:
+                self._rebuild()
+            return changed
+
+    def _fresh_mark(self, symbol: str, max_age_s: float = 10.0) -> bool:
+        m = self.marks.get(symbol)
+        return m is not None and time.time() * 1000 - m[1] <= max_age_s * 1000
+
+    def _derived_available(self, bal: Dict[str, float]) -> Optional[float]:
+        """Cross wallet + cross uPnL - cross initial margin; None while a leverage is unknown."""
+        available = bal['cross_wallet']
+        for p in self.positions.values():
+            if not p['symbol'].endswith(self.quote) or p['margin_type'] != 'cross':
+                continue
+            leverage = self.leverage.get(p['symbol'])
+            if not leverage:
+                return None
+            mark = p['entry_price'] + p['unrealized_pnl'] / p['amount']
+            available += p['unrealized_pnl'] - abs(p['amount']) * mark / leverage
+        return available
+
+    def _mark_pnl(self) -> None:
+        for pos in self.positions.values():
+            if self._fresh_mark(pos['symbol']):
+                pos['unrealized_pnl'] = pos['amount'] * (self.marks[pos['symbol']][0] - pos['entry_price'])
+
+    def note_leverage(self, symbol: str, leverage: int) -> None:
+        """Record a leverage this process just set (the stream confirms it later)."""
+        with self._lock:
+            self.leverage[symbol] = int(leverage)
+            self._rebuild()
+
+    def position_symbols(self) -> List[str]:
+        with self._lock:
+            return sorted({p['symbol'] for p in self.positions.values()})
+
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """Apply one stream event; returns True when it changed the mirror.
+
+        Account and order events older than the last REST snapshot (buffered
+        while it loaded) are skipped; fills are still recorded.
+        """
+        kind = event.get('e')
+        with self._lock:
+            stale = bool(self.snapshot_ms) and _f(event.get('E')) < self.snapshot_ms
+            if stale and kind in ('ACCOUNT_UPDATE', 'ACCOUNT_CONFIG_UPDATE'):
+                self.stale_events += 1
+                return False
+            if kind == 'ACCOUNT_UPDATE':
+                a = event.get('a') or {}
+                for b in a.get('B') or []:
+                    bal = self.balances.setdefault(b['a'], {'wallet_balance': 0.0, 'cross_wallet': 0.0,
+                                                            'unrealized_pnl': 0.0, 'available': 0.0})
+                    bal['wallet_balance'] = _f(b.get('wb'))
+                    bal['cross_wallet'] = _f(b.get('cw'), bal['wallet_balance'])
+                for p in a.get('P') or []:
+                    self._set_position(p['s'], p.get('ps') or 'BOTH', _f(p.get('pa')), _f(p.get('ep')),
+                                       _f(p.get('up')), p.get('mt') or 'cross')
+                self._mark_pnl()
+            elif kind == 'ORDER_TRADE_UPDATE':
+                o = event.get('o') or {}
+                oid = str(o.get('i'))
+                status = o.get('X')
+                order = self._make_order(oid, o.get('s'), o.get('S'), o.get('o'), status, o.get('p'), o.get('q'),
+                                         o.get('z'), o.get('ap'), o.get('ps'), o.get('sp'), o.get('T') or event.get('E'))
+                if o.get('x') == 'TRADE':
+                    self.fills.append({**order, 'last_qty': _f(o.get('l')), 'last_price': _f(o.get('L')),
+                                       'commission': _f(o.get('n')), 'commission_asset': o.get('N'),
+                                       'realized_pnl': _f(o.get('rp')), 'maker': bool(o.get('m'))})
+                if stale:
+                    self.stale_events += 1
+                elif status in self.FINAL_STATUSES:
+                    self.orders.pop(oid, None)
+                else:
+                    self.orders[oid] = order
+            elif kind == 'ACCOUNT_CONFIG_UPDATE':
+                ac = event.get('ac') or {}
+                if ac.get('s'):
+                    self.leverage[ac['s']] = int(_f(ac.get('l'), 1))
+            else:
+                return False
+            self.updated_ms = int(event.get('E') or time.time() * 1000)
+            self._rebuild()
+        return True
+
+    def _set_position(self, symbol: str, side: str, amount: float, entry: float, upnl: float, margin: str) -> None:
+        key = (symbol, side)
+        if amount == 0:
+            self.positions.pop(key, None)
+            return
+        self.positions[key] = {'symbol': symbol, 'position_side': side, 'amount': amount, 'entry_price': entry,
+                               'unrealized_pnl': upnl, 'margin_type': margin}
+
+    def _put_order(self, *args) -> Dict[str, Any]:
+        order = self._make_order(*args)
+        self.orders[order['id']] = order
+        return order
+
+    @staticmethod
+    def _make_order(oid, symbol, side, type_, status, price, qty, filled, avg, pos_side, stop, ts) -> Dict[str, Any]:
+        order = {'id': oid, 'symbol': symbol, 'side': (side or '').lower(), 'type': (type_ or '').lower(),
+                 'status': status, 'price': _f(price), 'amount': _f(qty), 'filled': _f(filled),
+                 'average': _f(avg), 'position_side': pos_side, 'stop_price': _f(stop), 'timestamp': ts}
+        order['remaining'] = max(0.0, order['amount'] - order['filled'])
+        return order
+
+    def _rebuild(self) -> None:
+        self.version += 1
+        views = []
+        for (symbol, ps), p in sorted(self.positions.items()):
+            amt = p['amount']
+            side = ps.lower() if ps in ('LONG', 'SHORT') else ('long' if amt > 0 else 'short')
+            views.append({
+                'symbol': unified_symbol(symbol),
+                'id': symbol,
+                'side': side,
+                'contracts': abs(amt),
+                'entryPrice': p['entry_price'],
+                'unrealizedPnl': p['unrealized_pnl'],
+                'leverage': self.leverage.get(symbol),
+                'marginMode': p['margin_type'],
+                'info': {'symbol': symbol, 'positionSide': ps, 'positionAmt': str(amt)},
+            })
+        self._positions_view = views
+        bal = self.balances.get(self.quote)
+        if bal is None:
+            self._balance_view = {'success': False, 'error': f'no {self.quote} balance', 'balance': 0.0, 'available': 0.0}
+            return
+        upnl = sum(p['unrealized_pnl'] for p in self.positions.values() if p['symbol'].endswith(self.quote))
+        wallet = bal['wallet_balance']
+        total = wallet + upnl
+        derived = self._derived_available(bal)
+        if derived is not None:
+            available = max(0.0, derived + self.available_offset)
+        else:
+            available = self.available if self.available is not None else bal.get('available') or bal['cross_wallet']
+        self._balance_view = {
+            'success': True,
+            'balance': total,
+            'wallet_balance': wallet,
+            'unrealized_pnl': upnl,
+            'available': available,
+            'available_source': 'stream' if derived is not None else 'snapshot',
+            'used': max(0.0, total - available),
+            'currency': self.quote,
+            'source': 'user_stream',
+        }
+
+    # -- readers (prebuilt views, no locking) -------------------------------------------
+    def positions_list(self) -> List[Dict[str, Any]]:
+        """Open positions in ccxt ``fetch_positions`` layout (non-zero only)."""
+        return self._positions_view
+
+    def balance_info(self) -> Dict[str, Any]:
+        """Same keys as ``_get_binance_futures_balance()``."""
+        return self._balance_view
+
+    def open_orders(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.orders.values())
+
+    def recent_fills(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.fills)[-limit:]
+
+
+def _snapshot_ms(account: Dict[str, Any]) -> int:
+    """Newest ``updateTime`` in an account snapshot: the last change it reflects."""
+    times = [account.get('updateTime')]
+    times += [a.get('updateTime') for a in account.get('assets') or []]
+    times += [p.get('updateTime') for p in account.get('positions') or []]
+    return int(max((_f(t) for t in times if t), default=0))
+
+
+def _sign(params: Dict[str, Any], secret: str) -> Dict[str, Any]:
+    query = _urllib_parse.urlencode(params)
+    return {**params, 'signature': hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()}
+
+
+class BinanceUserStream:
+    """Feeder that keeps an ``AccountMirror`` current from the futures user data stream."""
+
+    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 mirror: Optional[AccountMirror] = None, keepalive_s: Optional[float] = None):
+        self.api_key = api_key if api_key is not None else os.environ.get('BINANCE_API_KEY', '')
+        self.api_secret = api_secret if api_secret is not None else os.environ.get('BINANCE_API_SECRET', '')
+        self.mirror = mirror or AccountMirror()
+        self.keepalive_s = keepalive_s if keepalive_s is not None else env_float('ARB_USER_STREAM_KEEPALIVE_S', 1800.0)
+        self._store = None
+        self._watched: set = set()
+        self._running = False
+        self._handle: Optional[FeederHandle] = None
+        self.connected = False
+        self.reconciled = False
+        self.connects = 0
+        self.reconciles = 0
+        self.keepalives = 0
+        self.mark_updates = 0
+        self.events: Dict[str, int] = {}
+        self.last_event_ts: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def synced(self) -> bool:
+        """True while connected and reconciled since the last (re)connect."""
+        return self.connected and self.reconciled
+
+    def start(self) -> 'BinanceUserStream':
+        if websockets is None:
+            raise ImportError('websockets package is required for BinanceUserStream')
+        if not self.api_key or not self.api_secret:
+            raise ValueError('BINANCE_API_KEY / BINANCE_API_SECRET are required for the user data stream')
+        if not self._running:
+            self._running = True
+            self.store.add_listener(self.on_mark)
+            self._handle = spawn_feeder('binance-user-stream', self._main)
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        self.connected = False
+        try:
+            if self._handle is not None:
+                self._handle.stop(timeout=2.0)
+        except Exception:
+            pass
+        if self._store is not None:
+            self._store.remove_listener(self.on_mark)
+            for sym in list(self._watched):
+                self._store.unwatch(sym, 'futures', mark=True)
+            self._watched.clear()
+
+    # -- mark prices ---------------------------------------------------------------------
+    @property
+    def store(self):
+        if self._store is None:
+            from .kline_store import get_kline_store
+            self._store = get_kline_store()
+        return self._store
+
+    def on_mark(self, ev) -> None:
+        """Kline store listener (stream thread): revalue positions at the new mark."""
+        if ev.kind == 'mark' and self.mirror.apply_mark(ev.symbol, ev.price, ev.ts):
+            self.mark_updates += 1
+
+    def sync_marks(self) -> None:
+        """Stream the mark price of every symbol with an open position (blocking)."""
+        symbols = set(self.mirror.position_symbols())
+        for sym in symbols - self._watched:
+            self._watched.add(sym)
+            self.store.watch(sym, 'futures', mark=True)
+        for sym in self._watched - symbols:
+            self._watched.discard(sym)
+            self.store.unwatch(sym, 'futures', mark=True)
+
+    # -- REST ----------------------------------------------------------------------------
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                       signed: bool = False, weight: Optional[float] = None) -> Any:
+        params = dict(params or {})
+        if signed:
+            params.update(timestamp=int(time.time() * 1000), recvWindow=5000)
+            params = _sign(params, self.api_secret)
+        resp = await _http.get_client().request(method, REST_BASE + path, params=params or None,
+                                                headers={'X-MBX-APIKEY': self.api_key}, weight=weight)
+        if not resp.is_success:
+            raise _http.HttpError(resp.status_code, resp.text, REST_BASE + path)
+        return resp.json()
+
+    async def reconcile(self) -> None:
+        """Reload the whole account over REST (on connect only)."""
+        account = await self._request('GET', '/fapi/v2/account', signed=True, weight=5)
+        orders = await self._request('GET', '/fapi/v1/openOrders', signed=True, weight=40)
+        self.mirror.load_account(account, orders)
+        self.reconciles += 1
+
+    async def _keepalive(self, listen_key: str) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_s)
+            try:
+                await self._request('PUT', '/fapi/v1/listenKey', {'listenKey': listen_key})
+                self.keepalives += 1
+            except Exception as e:
+                self.last_error = f'keepalive: {e}'
+                print(f'[user-stream] {self.last_error}')
+
+    # -- stream ----------------------------------------------------------------------------
+    def handle(self, raw: Any) -> Optional[str]:
+        """Apply one stream message; returns its event type."""
+        msg = json.loads(raw)
+        kind = msg.get('e') if isinstance(msg, dict) else None
+        if not kind:
+            return None
+        self.events[kind] = self.events.get(kind, 0) + 1
+        self.last_event_ts = time.time()
+        self.mirror.apply(msg)
+        return kind
+
+    async def _main(self) -> None:
+        backoff = 1.0
+        while self._running:
+            keepalive = None
+            try:
+                listen_key = (await self._request('POST', '/fapi/v1/listenKey'))['listenKey']
+                # not recorder.connect: private account data is never recorded (see the module docstring)
+                async with websockets.connect(WS_BASE + listen_key, max_size=None) as ws:
+                    self.connected = True
+                    self.connects += 1
+                    keepalive = asyncio.create_task(self._keepalive(listen_key))
+                    # events arriving during the snapshot queue up in the socket and apply after it
+                    self.reconciled = False
+                    await self.reconcile()
+                    self.reconciled = True
+                    await asyncio.to_thread(self.sync_marks)
+                    backoff = 1.0
+                    while self._running:
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=60.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        try:
+                            kind = self.handle(raw)
+                            if kind == 'listenKeyExpired':
+                                break
+                            if kind == 'ACCOUNT_UPDATE':
+                                # follow opened / closed positions with the mark streams
+                                await asyncio.to_thread(self.sync_marks)
+                        except Exception as e:
+                            self.last_error = f'event: {e}'
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f'{type(e).__name__}: {e}'
+                print(f'[user-stream] {self.last_error}')
+            finally:
+                self.connected = False
+                if keepalive is not None:
+                    keepalive.cancel()
+            if not self._running:
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self._running,
+            'connected': self.connected,
+            'synced': self.synced,
+            'connects': self.connects,
+            'reconciles': self.reconciles,
+            'keepalives': self.keepalives,
+            'mark_updates': self.mark_updates,
+            'marks_watched': sorted(self._watched),
+            'stale_events_skipped': self.mirror.stale_events,
+            'events': dict(self.events),
+            'last_event_age_s': round(time.time() - self.last_event_ts, 1) if self.last_event_ts else None,
+            'last_error': self.last_error,
+            'positions': len(self.mirror.positions),
+            'open_orders': len(self.mirror.orders),
+            'mirror_version': self.mirror.version,
+        }
+
+
+_STREAM: Optional[BinanceUserStream] = None
+_STREAM_LOCK = threading.Lock()
+
+
+def get_user_stream() -> BinanceUserStream:
+    """Return the process-wide user data stream (created, not started, on first use)."""
+    global _STREAM
+    with _STREAM_LOCK:
+        if _STREAM is None:
+            _STREAM = BinanceUserStream()
+        return _STREAM
+
+
+def synced_mirror() -> Optional[AccountMirror]:
+    """The account mirror when the user stream is live and reconciled, else None."""
+    stream = _STREAM
+    if stream is not None and stream.synced:
+        return stream.mirror
+    return None
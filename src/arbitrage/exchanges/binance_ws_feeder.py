@@ -20,6 +20,8 @@ try:
 except Exception:
     websockets = None
 
+from . import recorder
+
 
 class BinanceWSFeeder:
     def __init__(self, symbols: list[str]):
@@ -67,7 +69,7 @@ class BinanceWSFeeder:
         streams = '/'.join([f"{s.lower()}@trade" for s in self.symbols])
         uri = f"wss://stream.binance.com:9443/stream?streams={streams}"
         try:
-            async with websockets.connect(uri, max_size=None) as ws:
+            async with recorder.connect('binance-trades', uri, max_size=None) as ws:
                 while self._running:
                     try:
                         msg = await asyncio.wait_for(ws.recv(), timeout=1.0)
@@ -78,7 +80,7 @@ class BinanceWSFeeder:
                         data = obj.get('data', {})
                         sym = (data.get('s') or '').upper()
                         price = data.get('p')
-                        ts = time.time()
+                        ts = recorder.now()
                         if sym and price is not None:
                             try:
                                 p = float(price)
@@ -0,0 +1,189 @@
+"""In-process "book changed" notifications from the feeders to the scanners.
+
+Consumers used to poll: ``_scanner_loop`` slept ARB_SCAN_INTERVAL and then
+rescanned every symbol on every exchange whether or not anything moved.
+With this bus the depth feeders publish a ``BookEvent`` whenever the top of
+a book changes, and consumers wait on a ``Subscription`` that wakes them up
+with just the symbols that moved.
+
+- publishing is cheap and thread-safe; events whose top of book (best
+  price and size on both sides) equals the previous event are dropped
+- each subscription keeps only the latest event per (exchange, symbol), so
+  a slow consumer sees a coalesced set of changes instead of a backlog
+- ``Subscription.wait(timeout)`` (async) and ``wait_sync(timeout)`` return
+  the drained changes, or an empty dict when the timeout passed first, so
+  callers keep their interval as a fallback
+
+Symbols are published in compact form (``BTCUSDT``); use ``symbol_key`` to
+compare against ``BASE/QUOTE`` style symbols.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from .symbol_registry import symbol_key
+
+Key = Tuple[str, str]
+
+
+class BookEvent(NamedTuple):
+    exchange: str
+    symbol: str
+    seq: int
+    bid: Optional[float]
+    bid_qty: Optional[float]
+    ask: Optional[float]
+    ask_qty: Optional[float]
+    ts: float
+
+
+class Subscription:
+    """Coalescing per-consumer view of the bus.
+
+    Pass ``loop`` to wait from a coroutine on that loop; without it use
+    ``wait_sync`` from a thread. ``exchanges`` restricts delivery.
+    """
+
+    def __init__(self, bus: 'BookEventBus', exchanges: Optional[Iterable[str]] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._bus = bus
+        self.exchanges = {e.lower() for e in exchanges} if exchanges else None
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._pending: Dict[Key, BookEvent] = {}
+        self._async_event = asyncio.Event() if loop is not None else None
+        self._sync_event = threading.Event()
+        self.delivered = 0
+
+    def _wake(self) -> None:
+        if self._async_event is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._async_event.set)
+            except RuntimeError:
+                # loop closed; the consumer is gone
+                pass
+        self._sync_event.set()
+
+    def _offer(self, ev: BookEvent) -> None:
+        if self.exchanges is not None and ev.exchange not in self.exchanges:
+            return
+        with self._lock:
+            first = not self._pending
+            self._pending[(ev.exchange, ev.symbol)] = ev
+        # only the first event after a drain needs to wake the consumer
+        if first:
+            self._wake()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def drain(self) -> Dict[Key, BookEvent]:
+        """Return and clear the latest event per (exchange, symbol)."""
+        with self._lock:
+            out, self._pending = self._pending, {}
+            self._sync_event.clear()
+            if self._async_event is not None:
+                self._async_event.clear()
+        self.delivered += len(out)
+        return out
+
+    async def wait(self, timeout: Optional[float] = None) -> Dict[Key, BookEvent]:
+        """Wait (on the subscription's loop) for changes; {} on timeout."""
+        if self._async_event is None:
+            raise RuntimeError('subscription was created without a loop')
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._async_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.drain()
+
+    def wait_sync(self, timeout: Optional[float] = None) -> Dict[Key, BookEvent]:
+        """Blocking variant of ``wait`` for consumer threads."""
+        if not self._pending:
+            self._sync_event.wait(timeout)
+        return self.drain()
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+
+class BookEventBus:
+    """Process-wide fan-out of top-of-book changes to subscriptions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: Tuple[Subscription, ...] = ()
+        self._last_top: Dict[Key, Tuple[Any, ...]] = {}
+        self.published = 0
+        self.suppressed = 0
+
+    def subscribe(self, exchanges: Optional[Iterable[str]] = None,
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        sub = Subscription(self, exchanges=exchanges, loop=loop)
+        with self._lock:
+            self._subs = self._subs + (sub,)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subs)
+
+    def publish(self, exchange: str, symbol: str, bid: Optional[Tuple[float, float]],
+                ask: Optional[Tuple[float, float]], seq: int = 0, ts: Optional[float] = None) -> bool:
+        """Publish a book's top of book; returns False when nothing changed."""
+        ex = exchange.lower()
+        key = symbol_key(symbol)
+        top = (bid, ask)
+        if self._last_top.get((ex, key)) == top:
+            self.suppressed += 1
+            return False
+        self._last_top[(ex, key)] = top
+        subs = self._subs
+        if not subs:
+            return False
+        ev = BookEvent(
+            ex, key, int(seq or 0),
+            bid[0] if bid else None, bid[1] if bid else None,
+            ask[0] if ask else None, ask[1] if ask else None,
+            time.time() if ts is None else ts,
+        )
+        for sub in subs:
+            sub._offer(ev)
+        self.published += 1
+        return True
+
+    def publish_book(self, exchange: str, book: Any) -> bool:
+        """Publish from an ``L2Book`` (uses its symbol, seq and timestamp)."""
+        if not self._subs:
+            return False
+        return self.publish(exchange, book.symbol, book.best_bid(), book.best_ask(),
+                            seq=book.seq or book.version, ts=book.timestamp)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'subscribers': len(self._subs),
+            'published': self.published,
+            'suppressed': self.suppressed,
+            'tracked_books': len(self._last_top),
+            'pending': [s.pending() for s in self._subs],
+        }
+
+
+_BUS: Optional[BookEventBus] = None
+_BUS_LOCK = threading.Lock()
+
+
+def get_bus() -> BookEventBus:
+    """Return the process-wide book event bus (created on first use)."""
+    global _BUS
+    with _BUS_LOCK:
+        if _BUS is None:
+            _BUS = BookEventBus()
+        return _BUS
@@ -4,6 +4,8 @@ import threading
 import time
 from typing import Optional, List, Dict, Any
 
+from .feeder_runtime import FeederHandle, spawn_feeder
+
 
 class CCXTAsyncFeeder:
     """Background feeder that keeps a ticker snapshot warm using an
@@ -24,6 +26,7 @@ class CCXTAsyncFeeder:
         self._tickers: Dict[str, Dict[str, Any]] = {}
         self._lock = threading.RLock()
         self._thread: Optional[threading.Thread] = None
+        self._handle: Optional[FeederHandle] = None
         self._stop = threading.Event()
         # error throttling to avoid log spam for flaky endpoints
         self._last_error_log: Dict[str, float] = {}
@@ -32,14 +35,30 @@ class CCXTAsyncFeeder:
         self._consecutive_failures = 0
 
     def start(self) -> None:
-        if self._thread and self._thread.is_alive():
+        if (self._thread and self._thread.is_alive()) or (self._handle and self._handle.alive()):
             return
         self._stop.clear()
-        self._thread = threading.Thread(target=self._run, name=f"ccxt-feeder-{self.id}", daemon=True)
+        async_ccxt = None
+        try:
+            import importlib
+
+            async_ccxt = importlib.import_module("ccxt.async_support")
+        except Exception:
+            async_ccxt = None
+        if async_ccxt is not None:
+            # async poller runs as a task on the shared feeder loop
+            self._handle = spawn_feeder(f"ccxt-{self.id}", lambda: self._run_hosted(async_ccxt))
+            return
+        self._start_sync_thread()
+
+    def _start_sync_thread(self) -> None:
+        self._thread = threading.Thread(target=self._run_sync, name=f"ccxt-feeder-{self.id}", daemon=True)
         self._thread.start()
 
     def stop(self, timeout: float = 2.0) -> None:
         self._stop.set()
+        if self._handle:
+            self._handle.stop(timeout=timeout)
         if self._thread:
             self._thread.join(timeout=timeout)
 
@@ -48,35 +67,16 @@ class CCXTAsyncFeeder:
             # return a shallow copy to avoid callers mutating internal state
             return dict(self._tickers)
 
-    def _run(self) -> None:
-        # Prefer async ccxt if available
+    async def _run_hosted(self, async_ccxt) -> None:
         try:
-            import asyncio
-        except Exception:
-            asyncio = None
-
-        async_ccxt = None
-        try:
-            import importlib
-
-            async_ccxt = importlib.import_module("ccxt.async_support")
-        except Exception:
-            async_ccxt = None
-
-        if async_ccxt is not None and asyncio is not None:
+            await self._run_async(async_ccxt)
+        except Exception as e:  # fall back to sync poller
             try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self._run_async(async_ccxt))
-                return
-            except Exception as e:  # fall back to sync poller
-                try:
-                    print(f"[feeder:{self.id}] async feeder failed to start: {e}")
-                except Exception:
-                    pass
-
-        # fallback: run sync poller
-        self._run_sync()
+                print(f"[feeder:{self.id}] async feeder failed to start: {e}")
+            except Exception:
+                pass
+            if not self._stop.is_set():
+                self._start_sync_thread()
 
     async def _run_async(self, async_ccxt) -> None:
         exch_cls = getattr(async_ccxt, self.id, None)
@@ -7,6 +7,7 @@ import threading
 import asyncio
 
 from .base import Exchange, Ticker
+from .feeder_runtime import get_runtime, loop_mode
 
 try:
     import ccxtpro as ccxtpro  # type: ignore
@@ -17,9 +18,10 @@ except Exception:  # pragma: no cover - optional dependency
 class CCXTProExchange:
     """A thin adapter for ccxt.pro (async websocket-capable client).
 
-    This is a best-effort prototype to help migrate to ccxt.pro. It runs an
-    asyncio event loop in a background thread and exposes a synchronous
-    compatibility surface similar to the existing CCXTExchange.
+    This is a best-effort prototype to help migrate to ccxt.pro. The async
+    client runs on the shared feeder loop (``feeder_runtime``) and the class
+    exposes a synchronous compatibility surface similar to the existing
+    CCXTExchange.
 
     Notes:
     - ccxt.pro must be installed (pip install ccxtpro). If not present the
@@ -64,9 +66,36 @@ class CCXTProExchange:
         # background loop management
         self._loop = None
         self._thread = None
+        self._feeder_name: str | None = None
         self._start_background_loop(exchange_cls, cfg)
 
     def _start_background_loop(self, exchange_cls, cfg):
+        # the client lives on the shared feeder loop (see feeder_runtime);
+        # ARB_FEEDER_LOOP=thread keeps the old dedicated loop thread
+        if loop_mode() == 'thread':
+            self._start_private_loop(exchange_cls, cfg)
+            return
+        runtime = get_runtime()
+        self._loop = runtime.loop()
+        self._feeder_name = f'ccxtpro-{self.name}'
+        runtime.track(self._feeder_name)
+
+        async def init_client():
+            client = exchange_cls(cfg)
+            try:
+                setattr(client, 'enableRateLimit', True)
+            except Exception:
+                pass
+            self._client = client
+
+        fut = runtime.submit(init_client(), feeder=self._feeder_name)
+        if not runtime.in_loop_thread():
+            try:
+                fut.result(timeout=2.0)
+            except Exception:
+                pass
+
+    def _start_private_loop(self, exchange_cls, cfg):
         # run an asyncio event loop in a dedicated thread and create the client there
         def run_loop():
             loop = asyncio.new_event_loop()
@@ -105,6 +134,8 @@ class CCXTProExchange:
         """Schedule a coroutine on the background loop and wait for result."""
         if self._loop is None:
             raise RuntimeError('Event loop not running')
+        if self._feeder_name is not None:
+            return get_runtime().run_sync(coro, timeout=timeout, feeder=self._feeder_name)
         fut = asyncio.run_coroutine_threadsafe(coro, self._loop)
         try:
             return fut.result(timeout=timeout)
@@ -115,6 +146,15 @@ class CCXTProExchange:
                 pass
             raise
 
+    def close(self, timeout: float = 2.0) -> None:
+        """Close the underlying ccxt.pro client (its websockets and sessions)."""
+        if self._client is None:
+            return
+        try:
+            self._run_coro_sync(self._client.close(), timeout=timeout)
+        except Exception:
+            pass
+
     def get_tickers(self) -> Dict[str, Ticker]:
         """Return the latest ticker snapshot collected via websocket where possible.
 
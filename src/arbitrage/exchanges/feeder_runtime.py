@@ -0,0 +1,406 @@
+"""Shared asyncio event loop host for the websocket feeders.
+
+Each feeder used to start a daemon thread running its own
+``asyncio.new_event_loop()``; with six feeders plus uvicorn that meant seven
+loops contending for the GIL. ``FeederRuntime`` hosts every feeder coroutine
+as a task on one loop instead:
+
+- ``dedicated`` (default): one daemon thread, one loop, shared by all feeders
+- ``app``: tasks run on an already running loop handed to ``attach()``
+  (web.py attaches the FastAPI loop when ARB_FEEDER_LOOP=app)
+- ``thread``: legacy behaviour, one thread + loop per feeder
+
+The mode comes from ARB_FEEDER_LOOP. Feeders call ``spawn_feeder(name,
+coro_fn)`` from ``start()`` and ``handle.stop()`` from ``stop()``; the
+returned handle hides which mode is active.
+
+Per-feeder metrics: every step of a feeder's coroutine (and, on the
+dedicated loop, of any task it creates) is timed, giving busy time, step
+count and the longest step, which flags blocking calls on the shared loop.
+A heartbeat task measures loop lag.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from . import recorder
+
+CoroFn = Callable[[], Awaitable[Any]]
+
+# name of the feeder whose task is currently running (propagates to child tasks)
+_CURRENT_FEEDER: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('arb_feeder', default=None)
+
+
+def loop_mode() -> str:
+    mode = os.environ.get('ARB_FEEDER_LOOP', 'dedicated').strip().lower()
+    return mode if mode in ('dedicated', 'app', 'thread') else 'dedicated'
+
+
+class TaskStats:
+    """Counters for one hosted feeder."""
+
+    __slots__ = ('name', 'started_ts', 'finished_ts', 'state', 'last_error', 'busy_s', 'steps', 'max_step_s', 'tasks')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_ts = time.time()
+        self.finished_ts: Optional[float] = None
+        self.state = 'starting'
+        self.last_error: Optional[str] = None
+        self.busy_s = 0.0
+        self.steps = 0
+        self.max_step_s = 0.0
+        # live tasks attributed to this feeder (root + children)
+        self.tasks = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        end = self.finished_ts or time.time()
+        uptime = max(0.0, end - self.started_ts)
+        return {
+            'name': self.name,
+            'state': self.state,
+            'started_ts': self.started_ts,
+            'uptime_s': round(uptime, 3),
+            'busy_s': round(self.busy_s, 6),
+            'busy_pct': round(100.0 * self.busy_s / uptime, 3) if uptime > 0 else 0.0,
+            'steps': self.steps,
+            'max_step_ms': round(self.max_step_s * 1000.0, 3),
+            'tasks': self.tasks,
+            'last_error': self.last_error,
+        }
+
+
+class _StepTimer:
+    """Awaitable that drives ``coro`` step by step, charging each step's wall time to ``stats``."""
+
+    __slots__ = ('coro', 'stats')
+
+    def __init__(self, coro, stats: TaskStats):
+        self.coro = coro
+        self.stats = stats
+
+    def __await__(self):
+        coro, stats = self.coro, self.stats
+        send_value: Any = None
+        throw_exc: Optional[BaseException] = None
+        while True:
+            t0 = time.perf_counter()
+            try:
+                if throw_exc is not None:
+                    exc, throw_exc = throw_exc, None
+                    yielded = coro.throw(exc)
+                else:
+                    yielded = coro.send(send_value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                dt = time.perf_counter() - t0
+                stats.busy_s += dt
+                stats.steps += 1
+                if dt > stats.max_step_s:
+                    stats.max_step_s = dt
+            try:
+                send_value = yield yielded
+            except GeneratorExit:
+                raise
+            except BaseException as e:  # delivered into the coroutine on the next step
+                send_value = None
+                throw_exc = e
+
+
+async def _timed(coro, stats: TaskStats):
+    """Run ``coro`` with per-step timing.
+
+    A native coroutine so ``asyncio.Task`` accepts it: since Python 3.12 tasks
+    reject generator-based coroutines (``@types.coroutine``).
+    """
+    stats.tasks += 1
+    try:
+        return await _StepTimer(coro, stats)
+    finally:
+        stats.tasks -= 1
+        coro.close()
+
+
+class FeederHandle:
+    """Returned by ``spawn_feeder``; stops the feeder's task or thread."""
+
+    def __init__(self, name: str, runtime: 'FeederRuntime', future: Optional[Future] = None, thread: Optional[threading.Thread] = None):
+        self.name = name
+        self._runtime = runtime
+        self._future = future
+        self._thread = thread
+        self.task: Optional[asyncio.Task] = None
+
+    def alive(self) -> bool:
+        if self._thread is not None:
+            return self._thread.is_alive()
+        return self._future is not None and not self._future.done()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            return
+        self._runtime.cancel(self, timeout=timeout)
+
+
+class FeederRuntime:
+    """Owns the feeder loop (or borrows one) and tracks the hosted tasks."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._owned = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, TaskStats] = {}
+        self._handles: Dict[str, FeederHandle] = {}
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    # -- loop management -----------------------------------------------------------
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Host feeders on an existing running loop (e.g. the FastAPI loop)."""
+        with self._lock:
+            if self._loop is loop:
+                return
+            if self._loop is not None and self._handles:
+                raise RuntimeError('feeder runtime already hosting tasks on another loop')
+            self._loop = loop
+            self._owned = False
+        asyncio.run_coroutine_threadsafe(self._heartbeat(), loop)
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the hosting loop, starting the dedicated loop thread if needed."""
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                return self._loop
+            ready = threading.Event()
+
+            def _run():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                loop.set_task_factory(self._task_factory)
+                self._loop = loop
+                loop.create_task(self._heartbeat())
+                ready.set()
+                try:
+                    loop.run_forever()
+                finally:
+                    try:
+                        loop.close()
+                    except Exception:
+                        pass
+
+            self._owned = True
+            self._thread = threading.Thread(target=_run, name='feeder-runtime', daemon=True)
+            self._thread.start()
+            ready.wait(timeout=5.0)
+            return self._loop
+
+    def _task_factory(self, loop, coro, **kwargs):
+        # attribute child tasks created by a feeder to that feeder's stats
+        name = _CURRENT_FEEDER.get()
+        stats = self._stats.get(name) if name else None
+        if stats is not None and asyncio.iscoroutine(coro):
+            coro = _timed(coro, stats)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    async def _heartbeat(self, interval: float = 0.25) -> None:
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, (time.perf_counter() - t0 - interval) * 1000.0)
+            self.lag_ms = lag
+            if lag > self.max_lag_ms:
+                self.max_lag_ms = lag
+
+    def in_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # -- task management -------------------------------------------------------------
+    def _unique_name(self, name: str) -> str:
+        if name not in self._handles:
+            return name
+        i = 2
+        while f'{name}#{i}' in self._handles:
+            i += 1
+        return f'{name}#{i}'
+
+    def spawn(self, name: str, coro_fn: CoroFn) -> FeederHandle:
+        """Run ``coro_fn()`` as a task on the hosting loop."""
+        self.loop()
+        with self._lock:
+            name = self._unique_name(name)
+            stats = TaskStats(name)
+            self._stats[name] = stats
+            handle = FeederHandle(name, self)
+            self._handles[name] = handle
+
+        async def _root():
+            _CURRENT_FEEDER.set(name)
+            handle.task = asyncio.current_task()
+            stats.state = 'running'
+            try:
+                if self._owned:
+                    # the task factory already times this task
+                    return await coro_fn()
+                return await _timed(coro_fn(), stats)
+            except asyncio.CancelledError:
+                stats.state = 'cancelled'
+                raise
+            except Exception as e:
+                stats.state = 'failed'
+                stats.last_error = f'{type(e).__name__}: {e}'
+            finally:
+                if stats.state == 'running':
+                    stats.state = 'finished'
+                stats.finished_ts = time.time()
+                with self._lock:
+                    if self._handles.get(name) is handle:
+                        self._handles.pop(name, None)
+
+        handle._future = self.submit(_root(), feeder=name)
+        return handle
+
+    def cancel(self, handle: FeederHandle, timeout: float = 2.0) -> None:
+        fut = handle._future
+        loop = self._loop
+        if fut is None or loop is None:
+            return
+        task = handle.task
+        if task is not None:
+            loop.call_soon_threadsafe(task.cancel)
+        else:
+            fut.cancel()
+        if self.in_loop_thread():
+            # cannot block the loop we are running on; cancellation is async
+            return
+        try:
+            fut.result(timeout=timeout)
+        except BaseException:
+            pass
+
+    def track(self, name: str) -> TaskStats:
+        """Register stats for a client that submits work via ``run_sync``."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = TaskStats(name)
+                stats.state = 'running'
+                self._stats[name] = stats
+            return stats
+
+    def submit(self, coro, feeder: Optional[str] = None) -> Future:
+        """Schedule a coroutine on the hosting loop; returns a concurrent Future.
+
+        When ``feeder`` names a tracked client, the task's steps are charged
+        to it (dedicated loop only).
+        """
+        loop = self.loop()
+        if feeder is None:
+            return asyncio.run_coroutine_threadsafe(coro, loop)
+        ctx = contextvars.copy_context()
+        ctx.run(_CURRENT_FEEDER.set, feeder)
+        return ctx.run(asyncio.run_coroutine_threadsafe, coro, loop)
+
+    def run_sync(self, coro, timeout: Optional[float] = None, feeder: Optional[str] = None):
+        """Run a coroutine on the hosting loop from another thread and wait."""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError('synchronous feeder call from the feeder loop thread')
+        fut = self.submit(coro, feeder=feeder)
+        try:
+            return fut.result(timeout=timeout)
+        except BaseException:
+            fut.cancel()
+            raise
+
+    # -- health ------------------------------------------------------------------------
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = [s.as_dict() for s in self._stats.values()]
+            live = len(self._handles)
+        return {
+            'mode': loop_mode(),
+            'owned_loop': self._owned,
+            'running': self._loop is not None and self._loop.is_running(),
+            'loop_lag_ms': round(self.lag_ms, 3),
+            'max_loop_lag_ms': round(self.max_lag_ms, 3),
+            'live_feeders': live,
+            'feeders': stats,
+        }
+
+    def stats_for(self, name: str) -> Optional[Dict[str, Any]]:
+        s = self._stats.get(name)
+        return s.as_dict() if s is not None else None
+
+
+_RUNTIME: Optional[FeederRuntime] = None
+_RUNTIME_LOCK = threading.Lock()
+
+
+def get_runtime() -> FeederRuntime:
+    """Return the process-wide feeder runtime (created on first use)."""
+    global _RUNTIME
+    with _RUNTIME_LOCK:
+        if _RUNTIME is None:
+            _RUNTIME = FeederRuntime()
+        return _RUNTIME
+
+
+def spawn_feeder(name: str, coro_fn: CoroFn) -> FeederHandle:
+    """Start a feeder coroutine according to ARB_FEEDER_LOOP.
+
+    In ``thread`` mode this reproduces the old behaviour (a daemon thread
+    with its own loop); otherwise the coroutine becomes a task on the shared
+    runtime loop.
+    """
+    runtime = get_runtime()
+    if loop_mode() != 'thread':
+        return runtime.spawn(name, coro_fn)
+
+    def _run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(coro_fn())
+        except Exception:
+            pass
+        finally:
+            try:
+                loop.close()
+            except Exception:
+                pass
+
+    t = threading.Thread(target=_run, name=f'feeder-{name}', daemon=True)
+    t.start()
+    return FeederHandle(name, runtime, thread=t)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking call (REST handshake, snapshot) off the feeder loop.
+
+    While recording (see ``recorder``) the result is logged with the feeder's
+    traffic; during a replay the recorded result is returned instead of
+    calling ``fn``, and None when the recording has no result for the call
+    (a replay never reaches the network).
+    """
+    call = getattr(fn, '__qualname__', None) or repr(fn)
+    replay = recorder.replay_session()
+    if replay is not None:
+        found, result = replay.rest_result(call, args)
+        return result if found else None
+    result = await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+    rec = recorder.get_recorder()
+    if rec is not None and result is not None:
+        rec.rest(_CURRENT_FEEDER.get() or '', call, args, result)
+    return result
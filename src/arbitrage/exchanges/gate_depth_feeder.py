@@ -3,7 +3,6 @@ from __future__ import annotations
 import asyncio
 import json
 import time
-import threading
 from typing import Dict, List, Optional
 
 try:
@@ -11,6 +10,12 @@ try:
 except Exception:
     websockets = None
 
+from . import recorder
+from .feeder_runtime import FeederHandle, run_blocking, spawn_feeder
+from .book_events import get_bus
+from .l2_book import L2Book
+from ..utils import http_client as _http
+
 
 class GateDepthFeeder:
     """Lightweight Gate.io feeder for public spot tickers and book tickers."""
@@ -46,8 +51,10 @@ class GateDepthFeeder:
         self._symbols = [] if symbols is None else [self._normalize_in(s) for s in symbols]
         self._tickers: Dict[str, Dict] = {}
         self._book_tickers: Dict[str, Dict] = {}
+        # top-of-book ladders fed from spot.book_ticker, keyed like _book_tickers
+        self._l2: Dict[str, L2Book] = {}
         self._running = False
-        self._thread: Optional[threading.Thread] = None
+        self._handle: Optional[FeederHandle] = None
         self._connected: bool = False
         self.last_update_ts: Optional[float] = None
         self._seen_first: set = set()
@@ -64,22 +71,14 @@ class GateDepthFeeder:
         if self._running:
             return
         self._running = True
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        # hosted as a task on the shared feeder loop (see feeder_runtime)
+        self._handle = spawn_feeder('gate-depth', self._ws_main)
 
     def stop(self):
         self._running = False
         try:
-            if self._thread is not None:
-                self._thread.join(timeout=2.0)
-        except Exception:
-            pass
-
-    def _run_loop(self):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(self._ws_main())
+            if self._handle is not None:
+                self._handle.stop(timeout=2.0)
         except Exception:
             pass
 
@@ -90,12 +89,13 @@ class GateDepthFeeder:
         print(f"GateDepthFeeder: will attempt to subscribe to payload_symbols={payload_symbols}")
 
         # Optional REST presence filtering (best effort)
+        def _currency_pairs():
+            return _http.get_json_sync('https://api.gateio.ws/api/v4/spot/currency_pairs', timeout=5)
+
         try:
-            import requests
             try:
-                resp = requests.get('https://api.gateio.ws/api/v4/spot/currency_pairs', timeout=5)
-                if resp.ok:
-                    data = resp.json()
+                data = await run_blocking(_currency_pairs)
+                if data is not None:
                     supported = set()
                     if isinstance(data, list):
                         for item in data:
@@ -134,7 +134,8 @@ class GateDepthFeeder:
         while self._running:
             try:
                 print("GateDepthFeeder: attempting websocket connection to Gate")
-                async with websockets.connect(
+                async with recorder.connect(
+                    'gate-depth',
                     base,
                     max_size=None,
                     ping_interval=None,   # rely on server heartbeats
@@ -236,13 +237,13 @@ class GateDepthFeeder:
                                     if out not in self._seen_first:
                                         self._seen_first.add(out)
                                         print(f"GateDepthFeeder: first ticker update for {out}")
-                                    self._tickers[out] = {'last': last, 'bid': bid, 'ask': ask, 'ts': time.time()}
+                                    self._tickers[out] = {'last': last, 'bid': bid, 'ask': ask, 'ts': recorder.now()}
                                     # mark satisfied
                                     k_in = self._normalize_in(out)
                                     st = self._sub_state.get(k_in)
                                     if st:
                                         st['last_sub'] = time.time()
-                                    self.last_update_ts = time.time()
+                                    self.last_update_ts = recorder.now()
 
                             # --- spot.book_ticker ---
                             if ch == 'spot.book_ticker' and ev == 'update' and res is not None:
@@ -263,12 +264,21 @@ class GateDepthFeeder:
                                     if out not in self._seen_first:
                                         self._seen_first.add(out)
                                         print(f"GateDepthFeeder: first book_ticker update for {out}")
-                                    self._book_tickers[out] = {'bid': bid, 'bid_sz': bid_sz, 'ask': ask, 'ask_sz': ask_sz, 'ts': time.time()}
+                                    self._book_tickers[out] = {'bid': bid, 'bid_sz': bid_sz, 'ask': ask, 'ask_sz': ask_sz, 'ts': recorder.now()}
+                                    book = self._l2.get(out)
+                                    if book is None:
+                                        book = L2Book(out, max_levels=50)
+                                        self._l2[out] = book
+                                    if bid is not None and bid_sz is not None:
+                                        book.replace_side('bids', [(bid, bid_sz)])
+                                    if ask is not None and ask_sz is not None:
+                                        book.replace_side('asks', [(ask, ask_sz)])
+                                    get_bus().publish_book('gate', book)
                                     k_in = self._normalize_in(out)
                                     st = self._sub_state.get(k_in)
                                     if st:
                                         st['last_sub'] = time.time()
-                                    self.last_update_ts = time.time()
+                                    self.last_update_ts = recorder.now()
 
                         # periodic resubscribe for missing symbols
                         try:
@@ -375,5 +385,10 @@ class GateDepthFeeder:
     def get_book_tickers(self) -> Dict[str, Dict]:
         return dict(self._book_tickers)
 
-    def get_order_book(self, symbol: str):
-        return None
+    def get_order_book(self, symbol: str, depth: int = 10):
+        """Return the top-of-book ladder from spot.book_ticker, or None if unseen."""
+        key = self._normalize_out(self._normalize_in(symbol))
+        book = self._l2.get(key)
+        if book is None or book.is_empty():
+            return None
+        return book.order_book(depth)
@@ -0,0 +1,789 @@
+"""Process-wide OHLCV kline store fed by Binance kline websockets.
+
+Klines used to be fetched over REST by every consumer on its own schedule
+(each ``LiveStrategy`` every 15s, the price-alert and top-futures loops for
+hundreds of symbols every 30s, the social-sentiment scanners, the
+volatility index). ``KlineStore`` keeps one ring buffer per
+(market, symbol, interval) instead:
+
+- the 1m series of a symbol is backfilled once over REST and then kept
+  current from the combined ``<symbol>@kline_1m`` stream of its market
+  (spot or USD-M futures); a reconnect backfills the gap over REST
+- intervals up to 1d are derived from 1m: closed bars come from one REST
+  backfill and are rolled forward from the 1m ring as buckets close; the
+  open bar is aggregated from the 1m bars of the current bucket on read
+- without a live stream (websockets missing, ARB_KLINE_STREAM=0, symbol
+  over the stream cap) the 1m tail is refreshed incrementally over REST at
+  most every ARB_KLINE_REST_TTL seconds
+- symbols nobody asked for in ARB_KLINE_IDLE_S seconds are unsubscribed
+  and dropped, unless a consumer pinned them with ``watch()``
+- listeners registered with ``add_listener`` get a ``MarketEvent`` for every
+  closed 1m kline and, for watched futures symbols, every 1s mark price
+
+``get_klines(symbol, interval, limit, market)`` returns rows in Binance REST
+layout (``[open_time, open, high, low, close, volume, close_time,
+quote_volume, trades, taker_buy_base, taker_buy_quote, '0']``) with numbers
+as floats/ints, so existing callers keep indexing them the same way.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+try:
+    import websockets
+except Exception:  # pragma: no cover - optional dependency
+    websockets = None
+
+from . import recorder
+from .feeder_runtime import FeederHandle, run_blocking, spawn_feeder
+from .symbol_registry import symbol_key
+from ..utils.env import env_float
+
+MINUTE_MS = 60_000
+DAY_MS = 86_400_000
+
+INTERVAL_MS: Dict[str, int] = {
+    '1m': MINUTE_MS, '3m': 3 * MINUTE_MS, '5m': 5 * MINUTE_MS, '15m': 15 * MINUTE_MS,
+    '30m': 30 * MINUTE_MS, '1h': 60 * MINUTE_MS, '2h': 120 * MINUTE_MS, '4h': 240 * MINUTE_MS,
+    '6h': 360 * MINUTE_MS, '8h': 480 * MINUTE_MS, '12h': 720 * MINUTE_MS, '1d': DAY_MS,
+    '3d': 3 * DAY_MS, '1w': 7 * DAY_MS,
+}
+
+REST_URLS = {
+    'spot': 'https://api.binance.com/api/v3/klines',
+    'futures': 'https://fapi.binance.com/fapi/v1/klines',
+}
+REST_MAX_LIMIT = {'spot': 1000, 'futures': 1500}
+WS_URLS = {
+    'spot': 'wss://stream.binance.com:9443/stream',
+    'futures': 'wss://fstream.binance.com/stream',
+}
+
+# column layout of a ring (all stored as doubles)
+FIELDS = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+          'quote_volume', 'trades', 'taker_base', 'taker_quote')
+_NF = len(FIELDS)
+
+Row = Tuple[float, ...]
+Fetch = Callable[[str, str, str, int, Optional[int]], List[Sequence[Any]]]
+
+
+class MarketEvent(NamedTuple):
+    """A closed 1m kline (``kind='kline'``) or a mark price update (``'mark'``)."""
+    kind: str
+    market: str
+    symbol: str
+    ts: float          # event time, ms (kline: close time of the 1m bar)
+    price: float       # kline close or mark price
+    row: Optional[Row] = None
+    funding_rate: Optional[float] = None
+
+
+Listener = Callable[[MarketEvent], None]
+
+
+def normalize_market(market: Optional[str]) -> str:
+    m = (market or 'spot').lower()
+    return 'futures' if m in ('futures', 'future', 'perp', 'perps', 'usdm', 'swap') else 'spot'
+
+
+def to_row(k: Sequence[Any]) -> Row:
+    """Convert a REST kline (strings) into a numeric ring row."""
+    return (float(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]),
+            float(k[6]), float(k[7]), float(k[8]), float(k[9]), float(k[10]))
+
+
+def to_kline(r: Row) -> List[Any]:
+    """Convert a ring row back to the Binance REST list layout."""
+    return [int(r[0]), r[1], r[2], r[3], r[4], r[5], int(r[6]), r[7], int(r[8]), r[9], r[10], '0']
+
+
+def aggregate(rows: Iterable[Row], bucket: int, ms: int) -> Optional[Row]:
+    """Fold consecutive finer rows into one bar starting at ``bucket``."""
+    o = h = lo = c = None
+    v = qv = n = tb = tq = 0.0
+    for r in rows:
+        if o is None:
+            o, h, lo = r[1], r[2], r[3]
+        else:
+            if r[2] > h:
+                h = r[2]
+            if r[3] < lo:
+                lo = r[3]
+        c = r[4]
+        v += r[5]
+        qv += r[7]
+        n += r[8]
+        tb += r[9]
+        tq += r[10]
+    if o is None:
+        return None
+    return (float(bucket), o, h, lo, c, v, float(bucket + ms - 1), qv, n, tb, tq)
+
+
+class KlineRing:
+    """Fixed-capacity ring of bars ordered by open time, stored column-wise."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._cols = [array('d', bytes(8 * self.capacity)) for _ in range(_NF)]
+        self._start = 0
+        self._len = 0
+        # bars asked of REST for this ring (short histories stay short)
+        self.requested = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _pos(self, i: int) -> int:
+        return (self._start + i) % self.capacity
+
+    def row(self, i: int) -> Row:
+        if i < 0:
+            i += self._len
+        p = self._pos(i)
+        return tuple(col[p] for col in self._cols)
+
+    def open_time(self, i: int) -> float:
+        if i < 0:
+            i += self._len
+        return self._cols[0][self._pos(i)]
+
+    def first_open_time(self) -> Optional[float]:
+        return self.open_time(0) if self._len else None
+
+    def last_open_time(self) -> Optional[float]:
+        return self.open_time(-1) if self._len else None
+
+    def _write(self, p: int, row: Row) -> None:
+        for col, v in zip(self._cols, row):
+            col[p] = v
+
+    def put(self, row: Row) -> None:
+        """Append a newer bar or replace the bar with the same open time."""
+        last = self.last_open_time()
+        if last is None or row[0] > last:
+            if self._len < self.capacity:
+                self._write(self._pos(self._len), row)
+                self._len += 1
+            else:
+                self._write(self._start, row)
+                self._start = (self._start + 1) % self.capacity
+        elif row[0] == last:
+            self._write(self._pos(self._len - 1), row)
+        else:
+            self.merge([row])
+
+    def rows(self) -> List[Row]:
+        return [self.row(i) for i in range(self._len)]
+
+    def load(self, rows: Sequence[Row]) -> None:
+        rows = list(rows)[-self.capacity:]
+        self._start = 0
+        self._len = 0
+        for r in rows:
+            self._write(self._len, r)
+            self._len += 1
+
+    def merge(self, rows: Iterable[Row]) -> None:
+        """Merge out-of-order bars; on a clash the bar with more volume wins.
+
+        Volume only grows while a bar is open, so this keeps whichever of the
+        stream and REST copies is more recent.
+        """
+        by_time = {r[0]: r for r in self.rows()}
+        for r in rows:
+            cur = by_time.get(r[0])
+            if cur is None or r[5] >= cur[5]:
+                by_time[r[0]] = r
+        self.load([by_time[t] for t in sorted(by_time)])
+
+    def grow(self, capacity: int) -> None:
+        if capacity > self.capacity:
+            rows = self.rows()
+            self.capacity = int(capacity)
+            self._cols = [array('d', bytes(8 * self.capacity)) for _ in range(_NF)]
+            self.load(rows)
+
+    def index_at(self, t: float) -> int:
+        """First index whose open time is >= ``t``."""
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.open_time(mid) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def between(self, t0: float, t1: float) -> List[Row]:
+        """Rows with ``t0 <= open_time < t1``."""
+        out = []
+        for i in range(self.index_at(t0), self._len):
+            r = self.row(i)
+            if r[0] >= t1:
+                break
+            out.append(r)
+        return out
+
+    def tail(self, n: int, start_time: Optional[float] = None) -> List[Row]:
+        first = max(0, self._len - max(0, int(n)))
+        if start_time is not None:
+            first = max(first, self.index_at(start_time))
+        return [self.row(i) for i in range(first, self._len)]
+
+
+class _MinuteSeries:
+    """1m ring of one (market, symbol) plus its freshness state."""
+
+    __slots__ = ('ring', 'live', 'fetched_at', 'updated_at', 'last_access', 'derived')
+
+    def __init__(self, capacity: int):
+        self.ring = KlineRing(capacity)
+        self.live = False
+        self.fetched_at = 0.0
+        self.updated_at = 0.0
+        self.last_access = time.time()
+        # interval -> ring of closed derived bars
+        self.derived: Dict[str, KlineRing] = {}
+
+
+def _rest_fetch(market: str, symbol: str, interval: str, limit: int,
+                start_time: Optional[int] = None) -> List[Sequence[Any]]:
+    """Fetch klines over the shared HTTP client, paging past the REST limit.
+
+    With ``start_time`` pages walk forward from it; without, the newest page
+    comes first and older pages are fetched backwards with ``endTime``.
+    """
+    from ..utils import http_client
+
+    url = REST_URLS[market]
+    page = REST_MAX_LIMIT[market]
+    pages: List[List[Sequence[Any]]] = []
+    remaining = max(1, int(limit))
+    end_time: Optional[int] = None
+    while remaining > 0:
+        params: Dict[str, Any] = {'symbol': symbol, 'interval': interval, 'limit': min(page, remaining)}
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        elif end_time is not None:
+            params['endTime'] = end_time
+        data = http_client.get_json_sync(url, params=params, timeout=10.0)
+        if not isinstance(data, list) or not data:
+            break
+        pages.append(data)
+        remaining -= len(data)
+        if len(data) < params['limit']:
+            break
+        if start_time is not None:
+            start_time = int(data[-1][0]) + 1
+        else:
+            end_time = int(data[0][0]) - 1
+    if start_time is None:
+        pages.reverse()
+    return [row for data in pages for row in data]
+
+
+class KlineStore:
+    """Shared kline cache; use ``get_kline_store()``.
+
+    ``fetch`` (market, symbol, interval, limit, start_time) -> REST rows can
+    be replaced for tests; ``stream=False`` disables the websockets.
+    """
+
+    def __init__(self, fetch: Optional[Fetch] = None, stream: Optional[bool] = None):
+        self._fetch = fetch or _rest_fetch
+        if stream is None:
+            stream = os.getenv('ARB_KLINE_STREAM', '1') != '0'
+        self._stream_enabled = bool(stream) and websockets is not None
+        self.capacity = int(env_float('ARB_KLINE_CAPACITY', 500))
+        self.rest_ttl = env_float('ARB_KLINE_REST_TTL', 5.0)
+        self.idle_s = env_float('ARB_KLINE_IDLE_S', 900.0)
+        self.max_streams = int(env_float('ARB_KLINE_MAX_STREAMS', 200))
+        self._lock = threading.RLock()
+        self._series: Dict[Tuple[str, str], _MinuteSeries] = {}
+        self._rest_cache: Dict[Tuple[str, str, str], Tuple[float, List[Row]]] = {}
+        self._streams: Dict[str, '_KlineStream'] = {}
+        self._pins: Dict[Tuple[str, str], int] = {}
+        self._marks: Dict[str, Tuple[float, Optional[float], float]] = {}
+        self._listeners: Tuple[Listener, ...] = ()
+        self._last_evict = time.time()
+        self.reads = 0
+        self.rest_calls = 0
+        self.ws_updates = 0
+
+    # -- REST ----------------------------------------------------------------------
+    def _rest(self, market: str, symbol: str, interval: str, limit: int,
+              start_time: Optional[int] = None) -> List[Row]:
+        self.rest_calls += 1
+        return [to_row(k) for k in self._fetch(market, symbol, interval, limit, start_time)]
+
+    # -- 1m series -----------------------------------------------------------------
+    def _minutes(self, market: str, sym: str, need: int, start_time: Optional[float] = None) -> _MinuteSeries:
+        """Return the 1m series holding at least ``need`` bars (or bars since
+        ``start_time``), backfilling or refreshing it over REST as needed."""
+        now = time.time()
+        need = max(1, int(need))
+        key = (market, sym)
+        with self._lock:
+            st = self._series.get(key)
+            created = st is None
+            if created:
+                st = _MinuteSeries(max(self.capacity, need))
+            st.last_access = now
+            st.ring.grow(min(need, 2000))
+            ring = st.ring
+            covered = len(ring) >= min(need, ring.capacity) and (
+                start_time is None or (ring.first_open_time() or 0) <= start_time)
+            # a live stream that stalled for more than a bar is not trusted
+            fresh = (st.live and now - st.updated_at < 90.0) or now - st.fetched_at < self.rest_ttl
+            last = ring.last_open_time()
+        if not covered:
+            if start_time is not None and start_time < now * 1000:
+                rows = self._rest(market, sym, '1m', need, int(start_time))
+            else:
+                # newest bars only: the ring cannot hold more than its capacity
+                rows = self._rest(market, sym, '1m', min(need, ring.capacity))
+        elif not fresh:
+            # incremental refresh from the last (possibly open) bar
+            missing = int((now * 1000 - last) // MINUTE_MS) + 1
+            rows = self._rest(market, sym, '1m', max(2, missing), int(last))
+        else:
+            rows = None
+        with self._lock:
+            if rows is not None:
+                if created and not rows:
+                    raise ValueError(f'no klines for {market} {sym}')
+                if len(ring) and rows and rows[0][0] > ring.last_open_time():
+                    for r in rows:
+                        ring.put(r)
+                else:
+                    ring.merge(rows)
+                st.fetched_at = now
+            if created:
+                self._series[key] = st
+        if self._stream_enabled:
+            self._stream(market).want(sym)
+        return st
+
+    def _refresh_minutes(self, market: str, sym: str) -> None:
+        """Fill the gap since the last 1m bar (after a stream reconnect)."""
+        with self._lock:
+            st = self._series.get((market, sym))
+            last = st.ring.last_open_time() if st is not None else None
+        if last is None:
+            return
+        missing = int((time.time() * 1000 - last) // MINUTE_MS) + 1
+        rows = self._rest(market, sym, '1m', max(2, missing), int(last))
+        with self._lock:
+            st.ring.merge(rows)
+            st.fetched_at = time.time()
+
+    def on_minute(self, market: str, symbol: str, row: Row, closed: bool = False) -> None:
+        """Apply a 1m kline update from the stream."""
+        with self._lock:
+            st = self._series.get((market, symbol))
+            if st is None:
+                return
+            st.ring.put(row)
+            st.live = True
+            st.updated_at = time.time()
+        self.ws_updates += 1
+        if closed and self._listeners:
+            self._emit(MarketEvent('kline', market, symbol, row[6], row[4], row))
+
+    def on_mark(self, symbol: str, price: float, funding_rate: Optional[float], ts: float) -> None:
+        """Record a futures mark price update from the stream."""
+        self._marks[symbol] = (price, funding_rate, ts)
+        if self._listeners:
+            self._emit(MarketEvent('mark', 'futures', symbol, ts, price, None, funding_rate))
+
+    def mark(self, symbol: str, max_age_s: float = 10.0) -> Optional[Tuple[float, Optional[float]]]:
+        """Latest streamed (mark price, funding rate) of a watched futures symbol.
+
+        Age is measured on ``recorder.now()``, so replayed marks stay fresh on
+        the simulated clock.
+        """
+        m = self._marks.get(symbol_key(symbol))
+        if m is None or recorder.now() * 1000 - m[2] > max_age_s * 1000:
+            return None
+        return m[0], m[1]
+
+    # -- listeners and pins --------------------------------------------------------
+    def add_listener(self, fn: Listener) -> None:
+        """Call ``fn(MarketEvent)`` from the stream's loop thread; keep it cheap."""
+        with self._lock:
+            self._listeners = self._listeners + (fn,)
+
+    def remove_listener(self, fn: Listener) -> None:
+        with self._lock:
+            self._listeners = tuple(f for f in self._listeners if f is not fn)
+
+    def _emit(self, ev: MarketEvent) -> None:
+        for fn in self._listeners:
+            try:
+                fn(ev)
+            except Exception as e:
+                print(f'[klines] listener error: {e}')
+
+    def watch(self, symbol: str, market: str = 'futures', mark: bool = False) -> bool:
+        """Pin a symbol's 1m series against idle eviction and stream it
+        (plus its mark price when ``mark``). Returns False without streaming."""
+        market = normalize_market(market)
+        sym = symbol_key(symbol)
+        with self._lock:
+            self._pins[(market, sym)] = self._pins.get((market, sym), 0) + 1
+            if mark:
+                self._pins[('mark', sym)] = self._pins.get(('mark', sym), 0) + 1
+        if not self._stream_enabled:
+            return False
+        try:
+            self._minutes(market, sym, 2)
+        except Exception as e:
+            print(f'[klines] watch {market} {sym} failed: {e}')
+        if mark and market == 'futures':
+            self._stream('futures').want_mark(sym)
+        return True
+
+    def unwatch(self, symbol: str, market: str = 'futures', mark: bool = False) -> None:
+        market = normalize_market(market)
+        sym = symbol_key(symbol)
+        keys = [(market, sym)] + ([('mark', sym)] if mark else [])
+        with self._lock:
+            for k in keys:
+                n = self._pins.get(k, 0) - 1
+                if n > 0:
+                    self._pins[k] = n
+                else:
+                    self._pins.pop(k, None)
+            drop_mark = mark and ('mark', sym) not in self._pins
+        if drop_mark and market == 'futures':
+            with self._lock:
+                stream = self._streams.get('futures')
+            if stream is not None:
+                stream.drop_mark(sym)
+            self._marks.pop(sym, None)
+
+    def set_live(self, market: str, symbols: Iterable[str], live: bool) -> None:
+        with self._lock:
+            for sym in symbols:
+                st = self._series.get((market, sym))
+                if st is not None:
+                    st.live = live
+
+    def _evict_idle(self) -> None:
+        """Drop series nobody read for ``idle_s`` (checked at most once a minute)."""
+        now = time.time()
+        if now - self._last_evict < 60.0:
+            return
+        self._last_evict = now
+        cutoff = now - self.idle_s
+        with self._lock:
+            for key in [k for k, st in self._series.items() if st.last_access < cutoff and k not in self._pins]:
+                del self._series[key]
+
+    def symbols(self, market: str) -> Set[str]:
+        with self._lock:
+            return {s for (m, s) in self._series if m == market}
+
+    # -- derived intervals ---------------------------------------------------------
+    def _derived(self, market: str, sym: str, interval: str, ms: int, limit: int,
+                 start_time: Optional[float]) -> List[Row]:
+        now_ms = time.time() * 1000
+        cur_bucket = now_ms - now_ms % ms
+        # 1m bars needed to build the open bar of the current bucket
+        st = self._minutes(market, sym, int((now_ms - cur_bucket) // MINUTE_MS) + 1)
+        want = limit if start_time is None else max(limit, int((now_ms - start_time) // ms) + 1)
+        with self._lock:
+            minutes = st.ring
+            last_min = minutes.last_open_time()
+            if last_min is not None:
+                cur_bucket = last_min - last_min % ms
+            d = st.derived.get(interval)
+            stale = d is None or want > d.requested or (
+                d.last_open_time() is not None and minutes.first_open_time() is not None
+                and d.last_open_time() + ms < minutes.first_open_time())
+        if stale:
+            rows = self._rest(market, sym, interval, want + 1)
+            closed = [r for r in rows if r[0] < cur_bucket]
+            with self._lock:
+                d = st.derived.get(interval)
+                if d is None:
+                    d = st.derived[interval] = KlineRing(max(self.capacity, want))
+                d.grow(want)
+                d.merge(closed)
+                d.requested = max(d.requested, want)
+        with self._lock:
+            d.grow(want)
+            # roll closed buckets forward from the 1m ring
+            nxt = (d.last_open_time() + ms) if len(d) else cur_bucket
+            while nxt < cur_bucket:
+                bar = aggregate(minutes.between(nxt, nxt + ms), int(nxt), ms)
+                if bar is not None:
+                    d.put(bar)
+                nxt += ms
+            open_bar = aggregate(minutes.between(cur_bucket, cur_bucket + ms), int(cur_bucket), ms)
+            out = d.tail(limit - (1 if open_bar is not None else 0), start_time)
+        if open_bar is not None:
+            out.append(open_bar)
+        return out
+
+    def _rest_cached(self, market: str, sym: str, interval: str, limit: int,
+                     start_time: Optional[float]) -> List[Row]:
+        key = (market, sym, interval)
+        hit = self._rest_cache.get(key)
+        if hit is not None and time.time() - hit[0] < max(60.0, self.rest_ttl) and len(hit[1]) >= limit \
+                and (start_time is None or (hit[1] and hit[1][0][0] <= start_time)):
+            rows = hit[1]
+        else:
+            rows = self._rest(market, sym, interval, limit, int(start_time) if start_time is not None else None)
+            self._rest_cache[key] = (time.time(), rows)
+        if start_time is not None:
+            rows = [r for r in rows if r[0] >= start_time]
+        return rows[-limit:]
+
+    # -- public API ----------------------------------------------------------------
+    def get_rows(self, symbol: str, interval: str = '1m', limit: int = 100, market: str = 'spot',
+                 start_time: Optional[float] = None) -> List[Row]:
+        """Like ``get_klines`` but returns numeric ring rows (tuples)."""
+        market = normalize_market(market)
+        sym = symbol_key(symbol)
+        limit = max(1, int(limit))
+        self.reads += 1
+        self._evict_idle()
+        ms = INTERVAL_MS.get(interval)
+        if ms is None or ms > DAY_MS:
+            return self._rest_cached(market, sym, interval, limit, start_time)
+        if ms == MINUTE_MS:
+            need = limit
+            if start_time is not None:
+                need = max(need, int((time.time() * 1000 - start_time) // MINUTE_MS) + 1)
+            st = self._minutes(market, sym, need, start_time)
+            with self._lock:
+                return st.ring.tail(limit, start_time)
+        return self._derived(market, sym, interval, ms, limit, start_time)
+
+    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100, market: str = 'spot',
+                   start_time: Optional[float] = None) -> List[List[Any]]:
+        """Return the last ``limit`` klines (optionally only those opening at or
+        after ``start_time`` ms) in Binance REST layout, oldest first.
+
+        Raises on a REST failure for a symbol the store has no data for.
+        """
+        return [to_kline(r) for r in self.get_rows(symbol, interval, limit, market, start_time)]
+
+    async def get_klines_async(self, symbol: str, interval: str = '1m', limit: int = 100,
+                               market: str = 'spot', start_time: Optional[float] = None) -> List[List[Any]]:
+        """``get_klines`` for coroutines; REST backfills run off the event loop."""
+        return await asyncio.to_thread(self.get_klines, symbol, interval, limit, market, start_time)
+
+    # -- streams -------------------------------------------------------------------
+    def _stream(self, market: str) -> '_KlineStream':
+        with self._lock:
+            s = self._streams.get(market)
+            if s is None:
+                s = self._streams[market] = _KlineStream(self, market)
+            return s
+
+    def stop(self) -> None:
+        with self._lock:
+            streams = list(self._streams.values())
+            self._streams.clear()
+        for s in streams:
+            s.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            series = list(self._series.items())
+            streams = {m: s.stats() for m, s in self._streams.items()}
+        return {
+            'series': len(series),
+            'live': sum(1 for _k, st in series if st.live),
+            'pinned': len(self._pins),
+            'marks': len(self._marks),
+            'listeners': len(self._listeners),
+            'derived': sum(len(st.derived) for _k, st in series),
+            'reads': self.reads,
+            'rest_calls': self.rest_calls,
+            'ws_updates': self.ws_updates,
+            'streaming': self._stream_enabled,
+            'streams': streams,
+        }
+
+
+class _KlineStream:
+    """One combined-stream connection for a market.
+
+    Carries ``<symbol>@kline_1m`` for every series the store holds and, on
+    futures, ``<symbol>@markPrice@1s`` for watched symbols. Subscriptions
+    change over the open socket (SUBSCRIBE/UNSUBSCRIBE, at most two control
+    messages a second to stay under Binance's message limit).
+    """
+
+    BATCH = 100
+
+    def __init__(self, store: KlineStore, market: str):
+        self.store = store
+        self.market = market
+        self._lock = threading.Lock()
+        self._wanted: Set[str] = set()
+        self._marks: Set[str] = set()
+        self._subscribed: Set[str] = set()
+        self._handle: Optional[FeederHandle] = None
+        self._msg_id = 0
+        self.connected = False
+        self.reconnects = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def _ensure_running(self) -> None:
+        if self._handle is None:
+            self._handle = spawn_feeder(f'klines-{self.market}', self._main)
+
+    def want(self, sym: str) -> bool:
+        with self._lock:
+            if sym not in self._wanted:
+                if len(self._wanted) + len(self._marks) >= self.store.max_streams:
+                    self.rejected += 1
+                    return False
+                self._wanted.add(sym)
+            self._ensure_running()
+        return True
+
+    def want_mark(self, sym: str) -> bool:
+        with self._lock:
+            if sym not in self._marks:
+                if len(self._wanted) + len(self._marks) >= self.store.max_streams:
+                    self.rejected += 1
+                    return False
+                self._marks.add(sym)
+            self._ensure_running()
+        return True
+
+    def drop_mark(self, sym: str) -> None:
+        with self._lock:
+            self._marks.discard(sym)
+
+    def stop(self) -> None:
+        with self._lock:
+            handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.stop()
+
+    async def _send(self, ws, method: str, streams: List[str]) -> None:
+        self._msg_id += 1
+        await ws.send(json.dumps({'method': method, 'params': streams, 'id': self._msg_id}))
+
+    def _streams(self) -> Set[str]:
+        held = self.store.symbols(self.market)
+        with self._lock:
+            # series evicted for idleness are unsubscribed
+            self._wanted &= held
+            out = {f'{s.lower()}@kline_1m' for s in self._wanted}
+            out.update(f'{s.lower()}@markPrice@1s' for s in self._marks)
+        return out
+
+    async def _sync(self, ws) -> None:
+        wanted = self._streams()
+        add = sorted(wanted - self._subscribed)[:self.BATCH]
+        drop = sorted(self._subscribed - wanted)[:self.BATCH]
+        if drop:
+            await self._send(ws, 'UNSUBSCRIBE', drop)
+            self._subscribed.difference_update(drop)
+        if add:
+            await self._send(ws, 'SUBSCRIBE', add)
+            self._subscribed.update(add)
+            # close the gap between the REST backfill and the first stream update
+            syms = [s.split('@', 1)[0].upper() for s in add if s.endswith('@kline_1m')]
+            await asyncio.gather(*[run_blocking(self.store._refresh_minutes, self.market, s) for s in syms],
+                                 return_exceptions=True)
+
+    def _on_message(self, raw: Any) -> None:
+        msg = json.loads(raw)
+        data = msg.get('data', msg) if isinstance(msg, dict) else None
+        if not isinstance(data, dict):
+            return
+        kind = data.get('e')
+        if kind == 'kline':
+            k = data['k']
+            row = (float(k['t']), float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v']),
+                   float(k['T']), float(k['q']), float(k['n']), float(k['V']), float(k['Q']))
+            self.store.on_minute(self.market, k['s'], row, bool(k.get('x')))
+        elif kind == 'markPriceUpdate':
+            r = data.get('r')
+            self.store.on_mark(data['s'], float(data['p']), float(r) if r not in (None, '') else None,
+                               float(data.get('E') or recorder.now() * 1000))
+
+    async def _main(self) -> None:
+        backoff = 1.0
+        while True:
+            with self._lock:
+                wanted = bool(self._wanted or self._marks)
+            if not wanted:
+                await asyncio.sleep(1.0)
+                continue
+            try:
+                async with recorder.connect(f'klines-{self.market}', WS_URLS[self.market], max_size=None,
+                                            ping_interval=20) as ws:
+                    self.connected = True
+                    backoff = 1.0
+                    self._subscribed = set()
+                    next_sync = 0.0
+                    while True:
+                        if time.time() >= next_sync:
+                            await self._sync(ws)
+                            next_sync = time.time() + 1.0
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), 1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        try:
+                            self._on_message(raw)
+                        except Exception:
+                            pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f'{type(e).__name__}: {e}'
+                print(f'[klines-{self.market}] stream error: {self.last_error}')
+            self.connected = False
+            self.reconnects += 1
+            self.store.set_live(self.market, [s.split('@', 1)[0].upper() for s in self._subscribed], False)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'connected': self.connected,
+            'wanted': len(self._wanted),
+            'marks': len(self._marks),
+            'subscribed': len(self._subscribed),
+            'rejected': self.rejected,
+            'reconnects': self.reconnects,
+            'last_error': self.last_error,
+        }
+
+
+_STORE: Optional[KlineStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_kline_store() -> KlineStore:
+    """Return the process-wide kline store (created on first use)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = KlineStore()
+        return _STORE
+
+
+def get_klines(symbol: str, interval: str = '1m', limit: int = 100, market: str = 'spot',
+               start_time: Optional[float] = None) -> List[List[Any]]:
+    """Shortcut for ``get_kline_store().get_klines(...)``."""
+    return get_kline_store().get_klines(symbol, interval, limit, market, start_time)
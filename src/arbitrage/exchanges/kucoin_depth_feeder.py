@@ -3,14 +3,20 @@ from __future__ import annotations
 import asyncio
 import json
 import time
-import threading
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 try:
     import websockets
 except Exception:
     websockets = None
 
+from . import recorder
+from .feeder_runtime import FeederHandle, run_blocking, spawn_feeder
+from .book_events import get_bus
+from .symbol_registry import canonical, get_registry
+from .l2_book import L2Book, BookViews, GAP, STALE
+from ..utils import http_client as _http
+
 
 class KucoinDepthFeeder:
     """Simple KuCoin L2 feeder that maintains top-of-book snapshots.
@@ -25,15 +31,13 @@ class KucoinDepthFeeder:
     def __init__(self, symbols: List[str]):
         # store normalized symbol names (e.g. BTCUSDT)
         self.symbols = [s.upper().replace('/', '').replace('-', '') for s in symbols]
-        self._books: Dict[str, Dict[str, List]] = {}
-        # per-symbol price level maps for incremental updates
-        self._levels: Dict[str, Dict[str, Dict[float, float]]] = {}
-        # per-symbol last applied sequence number
-        self._seq: Dict[str, int] = {}
+        # per-symbol incremental ladders (price levels + last applied sequence)
+        self._l2: Dict[str, L2Book] = {}
+        # read-only {'asks','bids','timestamp'} views over _l2 (top 200 levels)
+        self._books = BookViews(self._l2, depth=200)
         self._ts = 0.0
         self._running = False
-        self._thread: threading.Thread | None = None
-        self._loop = None
+        self._handle: Optional[FeederHandle] = None
 
     def start(self):
         if websockets is None:
@@ -41,22 +45,14 @@ class KucoinDepthFeeder:
         if self._running:
             return
         self._running = True
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        # hosted as a task on the shared feeder loop (see feeder_runtime)
+        self._handle = spawn_feeder('kucoin-depth', self._ws_main)
 
     def stop(self):
         self._running = False
         try:
-            if self._thread is not None:
-                self._thread.join(timeout=2.0)
-        except Exception:
-            pass
-
-    def _run_loop(self):
-        self._loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self._loop)
-        try:
-            self._loop.run_until_complete(self._ws_main())
+            if self._handle is not None:
+                self._handle.stop(timeout=2.0)
         except Exception:
             pass
 
@@ -68,18 +64,19 @@ class KucoinDepthFeeder:
         # Build a helper to fetch the websocket endpoint/token.
         def _get_bullet_endpoint():
             try:
-                import urllib.request as _urlreq
                 # KuCoin docs show POST /api/v1/bullet-public to obtain an endpoint + token
-                req = _urlreq.Request('https://api.kucoin.com/api/v1/bullet-public', data=b'', headers={'User-Agent': 'arb-kucoin-feeder/1.0', 'Content-Type': 'application/json'}, method='POST')
-                with _urlreq.urlopen(req, timeout=5) as resp:
-                    raw = resp.read()
-                    obj = json.loads(raw.decode('utf-8'))
-                    data = obj.get('data') or {}
-                    inst = data.get('instanceServers') or []
-                    token = data.get('token')
-                    if inst and isinstance(inst, list):
-                        endpoint = inst[0].get('endpoint')
-                        return endpoint, token
+                resp = _http.request_sync('POST', 'https://api.kucoin.com/api/v1/bullet-public',
+                                          headers={'User-Agent': 'arb-kucoin-feeder/1.0', 'Content-Type': 'application/json'},
+                                          timeout=5)
+                if not (200 <= resp.status_code < 300):
+                    return None, None
+                obj = resp.json()
+                data = obj.get('data') or {}
+                inst = data.get('instanceServers') or []
+                token = data.get('token')
+                if inst and isinstance(inst, list):
+                    endpoint = inst[0].get('endpoint')
+                    return endpoint, token
             except Exception:
                 return None, None
             return None, None
@@ -87,48 +84,44 @@ class KucoinDepthFeeder:
         def _fetch_snapshot_for(sym_hyphen: str):
             """Fetch REST L2 snapshot for hyphenated symbol (e.g. BTC-USDT).
 
-            Returns tuple (levels_map, seq) where levels_map={'asks':{price:qty}, 'bids':{price:qty}}
+            Returns tuple (levels, seq) where levels={'asks': [[price, qty], ...], 'bids': [...]}
             and seq is an int sequence value if present.
             """
             try:
-                import urllib.request as _urlreq
-                url = f'https://api.kucoin.com/api/v1/market/orderbook/level2?symbol={sym_hyphen}&limit=200'
-                req = _urlreq.Request(url, headers={'User-Agent': 'arb-kucoin-feeder/1.0'})
-                with _urlreq.urlopen(req, timeout=5) as resp:
-                    raw = resp.read()
-                    obj = json.loads(raw.decode('utf-8'))
-                    data = obj.get('data') or {}
-                    asks = data.get('asks') or []
-                    bids = data.get('bids') or []
-                    seq = data.get('sequence') or data.get('sequenceStart') or data.get('sequenceEnd') or 0
-                    try:
-                        seq = int(seq)
-                    except Exception:
-                        seq = 0
-                    a_map = {}
-                    b_map = {}
-                    for a in asks:
-                        try:
-                            p = float(a[0]) if isinstance(a, (list, tuple)) else float(a)
-                            q = float(a[1]) if isinstance(a, (list, tuple)) and len(a) > 1 else 0.0
-                            a_map[p] = q
-                        except Exception:
-                            continue
-                    for b in bids:
-                        try:
-                            p = float(b[0]) if isinstance(b, (list, tuple)) else float(b)
-                            q = float(b[1]) if isinstance(b, (list, tuple)) and len(b) > 1 else 0.0
-                            b_map[p] = q
-                        except Exception:
-                            continue
-                    return {'asks': a_map, 'bids': b_map}, seq
+                obj = _http.get_json_sync('https://api.kucoin.com/api/v1/market/orderbook/level2',
+                                          params={'symbol': sym_hyphen, 'limit': 200},
+                                          headers={'User-Agent': 'arb-kucoin-feeder/1.0'}, timeout=5)
+                data = obj.get('data') or {}
+                asks = data.get('asks') or []
+                bids = data.get('bids') or []
+                seq = data.get('sequence') or data.get('sequenceStart') or data.get('sequenceEnd') or 0
+                try:
+                    seq = int(seq)
+                except Exception:
+                    seq = 0
+                return {'asks': asks, 'bids': bids}, seq
             except Exception:
-                return {'asks': {}, 'bids': {}}, 0
+                return {'asks': [], 'bids': []}, 0
+
+        async def _load_snapshot(sym_hyphen: str) -> L2Book:
+            # REST call runs off the shared feeder loop
+            snap, seq = await run_blocking(_fetch_snapshot_for, sym_hyphen) or ({'asks': [], 'bids': []}, 0)
+            # the topic symbol is an exact listing ('BTC-USDT'); lets get_tickers split keys
+            get_registry().register('kucoin', sym_hyphen)
+            sym_key = sym_hyphen.replace('-', '')
+            book = self._l2.get(sym_key)
+            if book is None:
+                book = L2Book(sym_key)
+                self._l2[sym_key] = book
+            book.load_snapshot(snap.get('asks', []), snap.get('bids', []), seq)
+            self._ts = book.timestamp or recorder.now()
+            get_bus().publish_book('kucoin', book)
+            return book
 
         # Reconnect loop: try to keep websocket alive and refresh token when needed
         backoff = 1.0
         while self._running:
-            base, token = _get_bullet_endpoint()
+            base, token = await run_blocking(_get_bullet_endpoint) or (None, None)
             if not base:
                 base = 'wss://ws-api.kucoin.com/endpoint'
 
@@ -147,7 +140,7 @@ class KucoinDepthFeeder:
                     ws_url = base
 
             try:
-                async with websockets.connect(ws_url, max_size=None) as ws:
+                async with recorder.connect('kucoin-depth', ws_url, max_size=None) as ws:
                     # wait for welcome (server may send welcome/pingInterval)
                     ping_interval = 20.0
                     connect_id = None
@@ -207,8 +200,6 @@ class KucoinDepthFeeder:
                         pass
 
                     # process incoming messages until stopped
-                    raw_log = []
-                    start_ts = time.time()
                     while self._running:
                         # refresh token if it's getting close to 24h
                         try:
@@ -236,44 +227,13 @@ class KucoinDepthFeeder:
                                                 if s.endswith(q):
                                                     topic_sym = f"{s[:-len(q)]}-{q}"
                                                     break
-                                            snap, seq = _fetch_snapshot_for(topic_sym)
-                                            sym_key = topic_sym.replace('-', '')
-                                            self._levels[sym_key] = {'asks': snap.get('asks', {}), 'bids': snap.get('bids', {})}
-                                            a_map = self._levels.get(sym_key, {}).get('asks', {})
-                                            b_map = self._levels.get(sym_key, {}).get('bids', {})
-                                            a_list = sorted(((p, q) for p, q in a_map.items()), key=lambda x: x[0])[:200]
-                                            b_list = sorted(((p, q) for p, q in b_map.items()), key=lambda x: x[0], reverse=True)[:200]
-                                            ts = time.time()
-                                            self._books[sym_key] = {'asks': a_list, 'bids': b_list, 'timestamp': ts}
-                                            self._ts = ts
-                                            try:
-                                                if seq:
-                                                    self._seq[sym_key] = int(seq)
-                                            except Exception:
-                                                pass
+                                            await _load_snapshot(topic_sym)
                                         except Exception:
                                             continue
                             except Exception:
                                 pass
                             continue
                         try:
-                            # capture raw messages for debugging (short-lived)
-                            if len(raw_log) < 200 and (time.time() - start_ts) < 30:
-                                try:
-                                    raw_log.append(msg)
-                                except Exception:
-                                    pass
-                            elif len(raw_log) == 200 or (time.time() - start_ts) >= 30:
-                                try:
-                                    with open('kucoin_raw_messages.log', 'w', encoding='utf-8') as fh:
-                                        for m in raw_log:
-                                            try:
-                                                fh.write(m if isinstance(m, str) else str(m))
-                                                fh.write('\n')
-                                            except Exception:
-                                                pass
-                                except Exception:
-                                    pass
                             # KuCoin messages may wrap payloads under 'data' or 'body'
                             obj = json.loads(msg)
                             data = obj.get('data') or obj.get('body') or obj
@@ -286,15 +246,13 @@ class KucoinDepthFeeder:
                                 sym_hyphen = (data.get('symbol') or data.get('s') or '').upper()
                             sym = sym_hyphen.replace('-', '')
 
-                            ts = time.time()
                             if not sym:
                                 continue
 
                             # ensure we have a snapshot/levels for this symbol
-                            if sym not in self._levels or self._seq.get(sym, 0) == 0:
-                                snap, seq = _fetch_snapshot_for(sym_hyphen)
-                                self._levels[sym] = {'asks': snap.get('asks', {}), 'bids': snap.get('bids', {})}
-                                self._seq[sym] = seq
+                            book = self._l2.get(sym)
+                            if book is None or book.seq == 0:
+                                book = await _load_snapshot(sym_hyphen)
 
                             # sequence-aware diff application
                             try:
@@ -309,56 +267,24 @@ class KucoinDepthFeeder:
                                 except Exception:
                                     seq_end = None
 
-                                if seq_start is not None and self._seq.get(sym, 0):
-                                    expected_next = self._seq.get(sym, 0) + 1
-                                    if seq_start > expected_next:
-                                        try:
-                                            snap, seq = _fetch_snapshot_for(sym_hyphen)
-                                            self._levels[sym] = {'asks': snap.get('asks', {}), 'bids': snap.get('bids', {})}
-                                            self._seq[sym] = seq
-                                        except Exception:
-                                            pass
-                                        continue
-                                    if seq_start <= self._seq.get(sym, 0):
-                                        continue
-
+                                # stale diffs are dropped; a gap means we missed
+                                # messages, so resync from a fresh snapshot
                                 changes = data.get('changes') or {}
-                                for side in ('asks', 'bids'):
-                                    clist = changes.get(side) or []
-                                    for ch in clist:
-                                        try:
-                                            if isinstance(ch, (list, tuple)) and len(ch) >= 2:
-                                                p = float(ch[0])
-                                                q = float(ch[1])
-                                                lm = self._levels[sym].setdefault(side, {})
-                                                if q == 0.0:
-                                                    lm.pop(p, None)
-                                                else:
-                                                    lm[p] = q
-                                        except Exception:
-                                            continue
-
-                                if seq_end is not None:
-                                    try:
-                                        self._seq[sym] = int(seq_end)
-                                    except Exception:
-                                        pass
-                                else:
+                                status = book.apply_diff(
+                                    changes.get('asks') or [],
+                                    changes.get('bids') or [],
+                                    first_seq=seq_start,
+                                    last_seq=seq_end,
+                                )
+                                if status == GAP:
                                     try:
-                                        self._seq[sym] = self._seq.get(sym, 0) + 1
+                                        await _load_snapshot(sym_hyphen)
                                     except Exception:
                                         pass
-                            except Exception:
-                                pass
-
-                            # rebuild top lists (asks sorted asc, bids desc) limited to 200
-                            try:
-                                a_map = self._levels.get(sym, {}).get('asks', {})
-                                b_map = self._levels.get(sym, {}).get('bids', {})
-                                a_list = sorted(((p, q) for p, q in a_map.items()), key=lambda x: x[0])[:200]
-                                b_list = sorted(((p, q) for p, q in b_map.items()), key=lambda x: x[0], reverse=True)[:200]
-                                self._books[sym] = {'asks': a_list, 'bids': b_list, 'timestamp': ts}
-                                self._ts = ts
+                                    continue
+                                self._ts = book.timestamp or recorder.now()
+                                if status != STALE:
+                                    get_bus().publish_book('kucoin', book)
                             except Exception:
                                 pass
                         except Exception:
@@ -385,12 +311,10 @@ class KucoinDepthFeeder:
 
     def get_order_book(self, symbol: str, depth: int = 10) -> dict:
         key = symbol.upper().replace('/', '').replace('-', '')
-        b = self._books.get(key)
-        if not b:
+        book = self._l2.get(key)
+        if book is None:
             return {'asks': [], 'bids': []}
-        asks = b.get('asks', [])[:depth]
-        bids = b.get('bids', [])[:depth]
-        return {'asks': asks, 'bids': bids}
+        return book.order_book(depth)
 
     def get_tickers(self) -> Dict[str, Any]:
         out = {}
@@ -405,22 +329,11 @@ class KucoinDepthFeeder:
                     last = asks[0][0]
                 if last is None:
                     continue
-                # key is normalized like 'BTCUSDT' -> recover BASE/QUOTE
-                s = key
-                common_quotes = ['USDT', 'USDC', 'BUSD', 'BTC', 'ETH', 'USD']
-                quote = None
-                base = None
-                for q in common_quotes:
-                    if s.endswith(q) and len(s) > len(q):
-                        quote = q
-                        base = s[:-len(q)]
-                        break
-                if quote is None:
-                    quote = s[-3:]
-                    base = s[:-3]
-                if not base:
+                # key is normalized like 'BTCUSDT'; the registry knows the
+                # listing from the hyphenated topic symbol
+                symbol_std = canonical(key, 'kucoin')
+                if symbol_std.startswith('/'):
                     continue
-                symbol_std = f"{base}/{quote}"
                 out[symbol_std] = {'last': last, 'timestamp': v.get('timestamp')}
             except Exception:
                 continue
@@ -0,0 +1,315 @@
+"""Incremental sorted L2 order book shared by the diff-based depth feeders.
+
+The feeders used to keep each side of a book as a plain ``{price: qty}``
+dict and re-sort the whole side (``sorted(...)[:200]``) after every
+websocket message. ``L2Book`` keeps each side as a dict plus a sorted key
+ladder maintained with ``bisect``, so applying one level is a binary search
+plus (for new/removed prices) a list insert/delete.
+
+Keys are stored so that the *best* price sits at the end of each ladder
+(asks as ``-price``, bids as ``price``, both ascending). Most traffic hits
+the top of the book, so inserts and deletes there only move a handful of
+list slots, and a top-N view is a short tail slice.
+
+Sequence tracking follows the usual "first/last update id" scheme shared by
+KuCoin (sequenceStart/sequenceEnd) and Binance (U/u): a diff whose last id
+is not newer than the book is stale, a diff whose first id skips past
+``seq + 1`` is a gap and the caller should resync from a snapshot.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import recorder
+
+Level = Tuple[float, float]
+
+APPLIED = 'applied'
+STALE = 'stale'
+GAP = 'gap'
+
+
+def parse_level(raw) -> Optional[Level]:
+    """Parse a [price, qty(, ...)] list/tuple or 'price,qty' string into floats."""
+    try:
+        if isinstance(raw, (list, tuple)):
+            if len(raw) < 2:
+                return None
+            return float(raw[0]), float(raw[1])
+        if isinstance(raw, str):
+            parts = raw.split(',')
+            return float(parts[0]), float(parts[1])
+        if isinstance(raw, dict):
+            p = raw.get('price', raw.get('p'))
+            q = raw.get('quantity', raw.get('qty', raw.get('q', raw.get('v'))))
+            return float(p), float(q)
+    except Exception:
+        return None
+    return None
+
+
+class _Side:
+    """One side of the book: price -> qty dict plus a sorted key ladder."""
+
+    __slots__ = ('sign', 'qty', 'keys')
+
+    def __init__(self, sign: float):
+        # sign maps a price to its ladder key so the best level is last
+        self.sign = sign
+        self.qty: Dict[float, float] = {}
+        self.keys: List[float] = []
+
+    def clear(self) -> None:
+        self.qty = {}
+        self.keys = []
+
+    def load(self, levels: Iterable[Level]) -> None:
+        qty: Dict[float, float] = {}
+        for p, q in levels:
+            if q > 0.0:
+                qty[p] = q
+            else:
+                qty.pop(p, None)
+        sign = self.sign
+        self.qty = qty
+        self.keys = sorted(sign * p for p in qty)
+
+    def set(self, price: float, qty: float) -> int:
+        """Set or remove one level; return its distance from the top (0 = best)."""
+        key = self.sign * price
+        keys = self.keys
+        if qty > 0.0:
+            if price not in self.qty:
+                i = bisect_left(keys, key)
+                keys.insert(i, key)
+            else:
+                i = bisect_left(keys, key)
+            self.qty[price] = qty
+            return len(keys) - 1 - i
+        if self.qty.pop(price, None) is None:
+            return len(keys)
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+        return len(keys) - i
+
+    def top(self, n: int) -> List[Level]:
+        sign = self.sign
+        qty = self.qty
+        out: List[Level] = []
+        for key in reversed(self.keys[-n:] if n > 0 else []):
+            p = sign * key
+            q = qty.get(p)
+            if q is not None:
+                out.append((p, q))
+        return out
+
+    def trim(self, max_levels: int) -> None:
+        excess = len(self.keys) - max_levels
+        if excess <= 0:
+            return
+        sign = self.sign
+        for key in self.keys[:excess]:
+            self.qty.pop(sign * key, None)
+        del self.keys[:excess]
+
+
+class L2Book:
+    """Sorted price ladder for one symbol with O(log n) level updates.
+
+    - load_snapshot(asks, bids, seq): replace the whole book (REST snapshot)
+    - apply_diff(asks, bids, first_seq, last_seq): sequence-checked diff;
+      returns APPLIED, STALE or GAP (nothing is applied for STALE/GAP)
+    - replace_side(side, levels): overwrite one side (partial-depth streams)
+    - top(side, n) / best_bid() / best_ask(): cheap views from the ladder
+    - view(depth): {'asks', 'bids', 'timestamp'} dict in the feeders'
+      historical ``_books`` shape, cached until the next change
+
+    ``max_levels`` bounds memory: levels beyond it on the far side of the
+    ladder are dropped (in batches, so trimming stays amortised).
+    """
+
+    def __init__(self, symbol: str = '', max_levels: Optional[int] = 1000):
+        self.symbol = symbol
+        self.max_levels = max_levels
+        self.seq = 0
+        self.timestamp: Optional[float] = None
+        # bumped on every change; used to cache views and by change listeners
+        self.version = 0
+        self._asks = _Side(-1.0)
+        self._bids = _Side(1.0)
+        self._view_cache: Dict[int, Tuple[int, dict]] = {}
+
+    # -- mutation ---------------------------------------------------------------
+    def _side(self, side: str) -> _Side:
+        if side in ('asks', 'ask', 'sell', 'a'):
+            return self._asks
+        if side in ('bids', 'bid', 'buy', 'b'):
+            return self._bids
+        raise ValueError(f'unknown book side: {side!r}')
+
+    def _touch(self, ts: Optional[float]) -> None:
+        self.version += 1
+        self.timestamp = recorder.now() if ts is None else ts
+
+    def _maybe_trim(self) -> None:
+        limit = self.max_levels
+        if not limit:
+            return
+        # let each side overshoot by 25% so trimming runs once per batch
+        slack = limit + max(1, limit // 4)
+        for s in (self._asks, self._bids):
+            if len(s.keys) > slack:
+                s.trim(limit)
+
+    def clear(self) -> None:
+        self._asks.clear()
+        self._bids.clear()
+        self.seq = 0
+        self._touch(None)
+
+    def load_snapshot(self, asks: Iterable, bids: Iterable, seq: int = 0, ts: Optional[float] = None) -> None:
+        """Replace both sides from raw snapshot levels and set the sequence."""
+        self._asks.load(lv for lv in map(parse_level, asks or []) if lv is not None)
+        self._bids.load(lv for lv in map(parse_level, bids or []) if lv is not None)
+        try:
+            self.seq = int(seq or 0)
+        except Exception:
+            self.seq = 0
+        if self.max_levels:
+            self._asks.trim(self.max_levels)
+            self._bids.trim(self.max_levels)
+        self._touch(ts)
+
+    def replace_side(self, side: str, levels: Iterable, ts: Optional[float] = None) -> None:
+        """Overwrite one side with the given raw levels (no sequence check).
+
+        Input where no level parses leaves the side untouched; use ``clear()``
+        to empty a book.
+        """
+        parsed = [lv for lv in map(parse_level, levels or []) if lv is not None]
+        if not parsed:
+            return
+        s = self._side(side)
+        s.load(parsed)
+        if self.max_levels:
+            s.trim(self.max_levels)
+        self._touch(ts)
+
+    def update(self, side: str, price: float, qty: float, ts: Optional[float] = None) -> int:
+        """Set one level (qty <= 0 removes it); return its distance from the top."""
+        depth = self._side(side).set(float(price), float(qty))
+        self._touch(ts)
+        return depth
+
+    def apply(self, asks: Iterable = (), bids: Iterable = (), ts: Optional[float] = None) -> int:
+        """Apply raw level changes without sequence checks.
+
+        Returns the shallowest depth touched (0 = best level changed), or a
+        large number when nothing parsed; callers can use it to skip work
+        when only deep levels moved.
+        """
+        shallowest = 1 << 30
+        for s, levels in ((self._asks, asks), (self._bids, bids)):
+            for raw in levels or ():
+                lv = parse_level(raw)
+                if lv is None:
+                    continue
+                d = s.set(lv[0], lv[1])
+                if d < shallowest:
+                    shallowest = d
+        self._maybe_trim()
+        self._touch(ts)
+        return shallowest
+
+    def check_sequence(self, first_seq: Optional[int], last_seq: Optional[int] = None) -> str:
+        """Classify a diff spanning [first_seq, last_seq] against the book's seq."""
+        if not self.seq:
+            return APPLIED
+        last = last_seq if last_seq is not None else first_seq
+        if last is not None and last <= self.seq:
+            return STALE
+        if first_seq is not None and first_seq > self.seq + 1:
+            return GAP
+        return APPLIED
+
+    def apply_diff(
+        self,
+        asks: Iterable = (),
+        bids: Iterable = (),
+        *,
+        first_seq: Optional[int] = None,
+        last_seq: Optional[int] = None,
+        ts: Optional[float] = None,
+    ) -> str:
+        """Apply a sequenced diff; see ``check_sequence`` for the outcome rules."""
+        status = self.check_sequence(first_seq, last_seq)
+        if status != APPLIED:
+            return status
+        self.apply(asks, bids, ts=ts)
+        if last_seq is not None:
+            self.seq = int(last_seq)
+        elif first_seq is not None:
+            self.seq = int(first_seq)
+        elif self.seq:
+            self.seq += 1
+        return APPLIED
+
+    # -- views ------------------------------------------------------------------
+    def top(self, side: str, n: int = 10) -> List[Level]:
+        return self._side(side).top(n)
+
+    def best_bid(self) -> Optional[Level]:
+        top = self._bids.top(1)
+        return top[0] if top else None
+
+    def best_ask(self) -> Optional[Level]:
+        top = self._asks.top(1)
+        return top[0] if top else None
+
+    def depth(self) -> Tuple[int, int]:
+        """Return (ask_levels, bid_levels)."""
+        return len(self._asks.keys), len(self._bids.keys)
+
+    def is_empty(self) -> bool:
+        return not self._asks.keys and not self._bids.keys
+
+    def view(self, depth: int = 200) -> dict:
+        """Return {'asks', 'bids', 'timestamp'} limited to depth, cached per version."""
+        cached = self._view_cache.get(depth)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        out = {'asks': self._asks.top(depth), 'bids': self._bids.top(depth), 'timestamp': self.timestamp}
+        self._view_cache[depth] = (self.version, out)
+        return out
+
+    def order_book(self, depth: int = 10) -> dict:
+        """Return {'asks', 'bids'} in the feeders' ``get_order_book`` shape."""
+        return {'asks': self._asks.top(depth), 'bids': self._bids.top(depth)}
+
+
+class BookViews(Mapping):
+    """Read-only ``symbol -> {'asks', 'bids', 'timestamp'}`` mapping over L2Books.
+
+    Feeders expose this as ``_books`` so debug endpoints and tools that peek
+    at the historical dict keep working, while the per-message cost stays
+    the incremental ladder update (views are materialised on read).
+    """
+
+    def __init__(self, books: Dict[str, L2Book], depth: int = 200):
+        self._l2 = books
+        self.depth = depth
+
+    def __getitem__(self, key: str) -> dict:
+        book = self._l2[key]
+        if book.is_empty():
+            raise KeyError(key)
+        return book.view(self.depth)
+
+    def __iter__(self) -> Iterator[str]:
+        return (k for k, b in list(self._l2.items()) if not b.is_empty())
+
+    def __len__(self) -> int:
+        return sum(1 for b in list(self._l2.values()) if not b.is_empty())
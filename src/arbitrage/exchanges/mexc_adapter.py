@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 from typing import Dict, Any, Optional
-import requests
 import time
 import os
 
 from .base import Exchange, Ticker
+from ..utils import http_client as _http
 
 try:
     import ccxt  # type: ignore
@@ -421,7 +421,7 @@ class MEXCExchange:
                 'Accept': 'application/json, text/plain, */*',
                 'Accept-Language': 'en-US,en;q=0.9',
             }
-            r = requests.get(url, headers=headers, timeout=10.0)
+            r = _http.request_sync('GET', url, headers=headers, timeout=10.0)
             if r.status_code == 200:
                 j = r.json()
                 # response often contains a 'data' list of currency entries
@@ -3,8 +3,7 @@ from __future__ import annotations
 import asyncio
 import json
 import time
-import threading
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
 import base64
 import gzip
@@ -12,16 +11,18 @@ import zlib
 import importlib
 import inspect
 import types
-try:
-    import requests
-except Exception:
-    requests = None
-
 try:
     import websockets
 except Exception:
     websockets = None
 
+from . import recorder
+from .feeder_runtime import FeederHandle, run_blocking, spawn_feeder
+from .book_events import get_bus
+from .symbol_registry import canonical
+from .l2_book import L2Book, BookViews
+from ..utils import http_client as _http
+
 
 class MexcDepthFeeder:
     """Lightweight MEXC L2 feeder.
@@ -41,11 +42,12 @@ class MexcDepthFeeder:
     def __init__(self, symbols: List[str]):
         # normalize symbol names (MEXC expects uppercase symbols without separators)
         self.symbols = [s.upper().replace('/', '').replace('-', '') for s in symbols]
-        self._books: Dict[str, Dict[str, List]] = {}
-        self._levels: Dict[str, Dict[str, Dict[float, float]]] = {}
+        # per-symbol sorted ladders; _books exposes top-200 views over them
+        self._l2: Dict[str, L2Book] = {}
+        self._books = BookViews(self._l2, depth=200)
         self._ts = 0.0
         self._running = False
-        self._thread: threading.Thread | None = None
+        self._handle: Optional[FeederHandle] = None
 
     def start(self):
         if websockets is None:
@@ -53,22 +55,14 @@ class MexcDepthFeeder:
         if self._running:
             return
         self._running = True
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        # hosted as a task on the shared feeder loop (see feeder_runtime)
+        self._handle = spawn_feeder('mexc-depth', self._ws_main)
 
     def stop(self):
         self._running = False
         try:
-            if self._thread is not None:
-                self._thread.join(timeout=2.0)
-        except Exception:
-            pass
-
-    def _run_loop(self):
-        self._loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self._loop)
-        try:
-            self._loop.run_until_complete(self._ws_main())
+            if self._handle is not None:
+                self._handle.stop(timeout=2.0)
         except Exception:
             pass
 
@@ -81,7 +75,7 @@ class MexcDepthFeeder:
             try:
                 key = os.environ.get('MEXC_API_KEY') or os.environ.get('ARB_MEXC_API_KEY')
                 secret = os.environ.get('MEXC_API_SECRET') or os.environ.get('ARB_MEXC_API_SECRET')
-                if not key or not requests:
+                if not key:
                     return None
                 # candidate endpoints to try (best-effort). MEXC docs show
                 # GET/POST on /api/v3/userDataStream for listenKey creation/listing
@@ -101,11 +95,11 @@ class MexcDepthFeeder:
                             h = {hn: key}
                             # small timeout to avoid blocking
                             # POST is used to create a new listenKey on many APIs
-                            r = requests.post(url, headers=h, timeout=3)
+                            r = _http.request_sync('POST', url, headers=h, timeout=3)
                         except Exception:
                             # try GET as a fallback (some endpoints expose listing via GET)
                             try:
-                                r = requests.get(url, headers={hn: key}, timeout=3)
+                                r = _http.request_sync('GET', url, headers={hn: key}, timeout=3)
                             except Exception:
                                 continue
                         try:
@@ -138,10 +132,10 @@ class MexcDepthFeeder:
                         signed_url = f"{url}?{query}&signature={sig}"
                         for hn in header_names:
                             try:
-                                r = requests.post(signed_url, headers={hn: key}, timeout=5)
+                                r = _http.request_sync('POST', signed_url, headers={hn: key}, timeout=5)
                             except Exception:
                                 try:
-                                    r = requests.get(signed_url, headers={hn: key}, timeout=5)
+                                    r = _http.request_sync('GET', signed_url, headers={hn: key}, timeout=5)
                                 except Exception:
                                     continue
                             try:
@@ -162,7 +156,7 @@ class MexcDepthFeeder:
             except Exception:
                 return None
 
-        listen_key = _get_listen_key()
+        listen_key = await run_blocking(_get_listen_key)
         if listen_key:
             try:
                 # attach as query param; some servers expect ?listenKey=token
@@ -196,27 +190,17 @@ class MexcDepthFeeder:
             reconnect_backoff = 1.0
             while self._running:
                 try:
-                    async with websockets.connect(base, max_size=None) as ws:
+                    async with recorder.connect('mexc-depth', base, max_size=None) as ws:
                         # send all subscriptions for this chunk
                         for t in chunk:
                             # send the documented array-style subscription: params is an array of topic strings
                             sub = {'method': 'SUBSCRIPTION', 'params': [t], 'id': int(time.time() * 1000)}
-                            # log outgoing subscription for diagnostics
-                            try:
-                                with open('mexc_raw_messages.log', 'a', encoding='utf-8') as fh:
-                                    fh.write('OUT: ' + json.dumps(sub) + '\n')
-                            except Exception:
-                                pass
                             try:
                                 await ws.send(json.dumps(sub))
                             except Exception:
                                 # ignore individual subscribe failures
                                 continue
 
-                        # keep track of a small raw sample for debugging
-                        raw_log: List[str] = []
-                        start_ts = time.time()
-
                         async def _recv_loop():
                             while self._running:
                                 try:
@@ -228,20 +212,6 @@ class MexcDepthFeeder:
                                 except Exception:
                                     return
                                 try:
-                                    if len(raw_log) < 200 and (time.time() - start_ts) < 30:
-                                        raw_log.append(msg if isinstance(msg, str) else str(msg))
-                                    elif len(raw_log) == 200 or (time.time() - start_ts) >= 30:
-                                        try:
-                                            with open('mexc_raw_messages.log', 'w', encoding='utf-8') as fh:
-                                                for m in raw_log:
-                                                    try:
-                                                        fh.write(m)
-                                                        fh.write('\n')
-                                                    except Exception:
-                                                        pass
-                                        except Exception:
-                                            pass
-
                                     # attempt to parse JSON payload
                                     try:
                                         obj = json.loads(msg)
@@ -404,40 +374,18 @@ class MexcDepthFeeder:
 
                                     if key and (asks is not None or bids is not None):
                                         try:
-                                            lm = self._levels.setdefault(key, {'asks': {}, 'bids': {}})
+                                            # depth pushes carry the visible levels of a side;
+                                            # a non-empty side replaces the previous ladder
+                                            book = self._l2.get(key)
+                                            if book is None:
+                                                book = L2Book(key)
+                                                self._l2[key] = book
                                             if asks:
-                                                new_asks = {}
-                                                for a in asks:
-                                                    try:
-                                                        if isinstance(a, (list, tuple)) and len(a) >= 2:
-                                                            p = float(a[0]); q = float(a[1]); new_asks[p] = q
-                                                        elif isinstance(a, str):
-                                                            parts = a.split(',')
-                                                            p = float(parts[0]); q = float(parts[1]); new_asks[p] = q
-                                                    except Exception:
-                                                        continue
-                                                if new_asks:
-                                                    lm['asks'] = new_asks
+                                                book.replace_side('asks', asks)
                                             if bids:
-                                                new_bids = {}
-                                                for b in bids:
-                                                    try:
-                                                        if isinstance(b, (list, tuple)) and len(b) >= 2:
-                                                            p = float(b[0]); q = float(b[1]); new_bids[p] = q
-                                                        elif isinstance(b, str):
-                                                            parts = b.split(',')
-                                                            p = float(parts[0]); q = float(parts[1]); new_bids[p] = q
-                                                    except Exception:
-                                                        continue
-                                                if new_bids:
-                                                    lm['bids'] = new_bids
-
-                                            a_map = self._levels.get(key, {}).get('asks', {})
-                                            b_map = self._levels.get(key, {}).get('bids', {})
-                                            a_list = sorted(((p, q) for p, q in a_map.items()), key=lambda x: x[0])[:200]
-                                            b_list = sorted(((p, q) for p, q in b_map.items()), key=lambda x: x[0], reverse=True)[:200]
-                                            self._books[key] = {'asks': a_list, 'bids': b_list, 'timestamp': time.time()}
-                                            self._ts = time.time()
+                                                book.replace_side('bids', bids)
+                                            self._ts = book.timestamp or recorder.now()
+                                            get_bus().publish_book('mexc', book)
                                         except Exception:
                                             pass
                                 except Exception:
@@ -482,12 +430,10 @@ class MexcDepthFeeder:
 
     def get_order_book(self, symbol: str, depth: int = 10) -> dict:
         key = symbol.upper().replace('/', '').replace('-', '')
-        b = self._books.get(key)
-        if not b:
+        book = self._l2.get(key)
+        if book is None:
             return {'asks': [], 'bids': []}
-        asks = b.get('asks', [])[:depth]
-        bids = b.get('bids', [])[:depth]
-        return {'asks': asks, 'bids': bids}
+        return book.order_book(depth)
 
     def get_tickers(self) -> Dict[str, Any]:
         out = {}
@@ -502,22 +448,10 @@ class MexcDepthFeeder:
                     last = asks[0][0]
                 if last is None:
                     continue
-                # recover base/quote by heuristic (assume last 4/3 chars are quote)
-                s = key
-                common_quotes = ['USDT', 'USDC', 'USDT', 'BTC', 'ETH', 'USD']
-                quote = None
-                base = None
-                for q in common_quotes:
-                    if s.endswith(q) and len(s) > len(q):
-                        quote = q
-                        base = s[:-len(q)]
-                        break
-                if quote is None:
-                    quote = s[-3:]
-                    base = s[:-3]
-                if not base:
+                # MEXC keys are compact ('BTCUSDT'); split via the registry
+                symbol_std = canonical(key, 'mexc')
+                if symbol_std.startswith('/'):
                     continue
-                symbol_std = f"{base}/{quote}"
                 out[symbol_std] = {'last': last, 'timestamp': v.get('timestamp')}
             except Exception:
                 continue
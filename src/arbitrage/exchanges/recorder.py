@@ -0,0 +1,390 @@
+"""Raw market data recorder for the websocket feeders.
+
+Feeders open their sockets through ``recorder.connect(source, uri, **kw)``
+instead of ``websockets.connect``. Normally that is a plain passthrough;
+once ``start_recording()`` has been called (``feeder_utils.start_all`` does
+so when ``ARB_RECORD_DIR`` is set) every frame a feeder receives is logged
+with its receive timestamp, together with the connection opens/closes and
+the JSON results of the feeders' blocking REST calls (``run_blocking``:
+depth snapshots, listen keys, bullet tokens). ``arbitrage.replay`` plays a
+recording back through the same feeders.
+
+Records go to gzip-compressed segment files in the record directory:
+
+    rec-<UTC start>-<pid>-<seq>.arbrec.gz
+
+Each segment starts with ``MAGIC`` followed by records of the form
+
+    <recv_ts f64> <conn u64> <kind u8> <source_len u16> <payload_len u32>
+    <source bytes> <payload bytes>
+
+``kind`` is one of ``OPEN`` (payload: url), ``TEXT`` / ``BINARY`` (the
+frame as received), ``CLOSE`` or ``REST`` (payload: JSON ``{call, args,
+result}``). A segment is rotated after ``ARB_RECORD_SEGMENT_MB`` of raw
+records (default 64) or ``ARB_RECORD_SEGMENT_S`` seconds (default 3600);
+the connections still open are re-announced at the top of the new segment
+so that every segment can be replayed on its own.
+
+Compression and file IO happen on a writer thread; the feeder loop only
+enqueues tuples. When the queue backs up past ``ARB_RECORD_MAX_QUEUE``
+records, new frames are dropped and counted rather than stalling the
+feeders; ``OPEN`` and ``CLOSE`` are always queued, since a replay discards
+a connection whose ``OPEN`` is missing.
+``ARB_RECORD_FEEDERS`` (comma separated prefixes such as ``binance,klines``)
+limits which feeders are recorded.
+"""
+from __future__ import annotations
+
+import glob
+import gzip
+import heapq
+import itertools
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+try:
+    import websockets
+except Exception:
+    websockets = None
+
+from ..utils.env import env_float
+
+MAGIC = b'ARBREC1\n'
+SUFFIX = '.arbrec.gz'
+
+OPEN = 1
+TEXT = 2
+BINARY = 3
+CLOSE = 4
+REST = 5
+
+_HEADER = struct.Struct('<dQBHI')
+
+
+class Record(NamedTuple):
+    ts: float
+    conn: int
+    kind: int
+    source: str
+    # url for OPEN, str for TEXT, bytes for BINARY, {call, args, result} for REST
+    payload: Any
+
+
+def rest_key(call: str, args: Sequence[Any]) -> str:
+    """Key a ``run_blocking`` result is recorded and replayed under."""
+    return call + '|' + json.dumps(list(args), default=repr, sort_keys=True)
+
+
+class Recorder:
+    """Writes feeder traffic to rotating gzip segments on a background thread."""
+
+    def __init__(self, directory: str, segment_mb: Optional[float] = None, segment_s: Optional[float] = None,
+                 sources: Optional[Iterable[str]] = None, level: int = 6, max_queue: Optional[int] = None):
+        self.directory = directory
+        self.segment_bytes = int(1024 * 1024 * (segment_mb if segment_mb is not None else env_float('ARB_RECORD_SEGMENT_MB', 64)))
+        self.segment_s = segment_s if segment_s is not None else env_float('ARB_RECORD_SEGMENT_S', 3600)
+        if sources is None:
+            sources = [s.strip() for s in os.getenv('ARB_RECORD_FEEDERS', '').split(',') if s.strip()]
+        self.sources = tuple(s.lower() for s in sources)
+        self.level = level
+        self.max_queue = int(max_queue or env_float('ARB_RECORD_MAX_QUEUE', 100000))
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # conn ids are unique across processes recording into one directory
+        self._ids = itertools.count(os.getpid() * 1_000_000 + 1)
+        self._file = None
+        self._seq = 0
+        self._seg_started = 0.0
+        self._seg_bytes = 0
+        self._open: Dict[int, tuple] = {}
+        self.records = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.segments: List[str] = []
+        self.last_error: Optional[str] = None
+
+    # -- producer side (feeder loop) ----------------------------------------------
+    def wants(self, source: str) -> bool:
+        if not self.sources:
+            return True
+        s = (source or '').lower()
+        return any(s.startswith(p) for p in self.sources)
+
+    def _put(self, item: tuple, force: bool = False) -> None:
+        if not force and self._queue.qsize() >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.put_nowait(item)
+
+    def open_conn(self, source: str, url: str) -> int:
+        conn = next(self._ids)
+        self._put((time.time(), conn, OPEN, source, url), force=True)
+        return conn
+
+    def frame(self, conn: int, source: str, msg: Union[str, bytes]) -> None:
+        self._put((time.time(), conn, BINARY if isinstance(msg, (bytes, bytearray, memoryview)) else TEXT, source, msg))
+
+    def close_conn(self, conn: int, source: str) -> None:
+        self._put((time.time(), conn, CLOSE, source, ''), force=True)
+
+    def rest(self, source: str, call: str, args: Sequence[Any], result: Any) -> None:
+        if not self.wants(source):
+            return
+        try:
+            # serialised now: the caller may mutate the result afterwards
+            payload = json.dumps({'call': call, 'args': list(args), 'result': result})
+        except (TypeError, ValueError):
+            return
+        self._put((time.time(), 0, REST, source, payload))
+
+    # -- writer thread --------------------------------------------------------------
+    def start(self) -> 'Recorder':
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='market-recorder', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=timeout)
+
+    def _new_segment(self, now: float) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._seq += 1
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))
+        path = os.path.join(self.directory, f'rec-{stamp}-{os.getpid()}-{self._seq:04d}{SUFFIX}')
+        self._file = gzip.open(path, 'wb', compresslevel=self.level)
+        self._file.write(MAGIC)
+        self._seg_started = now
+        self._seg_bytes = 0
+        self.segments.append(path)
+        for conn, (source, url) in list(self._open.items()):
+            self._write(now, conn, OPEN, source, url)
+
+    def _write(self, ts: float, conn: int, kind: int, source: str, payload: Any) -> None:
+        src = source.encode('utf-8')
+        data = payload.encode('utf-8') if isinstance(payload, str) else bytes(payload)
+        rec = _HEADER.pack(ts, conn, kind, len(src), len(data)) + src + data
+        self._file.write(rec)
+        self._seg_bytes += len(rec)
+        self.bytes += len(rec)
+        self.records += 1
+
+    def _run(self) -> None:
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=1.0)
+                except queue.Empty:
+                    if self._file is not None:
+                        # let a reader (or a crash) see everything up to now
+                        self._file.flush()
+                    continue
+                if item is None:
+                    break
+                ts, conn, kind, source, payload = item
+                if self._file is None or self._seg_bytes >= self.segment_bytes or ts - self._seg_started >= self.segment_s:
+                    self._new_segment(ts)
+                try:
+                    self._write(ts, conn, kind, source, payload)
+                except Exception as e:
+                    self.last_error = f'{type(e).__name__}: {e}'
+                    continue
+                if kind == OPEN:
+                    self._open[conn] = (source, payload)
+                elif kind == CLOSE:
+                    self._open.pop(conn, None)
+        except Exception as e:
+            self.last_error = f'{type(e).__name__}: {e}'
+            print(f'[recorder] writer stopped: {self.last_error}')
+        finally:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except Exception:
+                    pass
+                self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'directory': self.directory,
+            'records': self.records,
+            'bytes': self.bytes,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+            'segments': len(self.segments),
+            'segment': self.segments[-1] if self.segments else None,
+            'last_error': self.last_error,
+        }
+
+
+class _RecordingSocket:
+    """Wraps a websockets connection and logs every frame ``recv`` returns."""
+
+    def __init__(self, ws, recorder: Recorder, conn: int, source: str):
+        self._ws = ws
+        self._rec = recorder
+        self._conn = conn
+        self._source = source
+
+    async def recv(self, *args, **kwargs):
+        msg = await self._ws.recv(*args, **kwargs)
+        self._rec.frame(self._conn, self._source, msg)
+        return msg
+
+    def __getattr__(self, name: str):
+        return getattr(self._ws, name)
+
+
+@asynccontextmanager
+async def _recorded(rec: Recorder, source: str, uri: str, kwargs: Dict[str, Any]):
+    async with websockets.connect(uri, **kwargs) as ws:
+        conn = rec.open_conn(source, uri)
+        try:
+            yield _RecordingSocket(ws, rec, conn, source)
+        finally:
+            rec.close_conn(conn, source)
+
+
+_RECORDER: Optional[Recorder] = None
+_REPLAY: Any = None
+_LOCK = threading.Lock()
+
+
+def connect(source: str, uri: str, **kwargs: Any):
+    """Drop-in for ``websockets.connect(uri, **kwargs)`` used by the feeders.
+
+    ``source`` names the feeder (its ``spawn_feeder`` name). Returns the
+    replayed connection while a replay session is installed, a recording
+    wrapper while recording, and the plain websockets connection otherwise.
+    """
+    replay = _REPLAY
+    if replay is not None:
+        return replay.connect(source, uri)
+    rec = _RECORDER
+    if rec is None or not rec.wants(source):
+        return websockets.connect(uri, **kwargs)
+    return _recorded(rec, source, uri, kwargs)
+
+
+def start_recording(directory: Optional[str] = None, **kwargs: Any) -> Recorder:
+    """Start (or return the already running) process-wide recorder."""
+    global _RECORDER
+    with _LOCK:
+        if _RECORDER is None:
+            directory = directory or os.getenv('ARB_RECORD_DIR') or os.path.join('var', 'recordings')
+            _RECORDER = Recorder(directory, **kwargs).start()
+            print(f'[recorder] recording feeder traffic to {directory}')
+        return _RECORDER
+
+
+def stop_recording() -> None:
+    global _RECORDER
+    with _LOCK:
+        rec, _RECORDER = _RECORDER, None
+    if rec is not None:
+        rec.stop()
+
+
+def get_recorder() -> Optional[Recorder]:
+    """The active recorder, or None when not recording."""
+    return _RECORDER
+
+
+def install_replay(session: Any) -> None:
+    """Route ``connect`` and ``run_blocking`` to a replay session (None to remove)."""
+    global _REPLAY
+    _REPLAY = session
+
+
+def replay_session() -> Any:
+    return _REPLAY
+
+
+def now() -> float:
+    """Wall time, or the replay's simulated clock while a session is installed.
+
+    Data timestamps (book and ticker times, staleness checks, strategy
+    bookkeeping) read this so a replay gives the same results at any speed;
+    socket keepalives and timeouts stay on ``time.time()``.
+    """
+    session = _REPLAY
+    if session is not None:
+        ts = session.clock.time()
+        if ts:
+            return ts
+    return time.time()
+
+
+# -- reading -----------------------------------------------------------------------------
+def segment_paths(path: Union[str, Sequence[str]]) -> List[str]:
+    """Segment files of a recording directory, a single file or a list of files."""
+    if not isinstance(path, str):
+        return list(path)
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '*' + SUFFIX)))
+    return [path]
+
+
+def _read_segment(path: str) -> Iterator[Record]:
+    try:
+        with gzip.open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path}: not a recorder segment')
+            while True:
+                head = f.read(_HEADER.size)
+                if len(head) < _HEADER.size:
+                    return
+                ts, conn, kind, slen, plen = _HEADER.unpack(head)
+                src = f.read(slen)
+                data = f.read(plen)
+                if len(src) < slen or len(data) < plen:
+                    return
+                if kind == BINARY:
+                    payload: Any = data
+                elif kind == REST:
+                    payload = json.loads(data)
+                else:
+                    payload = data.decode('utf-8')
+                yield Record(ts, conn, kind, src.decode('utf-8'), payload)
+    except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+        # a segment cut short by a crash or a still-running writer
+        print(f'[recorder] {os.path.basename(path)}: truncated ({type(e).__name__}), stopping there')
+
+
+def _writer_of(path: str) -> str:
+    # rec-<stamp>-<pid>-<seq>.arbrec.gz -> <pid>
+    parts = os.path.basename(path).split('-')
+    return parts[2] if len(parts) >= 4 else path
+
+
+def read_records(path: Union[str, Sequence[str]]) -> Iterator[Record]:
+    """Records of a recording in receive-time order.
+
+    Segments of one writer process are read in sequence; recordings made by
+    several processes (``ARB_FEEDER_PROCESSES``) are merged by timestamp.
+    """
+    by_writer: Dict[str, List[str]] = {}
+    for p in segment_paths(path):
+        by_writer.setdefault(_writer_of(p), []).append(p)
+    streams = [itertools.chain.from_iterable(_read_segment(p) for p in paths) for paths in by_writer.values()]
+    if len(streams) == 1:
+        return iter(streams[0])
+    return heapq.merge(*streams, key=lambda r: r.ts)
+
+
+__all__ = [
+    'BINARY', 'CLOSE', 'OPEN', 'REST', 'TEXT', 'Record', 'Recorder', 'connect', 'get_recorder', 'install_replay',
+    'read_records', 'replay_session', 'rest_key', 'segment_paths', 'start_recording', 'stop_recording',
+]
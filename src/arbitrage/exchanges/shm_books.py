@@ -0,0 +1,377 @@
+"""Fixed-layout shared-memory order books for out-of-process feeders.
+
+With ARB_FEEDER_PROCESSES=N the websocket feeders run in worker processes
+(see ``feeder_procs``). Each worker publishes the top-N book and last price
+of every symbol into one ``multiprocessing.shared_memory`` segment per
+exchange; the web process reads them through ``SharedBookFeeder``, which
+offers the usual ``get_order_book``/``get_tickers`` feeder interface without
+any IPC round trip or serialisation. ``SharedBookFeeder.publish_changes``
+relays rewritten books to the web process's book event bus.
+
+Segment layout (little endian, 8-byte aligned)::
+
+    header   64 bytes   magic, version, capacity, depth, used slot count
+    names    capacity * 32 bytes, NUL padded utf-8 symbol per slot
+    slots    capacity * (6 + 4 * depth) float64:
+             [seq, ts, last, n_asks, n_bids, reserved,
+              ask_px, ask_qty, ... (depth), bid_px, bid_qty, ... (depth)]
+
+A single writer owns each segment. Slots use a seqlock: the writer bumps
+``seq`` to an odd value, writes, then bumps it to even; readers retry when
+they see an odd or changed ``seq``, sleeping ``READ_BACKOFF_S`` between
+attempts, and fall back to the last book they read consistently from that
+slot when the writer keeps it busy through every retry.
+"""
+from __future__ import annotations
+
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b'ARBBOOK1'
+VERSION = 1
+HEADER_SIZE = 64
+NAME_BYTES = 32
+SLOT_FIXED = 6
+_HEADER = struct.Struct('<8sIII')  # magic, version, capacity, depth
+_USED_OFFSET = 32  # uint32 used-slot counter, written last when a slot is added
+
+Level = Tuple[float, float]
+
+
+def compact_symbol(symbol: str) -> str:
+    """'BTC/USDT', 'BTC-USDT', 'BTC_USDT', 'btcusdt' -> 'BTCUSDT'."""
+    return (symbol or '').upper().replace('/', '').replace('-', '').replace('_', '')
+
+
+def segment_size(capacity: int, depth: int) -> int:
+    return HEADER_SIZE + capacity * NAME_BYTES + capacity * (SLOT_FIXED + 4 * depth) * 8
+
+
+class BookSegment:
+    """One exchange's shared-memory book table (writer or reader side)."""
+
+    # reader pause between seqlock attempts; a slot write takes microseconds
+    READ_BACKOFF_S = 0.0002
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        magic, version, capacity, depth = _HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{shm.name} is not an order book segment')
+        self.capacity = capacity
+        self.depth = depth
+        self.slot_len = SLOT_FIXED + 4 * depth
+        names_off = HEADER_SIZE
+        data_off = HEADER_SIZE + capacity * NAME_BYTES
+        self._names = shm.buf[names_off:data_off]
+        self._data = shm.buf[data_off:data_off + capacity * self.slot_len * 8].cast('d')
+        # name -> slot, refreshed from the directory when the used count grows
+        self._slots: Dict[str, int] = {}
+        self._compact: Dict[str, int] = {}
+        self._known = 0
+        # reader side: (slot, depth) -> last consistent (asks, bids, last, ts)
+        self._last_good: Dict[Tuple[int, int], Tuple[List[Level], List[Level], Optional[float], float]] = {}
+        self.stale_reads = 0
+
+    @classmethod
+    def create(cls, capacity: int, depth: int, name: Optional[str] = None) -> 'BookSegment':
+        shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(capacity, depth))
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, capacity, depth)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'BookSegment':
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _used(self) -> int:
+        return struct.unpack_from('<I', self.shm.buf, _USED_OFFSET)[0]
+
+    def _refresh(self) -> None:
+        used = min(self._used(), self.capacity)
+        for i in range(self._known, used):
+            raw = bytes(self._names[i * NAME_BYTES:(i + 1) * NAME_BYTES]).rstrip(b'\0')
+            sym = raw.decode('utf-8', errors='replace')
+            self._slots[sym] = i
+            self._compact.setdefault(compact_symbol(sym), i)
+        self._known = used
+
+    # -- writer -------------------------------------------------------------------
+    def slot_for(self, symbol: str) -> Optional[int]:
+        """Return the slot for symbol, allocating one if needed (writer only)."""
+        slot = self._slots.get(symbol)
+        if slot is not None:
+            return slot
+        used = self._used()
+        if used >= self.capacity:
+            return None
+        raw = symbol.encode('utf-8')[:NAME_BYTES]
+        self._names[used * NAME_BYTES:(used + 1) * NAME_BYTES] = raw.ljust(NAME_BYTES, b'\0')
+        # publish the name before bumping the counter readers scan by
+        struct.pack_into('<I', self.shm.buf, _USED_OFFSET, used + 1)
+        self._slots[symbol] = used
+        self._compact.setdefault(compact_symbol(symbol), used)
+        self._known = used + 1
+        return used
+
+    def write(self, symbol: str, asks: List[Level], bids: List[Level], last: Optional[float], ts: Optional[float]) -> bool:
+        slot = self.slot_for(symbol)
+        if slot is None:
+            return False
+        d = self._data
+        base = slot * self.slot_len
+        depth = self.depth
+        seq = d[base]
+        d[base] = seq + 1.0  # odd: write in progress
+        d[base + 1] = float(ts if ts is not None else time.time())
+        d[base + 2] = float('nan') if last is None else float(last)
+        n_a = min(len(asks), depth)
+        n_b = min(len(bids), depth)
+        d[base + 3] = float(n_a)
+        d[base + 4] = float(n_b)
+        off = base + SLOT_FIXED
+        for i in range(n_a):
+            d[off + 2 * i] = float(asks[i][0])
+            d[off + 2 * i + 1] = float(asks[i][1])
+        off = base + SLOT_FIXED + 2 * depth
+        for i in range(n_b):
+            d[off + 2 * i] = float(bids[i][0])
+            d[off + 2 * i + 1] = float(bids[i][1])
+        d[base] = seq + 2.0  # even: consistent
+        return True
+
+    # -- reader -------------------------------------------------------------------
+    def lookup(self, symbol: str) -> Optional[int]:
+        slot = self._slots.get(symbol)
+        if slot is None:
+            slot = self._compact.get(compact_symbol(symbol))
+        if slot is None and self._used() != self._known:
+            self._refresh()
+            slot = self._slots.get(symbol)
+            if slot is None:
+                slot = self._compact.get(compact_symbol(symbol))
+        return slot
+
+    def symbols(self) -> List[str]:
+        if self._used() != self._known:
+            self._refresh()
+        return list(self._slots.keys())
+
+    def seq(self, slot: int) -> float:
+        """The slot's seqlock counter (0 = never written, odd = being written)."""
+        return self._data[slot * self.slot_len]
+
+    def read(self, slot: int, depth: Optional[int] = None, retries: int = 8) -> Optional[Tuple[List[Level], List[Level], Optional[float], float]]:
+        """Return (asks, bids, last, ts) for a slot.
+
+        Retries up to ``retries`` times, backing off while the writer holds
+        the slot; if it never stabilises, returns the last consistent read of
+        the slot at this depth (counted in ``stale_reads``) or None.
+        """
+        d = self._data
+        base = slot * self.slot_len
+        full = self.depth
+        want = full if depth is None else max(0, min(depth, full))
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(self.READ_BACKOFF_S)
+            seq = d[base]
+            if seq == 0.0:
+                return None
+            if int(seq) & 1:
+                continue
+            ts = d[base + 1]
+            last = d[base + 2]
+            n_a = min(int(d[base + 3]), want)
+            n_b = min(int(d[base + 4]), want)
+            off = base + SLOT_FIXED
+            ask_vals = d[off:off + 2 * n_a].tolist()
+            off = base + SLOT_FIXED + 2 * full
+            bid_vals = d[off:off + 2 * n_b].tolist()
+            if d[base] != seq:
+                continue
+            asks = list(zip(ask_vals[0::2], ask_vals[1::2]))
+            bids = list(zip(bid_vals[0::2], bid_vals[1::2]))
+            snap = asks, bids, (None if last != last else last), ts
+            self._last_good[(slot, want)] = snap
+            return snap
+        prev = self._last_good.get((slot, want))
+        if prev is not None:
+            self.stale_reads += 1
+        return prev
+
+    def close(self) -> None:
+        for view in (self._data, self._names):
+            try:
+                view.release()
+            except Exception:
+                pass
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except Exception:
+                pass
+
+
+class BookPublisher:
+    """Copies a feeder's tickers and top-N books into a BookSegment.
+
+    Works with any feeder exposing ``get_tickers()`` (keys are the symbols
+    published) and optionally ``get_order_book(symbol, depth)``. Symbols whose
+    ticker timestamp did not move since the last publish are skipped.
+    """
+
+    def __init__(self, segment: BookSegment):
+        self.segment = segment
+        self._last_ts: Dict[str, Any] = {}
+
+    def publish(self, feeder: Any) -> int:
+        try:
+            tickers = feeder.get_tickers() or {}
+        except Exception:
+            return 0
+        get_book = getattr(feeder, 'get_order_book', None)
+        depth = self.segment.depth
+        written = 0
+        for sym, info in list(tickers.items()):
+            if not isinstance(info, dict):
+                continue
+            ts = info.get('timestamp') or info.get('ts')
+            if ts is not None and self._last_ts.get(sym) == ts:
+                continue
+            asks: List[Level] = []
+            bids: List[Level] = []
+            if callable(get_book):
+                try:
+                    ob = get_book(sym, depth=depth) or {}
+                    asks = list(ob.get('asks') or [])
+                    bids = list(ob.get('bids') or [])
+                except Exception:
+                    pass
+            last = info.get('last')
+            try:
+                last = float(last) if last is not None else None
+            except Exception:
+                last = None
+            if self.segment.write(sym, asks, bids, last, ts):
+                self._last_ts[sym] = ts
+                written += 1
+        return written
+
+
+class SharedBookFeeder:
+    """Zero-copy reader over a worker's BookSegment with the feeder interface.
+
+    Registered in ``ws_feed_manager`` in place of the in-process feeder, so
+    adapters and endpoints calling ``get_order_book``/``get_tickers``/
+    ``get_book_tickers`` read the worker's books straight out of shared memory.
+    """
+
+    def __init__(self, exchange: str, segment: BookSegment, handle: Any = None):
+        self.exchange = exchange
+        self.segment = segment
+        self._handle = handle
+        # slot -> seq last forwarded by publish_changes
+        self._forwarded: Dict[int, float] = {}
+
+    def get_order_book(self, symbol: str, depth: int = 10) -> dict:
+        slot = self.segment.lookup(symbol)
+        if slot is None:
+            return {'asks': [], 'bids': []}
+        snap = self.segment.read(slot, depth)
+        if snap is None:
+            return {'asks': [], 'bids': []}
+        asks, bids, _last, _ts = snap
+        return {'asks': asks, 'bids': bids}
+
+    def _tops(self):
+        """Yield (symbol, asks, bids, last, ts) with the top level of each book."""
+        seg = self.segment
+        for sym in seg.symbols():
+            slot = seg.lookup(sym)
+            snap = seg.read(slot, 1) if slot is not None else None
+            if snap is not None:
+                yield (sym,) + snap
+
+    def get_tickers(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for sym, asks, bids, last, ts in self._tops():
+            bid = bids[0][0] if bids else None
+            ask = asks[0][0] if asks else None
+            if last is None:
+                last = bid if bid is not None else ask
+            if last is None:
+                continue
+            out[sym] = {'last': last, 'bid': bid, 'ask': ask, 'timestamp': ts}
+        return out
+
+    def get_book_tickers(self) -> Dict[str, Dict[str, Any]]:
+        """Best bid/ask with sizes per symbol, shaped like GateDepthFeeder's."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for sym, asks, bids, _last, ts in self._tops():
+            if not asks and not bids:
+                continue
+            bid, bid_sz = bids[0] if bids else (None, None)
+            ask, ask_sz = asks[0] if asks else (None, None)
+            out[sym] = {'bid': bid, 'bid_sz': bid_sz, 'ask': ask, 'ask_sz': ask_sz, 'ts': ts}
+        return out
+
+    def publish_changes(self, bus: Any) -> int:
+        """Forward books the worker rewrote since the last call to ``bus``.
+
+        The worker's feeders publish to their own process's book event bus;
+        the parent relays through this so its scanners see the same events.
+        """
+        seg = self.segment
+        n = 0
+        for sym in seg.symbols():
+            slot = seg.lookup(sym)
+            if slot is None:
+                continue
+            seq = seg.seq(slot)
+            if seq == 0.0 or int(seq) & 1 or self._forwarded.get(slot) == seq:
+                continue
+            snap = seg.read(slot, 1)
+            if snap is None:
+                continue
+            self._forwarded[slot] = seq
+            asks, bids, _last, ts = snap
+            if bus.publish(self.exchange, sym, bids[0] if bids else None, asks[0] if asks else None,
+                           seq=int(seq) // 2, ts=ts):
+                n += 1
+        return n
+
+    @property
+    def last_update_ts(self) -> Optional[float]:
+        latest = None
+        for info in self.get_tickers().values():
+            ts = info.get('timestamp')
+            if ts is not None and (latest is None or ts > latest):
+                latest = ts
+        return latest
+
+    def get_status(self) -> Dict[str, Any]:
+        alive = self._handle.alive() if self._handle is not None else None
+        return {
+            'feeder': self.exchange,
+            'status': 'ok' if alive else 'disconnected',
+            'mode': 'process',
+            'symbol_count': len(self.segment.symbols()),
+            'last_update_ts': self.last_update_ts,
+            'stale_reads': self.segment.stale_reads,
+        }
+
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.release(self)
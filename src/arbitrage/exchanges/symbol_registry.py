@@ -0,0 +1,193 @@
+"""Interned symbol registry shared by the adapters, feeders and scanners.
+
+Every layer used to re-derive symbols with string surgery on each call:
+``replace('/', '').replace('-', '').upper()`` comparisons, quote-suffix
+guessing to turn ``BTCUSDT`` back into ``BTC/USDT``, hyphenation attempts
+for KuCoin. ``SymbolRegistry`` does that work once per distinct string:
+
+- canonical ids are interned ``BASE/QUOTE`` strings
+- ``register(exchange, native, base, quote)`` records an exchange listing
+  (e.g. KuCoin ``BTC-USDT``); listings make splits exact, so ``BTCDAI``
+  resolves correctly once any venue lists it
+- strings never seen in a listing are parsed heuristically (separator,
+  then known quote suffix) and the result is kept in a bounded LRU
+- ``native(exchange, symbol)`` maps back to the venue's own spelling
+
+All lookups are dict hits after the first call for a given string.
+ARB_SYMBOL_LRU sets the size of the unknown-symbol cache (default 8192).
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+# quote suffixes tried (in order) when a compact symbol is not listed anywhere
+QUOTES = ('USDT', 'USDC', 'BUSD', 'BTC', 'ETH', 'USD')
+_SEPARATORS = ('/', '-', '_')
+
+
+def compact(symbol: str) -> str:
+    """'BTC/USDT', 'BTC-USDT', 'BTC_USDT', 'btcusdt' -> 'BTCUSDT' (no caching)."""
+    return (symbol or '').upper().replace('/', '').replace('-', '').replace('_', '')
+
+
+def parse_symbol(symbol: str, quotes: Iterable[str] = QUOTES) -> Tuple[str, str]:
+    """Heuristically split a raw symbol into (base, quote)."""
+    s = (symbol or '').strip().upper()
+    if ':' in s:
+        # ccxt derivatives suffix ('BTC/USDT:USDT')
+        s = s.split(':', 1)[0]
+    for sep in _SEPARATORS:
+        if sep in s:
+            base, _, quote = s.partition(sep)
+            if base and quote:
+                return base, quote.replace('/', '').replace('-', '').replace('_', '')
+    s = compact(s)
+    for q in quotes:
+        if s.endswith(q) and len(s) > len(q):
+            return s[:-len(q)], q
+    # last resort: treat the last 3 chars as the quote
+    return s[:-3], s[-3:]
+
+
+class SymbolRegistry:
+    """Bidirectional exchange-native <-> canonical symbol map."""
+
+    def __init__(self, lru_size: int = 8192):
+        self._lock = threading.Lock()
+        # canonical -> (base, quote, compact)
+        self._info: Dict[str, Tuple[str, str, str]] = {}
+        # compact -> canonical, from listings only (authoritative splits)
+        self._listed: Dict[str, str] = {}
+        # (exchange, native) -> canonical and (exchange, canonical) -> native
+        self._to_canonical: Dict[Tuple[str, str], str] = {}
+        self._to_native: Dict[Tuple[str, str], str] = {}
+        # raw string -> canonical for strings resolved heuristically
+        self._lru: 'OrderedDict[str, str]' = OrderedDict()
+        self._lru_size = max(16, lru_size)
+        self.hits = 0
+        self.misses = 0
+
+    # -- registration -----------------------------------------------------------------
+    def _intern(self, base: str, quote: str) -> str:
+        canon = sys.intern(f'{base}/{quote}')
+        if canon not in self._info:
+            self._info[canon] = (sys.intern(base), sys.intern(quote), sys.intern(base + quote))
+        return canon
+
+    def register(self, exchange: str, native: str, base: Optional[str] = None, quote: Optional[str] = None) -> str:
+        """Record an exchange listing and return its canonical id.
+
+        Without ``base``/``quote`` the native symbol is parsed, which is exact
+        for separated symbols ('BTC-USDT') and heuristic otherwise.
+        """
+        if not base or not quote:
+            base, quote = parse_symbol(native)
+        base = base.upper()
+        quote = quote.upper()
+        ex = (exchange or '').lower()
+        with self._lock:
+            canon = self._intern(base, quote)
+            self._to_canonical[(ex, native)] = canon
+            self._to_native.setdefault((ex, canon), native)
+            key = self._info[canon][2]
+            if key not in self._listed:
+                self._listed[key] = canon
+                # a heuristic answer for this compact form may now be wrong
+                self._lru.pop(key, None)
+        return canon
+
+    def register_many(self, exchange: str, listings: Iterable[Tuple[str, str, str]]) -> int:
+        """Register (native, base, quote) tuples; returns how many were added."""
+        n = 0
+        for native, base, quote in listings:
+            if native and base and quote:
+                self.register(exchange, native, base, quote)
+                n += 1
+        return n
+
+    # -- lookup ----------------------------------------------------------------------
+    def canonical(self, symbol: str, exchange: Optional[str] = None) -> str:
+        """Return the interned 'BASE/QUOTE' id for any spelling of a symbol."""
+        if exchange:
+            canon = self._to_canonical.get((exchange.lower(), symbol))
+            if canon is not None:
+                self.hits += 1
+                return canon
+        if symbol in self._info:
+            self.hits += 1
+            return symbol
+        canon = self._lru.get(symbol)
+        if canon is not None:
+            self.hits += 1
+            try:
+                self._lru.move_to_end(symbol)
+            except KeyError:
+                pass
+            return canon
+        self.misses += 1
+        canon = self._listed.get(compact(symbol))
+        with self._lock:
+            if canon is None:
+                canon = self._intern(*parse_symbol(symbol))
+            self._lru[symbol] = canon
+            if len(self._lru) > self._lru_size:
+                self._lru.popitem(last=False)
+        return canon
+
+    def split(self, symbol: str, exchange: Optional[str] = None) -> Tuple[str, str]:
+        base, quote, _ = self._info[self.canonical(symbol, exchange)]
+        return base, quote
+
+    def key(self, symbol: str, exchange: Optional[str] = None) -> str:
+        """Return the compact form ('BTCUSDT') of a symbol, cached."""
+        return self._info[self.canonical(symbol, exchange)][2]
+
+    def native(self, exchange: str, symbol: str) -> Optional[str]:
+        """Return ``exchange``'s own spelling of a symbol if it is listed there."""
+        return self._to_native.get(((exchange or '').lower(), self.canonical(symbol)))
+
+    def is_listed(self, exchange: str, symbol: str) -> bool:
+        return self.native(exchange, symbol) is not None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'canonical': len(self._info),
+            'listed': len(self._listed),
+            'native': len(self._to_canonical),
+            'lru': len(self._lru),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+_REGISTRY: Optional[SymbolRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry() -> SymbolRegistry:
+    """Return the process-wide symbol registry (created on first use)."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            try:
+                size = int(os.environ.get('ARB_SYMBOL_LRU', '8192'))
+            except Exception:
+                size = 8192
+            _REGISTRY = SymbolRegistry(size)
+        return _REGISTRY
+
+
+def canonical(symbol: str, exchange: Optional[str] = None) -> str:
+    return get_registry().canonical(symbol, exchange)
+
+
+def split_symbol(symbol: str, exchange: Optional[str] = None) -> Tuple[str, str]:
+    return get_registry().split(symbol, exchange)
+
+
+def symbol_key(symbol: str, exchange: Optional[str] = None) -> str:
+    return get_registry().key(symbol, exchange)
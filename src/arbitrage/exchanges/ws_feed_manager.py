@@ -1,7 +1,7 @@
 """Simple manager for websocket feeders.
 
 Allows registering a feeder instance under an exchange name so adapters can
-query live snapshots produced by feeders.
+query live snapshots produced by feeders, and reports their health.
 """
 from typing import Optional
 
@@ -26,3 +26,40 @@ def list_feeders() -> dict[str, object]:
     Keys are lower-cased exchange names.
     """
     return dict(_FEEDS)
+
+
+def feeder_health() -> dict[str, dict]:
+    """Return liveness, freshness and runtime task metrics per registered feeder.
+
+    Feeders hosted on the shared feeder loop expose a ``_handle``; its task
+    stats (busy time, longest step, state) come from ``feeder_runtime``.
+    """
+    import time
+
+    from .feeder_runtime import get_runtime
+
+    runtime = get_runtime()
+    now = time.time()
+    out: dict[str, dict] = {}
+    for name, feeder in list(_FEEDS.items()):
+        handle = getattr(feeder, '_handle', None)
+        thread = getattr(feeder, '_thread', None)
+        if handle is not None:
+            alive = handle.alive()
+        elif thread is not None:
+            alive = thread.is_alive()
+        else:
+            alive = None
+        last_ts = getattr(feeder, 'last_update_ts', None) or getattr(feeder, '_ts', None) or None
+        try:
+            age = round(now - float(last_ts), 3) if last_ts else None
+        except Exception:
+            age = None
+        out[name] = {
+            'feeder': type(feeder).__name__,
+            'alive': alive,
+            'last_update_ts': last_ts,
+            'age_s': age,
+            'task': runtime.stats_for(handle.name) if handle is not None else None,
+        }
+    return out
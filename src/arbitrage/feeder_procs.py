@@ -0,0 +1,157 @@
+"""Run websocket feeders in worker processes (ARB_FEEDER_PROCESSES=N).
+
+``feeder_utils.start_all`` delegates here when ARB_FEEDER_PROCESSES > 0.
+The requested exchanges are spread round-robin over N worker processes.
+Each worker runs the normal in-process ``start_all`` for its exchanges and
+publishes their books/tickers into one shared-memory segment per exchange
+(``exchanges.shm_books``) every ARB_FEEDER_PUBLISH_MS milliseconds. The
+parent registers a ``SharedBookFeeder`` reader per exchange with
+``ws_feed_manager``, so callers keep using ``get_feeder(ex)`` unchanged while
+JSON/protobuf decoding happens off the web process. A relay thread per worker
+forwards the books it rewrites to the parent's book event bus, so event-driven
+scanners wake up for them as for in-process feeders.
+
+Tunables (environment):
+- ARB_FEEDER_PROCESSES: number of worker processes (0/unset = in-process)
+- ARB_FEEDER_SHM_SLOTS: symbols per exchange segment (default 1024)
+- ARB_FEEDER_SHM_DEPTH: book levels kept per side (default 50)
+- ARB_FEEDER_PUBLISH_MS: worker publish interval (default 50)
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from .exchanges.shm_books import BookPublisher, BookSegment, SharedBookFeeder
+
+# exchanges start_all can host; others have no feeder to shard
+SHARDABLE = ('binance', 'kucoin', 'mexc', 'gate')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except Exception:
+        return default
+
+
+def process_count() -> int:
+    return max(0, _env_int('ARB_FEEDER_PROCESSES', 0))
+
+
+def _worker_main(exchanges: List[str], symbols: Optional[List[str]], interval: float,
+                 segments: Dict[str, str], stop_event: Any, publish_s: float) -> None:
+    # the worker hosts real feeders; never recurse into process mode
+    os.environ['ARB_FEEDER_PROCESSES'] = '0'
+    from .feeder_utils import start_all, stop_all
+
+    attached = {ex: BookSegment.attach(name) for ex, name in segments.items()}
+    publishers = {ex: BookPublisher(seg) for ex, seg in attached.items()}
+    feeders = start_all(interval=interval, symbols=symbols, exchanges=exchanges)
+    try:
+        while not stop_event.wait(publish_s):
+            for ex, feeder in list(feeders.items()):
+                pub = publishers.get(ex)
+                if pub is not None:
+                    pub.publish(feeder)
+    finally:
+        stop_all(feeders)
+        for seg in attached.values():
+            seg.close()
+
+
+class WorkerHandle:
+    """One feeder worker process plus the segments it writes.
+
+    Shared by the SharedBookFeeder proxies of its exchanges; the process is
+    stopped and the segments unlinked when the last proxy is released.
+    """
+
+    def __init__(self, name: str, process: Any, stop_event: Any, segments: Dict[str, BookSegment]):
+        self.name = name
+        self.process = process
+        self.stop_event = stop_event
+        self.segments = segments
+        self._users: set = set()
+        self._lock = threading.Lock()
+        self._relay: Optional[threading.Thread] = None
+        self._relay_stop = threading.Event()
+        self.relay_errors = 0
+
+    def start_relay(self, proxies: List[SharedBookFeeder], interval: float) -> None:
+        """Forward the proxies' book changes to this process's book event bus."""
+        self._relay = threading.Thread(target=self._relay_main, args=(proxies, interval),
+                                       name=f'{self.name}-relay', daemon=True)
+        self._relay.start()
+
+    def _relay_main(self, proxies: List[SharedBookFeeder], interval: float) -> None:
+        from .exchanges.book_events import get_bus
+        bus = get_bus()
+        while not self._relay_stop.wait(interval):
+            if not bus.has_subscribers():
+                continue
+            for proxy in proxies:
+                try:
+                    proxy.publish_changes(bus)
+                except Exception as e:
+                    self.relay_errors += 1
+                    print(f'[feeder-procs] relay {proxy.exchange} failed: {e}')
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def acquire(self, proxy: SharedBookFeeder) -> None:
+        with self._lock:
+            self._users.add(id(proxy))
+
+    def release(self, proxy: SharedBookFeeder, timeout: float = 5.0) -> None:
+        with self._lock:
+            self._users.discard(id(proxy))
+            if self._users:
+                return
+        self._relay_stop.set()
+        if self._relay is not None:
+            self._relay.join(timeout=timeout)
+        self.stop_event.set()
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        for seg in self.segments.values():
+            seg.close()
+
+
+def start_sharded(exchanges: List[str], symbols: Optional[List[str]], interval: float,
+                  n_procs: int) -> Dict[str, SharedBookFeeder]:
+    """Start feeders for ``exchanges`` in ``n_procs`` workers; return reader proxies."""
+    if not exchanges:
+        return {}
+    capacity = max(16, _env_int('ARB_FEEDER_SHM_SLOTS', 1024))
+    depth = max(1, _env_int('ARB_FEEDER_SHM_DEPTH', 50))
+    publish_s = max(0.005, _env_int('ARB_FEEDER_PUBLISH_MS', 50) / 1000.0)
+    ctx = mp.get_context('spawn')
+
+    shards: List[List[str]] = [[] for _ in range(max(1, min(n_procs, len(exchanges))))]
+    for i, ex in enumerate(exchanges):
+        shards[i % len(shards)].append(ex)
+
+    proxies: Dict[str, SharedBookFeeder] = {}
+    for idx, shard in enumerate(shards):
+        segments = {ex: BookSegment.create(capacity, depth) for ex in shard}
+        stop_event = ctx.Event()
+        proc = ctx.Process(
+            target=_worker_main,
+            args=(shard, symbols, interval, {ex: seg.name for ex, seg in segments.items()}, stop_event, publish_s),
+            name=f'feeder-worker-{idx}',
+            daemon=True,
+        )
+        proc.start()
+        handle = WorkerHandle(proc.name, proc, stop_event, segments)
+        for ex, seg in segments.items():
+            proxy = SharedBookFeeder(ex, seg, handle)
+            handle.acquire(proxy)
+            proxies[ex] = proxy
+        handle.start_relay([proxies[ex] for ex in shard], publish_s)
+    return proxies
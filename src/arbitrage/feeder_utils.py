@@ -2,10 +2,12 @@
 
 This module centralizes feeder startup so it can be used both by the
 tmp_start_all_feeders demo script and optionally by the FastAPI app at
-startup when ARB_AUTO_START_FEEDERS=1.
+startup when ARB_AUTO_START_FEEDERS=1. With ARB_FEEDER_PROCESSES=N the
+feeders run in worker processes instead (see feeder_procs).
 """
 from __future__ import annotations
 
+import asyncio
 import os
 from typing import Dict, Any, Optional
 
@@ -18,7 +20,13 @@ try:
         from .exchanges.kucoin_depth_feeder import KucoinDepthFeeder  # type: ignore
     except Exception:
         KucoinDepthFeeder = None  # type: ignore
-    from .exchanges.ws_feed_manager import register_feeder, unregister_feeder, get_feeder
+    from .exchanges.ws_feed_manager import register_feeder, unregister_feeder, get_feeder, feeder_health
+    from .exchanges.feeder_runtime import get_runtime, loop_mode
+    from .exchanges import recorder
+    from .exchanges.book_events import get_bus
+    from .exchanges.symbol_registry import get_registry as get_symbol_registry
+    from . import feeder_procs
+    from .utils import http_client as _http
     # helper to fetch binance top symbols when available
     try:
         from .hotcoins import _binance_top_by_volume
@@ -28,12 +36,24 @@ except Exception:
     # fallback for ad-hoc execution where package imports may differ
     from arbitrage.exchanges import ccxt_async_feeder as feeder_mod  # type: ignore
     from arbitrage.exchanges.binance_depth_feeder import BinanceDepthFeeder  # type: ignore
-    from arbitrage.exchanges.ws_feed_manager import register_feeder, unregister_feeder, get_feeder  # type: ignore
+    from arbitrage.exchanges.ws_feed_manager import register_feeder, unregister_feeder, get_feeder, feeder_health  # type: ignore
+    from arbitrage.exchanges.feeder_runtime import get_runtime, loop_mode  # type: ignore
+    from arbitrage.exchanges import recorder  # type: ignore
+    from arbitrage.exchanges.book_events import get_bus  # type: ignore
+    from arbitrage.exchanges.symbol_registry import get_registry as get_symbol_registry  # type: ignore
+    from arbitrage import feeder_procs  # type: ignore
+    from arbitrage.utils import http_client as _http  # type: ignore
 
 EXCHANGES = ['binance', 'bitrue', 'kucoin', 'okx', 'gate', 'mexc']
 
 
-def start_all(interval: float = 1.0, symbols: Optional[list[str]] = None, exchanges: Optional[list[str]] = None) -> Dict[str, Any]:
+def start_all(
+    interval: float = 1.0,
+    symbols: Optional[list[str]] = None,
+    exchanges: Optional[list[str]] = None,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    record: Optional[str] = None,
+) -> Dict[str, Any]:
     """Start websocket feeders.
 
     - interval: polling interval for non-ws feeders
@@ -42,8 +62,20 @@ def start_all(interval: float = 1.0, symbols: Optional[list[str]] = None, exchan
       function will consult the ARB_WS_FEED_EXCHANGES env var. If that is
       not set, default to ['binance'] to avoid starting unreliable adapters
       (e.g., okx) by default.
+    - loop: running loop to host the feeders on when ARB_FEEDER_LOOP=app
+      (the FastAPI loop); otherwise feeders share the dedicated feeder loop
+    - record: directory to record the feeders' raw traffic into (see
+      exchanges.recorder); defaults to the ARB_RECORD_DIR env var
     """
     feeders: Dict[str, Any] = {}
+    if loop is not None and loop_mode() == 'app':
+        get_runtime().attach(loop)
+    record = record or os.environ.get('ARB_RECORD_DIR')
+    if record:
+        try:
+            recorder.start_recording(record)
+        except Exception as e:
+            print(f'feeder_utils: recorder failed to start: {e}')
     exclude_env = os.environ.get('ARB_WS_FEED_EXCLUDE', '')
     exclude_set = set([s.strip().lower() for s in exclude_env.split(',') if s.strip()])
 
@@ -61,6 +93,31 @@ def start_all(interval: float = 1.0, symbols: Optional[list[str]] = None, exchan
 
     # If arbitrage mode is enabled, allow starting kucoin in addition to binance
     arb_enabled = os.environ.get('ARB_ENABLE_ARBITRAGE', '0').strip() == '1'
+
+    # ARB_FEEDER_PROCESSES=N: run the feeders in worker processes and register
+    # shared-memory reader proxies here instead (see feeder_procs)
+    n_procs = feeder_procs.process_count()
+    if n_procs > 0:
+        wanted = []
+        for ex in target_exchanges:
+            if ex in exclude_set or ex not in feeder_procs.SHARDABLE or (ex == 'kucoin' and not arb_enabled):
+                continue
+            existing = get_feeder(ex)
+            if existing is not None:
+                feeders[ex] = existing
+                continue
+            wanted.append(ex)
+        try:
+            proxies = feeder_procs.start_sharded(wanted, symbols, interval, n_procs)
+        except Exception as e:
+            print(f'feeder_utils: process feeders failed to start: {e}')
+            proxies = {}
+        for ex, proxy in proxies.items():
+            register_feeder(ex, proxy)
+            feeders[ex] = proxy
+        os.environ['ARB_USE_WS_FEED'] = '1'
+        return feeders
+
     for ex in target_exchanges:
         if ex.lower() in exclude_set:
             continue
@@ -113,51 +170,29 @@ def start_all(interval: float = 1.0, symbols: Optional[list[str]] = None, exchan
                     def _map_symbols_for_kucoin(candidates: list[str]) -> list[str]:
                         if not candidates:
                             return []
+                        reg = get_symbol_registry()
                         try:
-                            import urllib.request as _urlreq, json as _json
-                            # fetch KuCoin symbols list
-                            req = _urlreq.Request('https://api.kucoin.com/api/v1/symbols', headers={'User-Agent': 'arb-feeder/1.0'})
-                            with _urlreq.urlopen(req, timeout=5) as resp:
-                                raw = resp.read()
-                                obj = _json.loads(raw.decode('utf-8'))
-                                data = obj.get('data') or []
-                                available = set()
-                                for it in data:
-                                    try:
-                                        s = (it.get('symbol') or '').upper()
-                                        if s:
-                                            available.add(s)
-                                    except Exception:
-                                        continue
+                            # fetch KuCoin symbols list into the shared registry
+                            obj = _http.get_json_sync('https://api.kucoin.com/api/v1/symbols',
+                                                      headers={'User-Agent': 'arb-feeder/1.0'}, timeout=5)
+                            data = obj.get('data') or []
+                            reg.register_many('kucoin', (
+                                ((it.get('symbol') or '').upper(), it.get('baseCurrency') or '', it.get('quoteCurrency') or '')
+                                for it in data if isinstance(it, dict)
+                            ))
                         except Exception:
                             # If we can't fetch listings, fall back to best-effort mapping
-                            available = set()
+                            pass
 
                         out: list[str] = []
                         for c in candidates:
                             if not c:
                                 continue
-                            s = c.strip().upper().replace('/', '').replace('-', '')
-                            # Try common hyphenated/normalized forms
-                            cand1 = f"{s[:-4]}-{s[-4:]}" if len(s) > 4 else None
-                            cand2 = f"{s[:-3]}-{s[-3:]}" if len(s) > 3 else None
-                            hy1 = (c.strip().upper().replace('/', '-'))
-                            hy2 = (c.strip().upper().replace('/', '').replace('-', ''))
-                            chosen = None
-                            # prefer exact match against KuCoin's available symbols
-                            if hy1 in available:
-                                chosen = hy1
-                            elif hy2 in available:
-                                chosen = hy2
-                            elif cand1 and cand1 in available:
-                                chosen = cand1
-                            elif cand2 and cand2 in available:
-                                chosen = cand2
-                            else:
-                                # if we have no listing info, attempt hyphenated form as last resort
-                                chosen = hy1
-                            if chosen:
-                                out.append(chosen)
+                            # prefer KuCoin's own listing; otherwise hyphenate the canonical form
+                            chosen = reg.native('kucoin', c.strip())
+                            if chosen is None:
+                                chosen = '-'.join(reg.split(c.strip()))
+                            out.append(chosen)
                         return out
 
                     sub_symbols = symbols or ['BTC/USDT', 'ETH/USDT']
@@ -268,3 +303,19 @@ def stop_all(feeders: Dict[str, Any]) -> None:
                 pass
         except Exception:
             pass
+    # flush and close the recording, if any
+    try:
+        recorder.stop_recording()
+    except Exception:
+        pass
+
+
+def health() -> Dict[str, Any]:
+    """Return the feeder runtime metrics, per-feeder health, book event and recorder stats."""
+    rec = recorder.get_recorder()
+    return {
+        'runtime': get_runtime().metrics(),
+        'feeders': feeder_health(),
+        'book_events': get_bus().stats(),
+        'recorder': rec.stats() if rec is not None else None,
+    }
@@ -3,40 +3,23 @@ from __future__ import annotations
 import time
 from typing import List, Dict, Optional
 import os
-import json
-from urllib import request, parse
+from urllib import parse
 
-from .utils import coingecko
+from .utils import coingecko, http_client
+from .exchanges.symbol_registry import split_symbol
 
 
 def _http_get_json(url: str, timeout: float = 5.0) -> Optional[dict]:
     try:
-        req = request.Request(url, headers={"User-Agent": "arb-hotcoins/1.0"})
-        with request.urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
-            return json.loads(data.decode('utf-8'))
+        return http_client.get_json_sync(url, timeout=timeout)
     except Exception:
         return None
 
 
 def _parse_binance_symbol(sym: str) -> tuple[str, str]:
     """Return (base, quote) for a Binance symbol string (e.g. BTCUSDT -> (BTC, USDT))."""
-    # common stable/quote suffixes to consider
-    quotes = ['USDT', 'BUSD', 'USDC', 'USD', 'BTC', 'ETH']
-    # normalize symbol: remove separators so both 'BTCUSDT' and 'BTC/USDT'
-    # are handled uniformly and base/quote values do not contain '/' or '-'
-    s = (sym or '').upper().replace('/', '').replace('-', '')
-    for q in quotes:
-        if s.endswith(q) and len(s) > len(q):
-            base = s[:-len(q)]
-            return base, q
-    # fallback: split in middle (not ideal)
-    if '/' in s:
-        parts = s.split('/')
-        if len(parts) == 2:
-            return parts[0], parts[1]
-    # last-resort: treat last 3 chars as quote
-    return s[:-3], s[-3:]
+    # resolved once per distinct string by the shared registry
+    return split_symbol(sym or '', 'binance')
 
 
 def _binance_top_by_volume(top_n: int = 20, quote_filters: Optional[List[str]] = None) -> List[dict]:
@@ -0,0 +1,443 @@
+"""Streaming indicators updated in O(1) per bar.
+
+Each indicator keeps just its window and running aggregates, so a strategy
+can push one close per bar instead of re-slicing and re-summing its whole
+history on every decision. Values mirror the list-based helpers in
+``strategy.py``:
+
+- ``RollingMean``: windowed mean; ``None`` slots (e.g. a return against a zero
+  close) occupy the window but are not counted
+- ``RollingStats``: windowed mean / variance / std (Welford add + remove)
+- ``RollingMax`` / ``RollingMin``: monotonic-deque extrema
+- ``ATR``: mean true range as a fraction of the previous close; with closes
+  only it is the mean absolute return
+- ``RSI``: Wilder's relative strength index
+- ``Bollinger``: middle / upper / lower bands (population std)
+- ``latest_pivots``: pivot highs / lows of a bounded window using monotonic
+  deques, O(window) instead of O(window * radius)
+
+Running sums are recomputed from the window once per ``window`` updates so
+float drift cannot accumulate over long backtests (amortized O(1)).
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Sequence, Tuple
+
+
+def pct_change(prev: Optional[float], cur: float) -> Optional[float]:
+    """Fractional return, ``None`` when there is no usable previous close."""
+    if prev is None or prev == 0:
+        return None
+    return (cur - prev) / prev
+
+
+class RollingMean:
+    """Mean of the valid values among the last ``window`` pushes."""
+
+    __slots__ = ('window', '_buf', '_sum', '_n', '_since')
+
+    def __init__(self, window: int):
+        self.window = max(1, int(window))
+        self._buf: Deque[Optional[float]] = deque()
+        self._sum = 0.0
+        self._n = 0
+        self._since = 0
+
+    def push(self, x: Optional[float]) -> None:
+        if len(self._buf) == self.window:
+            old = self._buf.popleft()
+            if old is not None:
+                self._sum -= old
+                self._n -= 1
+        self._buf.append(x)
+        if x is not None:
+            self._sum += x
+            self._n += 1
+        self._since += 1
+        if self._since >= self.window:
+            self._since = 0
+            self._sum = math.fsum(v for v in self._buf if v is not None)
+
+    @property
+    def slots(self) -> int:
+        """Pushes currently in the window (valid or not)."""
+        return len(self._buf)
+
+    @property
+    def count(self) -> int:
+        return self._n
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self._n if self._n else None
+
+    def reset(self) -> None:
+        self._buf.clear()
+        self._sum = 0.0
+        self._n = 0
+        self._since = 0
+
+
+class RollingStats:
+    """Windowed mean and variance with Welford updates; ``ddof=1`` is the
+    sample variance, ``ddof=0`` the population variance."""
+
+    __slots__ = ('window', 'ddof', '_buf', '_n', '_mean', '_m2', '_since')
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = max(1, int(window))
+        self.ddof = ddof
+        self._buf: Deque[Optional[float]] = deque()
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since = 0
+
+    def _add(self, x: float) -> None:
+        self._n += 1
+        d = x - self._mean
+        self._mean += d / self._n
+        self._m2 += d * (x - self._mean)
+
+    def _remove(self, x: float) -> None:
+        if self._n <= 1:
+            self._n = 0
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        self._n -= 1
+        d = x - self._mean
+        self._mean -= d / self._n
+        self._m2 -= d * (x - self._mean)
+
+    def _recompute(self) -> None:
+        vals = [v for v in self._buf if v is not None]
+        self._n = len(vals)
+        if not vals:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        self._mean = math.fsum(vals) / self._n
+        self._m2 = math.fsum((v - self._mean) ** 2 for v in vals)
+
+    def push(self, x: Optional[float]) -> None:
+        if len(self._buf) == self.window:
+            old = self._buf.popleft()
+            if old is not None:
+                self._remove(old)
+        self._buf.append(x)
+        if x is not None:
+            self._add(x)
+        self._since += 1
+        if self._since >= self.window:
+            self._since = 0
+            self._recompute()
+
+    @property
+    def slots(self) -> int:
+        return len(self._buf)
+
+    @property
+    def count(self) -> int:
+        return self._n
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._mean if self._n else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        if self._n <= self.ddof or self._n == 0:
+            return None
+        return max(0.0, self._m2) / (self._n - self.ddof)
+
+    @property
+    def std(self) -> Optional[float]:
+        v = self.variance
+        return math.sqrt(v) if v is not None else None
+
+    def reset(self) -> None:
+        self._buf.clear()
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since = 0
+
+
+class _RollingExtreme:
+    __slots__ = ('window', '_dq', '_i')
+
+    def __init__(self, window: int):
+        self.window = max(1, int(window))
+        self._dq: Deque[Tuple[int, float]] = deque()
+        self._i = 0
+
+    def _beats(self, a: float, b: float) -> bool:
+        raise NotImplementedError
+
+    def push(self, x: float) -> None:
+        dq = self._dq
+        while dq and not self._beats(dq[-1][1], x):
+            dq.pop()
+        dq.append((self._i, x))
+        self._i += 1
+        if dq[0][0] <= self._i - 1 - self.window:
+            dq.popleft()
+
+    @property
+    def count(self) -> int:
+        return min(self._i, self.window)
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._dq[0][1] if self._dq else None
+
+    def reset(self) -> None:
+        self._dq.clear()
+        self._i = 0
+
+
+class RollingMax(_RollingExtreme):
+    """Maximum of the last ``window`` values."""
+
+    __slots__ = ()
+
+    def _beats(self, a: float, b: float) -> bool:
+        return a > b
+
+
+class RollingMin(_RollingExtreme):
+    """Minimum of the last ``window`` values."""
+
+    __slots__ = ()
+
+    def _beats(self, a: float, b: float) -> bool:
+        return a < b
+
+
+class ATR:
+    """Mean true range over ``window`` bars as a fraction of the previous close."""
+
+    __slots__ = ('_mean', '_prev')
+
+    def __init__(self, window: int):
+        self._mean = RollingMean(window)
+        self._prev: Optional[float] = None
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None) -> None:
+        prev = self._prev
+        self._prev = close
+        if prev is None:
+            return
+        if prev == 0:
+            self._mean.push(None)
+            return
+        if high is None or low is None:
+            tr = abs(close - prev)
+        else:
+            tr = max(high - low, abs(high - prev), abs(low - prev))
+        self._mean.push(tr / prev)
+
+    @property
+    def slots(self) -> int:
+        return self._mean.slots
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._mean.value
+
+    def reset(self) -> None:
+        self._mean.reset()
+        self._prev = None
+
+
+class RSI:
+    """Wilder's RSI; ``None`` until ``period`` changes have been seen."""
+
+    __slots__ = ('period', '_prev', '_gain', '_loss', '_n')
+
+    def __init__(self, period: int = 14):
+        self.period = max(1, int(period))
+        self._prev: Optional[float] = None
+        self._gain = 0.0
+        self._loss = 0.0
+        self._n = 0
+
+    def update(self, close: float) -> None:
+        prev = self._prev
+        self._prev = close
+        if prev is None:
+            return
+        ch = close - prev
+        gain, loss = (ch, 0.0) if ch > 0 else (0.0, -ch)
+        self._n += 1
+        p = self.period
+        if self._n <= p:
+            # seed with the simple average of the first ``period`` changes
+            self._gain += gain / p
+            self._loss += loss / p
+        else:
+            self._gain = (self._gain * (p - 1) + gain) / p
+            self._loss = (self._loss * (p - 1) + loss) / p
+
+    @property
+    def value(self) -> Optional[float]:
+        if self._n < self.period:
+            return None
+        if self._loss == 0:
+            return 100.0 if self._gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + self._gain / self._loss)
+
+    def reset(self) -> None:
+        self._prev = None
+        self._gain = 0.0
+        self._loss = 0.0
+        self._n = 0
+
+
+class Bollinger:
+    """Bollinger bands over ``period`` closes; ``None`` until the window is full."""
+
+    __slots__ = ('period', 'k', '_stats')
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.period = max(1, int(period))
+        self.k = k
+        self._stats = RollingStats(self.period, ddof=0)
+
+    def update(self, close: float) -> None:
+        self._stats.push(close)
+
+    @property
+    def bands(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if self._stats.count < self.period:
+            return None, None, None
+        mid = self._stats.mean
+        sd = self._stats.std or 0.0
+        return mid, mid + self.k * sd, mid - self.k * sd
+
+    def reset(self) -> None:
+        self._stats.reset()
+
+
+def _neighbour_extremes(data: Sequence[float], radius: int, want_max: bool) -> Tuple[List[Optional[float]], List[Optional[float]]]:
+    """For each i, the extreme of data[i-radius:i] and of data[i+1:i+radius+1]
+    (clipped to the sequence), via one monotonic-deque pass each way."""
+    n = len(data)
+    better = (lambda a, b: a >= b) if want_max else (lambda a, b: a <= b)
+    left: List[Optional[float]] = [None] * n
+    dq: Deque[int] = deque()
+    for i in range(n):
+        while dq and dq[0] < i - radius:
+            dq.popleft()
+        left[i] = data[dq[0]] if dq else None
+        while dq and not better(data[dq[-1]], data[i]):
+            dq.pop()
+        dq.append(i)
+    right: List[Optional[float]] = [None] * n
+    dq.clear()
+    for i in range(n - 1, -1, -1):
+        while dq and dq[0] > i + radius:
+            dq.popleft()
+        right[i] = data[dq[0]] if dq else None
+        while dq and not better(data[dq[-1]], data[i]):
+            dq.pop()
+        dq.append(i)
+    return left, right
+
+
+def _pick(a: Optional[float], b: Optional[float], want_max: bool) -> Optional[float]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b) if want_max else min(a, b)
+
+
+def latest_pivots(data: Sequence[float], radius: int, min_distance: int,
+                  prominence_pct: float) -> Tuple[Optional[float], Optional[float]]:
+    """Latest pivot high and low of ``data`` (already cut to the lookback).
+
+    A pivot beats every other value within ``radius`` bars by at least
+    ``prominence_pct`` and sits ``min_distance`` bars after the previous
+    pivot of its kind.
+    """
+    n = len(data)
+    if n < 2 or radius < 1:
+        return None, None
+    lmax, rmax = _neighbour_extremes(data, radius, True)
+    lmin, rmin = _neighbour_extremes(data, radius, False)
+    last_high: Optional[Tuple[int, float]] = None
+    last_low: Optional[Tuple[int, float]] = None
+    for i in range(n):
+        max_others = _pick(lmax[i], rmax[i], True)
+        if max_others is None:
+            continue
+        min_others = _pick(lmin[i], rmin[i], False)
+        val = data[i]
+        if val > max_others and (val - max_others) / max_others >= prominence_pct:
+            if last_high is None or (i - last_high[0]) >= min_distance:
+                last_high = (i, val)
+        if val < min_others and (min_others - val) / min_others >= prominence_pct:
+            if last_low is None or (i - last_low[0]) >= min_distance:
+                last_low = (i, val)
+    return (last_high[1] if last_high else None), (last_low[1] if last_low else None)
+
+
+def tail(values: Iterable[float], n: int) -> List[float]:
+    """Last ``n`` values without copying the whole sequence when it can be sliced."""
+    if n <= 0:
+        return []
+    if isinstance(values, (list, tuple)):
+        return list(values[-n:])
+    return list(deque(values, maxlen=n))
+
+
+class CloseCursor:
+    """Tracks how much of a caller-owned close list has been consumed.
+
+    Strategies receive the full ``recent_closes`` list on every call. Only
+    when it is provably the same list grown by appends (the very same list
+    object, longer than last time, with its first close and the close at the
+    previous end unchanged) are just the appended closes new. Anything else
+    (a refetched or sliding window, a copy, a different series) means start
+    over: equal values at two positions do not prove a window did not slide.
+    """
+
+    __slots__ = ('n', '_ref', '_head', '_last')
+
+    def __init__(self):
+        self.n = 0
+        self._ref: Optional[Sequence[float]] = None
+        self._head: Optional[float] = None
+        self._last: Optional[float] = None
+
+    def new_closes(self, closes: Sequence[float], warmup: int) -> Tuple[bool, List[float]]:
+        """Return (reset, closes to push); on reset only the last ``warmup``."""
+        if not isinstance(closes, list):
+            closes = list(closes)
+        n = len(closes)
+        if n == 0:
+            self.n, self._ref, self._head, self._last = 0, None, None, None
+            return True, []
+        if (self.n and closes is self._ref and n > self.n
+                and closes[0] == self._head and closes[self.n - 1] == self._last):
+            fresh = closes[self.n:]
+            reset = False
+        else:
+            fresh = tail(closes, warmup)
+            reset = True
+        self.n = n
+        self._ref = closes
+        self._head = closes[0]
+        self._last = closes[-1]
+        return reset, fresh
+
+
+__all__ = [
+    'ATR', 'Bollinger', 'CloseCursor', 'RSI', 'RollingMax', 'RollingMean', 'RollingMin',
+    'RollingStats', 'latest_pivots', 'pct_change', 'tail',
+]
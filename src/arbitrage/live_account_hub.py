@@ -0,0 +1,471 @@
+"""Shared upstream Binance futures account stream for /ws/live-dashboard.
+
+Each dashboard connection used to build its own aiohttp connector, its own
+``ccxtpro.binance`` client and its own ``load_markets()`` before running its
+own ``watch_balance`` / ``watch_orders`` / ``watch_ticker`` calls, so every
+open browser tab cost an authenticated upstream socket and a market load.
+
+``LiveAccountHub`` owns one upstream client for the whole process:
+
+- balance (REST once, then ``watch_balance``), orders (``watch_orders``) and
+  one ``watch_ticker`` per symbol with a live dashboard position
+- the latest state is kept in memory; clients subscribe and get the current
+  snapshot (connected, balance, positions, last orders, P&L per position)
+  queued immediately, without waiting for the market preload, which runs in
+  the background
+- updates fan out through a bounded queue per client. A client whose queue
+  fills up does not block the others: its backlog is replaced by a fresh
+  snapshot of the current state and the overflow is counted
+- the upstream connection starts with the first client and is closed
+  ``ARB_LIVE_HUB_IDLE_S`` seconds (default 60) after the last one leaves
+
+Message shapes are the ones the dashboard already consumes (``balance``,
+``positions``, ``orders``, ``pnl_update``). Must be used from a single event
+loop (the app's).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .utils.env import env_float
+
+_CLOSED = object()
+
+# async () -> (exchange, cleanup coroutine function)
+ExchangeFactory = Callable[[], Awaitable[Tuple[Any, Callable[[], Awaitable[None]]]]]
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _raw_symbol(symbol: str) -> str:
+    """MYXUSDT -> MYX/USDT:USDT (ccxt unified futures symbol)."""
+    return f"{symbol[:-4]}/{symbol[-4:]}:{symbol[-4:]}"
+
+
+async def binance_futures_client() -> Tuple[Any, Callable[[], Awaitable[None]]]:
+    """Default upstream: ccxt.pro Binance futures with the API keys from the env."""
+    from .trading_sessions import ccxtpro_client
+    return await ccxtpro_client('binance', 'futures')
+
+
+class HubClient:
+    """One subscriber: a bounded queue of dashboard messages."""
+
+    def __init__(self, hub: 'LiveAccountHub', maxsize: int):
+        self._hub = hub
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.connected_ts = time.time()
+        self.sent = 0
+        self.drops = 0
+        self.resyncs = 0
+        self.closed = False
+
+    def _drain(self) -> int:
+        n = 0
+        while True:
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return n
+            n += 1
+
+    def offer(self, msg: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        if not self.queue.full():
+            self.queue.put_nowait(msg)
+            return
+        # too far behind: the current state replaces the backlog
+        self.drops += self._drain()
+        self.resyncs += 1
+        for m in self._hub.snapshot():
+            if self.queue.full():
+                break
+            self.queue.put_nowait(m)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._drain()
+        self.queue.put_nowait(_CLOSED)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next message; None on timeout. Raises ConnectionError once closed."""
+        try:
+            msg = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if msg is _CLOSED:
+            self.queue.put_nowait(_CLOSED)
+            raise ConnectionError('hub client closed')
+        self.sent += 1
+        return msg
+
+
+class LiveAccountHub:
+    """Single upstream account/market stream fanned out to dashboard clients.
+
+    ``exchange_factory`` defaults to ``binance_futures_client`` and
+    ``dashboard`` to ``get_dashboard()``; both can be replaced for tests.
+    ``positions_fetcher`` (a blocking callable returning ccxt positions) is
+    used once per upstream session to import exchange positions into the
+    dashboard.
+    """
+
+    def __init__(self, exchange_factory: Optional[ExchangeFactory] = None, dashboard: Any = None,
+                 queue_size: Optional[int] = None, idle_s: Optional[float] = None,
+                 position_check_s: float = 10.0, ticker_timeout_s: float = 5.0):
+        self._factory = exchange_factory or binance_futures_client
+        self._dashboard = dashboard
+        self.positions_fetcher: Optional[Callable[[], List[Dict[str, Any]]]] = None
+        self.queue_size = max(8, int(queue_size or env_float('ARB_LIVE_HUB_QUEUE', 256)))
+        self.idle_s = idle_s if idle_s is not None else env_float('ARB_LIVE_HUB_IDLE_S', 60.0)
+        self.position_check_s = position_check_s
+        self.ticker_timeout_s = ticker_timeout_s
+        self._clients: Set[HubClient] = set()
+        self._exchange: Any = None
+        self._cleanup: Optional[Callable[[], Awaitable[None]]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._tickers: Dict[str, asyncio.Task] = {}
+        self._idle_task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._positions_changed = asyncio.Event()
+        # latest state
+        self._wallet: Optional[float] = None
+        self._orders: Optional[Dict[str, Any]] = None
+        self._pnl: Dict[str, Dict[str, Any]] = {}
+        self._positions_sig: Optional[tuple] = None
+        self.markets_loaded = False
+        self.last_error: Optional[str] = None
+        self.started_ts: Optional[float] = None
+        self.sessions = 0
+        self.published = 0
+
+    @property
+    def dashboard(self):
+        if self._dashboard is None:
+            from .live_dashboard import get_dashboard
+            self._dashboard = get_dashboard()
+        return self._dashboard
+
+    @property
+    def running(self) -> bool:
+        return self._exchange is not None
+
+    # -- clients --------------------------------------------------------------------
+    async def subscribe(self) -> HubClient:
+        """Register a client; its queue starts with the current snapshot."""
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        await self._ensure_started()
+        client = HubClient(self, self.queue_size)
+        for msg in self.snapshot():
+            client.offer(msg)
+        self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client: HubClient) -> None:
+        client.close()
+        self._clients.discard(client)
+        if not self._clients and self.running and self._idle_task is None:
+            self._idle_task = asyncio.get_running_loop().create_task(self._stop_when_idle())
+
+    async def _stop_when_idle(self) -> None:
+        await asyncio.sleep(self.idle_s)
+        self._idle_task = None
+        async with self._start_lock:
+            # a client may have subscribed while we waited for the lock
+            if not self._clients:
+                await self._shutdown()
+
+    def publish(self, msg: Dict[str, Any]) -> None:
+        self.published += 1
+        for client in list(self._clients):
+            client.offer(msg)
+
+    # -- state -------------------------------------------------------------------------
+    def _balance_message(self) -> Dict[str, Any]:
+        net = self.dashboard.calculate_net_balance(self._wallet or 0.0, live_only=True)
+        return {
+            'type': 'balance',
+            'data': {
+                'wallet_balance': self._wallet,
+                'unrealized_pnl': net['unrealized_pnl'],
+                'realized_pnl': net['realized_pnl'],
+                'total_fees_paid': net['total_fees_paid'],
+                'net_balance': net['net_balance'],
+            },
+            'timestamp': _now_ms(),
+        }
+
+    def _live_positions(self) -> list:
+        return [p for p in self.dashboard.get_all_positions() if getattr(p, 'is_live', False)]
+
+    def _positions_message(self) -> Dict[str, Any]:
+        out = []
+        for pos in self._live_positions():
+            pnl_pct = 0.0
+            if pos.entry_price > 0 and pos.size > 0:
+                pnl_pct = (pos.unrealized_pnl / (pos.entry_price * pos.size)) * 100
+            out.append({
+                'symbol': pos.symbol,
+                'side': pos.side,
+                'entry_price': pos.entry_price,
+                'size': pos.size,
+                'unrealized_pnl': pos.unrealized_pnl,
+                'unrealized_pnl_pct': pnl_pct,
+                'leverage': getattr(pos, 'leverage', 1) or 1,
+                'liquidation_price': 0,
+                'stop_loss': pos.stop_loss,
+                'take_profit': pos.take_profit,
+                'entry_time': pos.entry_time,
+                'current_price': pos.entry_price + (pos.unrealized_pnl / pos.size) if pos.size > 0 else 0,
+                # unique per hedge-mode leg
+                'position_id': f"{pos.symbol}_{pos.side.upper()}",
+            })
+        return {'type': 'positions', 'data': out, 'count': len(out), 'timestamp': _now_ms()}
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Messages that bring a new (or lagging) client up to date."""
+        msgs: List[Dict[str, Any]] = [{
+            'type': 'connected',
+            'message': 'Connected to Binance WebSocket',
+            'timestamp': _now_ms(),
+        }]
+        if self._wallet is not None:
+            msgs.append(self._balance_message())
+        msgs.append(self._positions_message())
+        if self._orders is not None:
+            msgs.append(self._orders)
+        msgs.extend(self._pnl.values())
+        return msgs
+
+    # -- upstream ------------------------------------------------------------------------
+    async def _ensure_started(self) -> None:
+        async with self._start_lock:
+            if self.running:
+                return
+            self._exchange, self._cleanup = await self._factory()
+            self.started_ts = time.time()
+            self.sessions += 1
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(c) for c in (
+                self._load_markets(), self._watch_balance(), self._watch_orders(), self._manage_positions())]
+
+    async def stop(self) -> None:
+        """Close the upstream connection (clients stay registered)."""
+        async with self._start_lock:
+            await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        # caller holds _start_lock, so a concurrent subscribe() waits in
+        # _ensure_started and then opens a fresh session
+        tasks = self._tasks + list(self._tickers.values())
+        self._tasks, self._tickers = [], {}
+        cleanup, self._cleanup = self._cleanup, None
+        self._exchange = None
+        self.markets_loaded = False
+        self._positions_sig = None
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if cleanup is not None:
+            await cleanup()
+
+    def _error(self, where: str, e: Exception) -> None:
+        self.last_error = f'{where}: {type(e).__name__}: {e}'
+        print(f'[live-hub] {self.last_error}')
+
+    async def _load_markets(self) -> None:
+        try:
+            await asyncio.wait_for(self._exchange.load_markets(), timeout=30.0)
+            self.markets_loaded = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # markets also load lazily on the first watch_* call
+            self._error('load_markets', e)
+            msg = str(e).lower()
+            if 'authentication' in msg or 'api' in msg:
+                self.publish({'type': 'error', 'message': f'Binance API authentication failed: {e}'})
+
+    async def _watch_balance(self) -> None:
+        try:
+            bal = await self._exchange.fetch_balance()
+            self._wallet = (bal.get('USDT') or {}).get('total', 0.0)
+            self.publish(self._balance_message())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error('fetch_balance', e)
+        while True:
+            try:
+                bal = await self._exchange.watch_balance()
+                self._wallet = (bal.get('USDT') or {}).get('total', 0.0)
+                self.publish(self._balance_message())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._error('watch_balance', e)
+                await asyncio.sleep(2)
+
+    async def _watch_orders(self) -> None:
+        while True:
+            try:
+                orders = await self._exchange.watch_orders()
+                self._orders = {
+                    'type': 'orders',
+                    'data': [{k: o.get(k) for k in ('id', 'symbol', 'type', 'side', 'status', 'price', 'amount',
+                                                    'filled', 'remaining', 'timestamp')} for o in orders],
+                    'timestamp': _now_ms(),
+                }
+                self.publish(self._orders)
+                # fills open and close positions: re-check the ticker set now
+                self._positions_changed.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._error('watch_orders', e)
+                await asyncio.sleep(2)
+
+    async def _import_positions(self) -> None:
+        """Add exchange positions missing from the dashboard (once per session)."""
+        if self.positions_fetcher is None:
+            return
+        from .live_dashboard import Position
+
+        try:
+            positions = await asyncio.to_thread(self.positions_fetcher)
+        except Exception as e:
+            self._error('positions', e)
+            return
+        for bp in positions or []:
+            try:
+                contracts = float(bp.get('contracts', 0) or 0)
+                if contracts == 0:
+                    continue
+                symbol = bp['symbol'].replace('/', '').replace(':USDT', '')
+                side = (bp.get('side') or 'long').lower()
+                if any(p.symbol == symbol and p.side == side for p in self._live_positions()):
+                    continue
+                self.dashboard.open_position(Position(
+                    symbol=symbol, side=side, entry_price=float(bp.get('entryPrice', 0) or 0), size=abs(contracts),
+                    entry_time=_now_ms(), market='futures', is_live=True))
+            except Exception as e:
+                self._error('import position', e)
+
+    async def _manage_positions(self) -> None:
+        """Publish position changes and keep one ticker watcher per live position symbol."""
+        await self._import_positions()
+        while True:
+            try:
+                live = self._live_positions()
+                sig = tuple(sorted((p.symbol, p.side, p.size, p.entry_price, p.stop_loss, p.take_profit) for p in live))
+                if sig != self._positions_sig:
+                    self._positions_sig = sig
+                    self.publish(self._positions_message())
+                    ids = {f"{p.symbol}_{p.side.upper()}" for p in live}
+                    for pid in [k for k in self._pnl if k not in ids]:
+                        del self._pnl[pid]
+                needed = {_raw_symbol(p.symbol) for p in live}
+                for raw in needed:
+                    task = self._tickers.get(raw)
+                    if task is None or task.done():
+                        self._tickers[raw] = asyncio.get_running_loop().create_task(self._watch_ticker(raw))
+                for raw in [r for r in self._tickers if r not in needed]:
+                    self._tickers.pop(raw).cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._error('positions', e)
+            self._positions_changed.clear()
+            try:
+                await asyncio.wait_for(self._positions_changed.wait(), self.position_check_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _watch_ticker(self, raw_symbol: str) -> None:
+        errors = 0
+        while errors < 5:
+            try:
+                ticker = await asyncio.wait_for(self._exchange.watch_ticker(raw_symbol), self.ticker_timeout_s)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                errors += 1
+                if not isinstance(e, asyncio.TimeoutError):
+                    self._error(f'watch_ticker {raw_symbol}', e)
+                await asyncio.sleep(1)
+                continue
+            price = float(ticker.get('last') or ticker.get('mark') or 0)
+            if price:
+                self._on_price(raw_symbol, price)
+        # the position manager restarts it on its next pass
+
+    def _on_price(self, raw_symbol: str, price: float) -> None:
+        for pos in self._live_positions():
+            if _raw_symbol(pos.symbol) != raw_symbol:
+                continue
+            if pos.side == 'long':
+                pnl = (price - pos.entry_price) * pos.size
+            else:
+                pnl = (pos.entry_price - price) * pos.size
+            pnl_pct = (pnl / (pos.entry_price * pos.size)) * 100 if pos.entry_price > 0 and pos.size > 0 else 0.0
+            pid = f"{pos.symbol}_{pos.side.upper()}"
+            msg = {
+                'type': 'pnl_update',
+                'data': {
+                    'symbol': pos.symbol,
+                    'side': pos.side,
+                    'position_id': pid,
+                    'current_price': price,
+                    'unrealized_pnl': pnl,
+                    'unrealized_pnl_pct': pnl_pct,
+                    'stop_loss': pos.stop_loss,
+                    'take_profit': pos.take_profit,
+                },
+                'timestamp': _now_ms(),
+            }
+            self._pnl[pid] = msg
+            self.publish(msg)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'running': self.running,
+            'sessions': self.sessions,
+            'uptime_s': round(now - self.started_ts, 1) if self.running and self.started_ts else 0.0,
+            'markets_loaded': self.markets_loaded,
+            'tickers': sorted(self._tickers),
+            'published': self.published,
+            'last_error': self.last_error,
+            'queue_size': self.queue_size,
+            'clients': [{
+                'age_s': round(now - c.connected_ts, 1),
+                'queued': c.queue.qsize(),
+                'sent': c.sent,
+                'drops': c.drops,
+                'resyncs': c.resyncs,
+            } for c in self._clients],
+        }
+
+
+_HUB: Optional[LiveAccountHub] = None
+_HUB_LOCK = threading.Lock()
+
+
+def get_live_account_hub() -> LiveAccountHub:
+    """Return the process-wide live account hub (created on first use)."""
+    global _HUB
+    with _HUB_LOCK:
+        if _HUB is None:
+            _HUB = LiveAccountHub()
+        return _HUB
@@ -1,20 +1,33 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import os
-import time
 import uuid
-from typing import Optional
-from urllib import request as _urllib_request, parse as _urllib_parse
+from collections import deque
+from typing import List, Optional
 
 from .strategy_executor import StrategyExecutor
+from .utils import http_client
+from .exchanges import recorder
+from .exchanges.kline_store import get_kline_store
 from .live_dashboard import get_dashboard, Signal, Position
 
 # Minimal Binance futures klines URL (public)
 BINANCE_FUTURES_KLINES_URL = "https://fapi.binance.com/fapi/v1/klines"
 
 
+def closes_from_klines(data) -> List[float]:
+    """Close prices of klines in REST layout ([open_time, open, high, low, close, ...])."""
+    try:
+        return [float(k[4]) for k in data or []]
+    except Exception:
+        return []
+
+
+def use_scheduler() -> bool:
+    return os.environ.get('ARB_STRATEGY_SCHEDULER', '1') != '0'
+
+
 class LiveStrategy:
     """Run the bear strategy logic on live market klines and emit actions.
 
@@ -30,6 +43,10 @@ class LiveStrategy:
         self._task: Optional[asyncio.Task] = None
         self._stop = False
         self._seen_actions: set[str] = set()
+        self._scheduled = False
+        # time (ms) of the bar close / tick being evaluated, for signal latency
+        self._event_ms: Optional[float] = None
+        self.signal_latency_ms: deque = deque(maxlen=200)
         
         # Validate mode
         valid_modes = ['bear', 'bull', 'scalp', 'range']
@@ -149,15 +166,9 @@ class LiveStrategy:
         except Exception:
             pass
 
-        # Fallback to REST fetch from Binance futures
-        params = {'symbol': self.symbol, 'interval': self.interval, 'limit': limit}
-        q = _urllib_parse.urlencode(params)
-        url = f"{BINANCE_FUTURES_KLINES_URL}?{q}"
-        req = _urllib_request.Request(url, headers={'User-Agent': 'arb-live-strategy/1.0'})
+        # Fallback to the shared kline store (Binance futures stream + REST backfill)
         try:
-            with _urllib_request.urlopen(req, timeout=10) as resp:
-                data = json.loads(resp.read().decode('utf-8'))
-                return data
+            return get_kline_store().get_klines(self.symbol, self.interval, limit, market='futures')
         except Exception:
             return []
 
@@ -165,7 +176,7 @@ class LiveStrategy:
         aid = uuid.uuid4().hex
         act = {
             'id': aid,
-            'timestamp': int(time.time() * 1000),
+            'timestamp': int(recorder.now() * 1000),
             'symbol': self.symbol,
             'action': action,
             'pos_size': pos_size,
@@ -174,333 +185,366 @@ class LiveStrategy:
         }
         return act
 
+    def _bars_needed(self) -> int:
+        """Closes each evaluation needs (scalp decides on 40+, range on 60+)."""
+        return {'scalp': 50, 'range': 60}.get(self.mode, 5)
+
     async def _loop(self, poll_s: float = 15.0):
-        # rolling buffer of closes (most recent last) length >= 5 to compute 15/30/60m
+        """Legacy per-strategy polling loop (ARB_STRATEGY_SCHEDULER=0)."""
         closes = []
-        # For scalp mode, fetch more initial bars
-        initial_fetch = 50 if self.mode == 'scalp' else 5
         print(f"[LiveStrategy] Starting {self.mode} strategy loop for {self.symbol} (interval={self.interval})")
         
         while not self._stop:
-            # fetch several recent klines and compute close list
-            fetch_limit = initial_fetch if len(closes) < initial_fetch else 5
-            data = await asyncio.to_thread(self._fetch_klines, fetch_limit)
-            new_closes = []
-            try:
-                for k in data:
-                    # kline format: [open_time, open, high, low, close, ...]
-                    c = float(k[4])
-                    new_closes.append(c)
-            except Exception:
-                new_closes = []
+            data = await asyncio.to_thread(self._fetch_klines, self._bars_needed())
+            new_closes = closes_from_klines(data)
             if new_closes:
                 closes = new_closes
-            
-            if len(closes) > 0:
-                print(f"[LiveStrategy {self.symbol}] Closes buffer: {len(closes)} bars, current price: {closes[-1]:.2f}")
-            
-            # Update position P&L with current price
-            if closes and self._current_position:
-                current_price = closes[-1]
-                self.dashboard.update_position_pnl(self.symbol, current_price)
-
-            # need at least 5 15m closes to compute pct15 (1), pct30 (2), pct60 (4)
-            if len(closes) >= 5:
-                price = closes[-1]
-                def pct(n):
-                    try:
-                        prev = closes[-1 - n]
-                        if prev == 0:
-                            return None
-                        return (price - prev) / prev * 100.0
-                    except Exception:
+            await self._evaluate(closes)
+            await asyncio.sleep(poll_s)
+
+    async def on_bar(self, closes: List[float], bar_close_ms: Optional[float] = None):
+        """Evaluate on a closed bar; called by the strategy scheduler."""
+        self._event_ms = bar_close_ms
+        try:
+            await self._evaluate(closes)
+        finally:
+            self._event_ms = None
+
+    async def on_tick(self, price: float, ts_ms: Optional[float] = None):
+        """Check the open position's stop-loss / take-profit on a mark price tick."""
+        current_pos = self.dashboard.get_position(self.symbol) if hasattr(self.dashboard, 'get_position') else self._current_position
+        if current_pos is None:
+            return
+        self.dashboard.update_position_pnl(self.symbol, price)
+        close_reason = None
+        if current_pos.side == 'long':
+            if price <= current_pos.stop_loss:
+                close_reason = 'stop_loss'
+            elif price >= current_pos.take_profit:
+                close_reason = 'take_profit'
+        else:  # short
+            if price >= current_pos.stop_loss:
+                close_reason = 'stop_loss'
+            elif price <= current_pos.take_profit:
+                close_reason = 'take_profit'
+        if close_reason is None:
+            return
+        action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
+        self._event_ms = ts_ms
+        try:
+            await self._emit_action(self._make_action(action_type, price, None, close_reason))
+        finally:
+            self._event_ms = None
+
+    async def _evaluate(self, closes: List[float]):
+        """Run the mode's rules on ``closes`` (oldest first) and emit actions."""
+        if len(closes) > 0:
+            print(f"[LiveStrategy {self.symbol}] Closes buffer: {len(closes)} bars, current price: {closes[-1]:.2f}")
+        
+        # Update position P&L with current price
+        if closes and self._current_position:
+            current_price = closes[-1]
+            self.dashboard.update_position_pnl(self.symbol, current_price)
+
+        # need at least 5 15m closes to compute pct15 (1), pct30 (2), pct60 (4)
+        if len(closes) >= 5:
+            price = closes[-1]
+            def pct(n):
+                try:
+                    prev = closes[-1 - n]
+                    if prev == 0:
                         return None
+                    return (price - prev) / prev * 100.0
+                except Exception:
+                    return None
 
-                pct15 = pct(1)
-                pct30 = pct(2)
-                pct60 = pct(4)
+            pct15 = pct(1)
+            pct30 = pct(2)
+            pct60 = pct(4)
 
-                # Mode-specific signal generation
-                if self.mode == 'bear':
-                    # Bear mode: long when deeply oversold, short quick on pumps
-                    long_signal = False
-                    short_quick = False
-                    signal_reason = None
+            # Mode-specific signal generation
+            if self.mode == 'bear':
+                # Bear mode: long when deeply oversold, short quick on pumps
+                long_signal = False
+                short_quick = False
+                signal_reason = None
+                
+                if pct15 is not None and pct30 is not None and pct60 is not None:
+                    # Calculate adaptive 60-min threshold based on max drop in last 60 minutes
+                    # This catches extreme volatile moves that might not recover
+                    # We look for the WORST drop at any point in the last 60 minutes
+                    max_drop_60m = 0.0
+                    if len(closes) >= 5:  # Need at least 5 bars (60 mins of 15m candles)
+                        for i in range(1, min(5, len(closes))):
+                            prev = closes[-1 - i]
+                            if prev > 0:
+                                drop = ((price - prev) / prev) * 100.0
+                                if drop < max_drop_60m:
+                                    max_drop_60m = drop
                     
-                    if pct15 is not None and pct30 is not None and pct60 is not None:
-                        # Calculate adaptive 60-min threshold based on max drop in last 60 minutes
-                        # This catches extreme volatile moves that might not recover
-                        # We look for the WORST drop at any point in the last 60 minutes
-                        max_drop_60m = 0.0
-                        if len(closes) >= 5:  # Need at least 5 bars (60 mins of 15m candles)
-                            for i in range(1, min(5, len(closes))):
-                                prev = closes[-1 - i]
-                                if prev > 0:
-                                    drop = ((price - prev) / prev) * 100.0
-                                    if drop < max_drop_60m:
-                                        max_drop_60m = drop
-                        
-                        # Standard entry: strict conditions
-                        standard_condition = (pct15 <= -self.p15_thresh) and (pct30 <= -self.p30_thresh) and (pct60 <= -self.p60_thresh)
-                        
-                        # Adaptive entry: if max drop in 60min exceeds -12%, use relaxed conditions
-                        # This catches scenarios where price crashed -20% then recovered
-                        # We still want to enter because the volatility suggests more downside
-                        extreme_drop_detected = max_drop_60m <= -self.p60_thresh  # Worse than -12%
-                        
-                        # Scale relaxation based on severity of max drop
-                        # -12% to -15%: relax pct30 to -8% (20% relaxation)
-                        # -15% to -20%: relax pct30 to -6% (40% relaxation)
-                        # -20%+:        relax pct30 to -5% (50% relaxation)
-                        if max_drop_60m <= -20.0:
-                            relaxed_p30 = -(self.p30_thresh * 0.5)  # -5%
-                        elif max_drop_60m <= -15.0:
-                            relaxed_p30 = -(self.p30_thresh * 0.6)  # -6%
-                        else:
-                            relaxed_p30 = -(self.p30_thresh * 0.8)  # -8%
-                        
-                        adaptive_condition = (pct15 <= -self.p15_thresh) and (pct30 <= relaxed_p30)
-                        
-                        if standard_condition:
-                            long_signal = True
-                            signal_reason = f'standard_oversold: pct15={pct15:.2f}%, pct30={pct30:.2f}%, pct60={pct60:.2f}%'
-                        elif extreme_drop_detected and adaptive_condition:
-                            # Extreme volatility detected - use relaxed entry
-                            long_signal = True
-                            signal_reason = f'extreme_volatility: max_drop_60m={max_drop_60m:.2f}%, current: pct15={pct15:.2f}%, pct30={pct30:.2f}%, pct60={pct60:.2f}%'
+                    # Standard entry: strict conditions
+                    standard_condition = (pct15 <= -self.p15_thresh) and (pct30 <= -self.p30_thresh) and (pct60 <= -self.p60_thresh)
+                    
+                    # Adaptive entry: if max drop in 60min exceeds -12%, use relaxed conditions
+                    # This catches scenarios where price crashed -20% then recovered
+                    # We still want to enter because the volatility suggests more downside
+                    extreme_drop_detected = max_drop_60m <= -self.p60_thresh  # Worse than -12%
+                    
+                    # Scale relaxation based on severity of max drop
+                    # -12% to -15%: relax pct30 to -8% (20% relaxation)
+                    # -15% to -20%: relax pct30 to -6% (40% relaxation)
+                    # -20%+:        relax pct30 to -5% (50% relaxation)
+                    if max_drop_60m <= -20.0:
+                        relaxed_p30 = -(self.p30_thresh * 0.5)  # -5%
+                    elif max_drop_60m <= -15.0:
+                        relaxed_p30 = -(self.p30_thresh * 0.6)  # -6%
+                    else:
+                        relaxed_p30 = -(self.p30_thresh * 0.8)  # -8%
+                    
+                    adaptive_condition = (pct15 <= -self.p15_thresh) and (pct30 <= relaxed_p30)
                     
-                    short_quick = True if (pct15 is not None and pct15 >= 5.0) else False
+                    if standard_condition:
+                        long_signal = True
+                        signal_reason = f'standard_oversold: pct15={pct15:.2f}%, pct30={pct30:.2f}%, pct60={pct60:.2f}%'
+                    elif extreme_drop_detected and adaptive_condition:
+                        # Extreme volatility detected - use relaxed entry
+                        long_signal = True
+                        signal_reason = f'extreme_volatility: max_drop_60m={max_drop_60m:.2f}%, current: pct15={pct15:.2f}%, pct30={pct30:.2f}%, pct60={pct60:.2f}%'
+                
+                short_quick = True if (pct15 is not None and pct15 >= 5.0) else False
 
-                    # Check if position already exists before opening new one
-                    current_pos = self.dashboard.get_position(self.symbol)
+                # Check if position already exists before opening new one
+                current_pos = self.dashboard.get_position(self.symbol)
+                
+                if long_signal and current_pos is None:
+                    reason = signal_reason if signal_reason else 'long_signal'
+                    act = self._make_action('open_long', price, None, reason)
+                    await self._emit_action(act)
+                elif short_quick and current_pos is None:
+                    act = self._make_action('open_short', price, None, 'short_quick')
+                    await self._emit_action(act)
+                elif current_pos is not None:
+                    # Position exists - check stop-loss and take-profit
+                    should_close = False
+                    close_reason = ''
                     
-                    if long_signal and current_pos is None:
-                        reason = signal_reason if signal_reason else 'long_signal'
-                        act = self._make_action('open_long', price, None, reason)
-                        await self._emit_action(act)
-                    elif short_quick and current_pos is None:
-                        act = self._make_action('open_short', price, None, 'short_quick')
+                    if current_pos.side == 'long':
+                        if price <= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                        elif price >= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
+                    else:  # short
+                        if price >= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                        elif price <= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
+                    
+                    if should_close:
+                        action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
+                        act = self._make_action(action_type, price, None, close_reason)
                         await self._emit_action(act)
-                    elif current_pos is not None:
-                        # Position exists - check stop-loss and take-profit
-                        should_close = False
-                        close_reason = ''
-                        
-                        if current_pos.side == 'long':
-                            if price <= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                            elif price >= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
-                        else:  # short
-                            if price >= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                            elif price <= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
-                        
-                        if should_close:
-                            action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
-                            act = self._make_action(action_type, price, None, close_reason)
-                            await self._emit_action(act)
 
-                elif self.mode == 'bull':
-                    # Bull mode: short when deeply overbought, long quick on dips
-                    short_signal = False
-                    long_quick = False
-                    if pct15 is not None and pct30 is not None and pct60 is not None:
-                        if (pct15 >= self.p15_thresh) and (pct30 >= self.p30_thresh) and (pct60 >= self.p60_thresh):
-                            short_signal = True
-                    long_quick = True if (pct15 is not None and pct15 <= -5.0) else False
-
-                    # Check if position already exists before opening new one
-                    current_pos = self.dashboard.get_position(self.symbol)
+            elif self.mode == 'bull':
+                # Bull mode: short when deeply overbought, long quick on dips
+                short_signal = False
+                long_quick = False
+                if pct15 is not None and pct30 is not None and pct60 is not None:
+                    if (pct15 >= self.p15_thresh) and (pct30 >= self.p30_thresh) and (pct60 >= self.p60_thresh):
+                        short_signal = True
+                long_quick = True if (pct15 is not None and pct15 <= -5.0) else False
+
+                # Check if position already exists before opening new one
+                current_pos = self.dashboard.get_position(self.symbol)
+                
+                if short_signal and current_pos is None:
+                    act = self._make_action('open_short', price, None, 'short_signal')
+                    await self._emit_action(act)
+                elif long_quick and current_pos is None:
+                    act = self._make_action('open_long', price, None, 'long_quick')
+                    await self._emit_action(act)
+                elif current_pos is not None:
+                    # Position exists - check stop-loss and take-profit
+                    should_close = False
+                    close_reason = ''
+                    
+                    if current_pos.side == 'long':
+                        if price <= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                        elif price >= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
+                    else:  # short
+                        if price >= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                        elif price <= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
                     
-                    if short_signal and current_pos is None:
-                        act = self._make_action('open_short', price, None, 'short_signal')
+                    if should_close:
+                        action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
+                        act = self._make_action(action_type, price, None, close_reason)
                         await self._emit_action(act)
-                    elif long_quick and current_pos is None:
-                        act = self._make_action('open_long', price, None, 'long_quick')
+
+            elif self.mode == 'scalp':
+                # Scalp mode: Use QuickScalpStrategy for decisions
+                # Need at least 30+ bars for strategy indicators
+                print(f"[Scalp] Checking decision... bars={len(closes)}, need 40+")
+                
+                # Check current position from dashboard (do this ALWAYS, not just when enough bars)
+                current_pos = self.dashboard.get_position(self.symbol) if hasattr(self.dashboard, 'get_position') else self._current_position
+                
+                # 🔧 FIX: Check TP/SL FIRST - ALWAYS run this check regardless of bar count!
+                tp_sl_triggered = False
+                if current_pos is not None:
+                    should_close = False
+                    close_reason = ''
+                    
+                    if current_pos.side == 'long':
+                        if price <= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                            print(f"[Scalp TP/SL] LONG Stop Loss triggered: price={price:.4f} <= SL={current_pos.stop_loss:.4f}")
+                        elif price >= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
+                            print(f"[Scalp TP/SL] LONG Take Profit triggered: price={price:.4f} >= TP={current_pos.take_profit:.4f}")
+                    else:  # short
+                        if price >= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                            print(f"[Scalp TP/SL] SHORT Stop Loss triggered: price={price:.4f} >= SL={current_pos.stop_loss:.4f}")
+                        elif price <= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
+                            print(f"[Scalp TP/SL] SHORT Take Profit triggered: price={price:.4f} <= TP={current_pos.take_profit:.4f}")
+                    
+                    if should_close:
+                        action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
+                        act = self._make_action(action_type, price, None, close_reason)
                         await self._emit_action(act)
-                    elif current_pos is not None:
-                        # Position exists - check stop-loss and take-profit
-                        should_close = False
-                        close_reason = ''
+                        tp_sl_triggered = True
+                
+                # Only run strategy decision if we have enough bars AND TP/SL didn't trigger
+                if len(closes) >= 40 and not tp_sl_triggered:
+                        # Get funding rate (optional, can be None)
+                        funding_rate = None
+                        mark = get_kline_store().mark(self.symbol)
+                        if mark is not None and mark[1] is not None:
+                            # streamed alongside the mark price while the scheduler watches us
+                            funding_rate = mark[1]
+                        elif recorder.replay_session() is None:
+                            # a replay only has the recorded marks; never fetch live
+                            try:
+                                # Attempt to fetch current funding rate from Binance
+                                url = "https://fapi.binance.com/fapi/v1/premiumIndex"
+                                data = await http_client.get_json(url, params={'symbol': self.symbol}, timeout=5)
+                                funding_rate = float(data.get('lastFundingRate', 0))
+                            except Exception:
+                                pass
                         
-                        if current_pos.side == 'long':
-                            if price <= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                            elif price >= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
-                        else:  # short
-                            if price >= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                            elif price <= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
+                        # Calculate bars held if in position
+                        bars_held = 0
+                        if current_pos is not None:
+                            entry_time = getattr(current_pos, 'entry_time', None)
+                            if entry_time:
+                                bars_held = int((recorder.now() * 1000 - entry_time) / 60000)  # Minutes
                         
-                        if should_close:
-                            action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
-                            act = self._make_action(action_type, price, None, close_reason)
+                        # Get strategy decision
+                        decision = self.scalp_strategy.decide(
+                            price=price,
+                            recent_closes=closes,
+                            funding_rate=funding_rate,
+                            position=current_pos,
+                            bars_held=bars_held
+                        )
+                        
+                        # Execute based on decision
+                        if decision.action == 'enter' and current_pos is None:
+                            action_type = 'open_long' if decision.direction == 'long' else 'open_short'
+                            act = self._make_action(action_type, price, decision.size, decision.reason)
                             await self._emit_action(act)
-
-                elif self.mode == 'scalp':
-                    # Scalp mode: Use QuickScalpStrategy for decisions
-                    # Need at least 30+ bars for strategy indicators
-                    print(f"[Scalp] Checking decision... bars={len(closes)}, need 40+")
-                    
-                    # Check current position from dashboard (do this ALWAYS, not just when enough bars)
-                    current_pos = self.dashboard.get_position(self.symbol) if hasattr(self.dashboard, 'get_position') else self._current_position
-                    
-                    # 🔧 FIX: Check TP/SL FIRST - ALWAYS run this check regardless of bar count!
-                    tp_sl_triggered = False
-                    if current_pos is not None:
-                        should_close = False
-                        close_reason = ''
                         
-                        if current_pos.side == 'long':
-                            if price <= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                                print(f"[Scalp TP/SL] LONG Stop Loss triggered: price={price:.4f} <= SL={current_pos.stop_loss:.4f}")
-                            elif price >= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
-                                print(f"[Scalp TP/SL] LONG Take Profit triggered: price={price:.4f} >= TP={current_pos.take_profit:.4f}")
-                        else:  # short
-                            if price >= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                                print(f"[Scalp TP/SL] SHORT Stop Loss triggered: price={price:.4f} >= SL={current_pos.stop_loss:.4f}")
-                            elif price <= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
-                                print(f"[Scalp TP/SL] SHORT Take Profit triggered: price={price:.4f} <= TP={current_pos.take_profit:.4f}")
+                        elif decision.action == 'exit' and current_pos is not None:
+                            action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
+                            act = self._make_action(action_type, price, None, decision.reason)
+                            await self._emit_action(act)
                         
-                        if should_close:
+                        elif decision.action == 'reduce' and current_pos is not None and decision.fraction:
+                            # Partial exit - close fraction of position
                             action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
-                            act = self._make_action(action_type, price, None, close_reason)
+                            # Calculate size to close
+                            close_size = getattr(current_pos, 'size', 0) * decision.fraction if hasattr(current_pos, 'size') else None
+                            act = self._make_action(action_type, price, close_size, f"partial_exit({decision.fraction:.0%}): {decision.reason}")
                             await self._emit_action(act)
-                            tp_sl_triggered = True
-                    
-                    # Only run strategy decision if we have enough bars AND TP/SL didn't trigger
-                    if len(closes) >= 40 and not tp_sl_triggered:
-                            # Get funding rate (optional, can be None)
-                            funding_rate = None
-                            try:
-                                # Attempt to fetch current funding rate from Binance
-                                from urllib import request as _req, parse as _p
-                                url = f"https://fapi.binance.com/fapi/v1/premiumIndex?symbol={self.symbol}"
-                                with _req.urlopen(url, timeout=5) as r:
-                                    data = json.load(r)
-                                    funding_rate = float(data.get('lastFundingRate', 0))
-                            except Exception:
-                                pass
-                            
-                            # Calculate bars held if in position
-                            bars_held = 0
-                            if current_pos is not None:
-                                entry_time = getattr(current_pos, 'entry_time', None)
-                                if entry_time:
-                                    bars_held = int((time.time() * 1000 - entry_time) / 60000)  # Minutes
-                            
-                            # Get strategy decision
-                            decision = self.scalp_strategy.decide(
-                                price=price,
-                                recent_closes=closes,
-                                funding_rate=funding_rate,
-                                position=current_pos,
-                                bars_held=bars_held
-                            )
-                            
-                            # Execute based on decision
-                            if decision.action == 'enter' and current_pos is None:
-                                action_type = 'open_long' if decision.direction == 'long' else 'open_short'
-                                act = self._make_action(action_type, price, decision.size, decision.reason)
-                                await self._emit_action(act)
-                            
-                            elif decision.action == 'exit' and current_pos is not None:
-                                action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
-                                act = self._make_action(action_type, price, None, decision.reason)
-                                await self._emit_action(act)
-                            
-                            elif decision.action == 'reduce' and current_pos is not None and decision.fraction:
-                                # Partial exit - close fraction of position
-                                action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
-                                # Calculate size to close
-                                close_size = getattr(current_pos, 'size', 0) * decision.fraction if hasattr(current_pos, 'size') else None
-                                act = self._make_action(action_type, price, close_size, f"partial_exit({decision.fraction:.0%}): {decision.reason}")
-                                await self._emit_action(act)
-
-                elif self.mode == 'range':
-                    # Range/Grid mode: Use RangeGridStrategy for decisions
-                    # Need at least 50+ bars for range detection
+
+            elif self.mode == 'range':
+                # Range/Grid mode: Use RangeGridStrategy for decisions
+                # Need at least 50+ bars for range detection
+                
+                # Check current position from dashboard (do this ALWAYS)
+                current_pos = self.dashboard.get_position(self.symbol) if hasattr(self.dashboard, 'get_position') else self._current_position
+                
+                # 🔧 FIX: Check TP/SL FIRST - ALWAYS run this check regardless of bar count!
+                tp_sl_triggered = False
+                if current_pos is not None:
+                    should_close = False
+                    close_reason = ''
                     
-                    # Check current position from dashboard (do this ALWAYS)
-                    current_pos = self.dashboard.get_position(self.symbol) if hasattr(self.dashboard, 'get_position') else self._current_position
+                    if current_pos.side == 'long':
+                        if price <= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                        elif price >= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
+                    else:  # short
+                        if price >= current_pos.stop_loss:
+                            should_close = True
+                            close_reason = 'stop_loss'
+                        elif price <= current_pos.take_profit:
+                            should_close = True
+                            close_reason = 'take_profit'
                     
-                    # 🔧 FIX: Check TP/SL FIRST - ALWAYS run this check regardless of bar count!
-                    tp_sl_triggered = False
-                    if current_pos is not None:
-                        should_close = False
-                        close_reason = ''
+                    if should_close:
+                        action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
+                        act = self._make_action(action_type, price, None, close_reason)
+                        await self._emit_action(act)
+                        tp_sl_triggered = True
+                
+                # Only run strategy decision if we have enough bars AND TP/SL didn't trigger
+                if len(closes) >= 60 and not tp_sl_triggered:
+                        # Calculate bars held if in position
+                        bars_held = 0
+                        if current_pos is not None:
+                            entry_time = getattr(current_pos, 'entry_time', None)
+                            if entry_time:
+                                bars_held = int((recorder.now() * 1000 - entry_time) / 60000)  # Minutes
+                        
+                        # Get strategy decision
+                        decision = self.range_strategy.decide(
+                            price=price,
+                            recent_closes=closes,
+                            funding_rate=None,
+                            position=current_pos,
+                            bars_held=bars_held
+                        )
                         
-                        if current_pos.side == 'long':
-                            if price <= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                            elif price >= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
-                        else:  # short
-                            if price >= current_pos.stop_loss:
-                                should_close = True
-                                close_reason = 'stop_loss'
-                            elif price <= current_pos.take_profit:
-                                should_close = True
-                                close_reason = 'take_profit'
+                        # Execute based on decision
+                        if decision.action == 'enter' and current_pos is None:
+                            action_type = 'open_long' if decision.direction == 'long' else 'open_short'
+                            act = self._make_action(action_type, price, decision.size, decision.reason)
+                            await self._emit_action(act)
                         
-                        if should_close:
+                        elif decision.action == 'exit' and current_pos is not None:
                             action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
-                            act = self._make_action(action_type, price, None, close_reason)
+                            act = self._make_action(action_type, price, None, decision.reason)
                             await self._emit_action(act)
-                            tp_sl_triggered = True
-                    
-                    # Only run strategy decision if we have enough bars AND TP/SL didn't trigger
-                    if len(closes) >= 60 and not tp_sl_triggered:
-                            # Calculate bars held if in position
-                            bars_held = 0
-                            if current_pos is not None:
-                                entry_time = getattr(current_pos, 'entry_time', None)
-                                if entry_time:
-                                    bars_held = int((time.time() * 1000 - entry_time) / 60000)  # Minutes
-                            
-                            # Get strategy decision
-                            decision = self.range_strategy.decide(
-                                price=price,
-                                recent_closes=closes,
-                                funding_rate=None,
-                                position=current_pos,
-                                bars_held=bars_held
-                            )
-                            
-                            # Execute based on decision
-                            if decision.action == 'enter' and current_pos is None:
-                                action_type = 'open_long' if decision.direction == 'long' else 'open_short'
-                                act = self._make_action(action_type, price, decision.size, decision.reason)
-                                await self._emit_action(act)
-                            
-                            elif decision.action == 'exit' and current_pos is not None:
-                                action_type = 'close_long' if current_pos.side == 'long' else 'close_short'
-                                act = self._make_action(action_type, price, None, decision.reason)
-                                await self._emit_action(act)
-
-            await asyncio.sleep(poll_s)
 
     async def _emit_action(self, action: dict):
         # idempotency: ignore if seen recently
@@ -508,11 +552,14 @@ class LiveStrategy:
         if not aid or aid in self._seen_actions:
             return
         self._seen_actions.add(aid)
+        if self._event_ms:
+            # bar close / tick -> signal, reported by the strategy scheduler
+            self.signal_latency_ms.append(max(0.0, recorder.now() * 1000 - self._event_ms))
         
         # Create signal record for dashboard
         signal = Signal(
             id=aid,
-            timestamp=action.get('timestamp', int(time.time() * 1000)),
+            timestamp=action.get('timestamp', int(recorder.now() * 1000)),
             symbol=action.get('symbol', self.symbol),
             action=action.get('action', 'unknown'),
             price=action.get('price_hint', 0.0),
@@ -591,7 +638,7 @@ class LiveStrategy:
                             side='long',
                             entry_price=price,
                             size=size,
-                            entry_time=int(time.time() * 1000),
+                            entry_time=int(recorder.now() * 1000),
                             stop_loss=price * (1 - self.sl_pct),
                             take_profit=price * (1 + self.tp_pct)
                         )
@@ -605,7 +652,7 @@ class LiveStrategy:
                             side='short',
                             entry_price=price,
                             size=size,
-                            entry_time=int(time.time() * 1000),
+                            entry_time=int(recorder.now() * 1000),
                             stop_loss=price * (1 + self.sl_pct),
                             take_profit=price * (1 - self.tp_pct)
                         )
@@ -695,10 +742,16 @@ class LiveStrategy:
             return None
 
     def start(self):
-        if self._task is not None and not self._task.done():
+        if self.running():
             return False
         self._stop = False
-        self._task = asyncio.create_task(self._loop())
+        if use_scheduler():
+            # one shared kline / mark-price subscription drives every strategy
+            from .strategy_scheduler import get_strategy_scheduler
+            get_strategy_scheduler().register(self)
+            self._scheduled = True
+        else:
+            self._task = asyncio.create_task(self._loop())
         
         # Register with dashboard
         self.dashboard.start_strategy(self.symbol, self.exec_mode, self.mode)
@@ -707,6 +760,10 @@ class LiveStrategy:
 
     async def stop(self):
         self._stop = True
+        if self._scheduled:
+            from .strategy_scheduler import get_strategy_scheduler
+            await get_strategy_scheduler().unregister(self)
+            self._scheduled = False
         if self._task is not None:
             try:
                 await self._task
@@ -720,4 +777,4 @@ class LiveStrategy:
         return True
 
     def running(self):
-        return self._task is not None and not self._task.done()
+        return self._scheduled or (self._task is not None and not self._task.done())
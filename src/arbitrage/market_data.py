@@ -0,0 +1,264 @@
+"""Local columnar OHLCV store shared by the tools and backtests.
+
+The tools used to re-download klines on every run and pass ad-hoc CSVs
+around. This module keeps one file per (exchange, market, symbol,
+interval) under ``ARB_MARKET_DATA_DIR`` (default ``var/market_data``):
+
+    <root>/<exchange>/<market>/<SYMBOL>_<interval>.npy
+
+Each file is a plain ``.npy`` float64 array of shape (6, n) holding the
+columns ``timestamp`` (bar open, ms), ``open``, ``high``, ``low``,
+``close`` and ``volume``, one contiguous row per column. ``load_ohlcv``
+memory-maps it, so loading a million bars costs no parsing or copying: the
+returned columns are read-only views into the page cache, sliced to the
+requested time range by binary search.
+
+``update_ohlcv`` (or ``load_ohlcv(..., fetch=True)``) downloads only what is
+missing: bars before the first stored one when ``start`` asks for older
+history, and bars from the last stored one onwards. Only closed bars are
+stored. Files are rewritten to a temp file and swapped in with
+``os.replace``, so a reader never sees a half-written file; mapped readers
+keep the old version.
+
+numpy is optional for the rest of the package; check ``available()``.
+"""
+from __future__ import annotations
+
+import csv
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from .exchanges.kline_store import INTERVAL_MS, _rest_fetch, normalize_market
+from .exchanges.symbol_registry import compact
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+Fetch = Callable[[str, str, str, int, Optional[int]], List[Sequence[Any]]]
+
+_LOCK = threading.Lock()
+
+
+def available() -> bool:
+    """Return True when numpy is importable and the store can be used."""
+    return np is not None
+
+
+def default_root() -> str:
+    return os.getenv('ARB_MARKET_DATA_DIR', os.path.join('var', 'market_data'))
+
+
+def path_for(symbol: str, interval: str, market: str = 'futures', exchange: str = 'binance',
+             root: Optional[str] = None) -> str:
+    return os.path.join(root or default_root(), exchange.lower(), normalize_market(market),
+                        f'{compact(symbol)}_{interval}.npy')
+
+
+def _read(path: str):
+    """Stored (6, n) array, memory-mapped; None when there is no file."""
+    try:
+        arr = np.load(path, mmap_mode='r')
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        # a zero-length array cannot be mapped
+        arr = np.load(path)
+    if arr.ndim != 2 or arr.shape[0] != len(COLUMNS):
+        raise ValueError(f'{path}: unexpected shape {arr.shape}')
+    return arr
+
+
+def _to_block(rows: Any):
+    """Rows in kline layout ([ts, o, h, l, c, v, ...]) -> (6, n) float64."""
+    if isinstance(rows, np.ndarray):
+        a = np.asarray(rows, dtype=np.float64)
+    else:
+        a = np.array([[float(x) for x in r[:6]] for r in rows], dtype=np.float64)
+    if a.size == 0:
+        return np.empty((len(COLUMNS), 0))
+    if a.ndim != 2 or a.shape[1] < len(COLUMNS):
+        raise ValueError('rows must have at least 6 fields (timestamp, open, high, low, close, volume)')
+    return np.ascontiguousarray(a[:, :len(COLUMNS)].T)
+
+
+def coverage(symbol: str, interval: str, market: str = 'futures', exchange: str = 'binance',
+             root: Optional[str] = None) -> Optional[Tuple[int, int, int]]:
+    """(first open time, last open time, bars) of the stored series, or None."""
+    if np is None:
+        return None
+    arr = _read(path_for(symbol, interval, market, exchange, root))
+    if arr is None or arr.shape[1] == 0:
+        return None
+    return int(arr[0, 0]), int(arr[0, -1]), int(arr.shape[1])
+
+
+def append_ohlcv(symbol: str, interval: str, rows: Any, market: str = 'futures',
+                 exchange: str = 'binance', root: Optional[str] = None) -> int:
+    """Merge ``rows`` into the stored series; returns the number of new bars.
+
+    A bar whose open time is already stored is replaced by the new one.
+    """
+    if np is None:
+        raise ImportError('numpy is required for the market data store')
+    new = _to_block(rows)
+    path = path_for(symbol, interval, market, exchange, root)
+    with _LOCK:
+        old = _read(path)
+        before = 0 if old is None else old.shape[1]
+        if new.shape[1] == 0 and old is not None:
+            return 0
+        if old is not None and before and new.shape[1] and new[0, 0] > old[0, -1] and np.all(np.diff(new[0]) > 0):
+            merged = np.concatenate([old, new], axis=1)  # common case: pure tail append
+        else:
+            both = new if old is None else np.concatenate([np.asarray(old), new], axis=1)
+            # keep the last occurrence of every timestamp (new rows win), sorted
+            rev = both[:, ::-1]
+            _, idx = np.unique(rev[0], return_index=True)
+            merged = rev[:, idx]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(merged))
+        del old
+        os.replace(tmp, path)
+        return int(merged.shape[1] - before)
+
+
+def _closed(rows: List[Sequence[Any]], interval_ms: int, now_ms: int) -> List[Sequence[Any]]:
+    return [r for r in rows if int(r[0]) + interval_ms <= now_ms]
+
+
+def update_ohlcv(symbol: str, interval: str, market: str = 'futures', exchange: str = 'binance',
+                 start: Optional[int] = None, end: Optional[int] = None, fetch: Optional[Fetch] = None,
+                 root: Optional[str] = None, now_ms: Optional[int] = None) -> int:
+    """Download the bars missing from the stored series; returns how many were added.
+
+    ``start`` / ``end`` are open times in ms; without ``start`` a new series
+    begins with the last REST page. ``fetch(market, symbol, interval,
+    limit, start_time)`` defaults to Binance REST (spot or USD-M futures).
+    """
+    if np is None:
+        raise ImportError('numpy is required for the market data store')
+    if fetch is None:
+        if exchange.lower() != 'binance':
+            raise ValueError(f'no default fetcher for {exchange}; pass fetch=')
+        fetch = _rest_fetch
+    market = normalize_market(market)
+    ms = INTERVAL_MS[interval]
+    now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+    end = min(int(end) if end is not None else now_ms, now_ms)
+    sym = compact(symbol)
+    cov = coverage(sym, interval, market, exchange, root)
+    added = 0
+    if cov is None:
+        limit = (end - start) // ms + 1 if start is not None else 1000
+        rows = fetch(market, sym, interval, max(1, int(limit)), start)
+        return append_ohlcv(sym, interval, _closed(rows, ms, now_ms), market, exchange, root)
+    first, last, _ = cov
+    if start is not None and start < first:
+        rows = fetch(market, sym, interval, -(-(first - start) // ms), int(start))
+        added += append_ohlcv(sym, interval, [r for r in _closed(rows, ms, now_ms) if int(r[0]) < first],
+                              market, exchange, root)
+    if end >= last + 2 * ms:
+        # resume after the last stored bar, up to the last closed one
+        rows = fetch(market, sym, interval, (end - last) // ms, last + ms)
+        added += append_ohlcv(sym, interval, _closed(rows, ms, now_ms), market, exchange, root)
+    return added
+
+
+def load_ohlcv(symbol: str, interval: str = '1m', market: str = 'futures', exchange: str = 'binance',
+               start: Optional[int] = None, end: Optional[int] = None, fetch: Any = False,
+               as_frame: bool = False, root: Optional[str] = None):
+    """Stored bars with ``start <= open time <= end``.
+
+    Returns a dict of read-only column views (``timestamp`` is float64 ms)
+    or, with ``as_frame=True``, a pandas DataFrame in the tools' CSV layout
+    (int64 ``timestamp`` column). ``fetch=True`` (or a fetch callable) first
+    downloads missing bars with ``update_ohlcv``.
+    """
+    if np is None:
+        raise ImportError('numpy is required for the market data store')
+    if fetch:
+        update_ohlcv(symbol, interval, market, exchange, start=start, end=end,
+                     fetch=fetch if callable(fetch) else None, root=root)
+    arr = _read(path_for(symbol, interval, market, exchange, root))
+    if arr is None:
+        arr = np.empty((len(COLUMNS), 0))
+    ts = arr[0]
+    lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+    hi = arr.shape[1] if end is None else int(np.searchsorted(ts, end, side='right'))
+    cols = {name: arr[i, lo:hi] for i, name in enumerate(COLUMNS)}
+    if not as_frame:
+        return cols
+    import pandas as pd
+
+    df = pd.DataFrame({name: np.array(v) for name, v in cols.items()})
+    df['timestamp'] = df['timestamp'].astype('int64')
+    return df
+
+
+def import_csv(path: str, symbol: str, interval: str, market: str = 'futures', exchange: str = 'binance',
+               root: Optional[str] = None) -> int:
+    """Load a tools-style CSV (``timestamp`` or ``ts`` in ms, open, high, low,
+    close, volume) into the store; returns the number of new bars."""
+    rows = []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        r = csv.DictReader(f)
+        cols = {c.lower(): c for c in (r.fieldnames or [])}
+        tcol = cols.get('timestamp') or cols.get('ts')
+        if tcol is None or not all(c in cols for c in COLUMNS[1:]):
+            raise ValueError(f'{path}: needs timestamp/ts, open, high, low, close, volume columns')
+        for rec in r:
+            try:
+                rows.append([float(rec[tcol])] + [float(rec[cols[c]]) for c in COLUMNS[1:]])
+            except (TypeError, ValueError):
+                continue
+    return append_ohlcv(symbol, interval, rows, market, exchange, root)
+
+
+def export_csv(data: Dict[str, Any], path: str) -> int:
+    """Write columns from ``load_ohlcv`` as a timestamp,open,high,low,close,volume CSV."""
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    n = len(data['timestamp'])
+    with open(path, 'w', newline='', encoding='utf8') as f:
+        w = csv.writer(f)
+        w.writerow(COLUMNS)
+        for i in range(n):
+            w.writerow([int(data['timestamp'][i])] + [repr(float(data[c][i])) for c in COLUMNS[1:]])
+    return n
+
+
+def list_series(root: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Stored series as {exchange, market, symbol, interval, path}."""
+    base = root or default_root()
+    if not os.path.isdir(base):
+        return []
+    out = []
+    for exchange in sorted(os.listdir(base)):
+        if not os.path.isdir(os.path.join(base, exchange)):
+            continue
+        for market in sorted(os.listdir(os.path.join(base, exchange))):
+            d = os.path.join(base, exchange, market)
+            if not os.path.isdir(d):
+                continue
+            for name in sorted(os.listdir(d)):
+                if not name.endswith('.npy') or '_' not in name:
+                    continue
+                symbol, interval = name[:-4].rsplit('_', 1)
+                out.append({'exchange': exchange, 'market': market, 'symbol': symbol,
+                            'interval': interval, 'path': os.path.join(d, name)})
+    return out
+
+
+__all__ = [
+    'COLUMNS', 'append_ohlcv', 'available', 'coverage', 'default_root', 'export_csv', 'import_csv',
+    'list_series', 'load_ohlcv', 'path_for', 'update_ohlcv',
+]
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any
-import time
+from typing import Iterable, List, Dict, Any, Optional, Set, Tuple
 import os
+import time
 
-from .scanner import Opportunity, find_executable_opportunities
+from .exchanges import recorder
+from .scanner import Opportunity, ScanSnapshot, find_executable_opportunities
 
 
 def _estimate_depth_usd_from_orderbook(ob: dict | None) -> float | None:
@@ -25,16 +26,21 @@ def _estimate_depth_usd_from_orderbook(ob: dict | None) -> float | None:
         return None
 
 
-def compute_dryrun_opportunities(exchanges: List[object], amount: float = 1.0, min_profit_pct: float = 0.1, min_price_diff_pct: float = 1.0) -> List[Dict[str, Any]]:
+def compute_dryrun_opportunities(exchanges: List[object], amount: float = 1.0, min_profit_pct: float = 0.1, min_price_diff_pct: float = 1.0, symbols: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
     """Run the existing executable opportunity scanner in dry-run mode and
     enrich results with additional presentation fields expected by the
     frontend (depth_usd, size_est, gas_est, deposit/withdraw flags).
 
     Returns a list of plain dicts suitable for JSON serialization and
     WebSocket broadcast.
+
+    `symbols` limits the scan to the given symbols (see the scanner).
     """
-    now = time.time()
-    opps = find_executable_opportunities(exchanges, amount, min_profit_pct, min_price_diff_pct=min_price_diff_pct)
+    now = recorder.now()
+    # tickers and order books gathered by the scan are reused below, so the
+    # enrichment does O(1) lookups per opportunity instead of adapter calls
+    snap = ScanSnapshot()
+    opps = find_executable_opportunities(exchanges, amount, min_profit_pct, min_price_diff_pct=min_price_diff_pct, symbols=symbols, snapshot=snap)
     out: List[Dict[str, Any]] = []
     # helper: best-effort read of a price for `symbol` from an exchange adapter
     def _extract_price_from_ticker_obj(tk) -> float | None:
@@ -66,40 +72,34 @@ def compute_dryrun_opportunities(exchanges: List[object], amount: float = 1.0, m
         except Exception:
             return None
 
+    # order books the scan did not fetch, read at most once per (adapter, symbol)
+    extra_books: Dict[tuple, Any] = {}
+
+    def _order_book(ex, symbol: str) -> dict | None:
+        if snap.has_book(ex, symbol):
+            return snap.order_book(ex, symbol)
+        key = (id(ex), symbol)
+        if key not in extra_books:
+            try:
+                extra_books[key] = ex.get_order_book(symbol)
+            except Exception:
+                extra_books[key] = None
+        return extra_books[key]
+
     def _get_price_from_exchange(ex, symbol: str) -> float | None:
-        # try direct tickers mapping first
+        # ticker from the per-scan snapshot (indexed by canonical symbol)
         try:
             if hasattr(ex, 'get_tickers'):
-                try:
-                    tk_map = ex.get_tickers() or {}
-                except Exception:
-                    tk_map = {}
-                if isinstance(tk_map, dict):
-                    # try several candidate symbol formats
-                    candidates = [symbol, symbol.replace('/', '-'), symbol.replace('-', '/'), symbol.upper(), symbol.lower()]
-                    for c in candidates:
-                        if c in tk_map:
-                            price = _extract_price_from_ticker_obj(tk_map.get(c))
-                            if price is not None:
-                                return price
-                    # try fuzzy: iterate keys and compare base/token
-                    for k, v in tk_map.items():
-                        try:
-                            if k and symbol and (k.replace('/', '').replace('-', '').upper() == symbol.replace('/', '').replace('-', '').upper()):
-                                price = _extract_price_from_ticker_obj(v)
-                                if price is not None:
-                                    return price
-                        except Exception:
-                            continue
+                snap.add_tickers(ex)
+                price = _extract_price_from_ticker_obj(snap.ticker(ex, symbol))
+                if price is not None:
+                    return price
         except Exception:
             pass
         # fallback: if adapter has get_order_book, derive top-of-book price
         try:
             if hasattr(ex, 'get_order_book'):
-                try:
-                    ob = ex.get_order_book(symbol) or {}
-                except Exception:
-                    ob = None
+                ob = _order_book(ex, symbol)
                 if isinstance(ob, dict):
                     asks = ob.get('asks', [])
                     bids = ob.get('bids', [])
@@ -118,51 +118,71 @@ def compute_dryrun_opportunities(exchanges: List[object], amount: float = 1.0, m
         except Exception:
             pass
         return None
+
+    # adapters by name, and the venues whose prices the frontend shows
+    by_name: Dict[str, object] = {}
+    for ex in exchanges:
+        by_name.setdefault(getattr(ex, 'name', ''), ex)
+    price_venues = (('binance', 'price_binance', 'Binance'), ('kucoin', 'price_kucoin', 'Kucoin'), ('mexc', 'price_mexc', 'Mexc'))
+    venue_sources: Dict[str, List[object]] = {venue: [] for venue, _, _ in price_venues}
+    for ex in exchanges:
+        lname = (getattr(ex, 'name', '') or '').lower()
+        for venue, _, _ in price_venues:
+            if venue in lname:
+                venue_sources[venue].append(ex)
+    # registered ws feeders are the last resort for each venue
+    try:
+        from .exchanges.ws_feed_manager import get_feeder
+    except Exception:
+        get_feeder = None
+    if get_feeder is not None and opps:
+        for venue, _, _ in price_venues:
+            try:
+                fd = get_feeder(venue)
+                if fd is not None:
+                    venue_sources[venue].append(fd)
+            except Exception:
+                pass
+
+    currency_cache: Dict[tuple, Any] = {}
+
+    def _currency_details(ex, base: str):
+        key = (id(ex), base)
+        if key not in currency_cache:
+            try:
+                currency_cache[key] = ex.get_currency_details(base)
+            except Exception:
+                currency_cache[key] = None
+        return currency_cache[key]
+
     for o in opps:
         try:
             # attempt to inspect orderbook depth if available on adapters
             depth_usd = None
-            size_est = 0
             gas_est = 0
             buy_currency_details = None
             sell_currency_details = None
             try:
-                buy_obj = next((ex for ex in exchanges if getattr(ex, 'name', '') == o.buy_exchange), None)
-                sell_obj = next((ex for ex in exchanges if getattr(ex, 'name', '') == o.sell_exchange), None)
-                if buy_obj and hasattr(buy_obj, 'get_order_book'):
-                    ob, _ = (buy_obj.get_order_book(o.symbol) or {}, None) if False else (None, None)
-                # best-effort: try to call get_order_book safely
-                if buy_obj and hasattr(buy_obj, 'get_order_book'):
-                    try:
-                        ob = buy_obj.get_order_book(o.symbol)
-                        d = _estimate_depth_usd_from_orderbook(ob)
-                        if d:
-                            depth_usd = d
-                    except Exception:
-                        pass
-                if sell_obj and hasattr(sell_obj, 'get_order_book') and depth_usd is None:
-                    try:
-                        ob = sell_obj.get_order_book(o.symbol)
-                        d = _estimate_depth_usd_from_orderbook(ob)
-                        if d:
-                            depth_usd = d
-                    except Exception:
-                        pass
+                buy_obj = by_name.get(o.buy_exchange)
+                sell_obj = by_name.get(o.sell_exchange)
+                if buy_obj is not None and hasattr(buy_obj, 'get_order_book'):
+                    d = _estimate_depth_usd_from_orderbook(_order_book(buy_obj, o.symbol))
+                    if d:
+                        depth_usd = d
+                if sell_obj is not None and hasattr(sell_obj, 'get_order_book') and depth_usd is None:
+                    d = _estimate_depth_usd_from_orderbook(_order_book(sell_obj, o.symbol))
+                    if d:
+                        depth_usd = d
                 # try to get currency metadata
-                if buy_obj and hasattr(buy_obj, 'get_currency_details'):
-                    try:
-                        buy_currency_details = buy_obj.get_currency_details(o.symbol.split('/')[0])
-                    except Exception:
-                        buy_currency_details = None
-                if sell_obj and hasattr(sell_obj, 'get_currency_details'):
-                    try:
-                        sell_currency_details = sell_obj.get_currency_details(o.symbol.split('/')[0])
-                    except Exception:
-                        sell_currency_details = None
+                base = o.symbol.split('/')[0]
+                if buy_obj is not None and hasattr(buy_obj, 'get_currency_details'):
+                    buy_currency_details = _currency_details(buy_obj, base)
+                if sell_obj is not None and hasattr(sell_obj, 'get_currency_details'):
+                    sell_currency_details = _currency_details(sell_obj, base)
             except Exception:
                 pass
 
-            out.append({
+            row = {
                 'symbol': o.symbol,
                 'buy_exchange': o.buy_exchange,
                 'sell_exchange': o.sell_exchange,
@@ -186,73 +206,95 @@ def compute_dryrun_opportunities(exchanges: List[object], amount: float = 1.0, m
                 'buy_currency_details': buy_currency_details,
                 'sell_currency_details': sell_currency_details,
                 'ts': now,
-            })
-            # attempt to populate binance/kucoin prices from provided exchange adapters
-            try:
-                # find adapters by name (case-insensitive contains)
-                for ex in exchanges:
+            }
+            out.append(row)
+            # populate binance/kucoin/mexc prices: matching adapters first, then ws feeders
+            for venue, key, label in price_venues:
+                for src in venue_sources[venue]:
                     try:
-                        name = getattr(ex, 'name', '') or ''
-                        lname = name.lower()
-                        if 'binance' in lname and out[-1].get('price_binance') is None:
-                            p = _get_price_from_exchange(ex, o.symbol)
-                            if p is not None:
-                                out[-1]['price_binance'] = p
-                                out[-1]['Binance'] = p
-                        if 'kucoin' in lname and out[-1].get('price_kucoin') is None:
-                            p = _get_price_from_exchange(ex, o.symbol)
-                            if p is not None:
-                                out[-1]['price_kucoin'] = p
-                                out[-1]['Kucoin'] = p
-                        if 'mexc' in lname and out[-1].get('price_mexc') is None:
-                            p = _get_price_from_exchange(ex, o.symbol)
-                            if p is not None:
-                                out[-1]['price_mexc'] = p
-                                out[-1]['Mexc'] = p
+                        p = _get_price_from_exchange(src, o.symbol)
                     except Exception:
-                        continue
-            except Exception:
-                pass
+                        p = None
+                    if p is not None:
+                        row[key] = p
+                        row[label] = p
+                        break
+        except Exception:
+            continue
+    return out
+
+
+def merge_rescan(previous: List[Dict[str, Any]], fresh: List[Dict[str, Any]], symbols: Iterable[str]) -> List[Dict[str, Any]]:
+    """Replace the rows of ``symbols`` in a previous scan with a partial rescan.
+
+    The result is ordered by ``profit_pct`` (highest first), like a full scan.
+    """
+    from .exchanges.symbol_registry import symbol_key
+    moved = {symbol_key(s) for s in symbols}
+    merged = [o for o in previous if symbol_key(o.get('symbol') or '') not in moved] + list(fresh)
+    merged.sort(key=lambda o: o.get('profit_pct') or 0.0, reverse=True)
+    return merged
+
+
+def _quote(tk: Any) -> Any:
+    """Comparable price fingerprint of a ticker (its timestamp is ignored)."""
+    if isinstance(tk, dict):
+        return (tk.get('last'), tk.get('bid'), tk.get('ask'))
+    if isinstance(tk, (int, float)):
+        return tk
+    return (getattr(tk, 'price', None), getattr(tk, 'bid', None), getattr(tk, 'ask', None))
+
+
+class RescanPlanner:
+    """Decides what each ``_scanner_loop`` tick rescans.
+
+    Moved symbols come from two sources: book events, for venues whose
+    feeders publish to the book event bus, and for every other venue a diff
+    of its tickers against the previous poll, taken at most once per
+    ``poll_interval``. ``plan`` returns ``(full, symbols)``; a full scan runs
+    on the first tick and then every ``full_interval`` seconds.
+    """
+
+    def __init__(self, poll_interval: float, full_interval: float):
+        self.poll_interval = poll_interval
+        self.full_interval = full_interval
+        # exchanges seen publishing book events (lower-case names)
+        self.evented: Set[str] = set()
+        self._quotes: Dict[Tuple[str, str], Any] = {}
+        self.last_poll = 0.0
+        self.last_full = 0.0
 
-            # If still missing, try registered ws feeders (binance/kucoin) as a last resort
+    def poll(self, exchanges: Iterable[object]) -> Set[str]:
+        """Symbol keys whose quotes changed on ``exchanges`` since the last poll."""
+        from .exchanges.symbol_registry import symbol_key
+        moved: Set[str] = set()
+        for ex in exchanges:
+            name = (getattr(ex, 'name', '') or '').lower()
             try:
+                tickers = ex.get_tickers() or {}
+            except Exception:
+                continue
+            for sym, tk in list(tickers.items()):
                 try:
-                    from .exchanges.ws_feed_manager import get_feeder
+                    key = (name, symbol_key(sym))
+                    quote = _quote(tk)
                 except Exception:
-                    get_feeder = None
-                if get_feeder is not None:
-                    if out[-1].get('price_binance') is None:
-                        try:
-                            fb = get_feeder('binance')
-                            if fb is not None:
-                                p = _get_price_from_exchange(fb, o.symbol)
-                                if p is not None:
-                                    out[-1]['price_binance'] = p
-                                    out[-1]['Binance'] = p
-                        except Exception:
-                            pass
-                    if out[-1].get('price_kucoin') is None:
-                        try:
-                            fk = get_feeder('kucoin')
-                            if fk is not None:
-                                p = _get_price_from_exchange(fk, o.symbol)
-                                if p is not None:
-                                    out[-1]['price_kucoin'] = p
-                                    out[-1]['Kucoin'] = p
-                        except Exception:
-                            pass
-                    if out[-1].get('price_mexc') is None:
-                        try:
-                            fm = get_feeder('mexc')
-                            if fm is not None:
-                                p = _get_price_from_exchange(fm, o.symbol)
-                                if p is not None:
-                                    out[-1]['price_mexc'] = p
-                                    out[-1]['Mexc'] = p
-                        except Exception:
-                            pass
-            except Exception:
-                pass
-        except Exception:
-            continue
-    return out
+                    continue
+                if self._quotes.get(key) != quote:
+                    self._quotes[key] = quote
+                    moved.add(key[1])
+        return moved
+
+    def plan(self, exchanges: List[object], changed: Dict[Any, Any],
+             now: Optional[float] = None) -> Tuple[bool, Set[str]]:
+        now = time.time() if now is None else now
+        self.evented.update(ev.exchange for ev in changed.values())
+        moved = {ev.symbol for ev in changed.values()}
+        if now - self.last_poll >= self.poll_interval:
+            self.last_poll = now
+            moved |= self.poll([ex for ex in exchanges
+                                if (getattr(ex, 'name', '') or '').lower() not in self.evented])
+        full = not self.last_full or now - self.last_full >= self.full_interval
+        if full:
+            self.last_full = now
+        return full, moved
@@ -0,0 +1,371 @@
+"""Parallel parameter-grid / walk-forward runner.
+
+The grid tools used to loop their combos serially, handing every backtest a
+fresh copy of the full OHLCV frames. ``run_grid`` instead:
+
+- packs the input arrays once into a single ``multiprocessing.shared_memory``
+  block (``SharedArrays``); pool workers attach to it at start-up and read the
+  arrays in place, so nothing is pickled or copied per combo
+- fans the combos out to a ``ProcessPoolExecutor`` with one worker per core
+  (``ARB_GRID_WORKERS`` to override), keeping at most two combos per worker
+  in flight
+- appends each result to a JSONL file as soon as it finishes (flushed), so a
+  crashed or interrupted run loses nothing; with ``resume=True`` combos whose
+  key is already in the file (finished or pruned) are skipped
+- supports early pruning: objectives call ``trial.report(step, value)`` after
+  each walk-forward window (or any intermediate step); a ``MedianPruner``
+  stops trials doing worse than the median of finished trials at that step,
+  as seen when the trial was submitted
+
+Objectives are plain top-level functions ``objective(trial) -> dict`` so they
+can be pickled to the workers; ``trial.params`` holds the combo and
+``trial.data`` the named arrays.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+_ALIGN = 64
+
+
+class TrialPruned(Exception):
+    """Raised by ``Trial.report`` when the pruner stops a trial."""
+
+
+def grid(**axes: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Cartesian product of named axes, e.g. ``grid(a=[1, 2], b=[True, False])``."""
+    names = list(axes)
+    return [dict(zip(names, vals)) for vals in itertools.product(*(list(axes[n]) for n in names))]
+
+
+def walk_forward_windows(n: int, train: int, test: int, step: int) -> List[Tuple[int, int]]:
+    """(start, end) bar ranges of the test windows of a rolling walk-forward."""
+    out = []
+    start = 0
+    while start + train + test <= n:
+        out.append((start + train, start + train + test))
+        start += step
+    return out
+
+
+def param_key(params: Mapping[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+# -- shared arrays -------------------------------------------------------------------
+class SharedArrays:
+    """Named numpy arrays packed into one shared-memory block.
+
+    The creating process owns the block (``close()`` unlinks it); workers
+    ``attach(spec)`` and get zero-copy read-only views.
+    """
+
+    def __init__(self, arrays: Mapping[str, Any]):
+        if np is None:
+            raise ImportError('numpy is required for SharedArrays')
+        fields: Dict[str, Tuple[int, Tuple[int, ...], str]] = {}
+        offset = 0
+        packed = {}
+        for name, arr in arrays.items():
+            a = np.ascontiguousarray(arr)
+            if a.dtype == object:
+                raise TypeError(f'array {name!r} has dtype object; convert it first')
+            fields[name] = (offset, a.shape, a.dtype.str)
+            packed[name] = a
+            offset += (a.nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.fields = fields
+        for name, a in packed.items():
+            off, shape, dt = fields[name]
+            np.ndarray(shape, dtype=dt, buffer=self.shm.buf, offset=off)[...] = a
+        self.owner = True
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        return {'name': self.shm.name, 'fields': self.fields}
+
+    @staticmethod
+    def attach(spec: Mapping[str, Any]) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+        shm = shared_memory.SharedMemory(name=spec['name'])
+        views = {}
+        for name, (off, shape, dt) in spec['fields'].items():
+            v = np.ndarray(tuple(shape), dtype=dt, buffer=shm.buf, offset=off)
+            v.flags.writeable = False
+            views[name] = v
+        return shm, views
+
+    def close(self) -> None:
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except Exception:
+                pass
+
+
+# -- trials and pruning --------------------------------------------------------------
+@dataclass
+class MedianPruner:
+    """Prune a trial whose value at a step is worse than the median of the
+    finished trials' values at that step.
+
+    ``warmup_steps`` steps always run; at least ``min_trials`` finished
+    trials must have reported the step. ``direction`` is ``'maximize'``
+    (e.g. PnL) or ``'minimize'``.
+    """
+    warmup_steps: int = 1
+    min_trials: int = 4
+    direction: str = 'maximize'
+
+    def should_prune(self, step: int, value: float, history: Mapping[int, List[float]]) -> bool:
+        if step < self.warmup_steps:
+            return False
+        seen = sorted(history.get(step, ()))
+        if len(seen) < self.min_trials:
+            return False
+        mid = len(seen) // 2
+        median = seen[mid] if len(seen) % 2 else 0.5 * (seen[mid - 1] + seen[mid])
+        return value < median if self.direction == 'maximize' else value > median
+
+
+class Trial:
+    """What an objective sees: ``params``, ``data`` and ``report()``."""
+
+    def __init__(self, params: Dict[str, Any], data: Mapping[str, Any],
+                 pruner: Optional[MedianPruner] = None,
+                 history: Optional[Mapping[int, List[float]]] = None):
+        self.params = params
+        self.data = data
+        self.intermediate: Dict[int, float] = {}
+        self._pruner = pruner
+        self._history = history or {}
+
+    def report(self, step: int, value: float) -> None:
+        """Record an intermediate value; raises ``TrialPruned`` when pruned."""
+        self.intermediate[int(step)] = float(value)
+        if self._pruner is not None and self._pruner.should_prune(int(step), float(value), self._history):
+            raise TrialPruned(f'step {step}: {value}')
+
+
+def _execute(objective: Callable[[Trial], Any], data: Mapping[str, Any], key: str,
+             params: Dict[str, Any], pruner: Optional[MedianPruner],
+             history: Mapping[int, List[float]]) -> Dict[str, Any]:
+    trial = Trial(params, data, pruner, history)
+    t0 = time.perf_counter()
+    rec: Dict[str, Any] = {'key': key, 'params': params}
+    try:
+        rec['result'] = objective(trial)
+        rec['status'] = 'ok'
+    except TrialPruned as e:
+        rec['status'] = 'pruned'
+        rec['pruned_at'] = str(e)
+    except Exception as e:
+        rec['status'] = 'error'
+        rec['error'] = f'{type(e).__name__}: {e}'
+    rec['intermediate'] = {str(k): v for k, v in trial.intermediate.items()}
+    rec['elapsed_s'] = round(time.perf_counter() - t0, 4)
+    rec['pid'] = os.getpid()
+    return rec
+
+
+def _failed(key: str, params: Dict[str, Any], exc: BaseException) -> Dict[str, Any]:
+    """Error record for a combo whose worker never returned a record."""
+    return {'key': key, 'params': params, 'status': 'error', 'error': f'{type(exc).__name__}: {exc}',
+            'intermediate': {}, 'elapsed_s': 0.0}
+
+
+# worker-process state, set by _init_worker
+_W_SHM = None
+_W_DATA: Dict[str, Any] = {}
+_W_OBJECTIVE: Optional[Callable[[Trial], Any]] = None
+
+
+def _init_worker(spec: Optional[Mapping[str, Any]], objective: Callable[[Trial], Any]) -> None:
+    global _W_SHM, _W_DATA, _W_OBJECTIVE
+    _W_OBJECTIVE = objective
+    if spec is not None:
+        _W_SHM, _W_DATA = SharedArrays.attach(spec)
+
+
+def _worker_run(key: str, params: Dict[str, Any], pruner: Optional[MedianPruner],
+                history: Mapping[int, List[float]]) -> Dict[str, Any]:
+    return _execute(_W_OBJECTIVE, _W_DATA, key, params, pruner, history)
+
+
+# -- runner --------------------------------------------------------------------------
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """Records of a results JSONL file (unreadable lines are skipped)."""
+    out = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    out.append(json.loads(line))
+                except Exception:
+                    pass  # a line cut short by a crash
+    except FileNotFoundError:
+        pass
+    return out
+
+
+def default_workers() -> int:
+    try:
+        n = int(os.getenv('ARB_GRID_WORKERS', '0'))
+    except ValueError:
+        n = 0
+    return n if n > 0 else (os.cpu_count() or 1)
+
+
+def run_grid(objective: Callable[[Trial], Any], combos: Iterable[Mapping[str, Any]],
+             data: Optional[Mapping[str, Any]] = None, results_path: Optional[str] = None,
+             workers: Optional[int] = None, resume: bool = True,
+             pruner: Optional[MedianPruner] = None,
+             key: Callable[[Mapping[str, Any]], str] = param_key,
+             verbose: bool = True) -> List[Dict[str, Any]]:
+    """Evaluate ``objective`` on every combo; returns all records (resumed
+    ones included) in completion order.
+
+    Each record is ``{key, params, status: ok|pruned|error, result,
+    intermediate, elapsed_s}``; with ``results_path`` every record is
+    appended to that JSONL file as it completes.
+    """
+    workers = workers or default_workers()
+    combos = [dict(c) for c in combos]
+    records: List[Dict[str, Any]] = []
+    history: Dict[int, List[float]] = {}
+
+    def _learn(rec: Dict[str, Any]) -> None:
+        if rec.get('status') == 'ok':
+            for step, v in (rec.get('intermediate') or {}).items():
+                history.setdefault(int(step), []).append(v)
+
+    done_keys = set()
+    if results_path and resume:
+        for rec in load_results(results_path):
+            # failed combos are retried; their old lines stay in the file
+            if rec.get('key') in done_keys or rec.get('status') == 'error':
+                continue
+            done_keys.add(rec.get('key'))
+            records.append(rec)
+            _learn(rec)
+    todo = []
+    for c in combos:
+        k = key(c)
+        if k not in done_keys:
+            done_keys.add(k)
+            todo.append((k, c))
+    total = len(todo)
+    if verbose and records:
+        print(f'[grid] resuming: {len(records)} done, {total} to run')
+
+    out_f = None
+    if results_path:
+        d = os.path.dirname(results_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        out_f = open(results_path, 'a', encoding='utf-8')
+
+    finished = 0
+
+    def _record(rec: Dict[str, Any]) -> None:
+        nonlocal finished
+        finished += 1
+        records.append(rec)
+        _learn(rec)
+        if out_f is not None:
+            out_f.write(json.dumps(rec, default=str) + '\n')
+            out_f.flush()
+        if verbose:
+            extra = rec.get('error') or rec.get('pruned_at') or ''
+            print(f"[grid] {finished}/{total} {rec['status']} {rec['params']} {rec['elapsed_s']}s {extra}".rstrip())
+
+    def _snapshot() -> Dict[int, List[float]]:
+        return {s: list(v) for s, v in history.items()} if pruner is not None else {}
+
+    shared = None
+    try:
+        if workers <= 1 or total <= 1:
+            for k, c in todo:
+                _record(_execute(objective, data or {}, k, c, pruner, _snapshot()))
+            return records
+
+        spec = None
+        if data:
+            shared = SharedArrays(data)
+            spec = shared.spec
+        with ProcessPoolExecutor(max_workers=min(workers, total), initializer=_init_worker,
+                                 initargs=(spec, objective)) as pool:
+            queue = iter(todo)
+            # future -> (key, params) of the combo it evaluates
+            pending: Dict[Any, Tuple[str, Dict[str, Any]]] = {}
+
+            def _submit() -> bool:
+                nxt = next(queue, None)
+                if nxt is None:
+                    return False
+                try:
+                    pending[pool.submit(_worker_run, nxt[0], nxt[1], pruner, _snapshot())] = nxt
+                except Exception as e:
+                    # the pool is broken (a worker died): the combo fails like the running ones
+                    _record(_failed(nxt[0], nxt[1], e))
+                return True
+
+            for _ in range(2 * workers):
+                if not _submit():
+                    break
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    k, c = pending.pop(fut)
+                    try:
+                        rec = fut.result()
+                    except Exception as e:
+                        # e.g. BrokenProcessPool, or a result that could not be pickled back
+                        rec = _failed(k, c, e)
+                    _record(rec)
+                    _submit()
+        return records
+    finally:
+        if out_f is not None:
+            out_f.close()
+        if shared is not None:
+            shared.close()
+
+
+def best(records: Iterable[Mapping[str, Any]], metric: Callable[[Any], float],
+         n: int = 10) -> List[Mapping[str, Any]]:
+    """Top ``n`` finished records by ``metric(result)`` (descending)."""
+    ok = []
+    for r in records:
+        if r.get('status') != 'ok':
+            continue
+        try:
+            ok.append((float(metric(r.get('result'))), r))
+        except Exception:
+            continue
+    ok.sort(key=lambda x: x[0], reverse=True)
+    return [r for _, r in ok[:n]]
+
+
+__all__ = [
+    'MedianPruner', 'SharedArrays', 'Trial', 'TrialPruned', 'best', 'default_workers', 'grid',
+    'load_results', 'param_key', 'run_grid', 'walk_forward_windows',
+]
@@ -0,0 +1,514 @@
+"""Deterministic replay of recorded feeder traffic.
+
+``ReplaySession`` plays a recording made by ``exchanges.recorder`` back
+through the real feeders: while it is installed, ``recorder.connect`` hands
+the feeders replayed connections and ``run_blocking`` answers their REST
+calls (depth snapshots, tokens) from the recorded results, so the feeders
+rebuild exactly the books they had in production without any network.
+
+The dispatcher walks the records in receive order and advances a
+``SimClock`` to each record's timestamp. While the session is installed
+``recorder.now()`` reads that clock, so the book and ticker timestamps the
+feeders stamp, the scanner's staleness checks and ``LiveStrategy``'s action
+times and bars-held count follow the recording rather than the wall clock:
+
+- ``OPEN`` waits (up to ``claim_timeout``) for a feeder to connect with the
+  same source, preferring the same url, and binds the recorded connection
+  to it
+- a frame is handed to its connection and the dispatcher waits until the
+  feeder comes back to ``recv()`` (it has processed the frame) before moving
+  on, so runs are reproducible at any speed
+- ``CLOSE`` makes the connection's next ``recv()`` raise, as a dropped
+  socket would
+
+``speed`` paces the replay against the recorded timestamps: 1.0 is real
+time, N is N times faster and 0 (the default) runs as fast as the feeders
+consume frames, which makes it a throughput benchmark as well.
+
+``run_replay`` is the harness used by tools/replay_market_data.py: it
+starts the feeders with ``feeder_utils.start_all``, runs
+``find_executable_opportunities`` over them every ``scan_every_s``
+simulated seconds and drives ``LiveStrategy`` instances from the recorded
+futures kline / mark price stream, capturing their actions instead of
+executing them. The returned report (opportunities, actions, final top of
+book) can be diffed between runs.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Union
+from urllib.parse import parse_qs, urlparse
+
+from .exchanges import recorder
+from .exchanges.kline_store import INTERVAL_MS, get_kline_store
+from .exchanges.recorder import BINARY, CLOSE, OPEN, REST, TEXT, Record
+
+_EOF = object()
+
+
+class SimClock:
+    """Simulated time: the receive timestamp of the record being replayed."""
+
+    def __init__(self):
+        self._ts = 0.0
+
+    def set(self, ts: float) -> None:
+        self._ts = ts
+
+    def time(self) -> float:
+        return self._ts
+
+    def time_ms(self) -> float:
+        return self._ts * 1000.0
+
+
+class ReplayConnection:
+    """Stands in for a websockets connection during a replay."""
+
+    def __init__(self, session: 'ReplaySession', source: str, url: str):
+        self.source = source
+        self.url = url
+        self.conn_id: Optional[int] = None
+        self.sent: List[Any] = []
+        self.closed = False
+        self._session = session
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # items pushed / returned by recv() / known processed: a feeder that
+        # calls recv() again is done with everything it got before
+        self._cv = threading.Condition()
+        self._pushed = 0
+        self._got = 0
+        self._handled = 0
+
+    async def __aenter__(self) -> 'ReplayConnection':
+        return self
+
+    async def __aexit__(self, *exc) -> bool:
+        self.closed = True
+        self._session._release(self)
+        return False
+
+    async def recv(self):
+        with self._cv:
+            self._handled = self._got
+            self._cv.notify_all()
+        item = await self._queue.get()
+        self._got += 1
+        if item is _EOF:
+            self._queue.put_nowait(_EOF)
+            raise ConnectionError('replayed connection closed')
+        return item
+
+    async def send(self, message: Any) -> None:
+        self.sent.append(message)
+
+    async def ping(self, *args, **kwargs) -> None:
+        return None
+
+    async def close(self, *args, **kwargs) -> None:
+        self.closed = True
+
+    def _push(self, item: Any, timeout: float) -> bool:
+        """Hand ``item`` to the feeder (dispatcher thread); True once it is processed."""
+        with self._cv:
+            self._pushed += 1
+            n = self._pushed
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            return False  # feeder loop closed
+        if timeout <= 0:
+            return True
+        with self._cv:
+            return self._cv.wait_for(lambda: self._handled >= n, timeout)
+
+
+Listener = Callable[[Record], None]
+
+
+class ReplaySession:
+    """Replays a recording (directory, segment file or list of segments).
+
+    ``sources`` (feeder name prefixes) limits which recorded connections are
+    handed to feeders; the others are still seen by listeners.
+    """
+
+    def __init__(self, path: Union[str, Sequence[str]], speed: float = 0.0, frame_timeout: float = 1.0,
+                 claim_timeout: float = 10.0, sources: Optional[Iterable[str]] = None):
+        self.paths = recorder.segment_paths(path)
+        if not self.paths:
+            raise FileNotFoundError(f'no recorder segments in {path}')
+        self.speed = max(0.0, float(speed))
+        self.frame_timeout = frame_timeout
+        self.claim_timeout = claim_timeout
+        self.feeds = tuple(sources) if sources is not None else None
+        self.clock = SimClock()
+        self._cond = threading.Condition()
+        self._waiting: List[ReplayConnection] = []
+        self._conns: Dict[int, ReplayConnection] = {}
+        self._rest: Dict[str, Deque[Any]] = {}
+        self._listeners: List[Listener] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.done = threading.Event()
+        self.sources: Dict[str, int] = {}
+        self.urls: Dict[str, List[str]] = {}
+        self.records = 0
+        self.frames = 0
+        self.dropped = 0
+        self.unclaimed = 0
+        self.slow_frames = 0
+        self.rest_served = 0
+        self.rest_missed = 0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.wall_s = 0.0
+        self._loaded = False
+
+    # -- hooks used by recorder.connect / run_blocking -----------------------------
+    def connect(self, source: str, uri: str) -> ReplayConnection:
+        conn = ReplayConnection(self, source, uri)
+        with self._cond:
+            self._waiting.append(conn)
+            self._cond.notify_all()
+        return conn
+
+    def rest_result(self, call: str, args: Sequence[Any]):
+        """(True, recorded result) for the next recorded call, else (False, None)."""
+        with self._cond:
+            q = self._rest.get(recorder.rest_key(call, args))
+            if q:
+                self.rest_served += 1
+                return True, q.popleft()
+            self.rest_missed += 1
+            return False, None
+
+    def _release(self, conn: ReplayConnection) -> None:
+        with self._cond:
+            if conn in self._waiting:
+                self._waiting.remove(conn)
+            if conn.conn_id is not None and self._conns.get(conn.conn_id) is conn:
+                del self._conns[conn.conn_id]
+
+    # -- control -----------------------------------------------------------------------
+    def add_listener(self, fn: Listener) -> None:
+        """Call ``fn(record)`` on the dispatcher thread after each record is delivered."""
+        self._listeners.append(fn)
+
+    def load(self) -> 'ReplaySession':
+        """Index the recording: REST results, and the sources and urls it holds.
+
+        REST results are served out of order with the frames (a feeder asks
+        for a snapshot when it needs one), so they are read up front.
+        """
+        if self._loaded:
+            return self
+        seen = set()
+        for rec in recorder.read_records(self.paths):
+            if rec.kind == REST:
+                key = recorder.rest_key(rec.payload['call'], rec.payload['args'])
+                self._rest.setdefault(key, deque()).append(rec.payload['result'])
+            elif rec.kind == OPEN and rec.conn not in seen:
+                seen.add(rec.conn)
+                self.sources[rec.source] = self.sources.get(rec.source, 0) + 1
+                urls = self.urls.setdefault(rec.source, [])
+                if rec.payload not in urls:
+                    urls.append(rec.payload)
+        self._loaded = True
+        return self
+
+    def start(self) -> 'ReplaySession':
+        self.load()
+        recorder.install_replay(self)
+        self._thread = threading.Thread(target=self._run, name='market-replay', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        if recorder.replay_session() is self:
+            recorder.install_replay(None)
+        with self._cond:
+            conns = list(self._conns.values()) + list(self._waiting)
+        for conn in conns:
+            conn._push(_EOF, 0)
+
+    # -- dispatcher ------------------------------------------------------------------
+    def _feeds(self, source: str) -> bool:
+        return self.feeds is None or any(source.startswith(p) for p in self.feeds)
+
+    def _claim(self, rec: Record) -> Optional[ReplayConnection]:
+        deadline = time.monotonic() + self.claim_timeout
+        with self._cond:
+            while not self._stop.is_set():
+                same = [c for c in self._waiting if c.source == rec.source]
+                if same:
+                    conn = next((c for c in same if c.url == rec.payload), same[0])
+                    self._waiting.remove(conn)
+                    conn.conn_id = rec.conn
+                    self._conns[rec.conn] = conn
+                    return conn
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return None
+                self._cond.wait(min(left, 0.1))
+        return None
+
+    def _run(self) -> None:
+        wall0 = time.perf_counter()
+        try:
+            for rec in recorder.read_records(self.paths):
+                if self._stop.is_set():
+                    break
+                if self.first_ts is None:
+                    self.first_ts = rec.ts
+                if self.speed > 0:
+                    delay = (rec.ts - self.first_ts) / self.speed - (time.perf_counter() - wall0)
+                    if delay > 0 and self._stop.wait(delay):
+                        break
+                self.records += 1
+                self.last_ts = rec.ts
+                self.clock.set(rec.ts)
+                if rec.kind == OPEN:
+                    # segments re-announce connections that are still open
+                    if rec.conn not in self._conns and self._feeds(rec.source) and self._claim(rec) is None:
+                        self.unclaimed += 1
+                elif rec.kind in (TEXT, BINARY):
+                    conn = self._conns.get(rec.conn)
+                    if conn is None or conn.closed:
+                        if self._feeds(rec.source):
+                            self.dropped += 1
+                    else:
+                        self.frames += 1
+                        if not conn._push(rec.payload, self.frame_timeout):
+                            self.slow_frames += 1
+                elif rec.kind == CLOSE:
+                    with self._cond:
+                        conn = self._conns.pop(rec.conn, None)
+                    if conn is not None:
+                        conn._push(_EOF, 0)
+                for fn in self._listeners:
+                    try:
+                        fn(rec)
+                    except Exception as e:
+                        print(f'[replay] listener failed: {type(e).__name__}: {e}')
+        except Exception as e:
+            print(f'[replay] dispatcher stopped: {type(e).__name__}: {e}')
+        finally:
+            self.wall_s = time.perf_counter() - wall0
+            self.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        span = (self.last_ts - self.first_ts) if self.first_ts is not None and self.last_ts is not None else 0.0
+        return {
+            'segments': len(self.paths),
+            'sources': dict(self.sources),
+            'records': self.records,
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'unclaimed': self.unclaimed,
+            'slow_frames': self.slow_frames,
+            'rest_served': self.rest_served,
+            'rest_missed': self.rest_missed,
+            'sim_span_s': round(span, 3),
+            'wall_s': round(self.wall_s, 3),
+            'frames_per_s': round(self.frames / self.wall_s, 1) if self.wall_s > 0 else None,
+            'speedup': round(span / self.wall_s, 1) if self.wall_s > 0 else None,
+        }
+
+
+# -- harness -------------------------------------------------------------------------------
+class _FeederExchange:
+    """Scanner adapter over a feeder (the scanner reads ``name``)."""
+
+    def __init__(self, name: str, feeder: Any):
+        self.name = name
+        self._feeder = feeder
+
+    def get_tickers(self):
+        return self._feeder.get_tickers()
+
+    def get_order_book(self, symbol: str, depth: int = 10):
+        return self._feeder.get_order_book(symbol, depth)
+
+
+class StrategyDriver:
+    """Feeds LiveStrategy instances from recorded Binance futures kline frames.
+
+    Mirrors the strategy scheduler: a closed 1m kline that completes a
+    strategy's interval becomes ``on_bar`` (with the closes of the last
+    ``_bars_needed()`` bars) and a mark price update becomes ``on_tick``.
+    Mark updates are also fed to ``store`` (the kline store by default), as
+    the live futures stream does, so ``mark()`` lookups see the recorded
+    mark and funding rate. ``_emit_action`` is replaced on each strategy so
+    actions are captured (with simulated timestamps) instead of reaching the
+    executor.
+    """
+
+    def __init__(self, strategies: Iterable[Any], source: str = 'klines-futures', store: Any = None):
+        self.source = source
+        self.store = store if store is not None else get_kline_store()
+        self.strategies = list(strategies)
+        self.actions: List[Dict[str, Any]] = []
+        self._closes: Dict[int, Deque[float]] = {}
+        self._loop = asyncio.new_event_loop()
+        self._now_ms = 0.0
+        for s in self.strategies:
+            self._closes[id(s)] = deque(maxlen=s._bars_needed())
+            s._emit_action = self._capture(s)
+
+    def _capture(self, strategy):
+        async def _emit(action: dict):
+            self.actions.append({
+                'ts': int(self._now_ms),
+                'symbol': strategy.symbol,
+                'mode': strategy.mode,
+                'action': action.get('action'),
+                'price': action.get('price_hint'),
+                'size': action.get('pos_size'),
+                'reason': action.get('reason'),
+            })
+        return _emit
+
+    def on_record(self, rec: Record) -> None:
+        if rec.source != self.source or rec.kind != TEXT:
+            return
+        try:
+            msg = json.loads(rec.payload)
+        except ValueError:
+            return
+        data = msg.get('data', msg) if isinstance(msg, dict) else None
+        if not isinstance(data, dict):
+            return
+        self._now_ms = rec.ts * 1000.0
+        kind = data.get('e')
+        sym = str(data.get('s') or '').upper()
+        if kind == 'kline':
+            k = data.get('k') or {}
+            if not k.get('x'):
+                return
+            close_ms = float(k['T']) + 1
+            for s in self.strategies:
+                if s.symbol != sym or close_ms % INTERVAL_MS.get(s.interval, INTERVAL_MS['15m']):
+                    continue
+                closes = self._closes[id(s)]
+                closes.append(float(k['c']))
+                self._loop.run_until_complete(s.on_bar(list(closes), close_ms))
+        elif kind == 'markPriceUpdate':
+            ts = float(data.get('E') or self._now_ms)
+            r = data.get('r')
+            self.store.on_mark(sym, float(data['p']), float(r) if r not in (None, '') else None, ts)
+            for s in self.strategies:
+                if s.symbol == sym:
+                    self._loop.run_until_complete(s.on_tick(float(data['p']), ts))
+
+    def close(self) -> None:
+        self._loop.close()
+
+
+def _top_of_book(feeders: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    for ex, f in feeders.items():
+        books = {}
+        try:
+            symbols = sorted(f.get_tickers())
+        except Exception:
+            continue
+        for sym in symbols:
+            try:
+                ob = f.get_order_book(sym, 1)
+            except Exception:
+                continue
+            bid = ob.get('bids') or [[None]]
+            ask = ob.get('asks') or [[None]]
+            books[sym] = {'bid': bid[0][0], 'ask': ask[0][0]}
+        out[ex] = books
+    return out
+
+
+def _binance_symbols(urls: Iterable[str]) -> List[str]:
+    """Symbols of recorded Binance combined-stream urls (``?streams=btcusdt@depth@100ms/...``)."""
+    out: List[str] = []
+    for url in urls:
+        for streams in parse_qs(urlparse(url).query).get('streams', []):
+            for stream in streams.split('/'):
+                sym = stream.split('@', 1)[0].upper()
+                if sym and sym not in out:
+                    out.append(sym)
+    return out
+
+
+def run_replay(path: Union[str, Sequence[str]], speed: float = 0.0, exchanges: Optional[List[str]] = None,
+               symbols: Optional[List[str]] = None, strategies: Iterable[Any] = (),
+               scan_every_s: Optional[float] = None, scan_kwargs: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None, settle_s: float = 0.5) -> Dict[str, Any]:
+    """Replay a recording through the feeders, the scanner and strategies.
+
+    ``exchanges`` defaults to the exchanges whose depth feeders appear in the
+    recording, ``symbols`` to the ones the Binance depth feeder subscribed.
+    Returns {'stats', 'opportunities', 'actions', 'books'}.
+    """
+    from . import feeder_utils
+    from .scanner import find_executable_opportunities
+
+    session = ReplaySession(path, speed=speed).load()
+    if exchanges is None:
+        exchanges = sorted({s.split('-', 1)[0] for s in session.sources if s.endswith('-depth')})
+    if symbols is None:
+        symbols = _binance_symbols(session.urls.get('binance-depth', ())) or None
+    session.feeds = tuple(f'{ex}-' for ex in exchanges)
+    driver = StrategyDriver(strategies) if strategies else None
+    if driver is not None:
+        session.add_listener(driver.on_record)
+    adapters: List[_FeederExchange] = []
+    opportunities: List[Dict[str, Any]] = []
+    if scan_every_s:
+        next_scan: List[Optional[float]] = [None]
+
+        def _scan(rec: Record) -> None:
+            if next_scan[0] is None:
+                next_scan[0] = rec.ts + scan_every_s
+            if rec.ts < next_scan[0] or len(adapters) < 2:
+                return
+            next_scan[0] = rec.ts + scan_every_s
+            for opp in find_executable_opportunities(list(adapters), **(scan_kwargs or {})):
+                opportunities.append(dict(asdict(opp), ts=int(rec.ts * 1000)))
+
+        session.add_listener(_scan)
+    feeders: Dict[str, Any] = {}
+    books: Dict[str, Dict[str, Any]] = {}
+    try:
+        session.start()
+        if exchanges:
+            feeders = feeder_utils.start_all(symbols=symbols, exchanges=exchanges)
+            adapters.extend(_FeederExchange(ex, f) for ex, f in feeders.items())
+        session.wait(timeout)
+        # let the feeders finish the last frames before reading their books
+        time.sleep(settle_s)
+        books = _top_of_book(feeders)
+    finally:
+        session.stop()
+        if feeders:
+            feeder_utils.stop_all(feeders)
+        if driver is not None:
+            driver.close()
+    return {
+        'stats': session.stats(),
+        'opportunities': opportunities,
+        'actions': driver.actions if driver is not None else [],
+        'books': books,
+    }
+
+
+__all__ = ['ReplayConnection', 'ReplaySession', 'SimClock', 'StrategyDriver', 'run_replay']
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
-import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Tuple, Optional
 import os
+from .book_fetcher import fetch_order_books, last_stats as book_fetch_stats
+from .capability_index import get_capability_index
+from .exchanges import recorder
 try:
     from arbitrage.utils.coingecko import get_metrics_for_base
 except Exception:
@@ -26,6 +28,62 @@ class Opportunity:
     sell_deposit: bool = True
 
 
+@dataclass
+class ScanSnapshot:
+    """Market data gathered by one scan, for callers that post-process it.
+
+    Pass an empty instance as ``find_executable_opportunities(snapshot=...)``;
+    the scan records each adapter's ticker map (phase 1) and every order book
+    it fetched (phase 2), so enrichment can reuse them instead of calling the
+    adapters again. ``price``/``order_book`` lookups are O(1): each adapter's
+    tickers are indexed by canonical symbol key once, on first use.
+    """
+    # id(adapter) -> raw ticker map returned by get_tickers()
+    tickers: dict = field(default_factory=dict)
+    # (id(adapter), symbol) -> (orderbook, used_symbol), as from fetch_order_books
+    books: dict = field(default_factory=dict)
+    _index: dict = field(default_factory=dict, repr=False)
+
+    def add_tickers(self, ex: object) -> None:
+        """Fetch and record an adapter's tickers if this scan has not yet."""
+        if id(ex) in self.tickers:
+            return
+        try:
+            self.tickers[id(ex)] = ex.get_tickers() or {}
+        except Exception:
+            self.tickers[id(ex)] = {}
+
+    def ticker(self, ex: object, symbol: str):
+        """Return the adapter's ticker for any spelling of ``symbol`` (or None)."""
+        index = self._index.get(id(ex))
+        if index is None:
+            from .exchanges.symbol_registry import symbol_key
+            raw = self.tickers.get(id(ex))
+            index = {}
+            if isinstance(raw, dict):
+                for k, v in raw.items():
+                    try:
+                        index.setdefault(symbol_key(k), v)
+                    except Exception:
+                        continue
+                # exact keys win over other spellings of the same symbol
+                for k, v in raw.items():
+                    index[k] = v
+            self._index[id(ex)] = index
+        hit = index.get(symbol)
+        if hit is None:
+            from .exchanges.symbol_registry import symbol_key
+            hit = index.get(symbol_key(symbol))
+        return hit
+
+    def order_book(self, ex: object, symbol: str) -> Optional[dict]:
+        ob, _used = self.books.get((id(ex), symbol), (None, None))
+        return ob
+
+    def has_book(self, ex: object, symbol: str) -> bool:
+        return (id(ex), symbol) in self.books
+
+
 def find_opportunities(exchanges: List[object], min_profit_pct: float = 0.1) -> List[Opportunity]:
     """Scan the provided exchange adapters for arbitrage opportunities.
 
@@ -135,6 +193,48 @@ def vwap_price_from_orderbook(side: List[Tuple[float, float]], amount: float) ->
     return total_cost / total_filled
 
 
+def _try_order_book_for(obj, symbol: str) -> tuple[dict | None, str | None]:
+    """Try several symbol variants when calling get_order_book to handle
+    exchanges that use different symbol formats (e.g. BTC/USDT vs BTC-USDT).
+    Returns the (orderbook, used_symbol) or (None, None) on failure.
+    """
+    if not hasattr(obj, 'get_order_book'):
+        return None, None
+    variants = [symbol]
+    if '/' in symbol:
+        variants.append(symbol.replace('/', '-'))
+    if '-' in symbol:
+        variants.append(symbol.replace('-', '/'))
+    # try appending common quote tokens if missing
+    if '/' not in symbol and '-' not in symbol:
+        variants.extend([f'{symbol}/USDT', f'{symbol}-USDT', f'{symbol}/USD', f'{symbol}-USD'])
+    # also try removing common suffixes
+    if symbol.endswith('/USDT') or symbol.endswith('-USDT'):
+        variants.append(symbol.replace('/USDT', '').replace('-USDT', ''))
+    # keep unique order preserving
+    seen = set()
+    unique_variants = []
+    for v in variants:
+        if v not in seen:
+            seen.add(v)
+            unique_variants.append(v)
+
+    for cand in unique_variants:
+        try:
+            # ask adapter for order book
+            ob = obj.get_order_book(cand)
+            if ob and isinstance(ob, dict) and (ob.get('asks') or ob.get('bids')):
+                return ob, cand
+        except Exception as e:
+            try:
+                print(f"      [scanner] candidate '{cand}' failed: {e}")
+            except Exception:
+                pass
+            # continue trying other variants
+            continue
+    return None, None
+
+
 def _are_same_asset(ex_a: object, symbol_a: str, ex_b: object, symbol_b: str) -> bool:
     """Best-effort check whether symbol_a on ex_a and symbol_b on ex_b refer to the same asset.
 
@@ -175,6 +275,79 @@ def _are_same_asset(ex_a: object, symbol_a: str, ex_b: object, symbol_b: str) ->
     return True
 
 
+def _price_candidates_scalar(
+    market: dict,
+    *,
+    min_profit_pct: float,
+    min_price_diff_pct: float,
+    max_age_seconds: float = 5.0,
+    min_price: float = 1e-6,
+    amount: float = 1.0,
+    min_notional: float = 0.0,
+    min_listing_age_seconds: float = 0.0,
+) -> list[tuple]:
+    """Pure-Python reference for the phase-1 price filters.
+
+    Walks every (buy, sell) quote pair per symbol and returns
+    (symbol, buy_obj, buy_ex, buy_price, sell_obj, sell_ex, sell_price) tuples.
+    Used when numpy is unavailable; see ``spread_matrix.SpreadMatrix`` for the
+    vectorized equivalent.
+    """
+    transfer_cost_default = 0.0
+    out: list[tuple] = []
+    for sym, quotes in market.items():
+        if len(quotes) < 2:
+            continue
+        for i in range(len(quotes)):
+            for j in range(len(quotes)):
+                if i == j:
+                    continue
+                buy_obj, buy_ex, buy_price, buy_ts = quotes[i]
+                sell_obj, sell_ex, sell_price, sell_ts = quotes[j]
+                now = recorder.now()
+                if buy_ts is not None and sell_ts is not None:
+                    if abs(buy_ts - sell_ts) > max_age_seconds:
+                        continue
+                    if (now - buy_ts) > max_age_seconds or (now - sell_ts) > max_age_seconds:
+                        continue
+                # quick raw-price filter to avoid scanning tiny spreads
+                raw_diff_pct = (sell_price - buy_price) / buy_price * 100.0 if buy_price > 0 else 0.0
+                if raw_diff_pct < min_price_diff_pct:
+                    continue
+
+                buy_fee = getattr(buy_obj, "fee_rate", 0.0)
+                sell_fee = getattr(sell_obj, "fee_rate", 0.0)
+                effective_buy = buy_price * (1.0 + buy_fee)
+                effective_sell = sell_price * (1.0 - sell_fee)
+                transfer_cost = getattr(sell_obj, "withdraw_fee", transfer_cost_default)
+                net_profit = effective_sell - effective_buy - transfer_cost
+                if net_profit <= 0:
+                    continue
+                profit_pct = net_profit / effective_buy * 100.0
+                if profit_pct < min_profit_pct:
+                    continue
+                # basic exclusion filters
+                if buy_price < min_price or sell_price < min_price:
+                    continue
+                if (buy_price * amount) < min_notional:
+                    continue
+                now = recorder.now()
+                if buy_ts is not None and (now - buy_ts) < min_listing_age_seconds:
+                    continue
+                if sell_ts is not None and (now - sell_ts) < min_listing_age_seconds:
+                    continue
+
+                # ensure the base asset is the same across exchanges (best-effort)
+                try:
+                    same = _are_same_asset(buy_obj, sym, sell_obj, sym)
+                except Exception:
+                    same = True
+                if not same:
+                    continue
+                out.append((sym, buy_obj, buy_ex, buy_price, sell_obj, sell_ex, sell_price))
+    return out
+
+
 def find_executable_opportunities(
     exchanges: List[object],
     amount: float = 1.0,
@@ -187,6 +360,8 @@ def find_executable_opportunities(
     min_top_level_size: float = 0.0001,
     allow_ticker_fallback: bool = True,
     min_side_notional: float = 0.0,
+    symbols: Optional[Iterable[str]] = None,
+    snapshot: Optional[ScanSnapshot] = None,
 ) -> List[Opportunity]:
     """Scan exchanges for executable arbitrage opportunities for a given `amount`.
 
@@ -197,7 +372,15 @@ def find_executable_opportunities(
 
     This function does NOT account for fees or withdrawal/deposit times — those
     must be applied by the caller (or extended here) before executing.
+
+    `symbols` restricts the scan to those symbols (any separator style), e.g.
+    the ones a book event reported as changed. `snapshot` (a ScanSnapshot)
+    receives the tickers and order books the scan used.
     """
+    wanted = None
+    if symbols is not None:
+        from .exchanges.symbol_registry import symbol_key
+        wanted = {symbol_key(s) for s in symbols}
     # Phase 1: collect tickers and build candidate pairs using ticker prices only
     market: dict[str, list[tuple[object, str, float, Optional[float]]]] = {}
     # Optionally pre-filter tickers by market metrics to reduce the symbol set.
@@ -309,12 +492,16 @@ def find_executable_opportunities(
             tickers = ex.get_tickers()
         except Exception:
             tickers = {}
+        if snapshot is not None:
+            snapshot.tickers[id(ex)] = tickers
         ex_symbol_count = len(tickers) if isinstance(tickers, dict) else 0
         ex_symbol_counts[id(ex)] = ex_symbol_count
         if not isinstance(tickers, dict):
             continue
         for sym, tk in tickers.items():
             try:
+                if wanted is not None and symbol_key(sym) not in wanted:
+                    continue
                 base = sym.split('/')[0] if '/' in sym else (sym.split('-')[0] if '-' in sym else sym)
                 mc, vol24 = _base_metrics_cache.get(base, (None, None))
                 if mc is None and strict_metrics:
@@ -367,109 +554,48 @@ def find_executable_opportunities(
     max_age_seconds = 5.0
     transfer_cost_default = 0.0
 
-    candidates: list[tuple] = []
-    for sym, quotes in market.items():
-        if len(quotes) < 2:
-            continue
-        for i in range(len(quotes)):
-            for j in range(len(quotes)):
-                if i == j:
-                    continue
-                buy_obj, buy_ex, buy_price, buy_ts = quotes[i]
-                sell_obj, sell_ex, sell_price, sell_ts = quotes[j]
-                now = time.time()
-                if buy_ts is not None and sell_ts is not None:
-                    if abs(buy_ts - sell_ts) > max_age_seconds:
-                        continue
-                    if (now - buy_ts) > max_age_seconds or (now - sell_ts) > max_age_seconds:
-                        continue
-                # quick raw-price filter to avoid scanning tiny spreads
-                raw_diff_pct = (sell_price - buy_price) / buy_price * 100.0 if buy_price > 0 else 0.0
-                if raw_diff_pct < min_price_diff_pct:
-                    continue
-
-                buy_fee = getattr(buy_obj, "fee_rate", 0.0)
-                sell_fee = getattr(sell_obj, "fee_rate", 0.0)
-                effective_buy = buy_price * (1.0 + buy_fee)
-                effective_sell = sell_price * (1.0 - sell_fee)
-                transfer_cost = getattr(sell_obj, "withdraw_fee", transfer_cost_default)
-                net_profit = effective_sell - effective_buy - transfer_cost
-                if net_profit <= 0:
-                    continue
-                profit_pct = net_profit / effective_buy * 100.0
-                if profit_pct >= min_profit_pct:
-                    # basic exclusion filters
-                    if buy_price < min_price or sell_price < min_price:
-                        continue
-                    if (buy_price * amount) < min_notional:
-                        continue
-                    now = time.time()
-                    if buy_ts is not None and (now - buy_ts) < min_listing_age_seconds:
-                        continue
-                    if sell_ts is not None and (now - sell_ts) < min_listing_age_seconds:
-                        continue
-
-                    # ensure the base asset is the same across exchanges (best-effort)
-                    try:
-                        same = _are_same_asset(buy_obj, sym, sell_obj, sym)
-                    except Exception:
-                        same = True
-                    if not same:
-                        continue
-
-                    # Ensure withdraw/deposit availability: the exchange where we buy
-                    # must allow withdrawals of the base asset, and the exchange where
-                    # we sell must allow deposits for the base asset. We call
-                    # supports_withdraw/supports_deposit if available; if the
-                    # adapter does not provide such a method, we conservatively
-                    # assume support (fail-open).
-                    base_token = sym.split('/')[0] if '/' in sym else (sym.split('-')[0] if '-' in sym else sym)
-                    # Check supports_withdraw/supports_deposit with a short timeout to avoid blocking
-                    def _call_bool_method_with_timeout(obj, method_name: str, arg, timeout_s: float = 0.5) -> bool:
-                        try:
-                            if not hasattr(obj, method_name):
-                                return True
-                            meth = getattr(obj, method_name)
-                            from concurrent.futures import ThreadPoolExecutor
-
-                            def _call():
-                                try:
-                                    return bool(meth(arg))
-                                except Exception:
-                                    return True
-
-                            with ThreadPoolExecutor(max_workers=1) as _exe:
-                                fut = _exe.submit(_call)
-                                try:
-                                    return fut.result(timeout=timeout_s)
-                                except Exception:
-                                    return True
-                        except Exception:
-                            return True
-
-                    if not _call_bool_method_with_timeout(buy_obj, 'supports_withdraw', base_token):
-                        continue
-                    if not _call_bool_method_with_timeout(sell_obj, 'supports_deposit', base_token):
-                        continue
+    price_filters = dict(
+        min_profit_pct=min_profit_pct,
+        min_price_diff_pct=min_price_diff_pct,
+        max_age_seconds=max_age_seconds,
+        min_price=min_price,
+        amount=amount,
+        min_notional=min_notional,
+        min_listing_age_seconds=min_listing_age_seconds,
+    )
+    # Price-level filtering runs on the NumPy spread matrix when available
+    # (ARB_SCAN_VECTORIZED=0 forces the scalar loop). Both paths yield the
+    # same pairs in the same order.
+    price_candidates = None
+    if os.getenv('ARB_SCAN_VECTORIZED', '1') != '0':
+        try:
+            from .spread_matrix import SpreadMatrix, available as _matrix_available
+            if _matrix_available():
+                price_candidates = SpreadMatrix.from_market(market, exchanges).candidates(**price_filters)
+        except Exception:
+            price_candidates = None
+    if price_candidates is None:
+        price_candidates = _price_candidates_scalar(market, **price_filters)
+
+    # Withdraw/deposit availability: the exchange where we buy must allow
+    # withdrawals of the base asset, and the exchange where we sell must allow
+    # deposits. Answers come from the capability index (O(1), no adapter I/O);
+    # unknown keys follow the ARB_FAIL_OPEN_WITHDRAW policy and are resolved
+    # in the background for the next scan.
+    capabilities = get_capability_index()
+    capabilities.track(exchanges)
 
-                    # record the withdraw/deposit support as available from adapters
-                    buy_withdraw = True
-                    sell_deposit = True
-                    # fetch support flags with timeboxed calls (fail-open)
-                    try:
-                        buy_withdraw = _call_bool_method_with_timeout(buy_obj, 'supports_withdraw', base_token)
-                    except Exception:
-                        buy_withdraw = True
-                    try:
-                        sell_deposit = _call_bool_method_with_timeout(sell_obj, 'supports_deposit', base_token)
-                    except Exception:
-                        sell_deposit = True
+    candidates: list[tuple] = []
+    for sym, buy_obj, buy_ex, buy_price, sell_obj, sell_ex, sell_price in price_candidates:
+        base_token = sym.split('/')[0] if '/' in sym else (sym.split('-')[0] if '-' in sym else sym)
+        buy_withdraw = capabilities.allows(buy_ex, base_token, 'withdraw')
+        sell_deposit = capabilities.allows(sell_ex, base_token, 'deposit')
 
-                    # Skip if buy side cannot withdraw or sell side cannot deposit
-                    if not buy_withdraw or not sell_deposit:
-                        continue
+        # Skip if buy side cannot withdraw or sell side cannot deposit
+        if not buy_withdraw or not sell_deposit:
+            continue
 
-                    candidates.append((sym, buy_obj, buy_ex, buy_price, sell_obj, sell_ex, sell_price, buy_withdraw, sell_deposit))
+        candidates.append((sym, buy_obj, buy_ex, buy_price, sell_obj, sell_ex, sell_price, buy_withdraw, sell_deposit))
 
     # reporting: how many tickers/candidates we collected
     try:
@@ -580,8 +706,8 @@ def find_executable_opportunities(
     for entry in candidates:
         sym = entry[0]
         exs_for_sym = sym_to_exs.get(sym, [])
-        mc, vol24 = _collect_symbol_metrics(sym, exs_for_sym)
-        # if not strict, keep candidate when metrics are missing
+        # if not strict, keep candidate without collecting metrics (each
+        # collection may call fetch_ticker on the adapters' clients)
         if not strict_metrics:
             filtered_candidates.append(entry)
             continue
@@ -592,6 +718,7 @@ def find_executable_opportunities(
             filtered_candidates.append(entry)
             continue
         # strict mode here: require metrics and thresholds
+        mc, vol24 = _collect_symbol_metrics(sym, exs_for_sym)
         keep = True
         if mc is None or vol24 is None:
             keep = False
@@ -611,6 +738,35 @@ def find_executable_opportunities(
     # swap in filtered candidates for the orderbook phase
     candidates = filtered_candidates
 
+    # Fetch every unique (exchange, symbol) book the candidates need up front,
+    # concurrently and under a deadline, then read books and VWAPs from the
+    # shared snapshot below.
+    book_requests: list[tuple[object, str]] = []
+    for entry in candidates:
+        for obj in (entry[1], entry[4]):
+            if hasattr(obj, 'get_order_book'):
+                book_requests.append((obj, entry[0]))
+    books = fetch_order_books(book_requests, _try_order_book_for)
+    if snapshot is not None:
+        snapshot.books.update(books)
+    try:
+        print(f"[scanner] fetched {len(books)} unique order books for {len(candidates)} candidates in {book_fetch_stats.get('elapsed_s', 0.0):.3f}s (timed out: {int(book_fetch_stats.get('timed_out', 0))})")
+    except Exception:
+        pass
+
+    vwap_cache: dict[tuple[int, str, str], tuple[list, float | None]] = {}
+
+    def _side_vwap(obj: object, symbol: str, side: str) -> tuple[list, float | None]:
+        """Return (levels, vwap for `amount`) for one side of a fetched book."""
+        key = (id(obj), symbol, side)
+        hit = vwap_cache.get(key)
+        if hit is None:
+            ob, _used = books.get((id(obj), symbol), (None, None))
+            levels = ob.get(side, []) if ob is not None else []
+            hit = (levels, vwap_price_from_orderbook(levels, amount))
+            vwap_cache[key] = hit
+        return hit
+
     for idx, entry in enumerate(candidates):
         try:
             print(f"[scanner] processing candidate {idx+1}/{len(candidates)}: symbol={entry[0]} buy={getattr(entry[1], 'name', str(entry[1]))} sell={getattr(entry[4], 'name', str(entry[4]))}")
@@ -630,64 +786,9 @@ def find_executable_opportunities(
         exec_buy_price = buy_price
         exec_sell_price = sell_price
         buy_ob = None
-        def _try_order_book_for(obj, symbol: str):
-            """Try several symbol variants when calling get_order_book to handle
-            exchanges that use different symbol formats (e.g. BTC/USDT vs BTC-USDT).
-            Returns the (orderbook, used_symbol) or (None, None) on failure.
-            """
-            if not hasattr(obj, 'get_order_book'):
-                return None, None
-            tried = []
-            variants = [symbol]
-            if '/' in symbol:
-                variants.append(symbol.replace('/', '-'))
-            if '-' in symbol:
-                variants.append(symbol.replace('-', '/'))
-            # try appending common quote tokens if missing
-            if '/' not in symbol and '-' not in symbol:
-                variants.extend([f'{symbol}/USDT', f'{symbol}-USDT', f'{symbol}/USD', f'{symbol}-USD'])
-            # also try removing common suffixes
-            if symbol.endswith('/USDT') or symbol.endswith('-USDT'):
-                variants.append(symbol.replace('/USDT', '').replace('-USDT', ''))
-            # keep unique order preserving
-            seen = set()
-            unique_variants = []
-            for v in variants:
-                if v not in seen:
-                    seen.add(v)
-                    unique_variants.append(v)
-
-            for cand in unique_variants:
-                try:
-                    try:
-                        print(f"      [scanner] trying orderbook candidate '{cand}' on {getattr(obj,'name',str(obj))}")
-                    except Exception:
-                        pass
-                    # ask adapter for order book
-                    ob = obj.get_order_book(cand)
-                    if ob and isinstance(ob, dict) and (ob.get('asks') or ob.get('bids')):
-                        try:
-                            print(f"      [scanner] orderbook found using '{cand}' on {getattr(obj,'name',str(obj))}")
-                        except Exception:
-                            pass
-                        return ob, cand
-                except Exception as e:
-                    try:
-                        print(f"      [scanner] candidate '{cand}' failed: {e}")
-                    except Exception:
-                        pass
-                    # continue trying other variants
-                    continue
-            return None, None
-
         if hasattr(buy_obj, "get_order_book"):
             try:
-                ob, used = _try_order_book_for(buy_obj, sym)
-                if ob is None:
-                    asks = []
-                else:
-                    asks = ob.get("asks", [])
-                vwap = vwap_price_from_orderbook(asks, amount)
+                asks, vwap = _side_vwap(buy_obj, sym, "asks")
                 if vwap is None:
                     if allow_ticker_fallback:
                         exec_buy_price = buy_price
@@ -708,12 +809,7 @@ def find_executable_opportunities(
         sell_ob = None
         if hasattr(sell_obj, "get_order_book"):
             try:
-                ob, used = _try_order_book_for(sell_obj, sym)
-                if ob is None:
-                    bids = []
-                else:
-                    bids = ob.get("bids", [])
-                vwap = vwap_price_from_orderbook(bids, amount)
+                bids, vwap = _side_vwap(sell_obj, sym, "bids")
                 if vwap is None:
                     if allow_ticker_fallback:
                         exec_sell_price = sell_price
@@ -731,39 +827,6 @@ def find_executable_opportunities(
             except Exception:
                 exec_sell_price = sell_price
 
-        # Before finalizing, consult adapters' get_currency_details if available
-        # to set withdraw/deposit flags more authoritatively.
-        base_token = sym.split('/')[0] if '/' in sym else (sym.split('-')[0] if '-' in sym else sym)
-        try:
-            if hasattr(buy_obj, 'get_currency_details'):
-                cd = buy_obj.get_currency_details(base_token)
-                if isinstance(cd, dict):
-                    # Prefer explicit top-level 'withdraw' flag when present
-                    if 'withdraw' in cd:
-                        buy_withdraw = bool(cd.get('withdraw'))
-                    # check networks entries for withdraw/deposit enables if available
-                    if 'networks' in cd and isinstance(cd['networks'], dict):
-                        # if any network enables withdraw, treat as withdrawable
-                        nw = cd['networks']
-                        any_withdraw = any(bool(v.get('withdrawEnable') or v.get('withdraw') or v.get('withdrawEnable', False)) for v in nw.values() if isinstance(v, dict))
-                        if any_withdraw:
-                            buy_withdraw = True
-        except Exception:
-            pass
-        try:
-            if hasattr(sell_obj, 'get_currency_details'):
-                cd = sell_obj.get_currency_details(base_token)
-                if isinstance(cd, dict):
-                    if 'deposit' in cd:
-                        sell_deposit = bool(cd.get('deposit'))
-                    if 'networks' in cd and isinstance(cd['networks'], dict):
-                        nw = cd['networks']
-                        any_deposit = any(bool(v.get('depositEnable') or v.get('deposit') or v.get('depositEnable', False)) for v in nw.values() if isinstance(v, dict))
-                        if any_deposit:
-                            sell_deposit = True
-        except Exception:
-            pass
-
         # enforce per-side notional minimum using the actual orderbook if available
         def notional_available(side: list[tuple[float, float]], required_amount: float) -> float:
             # returns total notional available for up to required_amount base units
@@ -0,0 +1,253 @@
+"""Background-refreshed snapshot service behind /api/spot-arbitrage.
+
+The endpoint used to fetch five venues' 24h tickers, two symbol listings
+and five currency-status batches one after another on every request, so
+each call took many seconds and held a threadpool worker. This module
+splits that into:
+
+- ``fetch_concurrently``: run the per-venue fetchers on a shared pool under
+  one deadline; a failed or slow venue yields its default instead of
+  stalling the rest
+- ``PriceTable``: a columnar (symbol x venue) price/volume table built once
+  per refresh, with NaN for venues that do not quote a symbol
+- ``SnapshotService``: a daemon thread that rebuilds the payload on a
+  schedule and keeps the latest one pre-serialised with an ETag, so the
+  endpoint only hands out bytes (or a 304)
+
+The service starts on the first request and goes idle when nobody has
+asked for a snapshot for ``idle_s`` seconds, so an unused endpoint does not
+keep polling exchange APIs.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+NAN = float('nan')
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='spot-fetch')
+        return _EXECUTOR
+
+
+def fetch_concurrently(tasks: Dict[str, Callable[[], Any]], timeout: float = 15.0,
+                       defaults: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Run ``tasks`` (name -> callable) concurrently under one deadline.
+
+    Returns (results, elapsed_ms). A task that raises or misses the deadline
+    resolves to ``defaults.get(name)``; its elapsed time is reported as -1.
+    """
+    defaults = defaults or {}
+    results: Dict[str, Any] = {name: defaults.get(name) for name in tasks}
+    elapsed: Dict[str, float] = {name: -1.0 for name in tasks}
+    if not tasks:
+        return results, elapsed
+
+    def _run(name: str, fn: Callable[[], Any]):
+        t0 = time.perf_counter()
+        out = fn()
+        return name, out, (time.perf_counter() - t0) * 1000.0
+
+    exe = _executor()
+    futures = [exe.submit(_run, name, fn) for name, fn in tasks.items()]
+    done, _not_done = wait(futures, timeout=timeout)
+    for fut in done:
+        try:
+            name, out, ms = fut.result()
+        except Exception:
+            continue
+        if out is not None:
+            results[name] = out
+        elapsed[name] = round(ms, 1)
+    return results, elapsed
+
+
+class PriceTable:
+    """Columnar cross-venue table: one price and one volume column per venue.
+
+    ``add(venue, symbol, price, volume)`` fills cells; rows are created on
+    first sight of a symbol and every column is padded with NaN, so reading
+    a row is a fixed number of array lookups.
+    """
+
+    def __init__(self, venues: List[str]):
+        self.venues = list(venues)
+        self._col = {v: i for i, v in enumerate(self.venues)}
+        self.symbols: List[str] = []
+        self._row: Dict[str, int] = {}
+        self.price = [array('d') for _ in self.venues]
+        self.volume = [array('d') for _ in self.venues]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def row_of(self, symbol: str) -> int:
+        r = self._row.get(symbol)
+        if r is None:
+            r = len(self.symbols)
+            self._row[symbol] = r
+            self.symbols.append(symbol)
+            for col in self.price:
+                col.append(NAN)
+            for col in self.volume:
+                col.append(NAN)
+        return r
+
+    def add(self, venue: str, symbol: str, price: float, volume: float) -> None:
+        c = self._col[venue]
+        r = self.row_of(symbol)
+        self.price[c][r] = price
+        self.volume[c][r] = volume
+
+    def quotes(self, row: int) -> List[Tuple[str, float, float]]:
+        """Return [(venue, price, volume)] for the venues quoting ``row``."""
+        out = []
+        for c, venue in enumerate(self.venues):
+            p = self.price[c][row]
+            if p == p:  # not NaN
+                out.append((venue, p, self.volume[c][row]))
+        return out
+
+    def rows(self) -> Iterator[Tuple[str, List[Tuple[str, float, float]]]]:
+        for r, sym in enumerate(self.symbols):
+            yield sym, self.quotes(r)
+
+    def counts(self) -> Dict[str, int]:
+        return {v: sum(1 for p in self.price[c] if not math.isnan(p)) for c, v in enumerate(self.venues)}
+
+
+class Snapshot:
+    """One refresh result: payload dict plus its serialised body and ETag."""
+
+    __slots__ = ('payload', 'body', 'etag', 'as_of')
+
+    def __init__(self, payload: Dict[str, Any], as_of: float):
+        self.payload = payload
+        self.as_of = as_of
+        self.body = json.dumps(payload, default=str).encode('utf-8')
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+
+
+class SnapshotService:
+    """Rebuilds a payload with ``build()`` every ``interval`` seconds in a thread.
+
+    Snapshots older than ``max_age`` (default 4 intervals, e.g. after the
+    service went idle) are not served; readers wait for the next build.
+    Before the first build has finished, readers get ``placeholder()`` (when
+    given) right away instead of waiting for it.
+    """
+
+    def __init__(self, name: str, build: Callable[[], Dict[str, Any]], interval: float = 15.0,
+                 idle_s: float = 300.0, max_age: Optional[float] = None,
+                 placeholder: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.name = name
+        self._build = build
+        self._placeholder = placeholder
+        self.interval = interval
+        self.idle_s = idle_s
+        self.max_age = max_age if max_age is not None else 4 * interval
+        self._lock = threading.Lock()
+        self._built = threading.Condition()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Optional[Snapshot] = None
+        self._last_request = 0.0
+        self.last_error: Optional[str] = None
+        self.last_build_s = 0.0
+        self.builds = 0
+        # refresh attempts, successful or not; readers wait for this to move
+        self.attempts = 0
+
+    def _ensure_running(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f'snapshot-{self.name}', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            t0 = time.time()
+            try:
+                payload = self._build()
+                as_of = float(payload.get('as_of') or t0)
+                self._snapshot = Snapshot(payload, as_of)
+                self.last_error = None
+                self.builds += 1
+            except Exception as e:
+                self.last_error = f'{type(e).__name__}: {e}'
+                print(f'[{self.name}] snapshot refresh failed: {self.last_error}')
+            self.last_build_s = time.time() - t0
+            with self._built:
+                self.attempts += 1
+                self._built.notify_all()
+            with self._lock:
+                # readers bump _last_request before _ensure_running takes this lock
+                if time.time() - self._last_request > self.idle_s:
+                    # nobody is reading; stop until the next request restarts us
+                    self._thread = None
+                    return
+            self._wake.wait(max(0.0, self.interval - self.last_build_s))
+            self._wake.clear()
+
+    def _fresh(self) -> Optional[Snapshot]:
+        snap = self._snapshot
+        if snap is not None and time.time() - snap.as_of <= self.max_age:
+            return snap
+        return None
+
+    def latest(self) -> Optional[Snapshot]:
+        """Return the current snapshot without waiting (None if missing or stale)."""
+        self._last_request = time.time()
+        self._ensure_running()
+        return self._fresh()
+
+    def get(self, timeout: float = 60.0) -> Optional[Snapshot]:
+        """Return a fresh snapshot, waiting for the next build if needed.
+
+        Falls back to the last (stale) snapshot when no build finishes in time.
+        On a cold start with a placeholder, returns it without waiting; the
+        background refresh replaces it once the first build lands.
+        """
+        self._last_request = time.time()
+        with self._built:
+            seen = self.attempts
+        self._ensure_running()
+        snap = self._fresh()
+        if snap is not None:
+            return snap
+        if self._snapshot is None and self._placeholder is not None:
+            now = time.time()
+            return Snapshot(self._placeholder(), now)
+        with self._built:
+            self._built.wait_for(lambda: self.attempts != seen, timeout)
+        return self._snapshot
+
+    def refresh_now(self) -> None:
+        self._wake.set()
+
+    def status(self) -> Dict[str, Any]:
+        snap = self._snapshot
+        return {
+            'name': self.name,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval_s': self.interval,
+            'builds': self.builds,
+            'as_of': snap.as_of if snap else None,
+            'age_s': round(time.time() - snap.as_of, 3) if snap else None,
+            'last_build_s': round(self.last_build_s, 3),
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,169 @@
+"""NumPy-backed cross-exchange spread matrix used by the scanner's phase 1.
+
+The scalar candidate builder in ``scanner.find_executable_opportunities``
+walks every (buy, sell) quote pair per symbol in Python. This module packs
+the per-tick quotes into dense (symbol x exchange) price/timestamp arrays
+plus per-exchange fee vectors once, then evaluates the full buy/sell
+net-profit matrix, the freshness mask and all threshold filters in bulk.
+
+The returned candidates are identical (same pairs, same order) to the
+scalar loop so callers can switch between the two implementations freely.
+numpy is optional; callers should check ``available()`` first.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+import time
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+
+def available() -> bool:
+    """Return True when numpy is importable and the matrix engine can run."""
+    return np is not None
+
+
+def _float_attr(obj: object, name: str, default: float = 0.0) -> float:
+    try:
+        v = getattr(obj, name, default)
+        return float(v) if v is not None else default
+    except Exception:
+        return default
+
+
+class SpreadMatrix:
+    """Dense (symbol x exchange) quote arrays for one scanner tick.
+
+    - prices / timestamps: float64 arrays of shape (S, E); missing quotes and
+      missing timestamps are NaN
+    - fees: per-exchange taker fee (fraction), shape (E,)
+    - transfer: per-exchange flat withdraw fee applied on the sell side, shape (E,)
+    """
+
+    def __init__(self, symbols: List[str], exchanges: List[object], prices, timestamps):
+        if np is None:
+            raise ImportError('numpy is required for SpreadMatrix')
+        self.symbols = symbols
+        self.exchanges = exchanges
+        self.names = [getattr(ex, 'name', str(ex)) for ex in exchanges]
+        self.prices = prices
+        self.timestamps = timestamps
+        self.fees = np.array([_float_attr(ex, 'fee_rate') for ex in exchanges], dtype=np.float64)
+        self.transfer = np.array([_float_attr(ex, 'withdraw_fee') for ex in exchanges], dtype=np.float64)
+
+    @classmethod
+    def from_market(cls, market: Dict[str, list], exchanges: List[object]) -> 'SpreadMatrix':
+        """Pack the scanner's ``market`` mapping into dense arrays.
+
+        ``market`` maps symbol -> list of (exchange_obj, exchange_name, price, ts)
+        as built in phase 1. Columns follow the order of ``exchanges`` so the
+        column index of a quote matches its position in the scalar loop.
+        Symbols quoted on fewer than two exchanges are dropped up front.
+        """
+        if np is None:
+            raise ImportError('numpy is required for SpreadMatrix')
+        col = {id(ex): i for i, ex in enumerate(exchanges)}
+        symbols = [s for s, q in market.items() if len(q) >= 2]
+        nan = float('nan')
+        quotes = [q for sym in symbols for q in market[sym]]
+        n = len(quotes)
+        rows = np.repeat(np.arange(len(symbols), dtype=np.intp), [len(market[sym]) for sym in symbols])
+        cols = np.fromiter((col.get(id(q[0]), -1) for q in quotes), dtype=np.intp, count=n)
+        vals = np.fromiter((q[2] for q in quotes), dtype=np.float64, count=n)
+        ts = np.fromiter((nan if q[3] is None else q[3] for q in quotes), dtype=np.float64, count=n)
+        known = cols >= 0
+        shape = (len(symbols), len(exchanges))
+        prices = np.full(shape, np.nan, dtype=np.float64)
+        stamps = np.full(shape, np.nan, dtype=np.float64)
+        prices[rows[known], cols[known]] = vals[known]
+        stamps[rows[known], cols[known]] = ts[known]
+        return cls(symbols, list(exchanges), prices, stamps)
+
+    def candidate_indices(
+        self,
+        *,
+        min_profit_pct: float,
+        min_price_diff_pct: float,
+        max_age_seconds: float = 5.0,
+        min_price: float = 1e-6,
+        amount: float = 1.0,
+        min_notional: float = 0.0,
+        min_listing_age_seconds: float = 0.0,
+        now: Optional[float] = None,
+    ):
+        """Return (sym_idx, buy_idx, sell_idx) arrays of pairs passing all filters.
+
+        Filters mirror the scalar loop: timestamp freshness (only when both
+        sides carry a timestamp), raw spread, fee/transfer adjusted net profit,
+        minimum price, minimum notional and minimum listing age. Indices come
+        out in (symbol, buy, sell) row-major order. Both legs always share the
+        same symbol key, so the scalar ``_are_same_asset`` check is a no-op and
+        is not evaluated here.
+        """
+        if now is None:
+            now = time.time()
+        prices = self.prices
+        n_ex = prices.shape[1]
+        # Cheap O(S x E) pre-pass: a symbol can only yield a pair when its
+        # widest raw spread (max / min) clears min_price_diff_pct. Rows with a
+        # non-positive minimum are kept since the raw filter treats them
+        # specially. Typically this leaves a few percent of the rows.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            missing = np.isnan(prices)
+            row_min = np.where(missing, np.inf, prices).min(axis=1)
+            row_max = np.where(missing, -np.inf, prices).max(axis=1)
+            widest = np.where(row_min > 0, (row_max - row_min) / row_min * 100.0, np.inf)
+        rows = np.nonzero(widest >= min_price_diff_pct)[0]
+        prices = prices[rows]
+        stamps = self.timestamps[rows]
+
+        buy = prices[:, :, None]
+        sell = prices[:, None, :]
+        bts = stamps[:, :, None]
+        sts = stamps[:, None, :]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mask = ~np.isnan(buy) & ~np.isnan(sell)
+            mask &= ~np.eye(n_ex, dtype=bool)[None, :, :]
+
+            both_ts = ~np.isnan(bts) & ~np.isnan(sts)
+            stale = (np.abs(bts - sts) > max_age_seconds) | ((now - bts) > max_age_seconds) | ((now - sts) > max_age_seconds)
+            mask &= ~(both_ts & stale)
+
+            raw_diff_pct = np.where(buy > 0, (sell - buy) / buy * 100.0, 0.0)
+            mask &= raw_diff_pct >= min_price_diff_pct
+
+            effective_buy = buy * (1.0 + self.fees[None, :, None])
+            effective_sell = sell * (1.0 - self.fees[None, None, :])
+            net_profit = effective_sell - effective_buy - self.transfer[None, None, :]
+            mask &= net_profit > 0
+            mask &= (net_profit / effective_buy * 100.0) >= min_profit_pct
+
+            mask &= (buy >= min_price) & (sell >= min_price)
+            mask &= (buy * amount) >= min_notional
+            if min_listing_age_seconds > 0.0:
+                mask &= np.isnan(bts) | ((now - bts) >= min_listing_age_seconds)
+                mask &= np.isnan(sts) | ((now - sts) >= min_listing_age_seconds)
+
+        s_idx, b_idx, x_idx = np.nonzero(mask)
+        return rows[s_idx], b_idx, x_idx
+
+    def candidates(self, **filters) -> List[Tuple[str, object, str, float, object, str, float]]:
+        """Return price-level candidates as scanner tuples.
+
+        Each tuple is (symbol, buy_obj, buy_name, buy_price, sell_obj, sell_name, sell_price).
+        Accepts the same keyword filters as ``candidate_indices``.
+        """
+        s_idx, b_idx, x_idx = self.candidate_indices(**filters)
+        buy_prices = self.prices[s_idx, b_idx].tolist()
+        sell_prices = self.prices[s_idx, x_idx].tolist()
+        symbols = self.symbols
+        exchanges = self.exchanges
+        names = self.names
+        return [
+            (symbols[s], exchanges[b], names[b], bp, exchanges[x], names[x], sp)
+            for s, b, x, bp, sp in zip(s_idx.tolist(), b_idx.tolist(), x_idx.tolist(), buy_prices, sell_prices)
+        ]
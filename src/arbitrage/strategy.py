@@ -3,6 +3,11 @@ from collections import deque
 from typing import Deque, List, Optional
 import math
 
+from .indicators import (
+    ATR, Bollinger, CloseCursor, RollingMax, RollingMean, RollingMin, RollingStats,
+    latest_pivots, pct_change, tail,
+)
+
 
 @dataclass
 class TradeDecision:
@@ -98,18 +103,70 @@ class QuickScalpStrategy:
 
         # Simple rolling window for SMA if needed by caller-less usage
         self._close_window: Deque[float] = deque(maxlen=sma_window)
+        # streaming indicators fed from recent_closes by _sync_indicators
+        self._ind_params = None
+        self._cursor = CloseCursor()
 
     def update_close(self, close: float):
         self._close_window.append(close)
 
+    def _indicator_params(self) -> tuple:
+        return (self.sma_window, self.vol_window, self.trend_window, self.sr_lookback,
+                self.momentum_window, self.htf_12h_bars, self.htf_24h_bars)
+
+    def _reset_indicators(self):
+        self._ind_params = self._indicator_params()
+        self._sma = RollingMean(self.sma_window)
+        self._trend = RollingMean(self.trend_window)
+        self._vol = RollingStats(self.vol_window, ddof=1)  # over returns
+        self._atr = ATR(max(self.vol_window, 3))
+        self._mom = RollingMean(self.momentum_window)
+        self._htf12 = RollingMean(self.htf_12h_bars)
+        self._htf24 = RollingMean(self.htf_24h_bars)
+        self._sr_high = RollingMax(self.sr_lookback)
+        self._sr_low = RollingMin(self.sr_lookback)
+        self._sr_window: Deque[float] = deque(maxlen=max(1, self.sr_lookback))
+        self._prev_close: Optional[float] = None
+
+    def _sync_indicators(self, recent_closes: List[float]):
+        """Push the closes appended to ``recent_closes`` since the last call.
+
+        Backtests pass one growing list, so each bar costs O(1); a list that is
+        not an extension of the previous one (e.g. a refetched window) replays
+        only the bars the longest indicator needs.
+        """
+        if self._ind_params != self._indicator_params():
+            self._reset_indicators()
+            self._cursor = CloseCursor()
+        warmup = max(self.sma_window, self.trend_window, self.sr_lookback,
+                     max(self.vol_window, 3) + 1, self.momentum_window + 1,
+                     self.htf_12h_bars + 1, self.htf_24h_bars + 1)
+        reset, fresh = self._cursor.new_closes(recent_closes, warmup)
+        if reset:
+            self._reset_indicators()
+        for c in fresh:
+            if self._prev_close is not None:
+                r = pct_change(self._prev_close, c)
+                self._vol.push(r)
+                self._mom.push(r)
+                self._htf12.push(r)
+                self._htf24.push(r)
+            self._prev_close = c
+            self._sma.push(c)
+            self._trend.push(c)
+            self._atr.update(c)
+            self._sr_high.push(c)
+            self._sr_low.push(c)
+            self._sr_window.append(c)
+
     def compute_sma(self, recent_closes: List[float]) -> Optional[float]:
-        data = list(recent_closes)[-self.sma_window :]
+        data = tail(recent_closes, self.sma_window)
         if len(data) < 2:
             return None
         return sum(data) / len(data)
 
     def compute_volatility(self, recent_closes: List[float]) -> Optional[float]:
-        data = list(recent_closes)[-self.vol_window - 1 :]
+        data = tail(recent_closes, self.vol_window + 1)
         if len(data) < 3:
             return None
         # compute returns
@@ -136,7 +193,7 @@ class QuickScalpStrategy:
 
         Returns ATR as a fractional value (e.g., 0.01 == 1%). Works with closes only.
         """
-        data = list(recent_closes)[-max(self.vol_window, 3) - 1 :]
+        data = tail(recent_closes, max(self.vol_window, 3) + 1)
         if len(data) < 3:
             return None
         trs = []
@@ -167,54 +224,17 @@ class QuickScalpStrategy:
 
         Returns (latest_pivot_high, latest_pivot_low) where either may be None.
         """
-        data = list(recent_closes)
-        n = len(data)
         if radius is None:
             radius = self.pivot_radius
         if min_distance is None:
             min_distance = self.pivot_min_distance
         if prominence_pct is None:
             prominence_pct = self.pivot_prominence_pct
-
-        if n < 2 or radius < 1:
-            return None, None
-
-        start = max(0, n - self.sr_lookback)
-        pivot_highs = []  # list of tuples (index, value)
-        pivot_lows = []
-
-        for i in range(start, n):
-            lo = max(start, i - radius)
-            hi = min(n, i + radius + 1)
-            window = data[lo:hi]
-            if not window or len(window) < 2:
-                continue
-            val = data[i]
-            # exclude edges where window is incomplete
-            # compute max/min excluding self for prominence
-            others = window[:]
-            mid = i - lo
-            others.pop(mid)
-            max_others = max(others)
-            min_others = min(others)
-
-            # check for pivot high
-            if val > max_others and (val - max_others) / max_others >= prominence_pct:
-                # ensure spacing from previous pivots
-                if not pivot_highs or (i - pivot_highs[-1][0]) >= min_distance:
-                    pivot_highs.append((i, val))
-
-            # check for pivot low
-            if val < min_others and (min_others - val) / min_others >= prominence_pct:
-                if not pivot_lows or (i - pivot_lows[-1][0]) >= min_distance:
-                    pivot_lows.append((i, val))
-
-        latest_high = pivot_highs[-1][1] if pivot_highs else None
-        latest_low = pivot_lows[-1][1] if pivot_lows else None
-        return latest_high, latest_low
+        data = tail(recent_closes, self.sr_lookback)
+        return latest_pivots(data, radius, min_distance, prominence_pct)
 
     def compute_momentum(self, recent_closes: List[float], window: int) -> Optional[float]:
-        data = list(recent_closes)[-window - 1 :]
+        data = tail(recent_closes, window + 1)
         if len(data) < 2:
             return None
         rets = []
@@ -296,8 +316,9 @@ class QuickScalpStrategy:
         - When no position: entry rule based on slope vs SMA; size scaled by volatility.
         - When in a position: check partial exit, full exit by target/stop/time.
         """
-        sma = self.compute_sma(recent_closes)
-        vol = self.compute_volatility(recent_closes)
+        self._sync_indicators(recent_closes)
+        sma = self._sma.value if self._sma.count >= 2 else None
+        vol = self._vol.std
         if sma is None:
             return TradeDecision(action="hold", reason="insufficient history for sma")
 
@@ -312,9 +333,8 @@ class QuickScalpStrategy:
         momentum = None
         if len(recent_closes) >= max(self.trend_window, self.sr_lookback, self.vol_window):
             # simple trend: compare price to moving average over trend_window
-            trend_slice = list(recent_closes)[-self.trend_window :]
-            if len(trend_slice) >= 2:
-                trend_sma = sum(trend_slice) / len(trend_slice)
+            if self._trend.count >= 2:
+                trend_sma = self._trend.value
                 if trend_sma != 0:
                     # small epsilon to avoid flipping on noise
                     eps = 1e-6
@@ -325,13 +345,14 @@ class QuickScalpStrategy:
 
             # pivot-based support/resistance
             radius = max(1, self.sr_lookback // 2)
-            pivot_high, pivot_low = self.find_latest_pivots(recent_closes, radius)
+            pivot_high, pivot_low = latest_pivots(
+                self._sr_window, radius, self.pivot_min_distance, self.pivot_prominence_pct)
 
             # ATR-like bands
-            atr = self.compute_atr_like(recent_closes)
+            atr = self._atr.value if self._atr.slots >= 2 else None
 
             # momentum (average returns over momentum_window)
-            momentum = self.compute_momentum(recent_closes, self.momentum_window)
+            momentum = self._mom.value
 
         # Nudge direction by funding rate
         funding_nudge = 0.0
@@ -390,9 +411,9 @@ class QuickScalpStrategy:
                 htf12_mom = None
                 htf24_mom = None
                 if len(recent_closes) >= self.htf_12h_bars + 1:
-                    htf12_mom = self.compute_momentum(recent_closes[-self.htf_12h_bars - 1 :], self.htf_12h_bars)
+                    htf12_mom = self._htf12.value
                 if len(recent_closes) >= self.htf_24h_bars + 1:
-                    htf24_mom = self.compute_momentum(recent_closes[-self.htf_24h_bars - 1 :], self.htf_24h_bars)
+                    htf24_mom = self._htf24.value
 
                 # Strengthened HTF gating: require HTF12 to be sufficiently negative
                 # AND confirm the HTF regime either by low HTF volatility (stable downtrend)
@@ -404,18 +425,12 @@ class QuickScalpStrategy:
                     htf12_sma_slope = None
                     # htf12 slice = last htf_12h_bars+1 closes
                     if len(recent_closes) >= self.htf_12h_bars + 2:
-                        htf_slice = list(recent_closes)[-self.htf_12h_bars - 1 :]
-                        # HTF volatility (using same compute_volatility but adapted)
-                        try:
-                            htf12_vol = self.compute_volatility(htf_slice)
-                        except Exception:
-                            htf12_vol = None
-                        # HTF SMA slope: compare latest price to HTF SMA
-                        try:
-                            htf12_sma = sum(htf_slice[-self.sma_window:]) / len(htf_slice[-self.sma_window:])
-                            htf12_sma_slope = (htf_slice[-1] - htf12_sma) / htf12_sma if htf12_sma != 0 else None
-                        except Exception:
-                            htf12_sma_slope = None
+                        # the HTF slice is the last htf_12h_bars+1 closes, whose tail
+                        # windows are exactly the short vol / SMA windows
+                        htf12_vol = vol
+                        htf12_sma = self._sma.value
+                        if htf12_sma is not None:
+                            htf12_sma_slope = (recent_closes[-1] - htf12_sma) / htf12_sma if htf12_sma != 0 else None
 
                     # require HTF momentum to be below negative threshold
                     if not (htf12_mom <= -abs(self.htf_momentum_threshold)):
@@ -442,10 +457,8 @@ class QuickScalpStrategy:
                 recent_low = pivot_low
                 recent_high = pivot_high
             else:
-                sr_slice = list(recent_closes)[-self.sr_lookback :]
-                if len(sr_slice) > 0:
-                    recent_high = max(sr_slice)
-                    recent_low = min(sr_slice)
+                recent_high = self._sr_high.value
+                recent_low = self._sr_low.value
 
             # ATR-based bands (if ATR available)
             lower_band = None
@@ -534,10 +547,38 @@ class RangeGridStrategy:
         
         # Track multiple grid positions
         self._grid_positions: List[dict] = []
+        # streaming indicators fed from recent_closes by _sync_indicators
+        self._ind_params = None
+        self._cursor = CloseCursor()
+
+    def _reset_indicators(self):
+        self._ind_params = (self.lookback_bars, self.bb_period, self.bb_std)
+        self._high = RollingMax(self.lookback_bars)
+        self._low = RollingMin(self.lookback_bars)
+        self._bb = Bollinger(self.bb_period, self.bb_std)
+        self._vol = RollingStats(19, ddof=1)  # returns of the last 20 closes
+        self._prev_close: Optional[float] = None
+
+    def _sync_indicators(self, recent_closes: List[float]):
+        """Push the closes appended since the last call (see QuickScalpStrategy)."""
+        if self._ind_params != (self.lookback_bars, self.bb_period, self.bb_std):
+            self._reset_indicators()
+            self._cursor = CloseCursor()
+        warmup = max(self.lookback_bars, self.bb_period, 20)
+        reset, fresh = self._cursor.new_closes(recent_closes, warmup)
+        if reset:
+            self._reset_indicators()
+        for c in fresh:
+            if self._prev_close is not None:
+                self._vol.push(pct_change(self._prev_close, c))
+            self._prev_close = c
+            self._high.push(c)
+            self._low.push(c)
+            self._bb.update(c)
     
     def compute_bollinger_bands(self, recent_closes: List[float]) -> tuple[Optional[float], Optional[float], Optional[float]]:
         """Compute Bollinger Bands (middle, upper, lower)."""
-        data = list(recent_closes)[-self.bb_period:]
+        data = tail(recent_closes, self.bb_period)
         if len(data) < self.bb_period:
             return None, None, None
         
@@ -552,7 +593,7 @@ class RangeGridStrategy:
     
     def compute_range_bounds(self, recent_closes: List[float]) -> tuple[Optional[float], Optional[float]]:
         """Identify range support and resistance using recent highs/lows."""
-        data = list(recent_closes)[-self.lookback_bars:]
+        data = tail(recent_closes, self.lookback_bars)
         if len(data) < 10:
             return None, None
         
@@ -563,7 +604,7 @@ class RangeGridStrategy:
     
     def compute_volatility(self, recent_closes: List[float]) -> Optional[float]:
         """Compute recent volatility (standard deviation of returns)."""
-        data = list(recent_closes)[-20:]
+        data = tail(recent_closes, 20)
         if len(data) < 3:
             return None
         
@@ -618,10 +659,13 @@ class RangeGridStrategy:
         if len(recent_closes) < max(self.lookback_bars, self.bb_period):
             return TradeDecision(action="hold", reason="insufficient history")
         
-        # Compute indicators
-        support, resistance = self.compute_range_bounds(recent_closes)
-        bb_mid, bb_upper, bb_lower = self.compute_bollinger_bands(recent_closes)
-        volatility = self.compute_volatility(recent_closes)
+        # Compute indicators (streaming, O(1) per new bar)
+        self._sync_indicators(recent_closes)
+        support, resistance = None, None
+        if self._high.count >= 10:
+            support, resistance = self._low.value, self._high.value
+        bb_mid, bb_upper, bb_lower = self._bb.bands
+        volatility = self._vol.std
         
         if support is None or resistance is None or bb_lower is None or bb_upper is None:
             return TradeDecision(action="hold", reason="indicators unavailable")
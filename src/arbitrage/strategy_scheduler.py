@@ -0,0 +1,254 @@
+"""Event-driven scheduler for LiveStrategy instances.
+
+Instead of every strategy polling klines on its own 15s timer, the scheduler
+watches each active symbol once in the shared kline store (1m klines plus the
+futures mark price) and dispatches work to the registered strategies:
+
+- a closed 1m kline that completes a strategy's bar interval -> ``on_bar``
+- a mark price update -> ``on_tick`` (TP/SL check; conflated, latest wins)
+
+Each strategy has its own bounded queue and worker task, so a slow strategy
+never delays the others; when a queue is full the oldest item is dropped and
+counted. A one-second clock dispatches any bar whose close was not seen on the
+stream within ``ARB_STRATEGY_BAR_GRACE_S`` (stream down, disabled, or over the
+subscription cap), so strategies keep running without websockets.
+
+Signal latency (bar close / tick -> ``_emit_action``) is recorded by the
+strategy and reported by ``stats()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .exchanges.kline_store import INTERVAL_MS, MarketEvent, get_kline_store
+from .exchanges.symbol_registry import symbol_key
+from .utils.env import env_float
+
+
+class _Slot:
+    """Queue, worker and counters of one registered strategy."""
+
+    def __init__(self, strategy, maxsize: int):
+        self.strategy = strategy
+        self.symbol = symbol_key(strategy.symbol)
+        self.interval_ms = INTERVAL_MS.get(getattr(strategy, 'interval', '15m'), INTERVAL_MS['15m'])
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.last_bar_ms = 0.0
+        self.tick: Optional[Tuple[float, float]] = None
+        self.tick_queued = False
+        self.bars = 0
+        self.ticks = 0
+        self.drops = 0
+        self.errors = 0
+        self.stream_bars = 0
+        self.clock_bars = 0
+        self.dispatch_ms = 0.0
+
+
+class StrategyScheduler:
+    """Dispatch bar-close and mark-price events to registered strategies.
+
+    ``store`` defaults to ``get_kline_store()`` and can be replaced for tests.
+    Must be used from a single event loop (the app's).
+    """
+
+    def __init__(self, store=None, queue_size: Optional[int] = None, grace_s: Optional[float] = None):
+        self._store = store
+        self.queue_size = max(1, int(queue_size or env_float('ARB_STRATEGY_QUEUE', 8)))
+        self.grace_ms = 1000.0 * (grace_s if grace_s is not None else env_float('ARB_STRATEGY_BAR_GRACE_S', 5.0))
+        self._slots: Dict[int, _Slot] = {}
+        self._by_symbol: Dict[str, List[_Slot]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clock: Optional[asyncio.Task] = None
+        self._listening = False
+        self.events = 0
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = get_kline_store()
+        return self._store
+
+    # -- registration ----------------------------------------------------------------
+    def register(self, strategy) -> bool:
+        """Start dispatching to ``strategy``; call from the event loop."""
+        if id(strategy) in self._slots:
+            return False
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # first use, or the previous loop is gone (tests, app restart)
+            self._slots.clear()
+            self._by_symbol.clear()
+            self._clock = None
+            self._loop = loop
+        slot = _Slot(strategy, self.queue_size)
+        self._slots[id(strategy)] = slot
+        self._by_symbol.setdefault(slot.symbol, []).append(slot)
+        try:
+            self.store.watch(slot.symbol, 'futures', mark=True)
+        except Exception as e:
+            print(f'[scheduler] watch {slot.symbol} failed: {e}')
+        if not self._listening:
+            self.store.add_listener(self._on_event)
+            self._listening = True
+        slot.task = loop.create_task(self._worker(slot))
+        if self._clock is None or self._clock.done():
+            self._clock = loop.create_task(self._run_clock())
+        # evaluate right away on the latest closed bar instead of waiting for the next one
+        now = time.time() * 1000
+        slot.last_bar_ms = now - now % slot.interval_ms
+        self._offer(slot, ('bar', None))
+        print(f'[scheduler] registered {slot.symbol} {getattr(strategy, "mode", "")} every {slot.interval_ms // 60000}m')
+        return True
+
+    async def unregister(self, strategy) -> bool:
+        slot = self._slots.pop(id(strategy), None)
+        if slot is None:
+            return False
+        peers = self._by_symbol.get(slot.symbol, [])
+        if slot in peers:
+            peers.remove(slot)
+        if not peers:
+            self._by_symbol.pop(slot.symbol, None)
+        try:
+            self.store.unwatch(slot.symbol, 'futures', mark=True)
+        except Exception as e:
+            print(f'[scheduler] unwatch {slot.symbol} failed: {e}')
+        if slot.task is not None:
+            slot.task.cancel()
+            try:
+                await slot.task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if not self._slots:
+            if self._listening:
+                self.store.remove_listener(self._on_event)
+                self._listening = False
+            if self._clock is not None:
+                self._clock.cancel()
+                self._clock = None
+        return True
+
+    # -- event intake ----------------------------------------------------------------
+    def _on_event(self, ev: MarketEvent) -> None:
+        """Store listener; runs on the stream thread, so hop onto our loop."""
+        loop = self._loop
+        if loop is None or ev.symbol not in self._by_symbol:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, ev)
+        except RuntimeError:
+            pass  # loop closed
+
+    def _dispatch(self, ev: MarketEvent) -> None:
+        self.events += 1
+        for slot in self._by_symbol.get(ev.symbol, ()):
+            if ev.kind == 'kline':
+                close_ms = ev.ts + 1  # 1m close_time is the last ms of the bar
+                if close_ms % slot.interval_ms == 0 and close_ms > slot.last_bar_ms:
+                    slot.last_bar_ms = close_ms
+                    slot.stream_bars += 1
+                    self._offer(slot, ('bar', close_ms))
+            elif ev.kind == 'mark':
+                slot.tick = (ev.price, ev.ts)
+                if not slot.tick_queued:
+                    slot.tick_queued = True
+                    self._offer(slot, ('tick', ev.ts))
+
+    def _offer(self, slot: _Slot, item: Tuple[str, Optional[float]]) -> None:
+        q = slot.queue
+        while q.full():
+            try:
+                old = q.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            slot.drops += 1
+            if old[0] == 'tick':
+                slot.tick_queued = False
+        q.put_nowait(item)
+
+    async def _run_clock(self) -> None:
+        """Safety net: dispatch bars whose close never arrived on the stream."""
+        while self._slots:
+            await asyncio.sleep(1.0)
+            now = time.time() * 1000
+            for slot in list(self._slots.values()):
+                boundary = now - now % slot.interval_ms
+                if boundary > slot.last_bar_ms and now - boundary >= self.grace_ms:
+                    slot.last_bar_ms = boundary
+                    slot.clock_bars += 1
+                    self._offer(slot, ('bar', boundary))
+
+    # -- per-strategy worker ---------------------------------------------------------
+    async def _worker(self, slot: _Slot) -> None:
+        from .live_strategy import closes_from_klines
+        s = slot.strategy
+        while True:
+            kind, event_ms = await slot.queue.get()
+            if event_ms:
+                slot.dispatch_ms = max(0.0, time.time() * 1000 - event_ms)
+            try:
+                if kind == 'bar':
+                    data = await asyncio.to_thread(s._fetch_klines, s._bars_needed())
+                    await s.on_bar(closes_from_klines(data), event_ms)
+                    slot.bars += 1
+                else:
+                    slot.tick_queued = False
+                    if slot.tick is not None:
+                        await s.on_tick(*slot.tick)
+                        slot.ticks += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                slot.errors += 1
+                print(f'[scheduler] {slot.symbol} {kind} failed: {e}')
+
+    # -- introspection ---------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        out = []
+        for slot in list(self._slots.values()):
+            lat = list(getattr(slot.strategy, 'signal_latency_ms', ()))
+            out.append({
+                'symbol': slot.symbol,
+                'mode': getattr(slot.strategy, 'mode', None),
+                'interval_ms': slot.interval_ms,
+                'queue_depth': slot.queue.qsize(),
+                'drops': slot.drops,
+                'bars': slot.bars,
+                'stream_bars': slot.stream_bars,
+                'clock_bars': slot.clock_bars,
+                'ticks': slot.ticks,
+                'errors': slot.errors,
+                'last_dispatch_ms': round(slot.dispatch_ms, 1),
+                'signal_latency_ms': {
+                    'n': len(lat),
+                    'last': round(lat[-1], 1) if lat else None,
+                    'avg': round(sum(lat) / len(lat), 1) if lat else None,
+                    'max': round(max(lat), 1) if lat else None,
+                },
+            })
+        return {
+            'strategies': out,
+            'symbols': sorted(self._by_symbol),
+            'events': self.events,
+            'queue_size': self.queue_size,
+            'grace_ms': self.grace_ms,
+        }
+
+
+_SCHEDULER: Optional[StrategyScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_strategy_scheduler() -> StrategyScheduler:
+    """Return the process-wide strategy scheduler (created on first use)."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = StrategyScheduler()
+        return _SCHEDULER
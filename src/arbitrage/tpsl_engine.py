@@ -0,0 +1,315 @@
+"""Event-driven TP/SL trigger engine on the kline store's mark price stream.
+
+``_monitor_positions`` used to wake every 5 seconds and fetch a REST ticker
+per open position (futures, then spot), so a stop could fire 5s late plus a
+round-trip, and 50 positions cost 100 requests a cycle. ``TpSlEngine``
+instead:
+
+- pins every futures symbol with an open ``LiveDashboard`` position on the
+  kline store's ``<symbol>@markPrice@1s`` stream (``watch(..., mark=True)``)
+  and checks each mark update as it arrives, on the stream thread
+- keeps the stop-loss / take-profit levels per symbol in price-sorted lists
+  (``TriggerIndex``), so an update costs one bisect per side and only the
+  crossed levels are touched
+- hands the fired triggers to the app loop, which closes the position through
+  the dashboard, and records the latency from the exchange event time to the
+  close
+- falls back to the old REST ticker poll (``ARB_TPSL_POLL_S``, default 5s)
+  for spot positions, which have no mark stream, and for futures symbols
+  whose mark is missing or older than ``ARB_TPSL_STALE_S`` (default 3s)
+
+Dashboard positions are re-synced every ``ARB_TPSL_SYNC_S`` (default 1s), so
+new or edited SL/TP levels are armed within that time.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .utils.env import env_float, pct
+
+PriceFetcher = Callable[[str, str], Awaitable[Optional[float]]]
+
+
+class Trigger(NamedTuple):
+    level: float
+    seq: int
+    key: Tuple[str, str, int]   # (symbol, side, entry_time): one dashboard position
+    reason: str                 # 'stop_loss' | 'take_profit'
+
+
+def position_key(pos) -> Tuple[str, str, int]:
+    return pos.symbol, pos.side, int(pos.entry_time or 0)
+
+
+def triggers_for(pos, seq: int = 0) -> List[Tuple[str, Trigger]]:
+    """(direction, trigger) pairs of a position: 'up' fires on price >= level, 'down' on price <= level."""
+    key = position_key(pos)
+    out = []
+    if pos.side == 'long':
+        if pos.stop_loss:
+            out.append(('down', Trigger(float(pos.stop_loss), seq, key, 'stop_loss')))
+        if pos.take_profit:
+            out.append(('up', Trigger(float(pos.take_profit), seq, key, 'take_profit')))
+    else:
+        if pos.stop_loss:
+            out.append(('up', Trigger(float(pos.stop_loss), seq, key, 'stop_loss')))
+        if pos.take_profit:
+            out.append(('down', Trigger(float(pos.take_profit), seq, key, 'take_profit')))
+    return out
+
+
+class TriggerIndex:
+    """Price-sorted trigger levels of one symbol."""
+
+    __slots__ = ('up', 'down')
+
+    def __init__(self):
+        self.up: List[Trigger] = []
+        self.down: List[Trigger] = []
+
+    def __len__(self) -> int:
+        return len(self.up) + len(self.down)
+
+    def add(self, direction: str, trig: Trigger) -> None:
+        bisect.insort(self.up if direction == 'up' else self.down, trig)
+
+    def remove(self, key) -> None:
+        self.up = [t for t in self.up if t.key != key]
+        self.down = [t for t in self.down if t.key != key]
+
+    def crossed(self, price: float) -> List[Trigger]:
+        """Pop and return every trigger the price has reached."""
+        hit: List[Trigger] = []
+        if self.up and self.up[0].level <= price:
+            i = bisect.bisect_right(self.up, (price, float('inf')))
+            hit.extend(self.up[:i])
+            del self.up[:i]
+        if self.down and self.down[-1].level >= price:
+            i = bisect.bisect_left(self.down, (price,))
+            hit.extend(self.down[i:])
+            del self.down[i:]
+        if hit:
+            # the other leg of a fired position must not fire later
+            for key in {t.key for t in hit}:
+                self.remove(key)
+        return hit
+
+
+class TpSlEngine:
+    """Closes dashboard positions when the mark price crosses their SL/TP."""
+
+    def __init__(self, dashboard: Any = None, store: Any = None, price_fetcher: Optional[PriceFetcher] = None,
+                 sync_s: Optional[float] = None, poll_s: Optional[float] = None, stale_s: Optional[float] = None):
+        self._dashboard = dashboard
+        self._store = store
+        self.price_fetcher = price_fetcher
+        self.sync_s = sync_s if sync_s is not None else env_float('ARB_TPSL_SYNC_S', 1.0)
+        self.poll_s = poll_s if poll_s is not None else env_float('ARB_TPSL_POLL_S', 5.0)
+        self.stale_s = stale_s if stale_s is not None else env_float('ARB_TPSL_STALE_S', 3.0)
+        self._lock = threading.Lock()
+        self._index: Dict[str, TriggerIndex] = {}
+        self._armed: Dict[Tuple[str, str, int], Tuple] = {}   # key -> (market, sl, tp)
+        self._watched: Dict[str, bool] = {}                   # futures symbol -> mark stream accepted
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_poll = 0.0
+        self.mark_events = 0
+        self.rest_polls = 0
+        self.fired: Dict[str, int] = {'stop_loss': 0, 'take_profit': 0}
+        self.close_errors = 0
+        self._latency_ms: deque = deque(maxlen=500)
+        self.recent: deque = deque(maxlen=50)
+
+    @property
+    def dashboard(self):
+        if self._dashboard is None:
+            from .live_dashboard import get_dashboard
+            self._dashboard = get_dashboard()
+        return self._dashboard
+
+    @property
+    def store(self):
+        if self._store is None:
+            from .exchanges.kline_store import get_kline_store
+            self._store = get_kline_store()
+        return self._store
+
+    # -- arming ----------------------------------------------------------------------
+    def sync(self) -> None:
+        """Arm new/changed dashboard positions, drop closed ones, adjust mark subscriptions."""
+        positions = {position_key(p): p for p in self.dashboard.get_all_positions()}
+        with self._lock:
+            for key in [k for k in self._armed if k not in positions]:
+                self._disarm(key)
+            for key, pos in positions.items():
+                state = (pos.market, pos.stop_loss, pos.take_profit)
+                if self._armed.get(key) == state:
+                    continue
+                if key in self._armed:
+                    self._disarm(key)
+                self._armed[key] = state
+                idx = self._index.setdefault(pos.symbol, TriggerIndex())
+                for direction, trig in triggers_for(pos, self._seq):
+                    idx.add(direction, trig)
+                    self._seq += 1
+            futures = {k[0] for k, st in self._armed.items() if st[0] == 'futures'}
+        for sym in futures - set(self._watched):
+            self._watched[sym] = bool(self.store.watch(sym, 'futures', mark=True))
+        for sym in set(self._watched) - futures:
+            del self._watched[sym]
+            self.store.unwatch(sym, 'futures', mark=True)
+
+    def _disarm(self, key) -> None:
+        self._armed.pop(key, None)
+        idx = self._index.get(key[0])
+        if idx is not None:
+            idx.remove(key)
+            if not len(idx):
+                del self._index[key[0]]
+
+    # -- firing ------------------------------------------------------------------------
+    def on_event(self, ev) -> None:
+        """Kline store listener (stream thread): check a mark update against the index."""
+        if ev.kind != 'mark' or ev.symbol not in self._index:
+            return
+        self.mark_events += 1
+        self.check(ev.symbol, ev.price, ev.ts)
+
+    def check(self, symbol: str, price: float, event_ms: Optional[float] = None) -> List[Trigger]:
+        with self._lock:
+            idx = self._index.get(symbol)
+            hit = idx.crossed(price) if idx is not None else []
+            if idx is not None and not len(idx):
+                del self._index[symbol]
+        if not hit:
+            return hit
+        detected_ms = time.time() * 1000
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                if asyncio.get_running_loop() is loop:
+                    self._fire(hit, price, event_ms, detected_ms)
+                    return hit
+            except RuntimeError:
+                pass
+            loop.call_soon_threadsafe(self._fire, hit, price, event_ms, detected_ms)
+        else:
+            self._fire(hit, price, event_ms, detected_ms)
+        return hit
+
+    def _fire(self, hit: List[Trigger], price: float, event_ms: Optional[float], detected_ms: float) -> None:
+        done = set()
+        # stop-loss wins if a misconfigured position crossed both legs at once
+        for trig in sorted(hit, key=lambda t: t.reason != 'stop_loss'):
+            if trig.key in done:
+                continue
+            done.add(trig.key)
+            symbol, side, entry_time = trig.key
+            pos = self.dashboard.get_position(symbol)
+            if pos is None or position_key(pos) != trig.key:
+                continue  # closed or replaced meanwhile
+            print(f"[POSITION MONITOR] 🎯 Auto-closing {symbol} {side.upper()} position - {trig.reason.upper()} hit!")
+            print(f"[POSITION MONITOR] Entry: ${pos.entry_price:.2f}, Current: ${price:.2f}, SL: ${pos.stop_loss or 0:.2f}, TP: ${pos.take_profit or 0:.2f}")
+            with self._lock:
+                # the next sync re-arms the position if the close fails
+                self._armed.pop(trig.key, None)
+            try:
+                trade = self.dashboard.close_position(symbol, price, trig.reason)
+            except Exception as e:
+                self.close_errors += 1
+                print(f"[POSITION MONITOR ERROR] Failed to close {symbol}: {e}")
+                continue
+            closed_ms = time.time() * 1000
+            latency = closed_ms - (event_ms or detected_ms)
+            self.fired[trig.reason] = self.fired.get(trig.reason, 0) + 1
+            self._latency_ms.append(latency)
+            self.recent.append({'symbol': symbol, 'side': side, 'reason': trig.reason, 'level': trig.level,
+                                'price': price, 'event_ms': event_ms, 'latency_ms': round(latency, 1)})
+            pnl = trade.pnl if trade is not None else 0.0
+            print(f"[POSITION MONITOR] ✅ Position closed - P&L: ${pnl:.2f} ({latency:.0f}ms after the price event)")
+
+    # -- REST fallback -------------------------------------------------------------------
+    def _poll_targets(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            armed = {(k[0], st[0]) for k, st in self._armed.items()}
+        out = []
+        for symbol, market in sorted(armed):
+            if market == 'futures' and self._watched.get(symbol) and self.store.mark(symbol, self.stale_s) is not None:
+                continue
+            out.append((symbol, market))
+        return out
+
+    async def poll_once(self) -> None:
+        if self.price_fetcher is None:
+            return
+        for symbol, market in self._poll_targets():
+            try:
+                price = await self.price_fetcher(symbol, market)
+            except Exception as e:
+                print(f"[POSITION MONITOR ERROR] Failed to check {symbol}: {e}")
+                continue
+            self.rest_polls += 1
+            if price:
+                self.check(symbol, float(price), time.time() * 1000)
+
+    # -- lifecycle ----------------------------------------------------------------------
+    async def run(self) -> None:
+        """Sync loop; run as a task on the app loop and cancel it to stop."""
+        self._loop = asyncio.get_running_loop()
+        self.store.add_listener(self.on_event)
+        print("[POSITION MONITOR] Started (mark price triggers)")
+        try:
+            while True:
+                try:
+                    await asyncio.to_thread(self.sync)
+                    if time.time() - self._last_poll >= self.poll_s:
+                        self._last_poll = time.time()
+                        await self.poll_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"[POSITION MONITOR ERROR] Monitor loop failed: {e}")
+                await asyncio.sleep(self.sync_s)
+        finally:
+            self.store.remove_listener(self.on_event)
+            for sym in list(self._watched):
+                self.store.unwatch(sym, 'futures', mark=True)
+            self._watched.clear()
+            self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            armed = len(self._armed)
+            levels = sum(len(i) for i in self._index.values())
+        return {
+            'armed_positions': armed,
+            'armed_levels': levels,
+            'mark_symbols': sorted(s for s, ok in self._watched.items() if ok),
+            'rest_symbols': [s for s, _ in self._poll_targets()],
+            'mark_events': self.mark_events,
+            'rest_polls': self.rest_polls,
+            'fired': dict(self.fired),
+            'close_errors': self.close_errors,
+            'latency_ms_p50': pct(self._latency_ms, 0.5),
+            'latency_ms_p95': pct(self._latency_ms, 0.95),
+            'latency_ms_max': round(max(self._latency_ms), 1) if self._latency_ms else None,
+            'recent': list(self.recent),
+        }
+
+
+_ENGINE: Optional[TpSlEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_tpsl_engine() -> TpSlEngine:
+    """Return the process-wide TP/SL engine (created on first use)."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = TpSlEngine()
+        return _ENGINE
@@ -0,0 +1,382 @@
+"""Long-lived, pre-warmed order-entry sessions for the manual trade endpoints.
+
+``/api/manual-trade`` and ``/api/manual-trade-ws`` used to build a resolver,
+connector, aiohttp session and ccxt client for every order, load markets
+cold and then tear it all down again. Here there is one authenticated
+``TradingSession`` per (exchange, market type), kept in ``TradingSessionPool``:
+
+- markets and the account position mode (hedge / one-way) are loaded once;
+  the mode is re-read when Binance rejects an entry's positionSide (-4061)
+- ``set_leverage`` is only sent when the account's leverage for the symbol
+  differs: read from the user data stream mirror while it is synced (it
+  follows changes made anywhere), else from what the session last set, for
+  ``ARB_TRADE_SESSION_LEVERAGE_TTL_S`` (default 60s)
+- a health loop (``ARB_TRADE_SESSION_PING_S``, default 30s) keeps the REST
+  keep-alive connection and the WebSocket API connection warm, and rebuilds
+  the client after ``ARB_TRADE_SESSION_MAX_FAILS`` (default 3) failed checks
+- every order records its timing from request arrival to exchange ack; the
+  latency stats cover entries only, not the protective orders
+
+With a warm session the hot path is one signed send. The pool is bound to
+the app's event loop. It is warmed at startup when live orders are enabled and
+the keys are set, and closed at shutdown.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    import ccxt.pro as ccxtpro
+except Exception:  # pragma: no cover - optional dependency
+    ccxtpro = None
+
+from .utils.env import env_float, pct
+
+# async (exchange_id, market) -> (exchange, cleanup coroutine function)
+ClientFactory = Callable[[str, str], Awaitable[Tuple[Any, Callable[[], Awaitable[None]]]]]
+
+_KEY_ENV = {'binance': ('BINANCE_API_KEY', 'BINANCE_API_SECRET')}
+
+# Binance: "Order's position side does not match user's setting."
+POSITION_SIDE_MISMATCH = '-4061'
+
+
+def available() -> bool:
+    return ccxtpro is not None
+
+
+def credentials(exchange_id: str = 'binance') -> Tuple[str, str]:
+    key_env, secret_env = _KEY_ENV.get(exchange_id, (f'{exchange_id.upper()}_API_KEY', f'{exchange_id.upper()}_API_SECRET'))
+    return os.environ.get(key_env, ''), os.environ.get(secret_env, '')
+
+
+async def ccxtpro_client(exchange_id: str = 'binance', market: str = 'futures') -> Tuple[Any, Callable[[], Awaitable[None]]]:
+    """Authenticated ccxt.pro client on its own aiohttp session."""
+    if ccxtpro is None:
+        raise RuntimeError('ccxt.pro is not installed')
+    import aiohttp
+    from aiohttp.resolver import ThreadedResolver
+
+    api_key, api_secret = credentials(exchange_id)
+    # ThreadedResolver instead of aiodns avoids DNS timeouts on Windows
+    connector = aiohttp.TCPConnector(resolver=ThreadedResolver(), limit=100, ttl_dns_cache=300,
+                                     use_dns_cache=True, force_close=False)
+    session = aiohttp.ClientSession(connector=connector)
+    exchange = getattr(ccxtpro, exchange_id)({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'options': {'defaultType': 'future' if market == 'futures' else 'spot'},
+        'enableRateLimit': True,
+        'session': session,
+    })
+
+    async def cleanup() -> None:
+        for closer in (exchange.close, session.close, connector.close):
+            try:
+                await closer()
+            except Exception as e:
+                print(f'[trade-session] cleanup error: {e}')
+
+    return exchange, cleanup
+
+
+class TradingSession:
+    """One warm, authenticated order-entry client for an (exchange, market) pair."""
+
+    def __init__(self, exchange_id: str = 'binance', market: str = 'futures',
+                 client_factory: Optional[ClientFactory] = None, ping_s: Optional[float] = None,
+                 max_fails: Optional[int] = None):
+        self.exchange_id = exchange_id
+        self.market = market
+        self._factory = client_factory or ccxtpro_client
+        self.ping_s = ping_s if ping_s is not None else env_float('ARB_TRADE_SESSION_PING_S', 30.0)
+        self.max_fails = int(max_fails if max_fails is not None else env_float('ARB_TRADE_SESSION_MAX_FAILS', 3))
+        self.leverage_ttl_s = env_float('ARB_TRADE_SESSION_LEVERAGE_TTL_S', 60.0)
+        self.exchange: Any = None
+        self._cleanup: Optional[Callable[[], Awaitable[None]]] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.hedged: Optional[bool] = None
+        # symbol -> (leverage this session set, when)
+        self._leverage: Dict[str, Tuple[int, float]] = {}
+        self.started_ts: Optional[float] = None
+        self.last_ok_ts: Optional[float] = None
+        self.fails = 0
+        self.rebuilds = 0
+        self.last_error: Optional[str] = None
+        self.orders = 0
+        self.order_errors = 0
+        self.leverage_sets = 0
+        self._ack_ms: deque = deque(maxlen=200)
+        self._total_ms: deque = deque(maxlen=200)
+
+    @property
+    def ready(self) -> bool:
+        return self.exchange is not None
+
+    async def start(self) -> 'TradingSession':
+        async with self._lock:
+            if self.exchange is None:
+                await self._connect()
+            if self._health_task is None:
+                self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+        return self
+
+    async def _connect(self) -> None:
+        t0 = time.perf_counter()
+        exchange, cleanup = await self._factory(self.exchange_id, self.market)
+        try:
+            await exchange.load_markets()
+        except Exception:
+            await cleanup()
+            raise
+        self.exchange, self._cleanup = exchange, cleanup
+        self._leverage.clear()
+        self.hedged = None
+        await self.refresh_position_mode()
+        self.started_ts = self.last_ok_ts = time.time()
+        self.fails = 0
+        print(f'[trade-session] {self.exchange_id}/{self.market} ready in {(time.perf_counter() - t0) * 1000:.0f}ms '
+              f'(hedged={self.hedged})')
+
+    async def refresh_position_mode(self) -> None:
+        """Re-read whether the futures account is in hedge mode."""
+        exchange = self.exchange
+        if self.market != 'futures' or exchange is None or not exchange.has.get('fetchPositionMode'):
+            return
+        try:
+            self.hedged = bool((await exchange.fetch_position_mode())['hedged'])
+        except Exception as e:
+            # unknown: orders keep sending positionSide as before
+            self.last_error = f'fetch_position_mode: {e}'
+
+    async def _disconnect(self) -> None:
+        cleanup, self._cleanup = self._cleanup, None
+        self.exchange = None
+        if cleanup is not None:
+            await cleanup()
+
+    async def close(self) -> None:
+        task, self._health_task = self._health_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        async with self._lock:
+            await self._disconnect()
+
+    async def ping(self) -> None:
+        """Touch the REST and WebSocket API connections so they stay open."""
+        await self.exchange.fetch_time()
+        if self.exchange.has.get('fetchBalanceWs'):
+            await self.exchange.fetch_balance_ws()
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_s)
+            try:
+                async with self._lock:
+                    if self.exchange is None:
+                        await self._connect()
+                        self.rebuilds += 1
+                    await self.ping()
+                self.last_ok_ts = time.time()
+                self.fails = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.fails += 1
+                self.last_error = f'health: {type(e).__name__}: {e}'
+                print(f'[trade-session] {self.exchange_id}/{self.market} {self.last_error}')
+                if self.fails >= self.max_fails:
+                    async with self._lock:
+                        await self._disconnect()
+
+    async def _client(self):
+        if self.exchange is None:
+            await self.start()
+        return self.exchange
+
+    def _mirror(self):
+        if self.exchange_id != 'binance' or self.market != 'futures':
+            return None
+        from .exchanges.binance_user_stream import synced_mirror
+        return synced_mirror()
+
+    async def ensure_leverage(self, symbol: str, leverage: int) -> None:
+        """set_leverage only when the account's leverage for ``symbol`` differs.
+
+        The synced user-stream mirror tracks ``ACCOUNT_CONFIG_UPDATE``, so a
+        change made in the UI or by another client is seen; without it the
+        session's own last value is trusted for ``leverage_ttl_s``.
+        """
+        if self.market != 'futures':
+            return
+        mirror = self._mirror()
+        market_id = symbol.split(':')[0].replace('/', '').upper()
+        current = mirror.leverage.get(market_id) if mirror is not None else None
+        if current is not None:
+            if current == leverage:
+                return
+        else:
+            cached = self._leverage.get(symbol)
+            if cached is not None and cached[0] == leverage and time.time() - cached[1] < self.leverage_ttl_s:
+                return
+        exchange = await self._client()
+        await exchange.set_leverage(leverage, symbol)
+        self._leverage[symbol] = (leverage, time.time())
+        if mirror is not None:
+            # until the stream's ACCOUNT_CONFIG_UPDATE confirms it
+            mirror.note_leverage(market_id, leverage)
+        self.leverage_sets += 1
+
+    def position_params(self, side: str) -> Dict[str, Any]:
+        """positionSide for hedge-mode futures accounts; nothing in one-way mode or spot."""
+        if self.market != 'futures' or self.hedged is False:
+            return {}
+        return {'positionSide': 'LONG' if side == 'long' else 'SHORT'}
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float, price: Optional[float] = None,
+                           params: Optional[Dict[str, Any]] = None, use_ws: bool = False,
+                           t_arrival: Optional[float] = None, timed: bool = True) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Send one order; returns (order, timing in ms).
+
+        ``t_arrival`` is the ``time.perf_counter()`` stamp taken when the request
+        reached the server, so the timing covers request arrival to exchange ack.
+        Orders sent with ``timed=False`` (protective orders) are left out of the
+        latency stats.
+        """
+        exchange = await self._client()
+        send = exchange.create_order_ws if use_ws and exchange.has.get('createOrderWs') else exchange.create_order
+        t_send = time.perf_counter()
+        try:
+            order = await send(symbol, type, side, amount, price, params or {})
+        except Exception:
+            self.order_errors += 1
+            raise
+        t_ack = time.perf_counter()
+        start = t_arrival if t_arrival is not None else t_send
+        timing = {
+            'prep_ms': round((t_send - start) * 1000, 1),
+            'ack_ms': round((t_ack - t_send) * 1000, 1),
+            'total_ms': round((t_ack - start) * 1000, 1),
+            'ws': send is not exchange.create_order,
+        }
+        self.orders += 1
+        if timed:
+            self._ack_ms.append(timing['ack_ms'])
+            self._total_ms.append(timing['total_ms'])
+        return order, timing
+
+    async def enter(self, symbol: str, side: str, amount: float, leverage: int = 1,
+                    stop_loss: Optional[float] = None, take_profit: Optional[float] = None,
+                    use_ws: bool = False, t_arrival: Optional[float] = None) -> Dict[str, Any]:
+        """Market entry plus reduce-only STOP_MARKET / TAKE_PROFIT_MARKET protection.
+
+        The protective orders go out in parallel over REST once the entry is
+        acknowledged; a failure there is logged and returned, not raised. An
+        entry rejected because the account's position mode changed (-4061)
+        is retried once with the re-read mode.
+        """
+        if leverage > 1:
+            await self.ensure_leverage(symbol, leverage)
+        entry_side = 'buy' if side == 'long' else 'sell'
+        pos_params = self.position_params(side)
+        try:
+            order, timing = await self.create_order(symbol, 'market', entry_side, amount, None, dict(pos_params),
+                                                    use_ws=use_ws, t_arrival=t_arrival)
+        except Exception as e:
+            if POSITION_SIDE_MISMATCH not in str(e):
+                raise
+            async with self._lock:
+                await self.refresh_position_mode()
+            print(f'[trade-session] {symbol}: position side rejected, retrying with hedged={self.hedged}')
+            pos_params = self.position_params(side)
+            order, timing = await self.create_order(symbol, 'market', entry_side, amount, None, dict(pos_params),
+                                                    use_ws=use_ws, t_arrival=t_arrival)
+        exit_side = 'sell' if side == 'long' else 'buy'
+
+        async def protect(kind: str, price: Optional[float]):
+            if not price:
+                return None
+            try:
+                o, _ = await self.create_order(symbol, kind, exit_side, amount, None, {
+                    **pos_params, 'stopPrice': price, 'closePosition': True, 'workingType': 'MARK_PRICE'},
+                    timed=False)
+                return o
+            except Exception as e:
+                print(f'[trade-session] failed to place {kind} for {symbol}: {e}')
+                return e
+
+        t0 = time.perf_counter()
+        sl, tp = await asyncio.gather(protect('STOP_MARKET', stop_loss), protect('TAKE_PROFIT_MARKET', take_profit))
+        timing['protect_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+        return {'order': order, 'stop_loss_order': sl, 'take_profit_order': tp, 'timing': timing}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'hedged': self.hedged,
+            'uptime_s': round(time.time() - self.started_ts, 1) if self.ready and self.started_ts else 0.0,
+            'last_ok_age_s': round(time.time() - self.last_ok_ts, 1) if self.last_ok_ts else None,
+            'fails': self.fails,
+            'rebuilds': self.rebuilds,
+            'last_error': self.last_error,
+            'leverage': {sym: lev for sym, (lev, _) in self._leverage.items()},
+            'leverage_sets': self.leverage_sets,
+            'orders': self.orders,
+            'order_errors': self.order_errors,
+            'ack_ms_p50': pct(self._ack_ms, 0.5),
+            'ack_ms_p95': pct(self._ack_ms, 0.95),
+            'total_ms_p50': pct(self._total_ms, 0.5),
+            'total_ms_p95': pct(self._total_ms, 0.95),
+        }
+
+
+class TradingSessionPool:
+    """Keeps one ``TradingSession`` per (exchange, market type)."""
+
+    def __init__(self, client_factory: Optional[ClientFactory] = None):
+        self._factory = client_factory
+        self._sessions: Dict[Tuple[str, str], TradingSession] = {}
+
+    async def get(self, exchange_id: str = 'binance', market: str = 'futures') -> TradingSession:
+        key = (exchange_id, market)
+        sess = self._sessions.get(key)
+        if sess is None:
+            sess = self._sessions[key] = TradingSession(exchange_id, market, client_factory=self._factory)
+        if not sess.ready:
+            await sess.start()
+        return sess
+
+    async def prewarm(self, pairs=(('binance', 'futures'),)) -> None:
+        for exchange_id, market in pairs:
+            try:
+                await self.get(exchange_id, market)
+            except Exception as e:
+                print(f'[trade-session] prewarm {exchange_id}/{market} failed: {e}')
+
+    async def close_all(self) -> None:
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {f'{ex}/{mkt}': s.stats() for (ex, mkt), s in self._sessions.items()}
+
+
+_POOL: Optional[TradingSessionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_trading_session_pool() -> TradingSessionPool:
+    """Return the process-wide trading session pool (created on first use)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = TradingSessionPool()
+        return _POOL
@@ -1,6 +1,6 @@
 """Lightweight CoinGecko enrichment helper.
 
-This module uses the public CoinGecko API (no external deps) to map a base
+This module uses the public CoinGecko API (via the shared HTTP client) to map a base
 symbol (e.g. 'BTC') to a CoinGecko id and fetch market cap and 24h volume in USD.
 It provides a small file-backed cache to avoid repeated network calls.
 
@@ -13,7 +13,9 @@ import json
 import os
 import time
 from typing import Tuple, Optional
-from urllib import request, parse
+from urllib import parse
+
+from . import http_client
 
 
 _CACHE: dict = {}
@@ -56,10 +58,8 @@ def _save_cache() -> None:
 
 def _http_get_json(url: str, timeout: float = 5.0) -> Optional[dict]:
     try:
-        req = request.Request(url, headers={"User-Agent": "arb-bot/1.0 (+https://example)"})
-        with request.urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
-            return json.loads(data.decode('utf-8'))
+        # shared pool; the api.coingecko.com bucket keeps us under the free tier
+        return http_client.get_json_sync(url, timeout=timeout)
     except Exception:
         return None
 
@@ -0,0 +1,21 @@
+"""Small helpers shared by the ARB_* tunables and the debug stats endpoints."""
+from __future__ import annotations
+
+import os
+from typing import Optional, Sequence
+
+
+def env_float(name: str, default: float) -> float:
+    """Return env var ``name`` as a float, or ``default`` when unset or malformed."""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def pct(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank ``q`` quantile of ``values`` rounded to 0.1 (None when empty)."""
+    if not values:
+        return None
+    s = sorted(values)
+    return round(s[min(len(s) - 1, int(q * len(s)))], 1)
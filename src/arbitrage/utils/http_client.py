@@ -0,0 +1,497 @@
+"""Shared outbound HTTP layer: pooled async client, per-host rate limits.
+
+Every module used to open its own connection per request (``urllib``
+``urlopen``, a fresh ``httpx.AsyncClient`` per call, ``requests``), so each
+REST call paid DNS + TCP + TLS again and nothing kept the process under the
+exchanges' request-weight limits. All outbound REST now goes through here:
+
+- one ``httpx.AsyncClient`` per event loop with keep-alive pools (and
+  HTTP/2 when the ``h2`` package is installed and ARB_HTTP2 is not 0),
+  closed when its loop shuts down
+- a token bucket per host sized to the venue's published limits; Binance
+  requests are charged their endpoint weight, and a 429/418 with
+  ``Retry-After`` pauses that host's bucket
+- identical in-flight GETs are coalesced into one upstream request
+- ``request_sync`` / ``get_json_sync`` run the same path on a background
+  loop for legacy synchronous callers
+
+Without httpx the same API falls back to ``urllib`` (no pooling).
+
+Configuration: ARB_HTTP_MAX_CONNECTIONS (100), ARB_HTTP_MAX_KEEPALIVE (20),
+ARB_HTTP_KEEPALIVE_S (30), ARB_HTTP2 (1), ARB_HTTP_RATE_LIMITS (1; 0 turns
+the host buckets off).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib import error as _urllib_error
+from urllib import parse as _urllib_parse
+from urllib import request as _urllib_request
+
+try:
+    import httpx
+except Exception:  # pragma: no cover - optional dependency
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    _HAS_H2 = True
+except Exception:
+    _HAS_H2 = False
+
+USER_AGENT = 'arb-bot/1.0'
+
+# connection/timeout failures (HTTP status errors are ``HttpError``)
+TransportError = httpx.TransportError if httpx is not None else OSError
+TimeoutException = httpx.TimeoutException if httpx is not None else TimeoutError
+
+
+class HttpError(Exception):
+    """Non-2xx response from ``get_json`` / ``get_json_sync``."""
+
+    def __init__(self, status: int, body: str, url: str = ''):
+        super().__init__(f'HTTP {status} for {url}')
+        self.status = status
+        self.body = body
+        self.url = url
+
+
+class _UrllibResponse:
+    """Minimal stand-in for ``httpx.Response`` when httpx is missing."""
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes, url: str):
+        self.status_code = status_code
+        self.headers = dict(headers)
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    @property
+    def is_success(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    def json(self) -> Any:
+        return json.loads(self.content.decode('utf-8'))
+
+
+# -----------------------------------------------------------------------------
+# Per-host rate limits
+# -----------------------------------------------------------------------------
+
+class TokenBucket:
+    """Thread-safe token bucket; ``reserve`` returns how long to wait.
+
+    Tokens may go negative: a caller reserves its cost immediately and then
+    sleeps for the returned delay, so concurrent callers queue up fairly
+    without holding the lock while they wait.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._ts = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+
+    def reserve(self, cost: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+            self._ts = now
+            self._tokens -= cost
+            delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            delay = max(delay, self._paused_until - now)
+            self.waited_s += delay
+            return delay
+
+    def pause(self, seconds: float) -> None:
+        """Block the bucket for ``seconds`` (server asked us to back off)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'tokens': round(self._tokens, 2),
+            'waited_s': round(self.waited_s, 3),
+        }
+
+
+# host -> (tokens per second, burst). Binance limits are request weight per
+# minute (spot 6000, USD-M futures 2400); the burst is a fifth of that so a
+# cold start cannot spend the whole minute at once. MEXC and Gate publish
+# per-endpoint limits (MEXC 500 / 10 s, Gate public 200 / 10 s); one bucket
+# per host at 20 req/s stays under either.
+HOST_LIMITS: Dict[str, Tuple[float, float]] = {
+    'api.binance.com': (6000 / 60.0, 1200.0),
+    'fapi.binance.com': (2400 / 60.0, 480.0),
+    'api.mexc.com': (20.0, 20.0),
+    'contract.mexc.com': (20.0, 20.0),
+    'api.gateio.ws': (20.0, 40.0),
+    'api.kucoin.com': (2000 / 30.0, 200.0),
+    'api.coingecko.com': (0.5, 5.0),
+}
+
+
+def _binance_weight(host: str, path: str, query: Mapping[str, Any]) -> float:
+    """Request weight for the Binance REST endpoints this app calls."""
+    futures = host.startswith('fapi.')
+    has_symbol = bool(query.get('symbol') or query.get('symbols'))
+    try:
+        limit = int(query.get('limit') or 0)
+    except Exception:
+        limit = 0
+    if path.endswith('/ticker/24hr'):
+        if futures:
+            return 1 if has_symbol else 40
+        return 2 if has_symbol else 80
+    if path.endswith('/exchangeInfo'):
+        return 1 if futures else 20
+    if path.endswith('/depth'):
+        limit = limit or 100
+        if futures:
+            return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    if path.endswith('/klines'):
+        if not futures:
+            return 2
+        limit = limit or 500
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+    if path.endswith('/ticker/price') or path.endswith('/ticker/bookTicker'):
+        if futures:
+            return 1 if has_symbol else 2
+        return 2 if has_symbol else 4
+    if path.endswith('/premiumIndex'):
+        return 1 if has_symbol else 10
+    return 1
+
+
+def request_weight(url: str, params: Optional[Mapping[str, Any]] = None) -> Tuple[str, float]:
+    """Return (host, weight) for ``url`` plus ``params``."""
+    parts = _urllib_parse.urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if host.endswith('binance.com'):
+        query: Dict[str, Any] = {k: v[-1] for k, v in _urllib_parse.parse_qs(parts.query).items()}
+        if params:
+            query.update(params)
+        return host, float(_binance_weight(host, parts.path, query))
+    return host, 1.0
+
+
+_BUCKETS: Dict[str, TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def _rate_limits_enabled() -> bool:
+    return os.getenv('ARB_HTTP_RATE_LIMITS', '1') != '0'
+
+
+def bucket_for(host: str) -> Optional[TokenBucket]:
+    """Return the shared bucket for ``host`` (None when it is unlimited)."""
+    spec = HOST_LIMITS.get(host)
+    if spec is None or not _rate_limits_enabled():
+        return None
+    with _BUCKETS_LOCK:
+        b = _BUCKETS.get(host)
+        if b is None:
+            b = _BUCKETS[host] = TokenBucket(*spec)
+        return b
+
+
+def _retry_after(headers: Mapping[str, str]) -> float:
+    try:
+        return max(1.0, float(headers.get('retry-after') or headers.get('Retry-After') or 0))
+    except Exception:
+        return 1.0
+
+
+# -----------------------------------------------------------------------------
+# Client
+# -----------------------------------------------------------------------------
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def _coalesce_key(url: str, params: Optional[Mapping[str, Any]],
+                  headers: Optional[Mapping[str, str]]) -> Optional[Tuple[Any, ...]]:
+    """Key for sharing an in-flight GET; None when the request can't be keyed."""
+    try:
+        items = tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple)) else v)
+                             for k, v in (params or {}).items()))
+        key = (url, items, tuple(sorted((headers or {}).items())))
+        hash(key)
+        return key
+    except TypeError:
+        return None
+
+
+class HttpClient:
+    """Pooled client bound to one event loop; use ``get_client()``."""
+
+    def __init__(self):
+        self._client = None
+        if httpx is not None:
+            limits = httpx.Limits(
+                max_connections=_env_int('ARB_HTTP_MAX_CONNECTIONS', 100),
+                max_keepalive_connections=_env_int('ARB_HTTP_MAX_KEEPALIVE', 20),
+                keepalive_expiry=float(_env_int('ARB_HTTP_KEEPALIVE_S', 30)),
+            )
+            self._client = httpx.AsyncClient(
+                limits=limits,
+                http2=_HAS_H2 and os.getenv('ARB_HTTP2', '1') != '0',
+                headers={'User-Agent': USER_AGENT},
+                follow_redirects=True,
+            )
+        self._inflight: Dict[Tuple[Any, ...], asyncio.Task] = {}
+        self._closer: Any = None
+        self.requests = 0
+        self.coalesced = 0
+        self.throttled = 0
+
+    async def request(self, method: str, url: str, *, params: Optional[Mapping[str, Any]] = None,
+                      headers: Optional[Mapping[str, str]] = None, json_body: Any = None,
+                      timeout: float = 10.0, weight: Optional[float] = None):
+        """Send a request; returns an ``httpx.Response`` (or a compatible object).
+
+        Network errors propagate (``httpx.TimeoutException`` etc.). GETs with
+        the same URL, params and headers share one in-flight request, which
+        runs as its own task: cancelling any caller (the first one included)
+        leaves the others waiting on it.
+        """
+        method = method.upper()
+        key = None
+        if method == 'GET' and json_body is None:
+            key = _coalesce_key(url, params, headers)
+        if key is None:
+            return await self._send(method, url, params, headers, json_body, timeout, weight)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.get_running_loop().create_task(
+                self._send(method, url, params, headers, json_body, timeout, weight))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finished(key, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Tuple[Any, ...], task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # mark retrieved: every caller may have been cancelled
+            task.exception()
+
+    async def _send(self, method, url, params, headers, json_body, timeout, weight):
+        host, cost = request_weight(url, params)
+        bucket = bucket_for(host)
+        if bucket is not None:
+            delay = bucket.reserve(cost if weight is None else weight)
+            if delay > 0:
+                self.throttled += 1
+                await asyncio.sleep(delay)
+        self.requests += 1
+        if self._client is not None:
+            resp = await self._client.request(method, url, params=params, headers=headers,
+                                              json=json_body, timeout=timeout)
+        else:
+            resp = await asyncio.to_thread(_urllib_send, method, url, params, headers, json_body, timeout)
+        if resp.status_code in (418, 429) and bucket is not None:
+            bucket.pause(_retry_after(resp.headers))
+        return resp
+
+    async def get(self, url: str, **kw):
+        return await self.request('GET', url, **kw)
+
+    async def post(self, url: str, **kw):
+        return await self.request('POST', url, **kw)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'throttled': self.throttled,
+            'inflight': len(self._inflight),
+        }
+
+
+def _urllib_send(method, url, params, headers, json_body, timeout):
+    if params:
+        url = url + ('&' if '?' in url else '?') + _urllib_parse.urlencode(params, doseq=True)
+    data = None
+    hdrs = {'User-Agent': USER_AGENT}
+    hdrs.update(headers or {})
+    if json_body is not None:
+        data = json.dumps(json_body).encode('utf-8')
+        hdrs.setdefault('Content-Type', 'application/json')
+    req = _urllib_request.Request(url, data=data, headers=hdrs, method=method)
+    try:
+        with _urllib_request.urlopen(req, timeout=timeout) as r:
+            return _UrllibResponse(r.status, r.headers, r.read(), url)
+    except _urllib_error.HTTPError as e:
+        return _UrllibResponse(e.code, e.headers or {}, e.read() if e.fp else b'', url)
+
+
+_CLIENTS: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HttpClient]' = weakref.WeakKeyDictionary()
+_CLIENTS_LOCK = threading.Lock()
+
+
+async def _close_with_loop(loop: asyncio.AbstractEventLoop, client: HttpClient):
+    # an async generator started on the client's loop: asyncio.run() (and any
+    # loop.shutdown_asyncgens()) finalises it before the loop closes
+    try:
+        yield
+    finally:
+        with _CLIENTS_LOCK:
+            if _CLIENTS.get(loop) is client:
+                del _CLIENTS[loop]
+        await client.aclose()
+
+
+def get_client() -> HttpClient:
+    """Return the pooled client for the running event loop (created on first use).
+
+    Connections belong to the loop that opened them, so each loop gets its
+    own pool, closed when the loop shuts down; rate-limit buckets are shared
+    process-wide.
+    """
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        c = _CLIENTS.get(loop)
+        if c is not None:
+            return c
+        c = _CLIENTS[loop] = HttpClient()
+    # the loop tracks async generators weakly; the client keeps this one alive
+    c._closer = _close_with_loop(loop, c)
+    asyncio.ensure_future(c._closer.__anext__())
+    return c
+
+
+async def aclose() -> None:
+    """Close the running loop's pool (call from the app's shutdown hook)."""
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        c = _CLIENTS.pop(loop, None)
+    if c is not None:
+        await c.aclose()
+
+
+class Session:
+    """``async with session(timeout=...) as client`` drop-in for a per-call
+    ``httpx.AsyncClient``: same ``get``/``post`` signatures, but backed by the
+    shared pool, so leaving the block does not close any connections."""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+
+    async def __aenter__(self) -> 'Session':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def get(self, url: str, *, params=None, headers=None, timeout: Optional[float] = None):
+        return await get_client().request('GET', url, params=params, headers=headers,
+                                          timeout=self.timeout if timeout is None else timeout)
+
+    async def post(self, url: str, *, params=None, headers=None, json=None, timeout: Optional[float] = None):
+        return await get_client().request('POST', url, params=params, headers=headers, json_body=json,
+                                          timeout=self.timeout if timeout is None else timeout)
+
+
+def session(timeout: float = 10.0) -> Session:
+    return Session(timeout)
+
+
+async def request(method: str, url: str, **kw):
+    return await get_client().request(method, url, **kw)
+
+
+async def get_json(url: str, *, params: Optional[Mapping[str, Any]] = None,
+                   headers: Optional[Mapping[str, str]] = None, timeout: float = 10.0) -> Any:
+    """GET ``url`` and decode JSON; raises ``HttpError`` on a non-2xx status."""
+    resp = await get_client().request('GET', url, params=params, headers=headers, timeout=timeout)
+    if not (200 <= resp.status_code < 300):
+        raise HttpError(resp.status_code, resp.text, url)
+    return resp.json()
+
+
+# -----------------------------------------------------------------------------
+# Sync shim
+# -----------------------------------------------------------------------------
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            t = threading.Thread(target=loop.run_forever, name='http-client', daemon=True)
+            t.start()
+            _LOOP = loop
+        return _LOOP
+
+
+def request_sync(method: str, url: str, *, timeout: float = 10.0, **kw):
+    """Blocking ``request`` for synchronous callers.
+
+    Runs on a dedicated background loop so sync callers share one pool and
+    their identical GETs coalesce with each other.
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError('request_sync called from the HTTP client loop')
+    fut = asyncio.run_coroutine_threadsafe(request(method, url, timeout=timeout, **kw), loop)
+    # the request's own timeout bounds each phase; allow for rate-limit waits on top
+    return fut.result(timeout + 60.0)
+
+
+def get_json_sync(url: str, *, params: Optional[Mapping[str, Any]] = None,
+                  headers: Optional[Mapping[str, str]] = None, timeout: float = 10.0) -> Any:
+    """Blocking ``get_json``; raises ``HttpError`` on a non-2xx status."""
+    resp = request_sync('GET', url, params=params, headers=headers, timeout=timeout)
+    if not (200 <= resp.status_code < 300):
+        raise HttpError(resp.status_code, resp.text, url)
+    return resp.json()
+
+
+def stats() -> Dict[str, Any]:
+    with _CLIENTS_LOCK:
+        clients = [c.stats() for c in _CLIENTS.values()]
+    with _BUCKETS_LOCK:
+        buckets = {h: b.stats() for h, b in _BUCKETS.items()}
+    return {
+        'httpx': httpx is not None,
+        'http2': _HAS_H2 and os.getenv('ARB_HTTP2', '1') != '0',
+        'clients': clients,
+        'buckets': buckets,
+    }
@@ -4,7 +4,7 @@ import json
 import os
 import subprocess
 import threading
-from typing import Dict, Optional
+from typing import Dict, Mapping, Optional
 import time
 
 # Load environment variables from .env file
@@ -20,8 +20,8 @@ except ImportError:
     pass
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
-from fastapi.responses import JSONResponse
-from urllib import request as _urllib_request, parse as _urllib_parse, error as _urllib_error
+from fastapi.responses import JSONResponse, Response
+from urllib import parse as _urllib_parse
 import datetime as _dt
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -33,10 +33,17 @@ if not os.path.isdir(ROOT):
 
 from .executor import Executor
 from .scanner import Opportunity
+from .capability_index import register_status_source
+from .spot_snapshot import PriceTable, SnapshotService, fetch_concurrently
+from .utils import http_client as _http
+from .ws_broadcast import WsBroadcaster
+from .exchanges.binance_user_stream import get_user_stream, synced_mirror
 from .exchanges.mock_exchange import MockExchange
-from .opportunities import compute_dryrun_opportunities
+from .opportunities import RescanPlanner, compute_dryrun_opportunities, merge_rescan
+from .exchanges.book_events import get_bus as get_book_bus
+from .exchanges.kline_store import get_kline_store
 from .hotcoins import find_hot_coins
-from .feeder_utils import start_all as feeders_start_all, stop_all as feeders_stop_all
+from .feeder_utils import start_all as feeders_start_all, stop_all as feeders_stop_all, health as feeders_health
 
 # Import social sentiment router
 try:
@@ -144,38 +151,21 @@ def _check_common_networks(buy_exchange: str, sell_exchange: str, asset: str):
     common = buy_networks & sell_networks
     return len(common) > 0
 
+def _fresh_status_entries():
+    """Unexpired deposit/withdraw cache entries, exposed to the scanner's capability index"""
+    now = time.time()
+    out = {}
+    for exchange, assets in list(_deposit_withdraw_cache.items()):
+        if not isinstance(assets, dict):
+            continue
+        out[exchange] = {a: v for a, v in list(assets.items()) if isinstance(v, dict) and now - v.get('timestamp', 0) <= _cache_ttl_seconds}
+    return out
+
+register_status_source(_fresh_status_entries)
+
 # -----------------------------------------------------------------------------
 # Connection manager
 # -----------------------------------------------------------------------------
-class ConnectionManager:
-    def __init__(self):
-        self.active: set[WebSocket] = set()
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active.add(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        try:
-            self.active.remove(websocket)
-        except KeyError:
-            pass
-
-    async def broadcast(self, message: str):
-        """Broadcast message to all connected websockets concurrently."""
-        dead: list[WebSocket] = []
-
-        async def _send(ws: WebSocket) -> None:
-            try:
-                await asyncio.wait_for(ws.send_text(message), timeout=1.0)
-            except Exception:
-                dead.append(ws)
-
-        await asyncio.gather(*[_send(ws) for ws in list(self.active)], return_exceptions=True)
-        for ws in dead:
-            self.disconnect(ws)
-
-
 app = FastAPI()
 
 # Include social sentiment router if available
@@ -229,7 +219,6 @@ async def get_ai_analysis(symbol: str):
     Fetches 1h and 4h klines from Binance and computes technical indicators + trend prediction.
     """
     import statistics
-    import httpx
     
     symbol_upper = symbol.upper()
     
@@ -240,12 +229,12 @@ async def get_ai_analysis(symbol: str):
             url = f"https://fapi.binance.com/fapi/v1/klines"
             params = {'symbol': sym, 'interval': interval, 'limit': str(limit)}
             
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with _http.session(timeout=5.0) as client:
                 response = await client.get(url, params=params)
                 if response.status_code == 200:
                     return response.json()
                 return None
-        except httpx.TimeoutException:
+        except _http.TimeoutException:
             print(f"Timeout fetching klines for {sym}")
             return None
         except Exception as e:
@@ -522,723 +511,722 @@ def debug_status_cache(exchange: str = None, symbol: str = None):
         return {'total_entries': len(_deposit_withdraw_cache), 'by_exchange': summary}
 
 
-@app.get('/api/spot-arbitrage')
-def get_spot_arbitrage_opportunities():
-    """Scan spot markets across Binance, MEXC, Gate.io, KuCoin, and Bitget for arbitrage opportunities.
-    
-    Returns pairs with price differences that have decent liquidity and volume.
+def _spot_fetch_binance_trading_symbols():
+    """Fetch list of actively trading symbols on Binance (status=TRADING)"""
+    try:
+        data = _http.get_json_sync('https://api.binance.com/api/v3/exchangeInfo', timeout=10)
+        trading_symbols = set()
+        for symbol_info in data.get('symbols', []):
+            if symbol_info.get('status') == 'TRADING':
+                trading_symbols.add(symbol_info.get('symbol'))
+        print(f"Found {len(trading_symbols)} actively trading symbols on Binance")
+        return trading_symbols
+    except Exception as e:
+        print(f"Failed to fetch Binance exchange info: {e}")
+        return set()
+
+def _spot_fetch_binance_spot_tickers():
+    try:
+        return _http.get_json_sync('https://api.binance.com/api/v3/ticker/24hr', timeout=10)
+    except Exception as e:
+        print(f"Failed to fetch Binance tickers: {e}")
+        return []
+
+def _spot_fetch_mexc_spot_tickers():
+    try:
+        return _http.get_json_sync('https://api.mexc.com/api/v3/ticker/24hr', timeout=10)
+    except Exception as e:
+        print(f"Failed to fetch MEXC tickers: {e}")
+        return []
+
+def _spot_fetch_gateio_spot_tickers():
+    try:
+        return _http.get_json_sync('https://api.gateio.ws/api/v4/spot/tickers', timeout=10)
+    except Exception as e:
+        print(f"Failed to fetch Gate.io tickers: {e}")
+        return []
+
+def _spot_fetch_kucoin_spot_tickers():
+    try:
+        data = _http.get_json_sync('https://api.kucoin.com/api/v1/market/allTickers', timeout=10)
+        return data.get('data', {}).get('ticker', [])
+    except Exception as e:
+        print(f"Failed to fetch KuCoin tickers: {e}")
+        return []
+
+def _spot_fetch_bitget_spot_tickers():
+    try:
+        # Bitget requires User-Agent header
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36', 'Accept': 'application/json'}
+        data = _http.get_json_sync('https://api.bitget.com/api/v2/spot/market/tickers', headers=headers, timeout=10)
+        tickers = data.get('data', [])
+        print(f"Fetched {len(tickers)} Bitget tickers")
+        return tickers
+    except Exception as e:
+        print(f"Failed to fetch Bitget tickers: {e}")
+        return []
+
+def _spot_fetch_kucoin_trading_symbols():
+    """Fetch list of actively trading symbols on KuCoin (enableTrading=true)"""
+    try:
+        data = _http.get_json_sync('https://api.kucoin.com/api/v1/symbols', timeout=10)
+        trading_symbols = set()
+        for symbol_info in data.get('data', []):
+            if symbol_info.get('enableTrading', False):
+                # KuCoin uses hyphenated symbols like BTC-USDT, convert to BTCUSDT
+                symbol = symbol_info.get('symbol', '').replace('-', '')
+                trading_symbols.add(symbol)
+        print(f"Found {len(trading_symbols)} actively trading symbols on KuCoin")
+        return trading_symbols
+    except Exception as e:
+        print(f"Failed to fetch KuCoin symbols: {e}")
+        return set()
+
+def _spot_arbitrage_pnl(symbol, buy_price, sell_price, buy_exchange, sell_exchange, notional=100):
+    """Calculate realistic PnL for arbitrage considering fees and slippage
+
+    Args:
+        symbol: Trading pair symbol
+        buy_price: Price on buy exchange
+        sell_price: Price on sell exchange
+        buy_exchange: Exchange to buy from
+        sell_exchange: Exchange to sell to
+        notional: Trade size in USDT (default $100)
+
+    Returns:
+        dict with breakdown of costs and final PnL
     """
-    from urllib import request as _req
-    import statistics
-    
-    def fetch_binance_trading_symbols():
-        """Fetch list of actively trading symbols on Binance (status=TRADING)"""
-        try:
-            with _req.urlopen('https://api.binance.com/api/v3/exchangeInfo', timeout=10) as r:
-                data = json.load(r)
-                trading_symbols = set()
-                for symbol_info in data.get('symbols', []):
-                    if symbol_info.get('status') == 'TRADING':
-                        trading_symbols.add(symbol_info.get('symbol'))
-                print(f"Found {len(trading_symbols)} actively trading symbols on Binance")
-                return trading_symbols
-        except Exception as e:
-            print(f"Failed to fetch Binance exchange info: {e}")
-            return set()
-    
-    def fetch_binance_spot_tickers():
-        try:
-            with _req.urlopen('https://api.binance.com/api/v3/ticker/24hr', timeout=10) as r:
-                return json.load(r)
-        except Exception as e:
-            print(f"Failed to fetch Binance tickers: {e}")
-            return []
-    
-    def fetch_mexc_spot_tickers():
-        try:
-            with _req.urlopen('https://api.mexc.com/api/v3/ticker/24hr', timeout=10) as r:
-                return json.load(r)
-        except Exception as e:
-            print(f"Failed to fetch MEXC tickers: {e}")
-            return []
-    
-    def fetch_gateio_spot_tickers():
-        try:
-            with _req.urlopen('https://api.gateio.ws/api/v4/spot/tickers', timeout=10) as r:
-                return json.load(r)
-        except Exception as e:
-            print(f"Failed to fetch Gate.io tickers: {e}")
-            return []
-    
-    def fetch_kucoin_spot_tickers():
-        try:
-            with _req.urlopen('https://api.kucoin.com/api/v1/market/allTickers', timeout=10) as r:
-                data = json.load(r)
-                return data.get('data', {}).get('ticker', [])
-        except Exception as e:
-            print(f"Failed to fetch KuCoin tickers: {e}")
-            return []
-    
-    def fetch_bitget_spot_tickers():
-        try:
-            # Bitget requires User-Agent header
-            req = _req.Request('https://api.bitget.com/api/v2/spot/market/tickers')
-            req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            req.add_header('Accept', 'application/json')
-            
-            with _req.urlopen(req, timeout=10) as r:
-                data = json.load(r)
-                tickers = data.get('data', [])
-                print(f"Fetched {len(tickers)} Bitget tickers")
-                return tickers
-        except Exception as e:
-            print(f"Failed to fetch Bitget tickers: {e}")
-            return []
-    
-    def fetch_kucoin_trading_symbols():
-        """Fetch list of actively trading symbols on KuCoin (enableTrading=true)"""
-        try:
-            with _req.urlopen('https://api.kucoin.com/api/v1/symbols', timeout=10) as r:
-                data = json.load(r)
-                trading_symbols = set()
-                for symbol_info in data.get('data', []):
-                    if symbol_info.get('enableTrading', False):
-                        # KuCoin uses hyphenated symbols like BTC-USDT, convert to BTCUSDT
-                        symbol = symbol_info.get('symbol', '').replace('-', '')
-                        trading_symbols.add(symbol)
-                print(f"Found {len(trading_symbols)} actively trading symbols on KuCoin")
-                return trading_symbols
-        except Exception as e:
-            print(f"Failed to fetch KuCoin symbols: {e}")
-            return set()
-    
-    def calculate_arbitrage_pnl(symbol, buy_price, sell_price, buy_exchange, sell_exchange, notional=100):
-        """Calculate realistic PnL for arbitrage considering fees and slippage
-        
-        Args:
-            symbol: Trading pair symbol
-            buy_price: Price on buy exchange
-            sell_price: Price on sell exchange
-            buy_exchange: Exchange to buy from
-            sell_exchange: Exchange to sell to
-            notional: Trade size in USDT (default $100)
-        
-        Returns:
-            dict with breakdown of costs and final PnL
-        """
-        base_asset = symbol.replace('USDT', '').replace('BUSD', '').replace('USDC', '')
-        
-        # Trading fees (spot maker/taker average)
-        trading_fees = {
-            'Binance': 0.001,   # 0.1%
-            'MEXC': 0.002,      # 0.2%
-            'Gate.io': 0.002,   # 0.2%
-            'KuCoin': 0.001,    # 0.1%
-            'Bitget': 0.001     # 0.1%
-        }
-        
-        # Typical withdrawal fees in USDT value (estimated averages)
-        # These vary by network but using common mainnet fees
-        withdrawal_fees_usd = {
-            'Binance': 1.0,     # Usually $0.5-2 depending on coin
-            'MEXC': 2.0,        # Usually $1-3
-            'Gate.io': 1.5,     # Usually $0.8-2.5
-            'KuCoin': 1.5,      # Usually $1-2.5
-            'Bitget': 1.5       # Usually $1-2
-        }
-        
-        # Calculate quantities
-        buy_fee_rate = trading_fees.get(buy_exchange, 0.002)
-        sell_fee_rate = trading_fees.get(sell_exchange, 0.002)
-        withdrawal_fee_usd = withdrawal_fees_usd.get(buy_exchange, 2.0)
-        
-        # Buy side: notional / price = quantity, minus trading fee
-        quantity = (notional / buy_price) * (1 - buy_fee_rate)
-        buy_cost = notional  # Total cost including fee
-        
-        # Sell side: quantity * price, minus trading fee
-        sell_proceeds = quantity * sell_price * (1 - sell_fee_rate)
-        
-        # Withdrawal fee in quantity terms
-        withdrawal_fee_quantity = withdrawal_fee_usd / buy_price
-        quantity_after_withdrawal = quantity - withdrawal_fee_quantity
-        
-        # Recalculate sell proceeds after withdrawal fee
-        sell_proceeds_after_fees = quantity_after_withdrawal * sell_price * (1 - sell_fee_rate)
-        
-        # Slippage estimate (0.1% for liquid pairs, 0.5% for thin orderbooks)
-        # Use volume as proxy for liquidity
-        slippage_rate = 0.001  # Default 0.1%
-        slippage_cost = sell_proceeds_after_fees * slippage_rate
-        
-        # Final PnL
-        gross_profit = sell_proceeds_after_fees - buy_cost
-        net_profit = gross_profit - slippage_cost
-        roi = (net_profit / notional) * 100
-        
-        return {
-            'notional_usd': notional,
-            'quantity': quantity,
-            'buy_cost_usd': buy_cost,
-            'sell_proceeds_usd': sell_proceeds_after_fees,
-            'trading_fees_usd': (notional * buy_fee_rate) + (sell_proceeds_after_fees * sell_fee_rate),
-            'withdrawal_fee_usd': withdrawal_fee_usd,
-            'slippage_cost_usd': slippage_cost,
-            'gross_profit_usd': gross_profit,
-            'net_profit_usd': net_profit,
-            'roi_percent': roi,
-            'is_profitable': net_profit > 0
-        }
-    
-    def batch_fetch_kucoin_currencies():
-        """Fetch all currency status from KuCoin in one call and cache"""
-        try:
-            with _req.urlopen('https://api.kucoin.com/api/v1/currencies', timeout=10) as r:
-                data = json.load(r)
-                if data.get('code') == '200000':
-                    currencies = data.get('data', [])
-                    for curr in currencies:
-                        asset = curr.get('currency', '')
-                        if asset:
-                            deposit = curr.get('isDepositEnabled', True)
-                            withdraw = curr.get('isWithdrawEnabled', True)
-                            
-                            # Extract available networks (KuCoin uses 'chains' array)
-                            available_networks = set()
-                            chains = curr.get('chains', [])
-                            for chain in chains:
-                                if chain.get('isDepositEnabled', False) and chain.get('isWithdrawEnabled', False):
-                                    chain_name = chain.get('chainName', '') or chain.get('chain', '')
-                                    if chain_name:
-                                        # Normalize network names
-                                        normalized = _normalize_network_name(chain_name)
-                                        if normalized:
-                                            available_networks.add(normalized)
-                            
-                            _set_cached_status('KuCoin', asset, deposit, withdraw, available_networks)
-                    print(f"Cached {len(currencies)} KuCoin currency statuses")
-        except Exception as e:
-            print(f"Failed to batch fetch KuCoin currencies: {e}")
-    
-    def batch_fetch_gateio_currencies():
-        """Fetch all currency status from Gate.io spot currencies endpoint and cache"""
-        try:
-            with _req.urlopen('https://api.gateio.ws/api/v4/spot/currencies', timeout=10) as r:
-                currencies = json.load(r)
-                for curr in currencies:
-                    currency = curr.get('currency', '').upper()
-                    if not currency:
-                        continue
-                    
-                    # Check deposit/withdraw status from the currency object
-                    deposit_disabled = curr.get('deposit_disabled', False)
-                    withdraw_disabled = curr.get('withdraw_disabled', False)
-                    
-                    # Extract available networks (Gate.io uses 'chain' field)
+    base_asset = symbol.replace('USDT', '').replace('BUSD', '').replace('USDC', '')
+
+    # Trading fees (spot maker/taker average)
+    trading_fees = {
+        'Binance': 0.001,   # 0.1%
+        'MEXC': 0.002,      # 0.2%
+        'Gate.io': 0.002,   # 0.2%
+        'KuCoin': 0.001,    # 0.1%
+        'Bitget': 0.001     # 0.1%
+    }
+
+    # Typical withdrawal fees in USDT value (estimated averages)
+    # These vary by network but using common mainnet fees
+    withdrawal_fees_usd = {
+        'Binance': 1.0,     # Usually $0.5-2 depending on coin
+        'MEXC': 2.0,        # Usually $1-3
+        'Gate.io': 1.5,     # Usually $0.8-2.5
+        'KuCoin': 1.5,      # Usually $1-2.5
+        'Bitget': 1.5       # Usually $1-2
+    }
+
+    # Calculate quantities
+    buy_fee_rate = trading_fees.get(buy_exchange, 0.002)
+    sell_fee_rate = trading_fees.get(sell_exchange, 0.002)
+    withdrawal_fee_usd = withdrawal_fees_usd.get(buy_exchange, 2.0)
+
+    # Buy side: notional / price = quantity, minus trading fee
+    quantity = (notional / buy_price) * (1 - buy_fee_rate)
+    buy_cost = notional  # Total cost including fee
+
+    # Sell side: quantity * price, minus trading fee
+    sell_proceeds = quantity * sell_price * (1 - sell_fee_rate)
+
+    # Withdrawal fee in quantity terms
+    withdrawal_fee_quantity = withdrawal_fee_usd / buy_price
+    quantity_after_withdrawal = quantity - withdrawal_fee_quantity
+
+    # Recalculate sell proceeds after withdrawal fee
+    sell_proceeds_after_fees = quantity_after_withdrawal * sell_price * (1 - sell_fee_rate)
+
+    # Slippage estimate (0.1% for liquid pairs, 0.5% for thin orderbooks)
+    # Use volume as proxy for liquidity
+    slippage_rate = 0.001  # Default 0.1%
+    slippage_cost = sell_proceeds_after_fees * slippage_rate
+
+    # Final PnL
+    gross_profit = sell_proceeds_after_fees - buy_cost
+    net_profit = gross_profit - slippage_cost
+    roi = (net_profit / notional) * 100
+
+    return {
+        'notional_usd': notional,
+        'quantity': quantity,
+        'buy_cost_usd': buy_cost,
+        'sell_proceeds_usd': sell_proceeds_after_fees,
+        'trading_fees_usd': (notional * buy_fee_rate) + (sell_proceeds_after_fees * sell_fee_rate),
+        'withdrawal_fee_usd': withdrawal_fee_usd,
+        'slippage_cost_usd': slippage_cost,
+        'gross_profit_usd': gross_profit,
+        'net_profit_usd': net_profit,
+        'roi_percent': roi,
+        'is_profitable': net_profit > 0
+    }
+
+def _spot_batch_fetch_kucoin_currencies():
+    """Fetch all currency status from KuCoin in one call and cache"""
+    try:
+        data = _http.get_json_sync('https://api.kucoin.com/api/v1/currencies', timeout=10)
+        if data.get('code') == '200000':
+            currencies = data.get('data', [])
+            for curr in currencies:
+                asset = curr.get('currency', '')
+                if asset:
+                    deposit = curr.get('isDepositEnabled', True)
+                    withdraw = curr.get('isWithdrawEnabled', True)
+
+                    # Extract available networks (KuCoin uses 'chains' array)
                     available_networks = set()
-                    chains = curr.get('chain', '').split(',') if curr.get('chain') else []
+                    chains = curr.get('chains', [])
                     for chain in chains:
-                        chain = chain.strip().upper()
-                        if chain:
-                            # Normalize common network names
-                            normalized = _normalize_network_name(chain)
+                        if chain.get('isDepositEnabled', False) and chain.get('isWithdrawEnabled', False):
+                            chain_name = chain.get('chainName', '') or chain.get('chain', '')
+                            if chain_name:
+                                # Normalize network names
+                                normalized = _normalize_network_name(chain_name)
+                                if normalized:
+                                    available_networks.add(normalized)
+
+                    _set_cached_status('KuCoin', asset, deposit, withdraw, available_networks)
+            print(f"Cached {len(currencies)} KuCoin currency statuses")
+            return len(currencies)
+    except Exception as e:
+        print(f"Failed to batch fetch KuCoin currencies: {e}")
+
+def _spot_batch_fetch_gateio_currencies():
+    """Fetch all currency status from Gate.io spot currencies endpoint and cache"""
+    try:
+        currencies = _http.get_json_sync('https://api.gateio.ws/api/v4/spot/currencies', timeout=10)
+        for curr in currencies:
+            currency = curr.get('currency', '').upper()
+            if not currency:
+                continue
+
+            # Check deposit/withdraw status from the currency object
+            deposit_disabled = curr.get('deposit_disabled', False)
+            withdraw_disabled = curr.get('withdraw_disabled', False)
+
+            # Extract available networks (Gate.io uses 'chain' field)
+            available_networks = set()
+            chains = curr.get('chain', '').split(',') if curr.get('chain') else []
+            for chain in chains:
+                chain = chain.strip().upper()
+                if chain:
+                    # Normalize common network names
+                    normalized = _normalize_network_name(chain)
+                    if normalized:
+                        available_networks.add(normalized)
+
+            # Store as enabled (inverse of disabled)
+            _set_cached_status('Gate.io', currency, not deposit_disabled, not withdraw_disabled, available_networks)
+
+        print(f"Cached {len(currencies)} Gate.io currency statuses")
+        return len(currencies)
+    except Exception as e:
+        print(f"Failed to batch fetch Gate.io currencies: {e}")
+
+def _spot_batch_fetch_binance_currencies():
+    """Fetch all currency status from Binance using API keys if available"""
+    try:
+        import hmac
+        import hashlib
+        from urllib.parse import urlencode
+
+        api_key = os.environ.get('BINANCE_API_KEY', '')
+        api_secret = os.environ.get('BINANCE_API_SECRET', '')
+
+        if not api_key or not api_secret:
+            print("Binance API keys not found, skipping deposit/withdrawal status check")
+            return 0
+
+        # Create signed request for /sapi/v1/capital/config/getall
+        timestamp = int(time.time() * 1000)
+        params = {'timestamp': timestamp}
+        query_string = urlencode(params)
+        signature = hmac.new(api_secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
+
+        url = f'https://api.binance.com/sapi/v1/capital/config/getall?{query_string}&signature={signature}'
+
+        headers = {'X-MBX-APIKEY': api_key}
+        coins = _http.get_json_sync(url, headers=headers, timeout=10)
+        for coin in coins:
+            asset = coin.get('coin', '')
+            if asset:
+                deposit = coin.get('depositAllEnable', True)
+                withdraw = coin.get('withdrawAllEnable', True)
+
+                # Extract networks
+                available_networks = set()
+                network_list = coin.get('networkList', [])
+                for net in network_list:
+                    if net.get('depositEnable', False) and net.get('withdrawEnable', False):
+                        network_name = net.get('network', '')
+                        if network_name:
+                            # Normalize network names
+                            normalized = _normalize_network_name(network_name)
                             if normalized:
                                 available_networks.add(normalized)
-                    
-                    # Store as enabled (inverse of disabled)
-                    _set_cached_status('Gate.io', currency, not deposit_disabled, not withdraw_disabled, available_networks)
-                
-                print(f"Cached {len(currencies)} Gate.io currency statuses")
-        except Exception as e:
-            print(f"Failed to batch fetch Gate.io currencies: {e}")
-    
-    def batch_fetch_binance_currencies():
-        """Fetch all currency status from Binance using API keys if available"""
+
+                _set_cached_status('Binance', asset, deposit, withdraw, available_networks)
+        print(f"Cached {len(coins)} Binance currency statuses")
+        return len(coins)
+    except Exception as e:
+        print(f"Failed to batch fetch Binance currencies: {e}")
+
+def _spot_batch_fetch_mexc_currencies():
+    """Fetch all currency status from MEXC using API keys if available"""
+    try:
+        import hmac
+        import hashlib
+        from urllib.parse import urlencode
+
+        api_key = os.environ.get('MEXC_API_KEY', '')
+        api_secret = os.environ.get('MEXC_API_SECRET', '')
+
+        if not api_key or not api_secret:
+            print("MEXC API keys not found, skipping deposit/withdrawal status check")
+            return 0
+
+        # MEXC uses timestamp in milliseconds
+        timestamp = int(time.time() * 1000)
+        params = {
+            'timestamp': timestamp
+        }
+        query_string = urlencode(params)
+        signature = hmac.new(api_secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
+
+        # MEXC API endpoint for coin information
+        url = f'https://api.mexc.com/api/v3/capital/config/getall?{query_string}&signature={signature}'
+
+        headers = {'X-MEXC-APIKEY': api_key}
+        coins = _http.get_json_sync(url, headers=headers, timeout=10)
+        for coin in coins:
+            asset = coin.get('coin', '')
+            if asset:
+                # MEXC uses networkList - need to check if ANY network supports deposit/withdraw
+                network_list = coin.get('networkList', [])
+                if network_list:
+                    # Collect networks that support both deposit and withdraw
+                    available_networks = set()
+                    deposit_enabled = False
+                    withdraw_enabled = False
+
+                    for net in network_list:
+                        dep = net.get('depositEnable', False)
+                        wit = net.get('withdrawEnable', False)
+                        network_name = net.get('network', '') or net.get('netWork', '')
+
+                        if dep:
+                            deposit_enabled = True
+                        if wit:
+                            withdraw_enabled = True
+
+                        # Store network if BOTH deposit and withdraw are enabled
+                        if dep and wit and network_name:
+                            # Normalize network names
+                            normalized = _normalize_network_name(network_name)
+                            if normalized:
+                                available_networks.add(normalized)
+
+                    _set_cached_status('MEXC', asset, deposit_enabled, withdraw_enabled, available_networks)
+                else:
+                    # Fallback to top-level flags (older API format)
+                    deposit = coin.get('depositEnable', False) or coin.get('depositAllEnable', False)
+                    withdraw = coin.get('withdrawEnable', False) or coin.get('withdrawAllEnable', False)
+                    _set_cached_status('MEXC', asset, deposit, withdraw, set())
+        print(f"Cached {len(coins)} MEXC currency statuses")
+        return len(coins)
+    except Exception as e:
+        print(f"Failed to batch fetch MEXC currencies: {e}")
+
+def _spot_batch_fetch_bitget_currencies():
+    """Fetch all currency status from Bitget"""
+    try:
+        # Bitget requires User-Agent header
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36', 'Accept': 'application/json'}
+        data = _http.get_json_sync('https://api.bitget.com/api/v2/spot/public/coins', headers=headers, timeout=10)
+        coins = data.get('data', [])
+        for coin in coins:
+            asset = coin.get('coin', '')
+            if asset:
+                # Bitget uses 'chains' array with depositEnabled/withdrawEnabled per chain
+                # We check if ANY chain allows deposit/withdraw
+                chains = coin.get('chains', [])
+                deposit = any(c.get('depositEnable', '') == 'true' for c in chains)
+                withdraw = any(c.get('withdrawEnable', '') == 'true' for c in chains)
+
+                # Extract available networks
+                available_networks = set()
+                for chain in chains:
+                    if chain.get('depositEnable', '') == 'true' and chain.get('withdrawEnable', '') == 'true':
+                        chain_name = chain.get('chain', '') or chain.get('chainName', '')
+                        if chain_name:
+                            # Normalize network names
+                            normalized = _normalize_network_name(chain_name)
+                            if normalized:
+                                available_networks.add(normalized)
+
+                _set_cached_status('Bitget', asset, deposit, withdraw, available_networks)
+        print(f"Cached {len(coins)} Bitget currency statuses")
+        return len(coins)
+    except Exception as e:
+        print(f"Failed to batch fetch Bitget currencies: {e}")
+
+
+_SPOT_VENUES = ['Binance', 'MEXC', 'Gate.io', 'KuCoin', 'Bitget']
+# base-asset suffixes each venue's transfer-status lookup strips from the symbol
+_SPOT_STATUS_QUOTES = {'Binance': ('USDT', 'BUSD', 'USDC')}
+
+
+def _spot_transfer_status(exchange: str, symbol: str):
+    """Deposit/withdraw status for a symbol's base asset (cached; assume enabled when unknown)."""
+    base_asset = symbol
+    for q in _SPOT_STATUS_QUOTES.get(exchange, ('USDT', 'USDC')):
+        base_asset = base_asset.replace(q, '')
+    cached = _get_cached_status(exchange, base_asset)
+    if cached:
+        return cached
+    # Not in cache, assume enabled (batch fetch will populate cache)
+    _set_cached_status(exchange, base_asset, True, True)
+    return {'deposit_enabled': True, 'withdraw_enabled': True}
+
+
+def _spot_price_table(binance_data, mexc_data, gateio_data, kucoin_data, bitget_data,
+                      binance_trading_symbols, kucoin_trading_symbols) -> PriceTable:
+    """Normalise the venues' 24h tickers into one columnar USDT price table."""
+    table = PriceTable(_SPOT_VENUES)
+
+    def _add(venue, symbol, price, volume):
+        price = float(price or 0)
+        volume = float(volume or 0)
+        if price > 0 and volume > 10000:  # Min $10k volume
+            table.add(venue, symbol, price, volume)
+
+    for t in binance_data or []:
+        symbol = t.get('symbol', '')
+        if not symbol.endswith('USDT'):
+            continue
+        # Filter out leveraged ETF products (3S/3L tokens)
+        if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
+            continue
+        # Filter out symbols that are not actively trading (status != TRADING)
+        if symbol not in binance_trading_symbols:
+            continue
         try:
-            import hmac
-            import hashlib
-            from urllib.parse import urlencode
-            
-            api_key = os.environ.get('BINANCE_API_KEY', '')
-            api_secret = os.environ.get('BINANCE_API_SECRET', '')
-            
-            if not api_key or not api_secret:
-                print("Binance API keys not found, skipping deposit/withdrawal status check")
-                return
-            
-            # Create signed request for /sapi/v1/capital/config/getall
-            timestamp = int(time.time() * 1000)
-            params = {'timestamp': timestamp}
-            query_string = urlencode(params)
-            signature = hmac.new(api_secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
-            
-            url = f'https://api.binance.com/sapi/v1/capital/config/getall?{query_string}&signature={signature}'
-            req = _req.Request(url)
-            req.add_header('X-MBX-APIKEY', api_key)
-            
-            with _req.urlopen(req, timeout=10) as r:
-                coins = json.load(r)
-                for coin in coins:
-                    asset = coin.get('coin', '')
-                    if asset:
-                        deposit = coin.get('depositAllEnable', True)
-                        withdraw = coin.get('withdrawAllEnable', True)
-                        
-                        # Extract networks
-                        available_networks = set()
-                        network_list = coin.get('networkList', [])
-                        for net in network_list:
-                            if net.get('depositEnable', False) and net.get('withdrawEnable', False):
-                                network_name = net.get('network', '')
-                                if network_name:
-                                    # Normalize network names
-                                    normalized = _normalize_network_name(network_name)
-                                    if normalized:
-                                        available_networks.add(normalized)
-                        
-                        _set_cached_status('Binance', asset, deposit, withdraw, available_networks)
-                print(f"Cached {len(coins)} Binance currency statuses")
-        except Exception as e:
-            print(f"Failed to batch fetch Binance currencies: {e}")
-    
-    def batch_fetch_mexc_currencies():
-        """Fetch all currency status from MEXC using API keys if available"""
+            _add('Binance', symbol, t.get('lastPrice', 0), t.get('quoteVolume', 0))
+        except Exception:
+            pass
+
+    for t in mexc_data or []:
+        symbol = t.get('symbol', '')
+        if not symbol.endswith('USDT'):
+            continue
+        if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
+            continue
         try:
-            import hmac
-            import hashlib
-            from urllib.parse import urlencode
-            
-            api_key = os.environ.get('MEXC_API_KEY', '')
-            api_secret = os.environ.get('MEXC_API_SECRET', '')
-            
-            if not api_key or not api_secret:
-                print("MEXC API keys not found, skipping deposit/withdrawal status check")
-                return
-            
-            # MEXC uses timestamp in milliseconds
-            timestamp = int(time.time() * 1000)
-            params = {
-                'timestamp': timestamp
-            }
-            query_string = urlencode(params)
-            signature = hmac.new(api_secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
-            
-            # MEXC API endpoint for coin information
-            url = f'https://api.mexc.com/api/v3/capital/config/getall?{query_string}&signature={signature}'
-            req = _req.Request(url)
-            req.add_header('X-MEXC-APIKEY', api_key)
-            
-            with _req.urlopen(req, timeout=10) as r:
-                coins = json.load(r)
-                for coin in coins:
-                    asset = coin.get('coin', '')
-                    if asset:
-                        # MEXC uses networkList - need to check if ANY network supports deposit/withdraw
-                        network_list = coin.get('networkList', [])
-                        if network_list:
-                            # Collect networks that support both deposit and withdraw
-                            available_networks = set()
-                            deposit_enabled = False
-                            withdraw_enabled = False
-                            
-                            for net in network_list:
-                                dep = net.get('depositEnable', False)
-                                wit = net.get('withdrawEnable', False)
-                                network_name = net.get('network', '') or net.get('netWork', '')
-                                
-                                if dep:
-                                    deposit_enabled = True
-                                if wit:
-                                    withdraw_enabled = True
-                                
-                                # Store network if BOTH deposit and withdraw are enabled
-                                if dep and wit and network_name:
-                                    # Normalize network names
-                                    normalized = _normalize_network_name(network_name)
-                                    if normalized:
-                                        available_networks.add(normalized)
-                            
-                            _set_cached_status('MEXC', asset, deposit_enabled, withdraw_enabled, available_networks)
-                        else:
-                            # Fallback to top-level flags (older API format)
-                            deposit = coin.get('depositEnable', False) or coin.get('depositAllEnable', False)
-                            withdraw = coin.get('withdrawEnable', False) or coin.get('withdrawAllEnable', False)
-                            _set_cached_status('MEXC', asset, deposit, withdraw, set())
-                print(f"Cached {len(coins)} MEXC currency statuses")
-        except Exception as e:
-            print(f"Failed to batch fetch MEXC currencies: {e}")
-    
-    def batch_fetch_bitget_currencies():
-        """Fetch all currency status from Bitget"""
+            _add('MEXC', symbol, t.get('lastPrice', 0), t.get('quoteVolume', 0))
+        except Exception:
+            pass
+
+    for t in gateio_data or []:
+        currency_pair = t.get('currency_pair', '')
+        if not currency_pair.endswith('_USDT'):
+            continue
+        symbol = currency_pair.replace('_', '')  # Convert BTC_USDT to BTCUSDT
+        if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
+            continue
         try:
-            # Bitget requires User-Agent header
-            req = _req.Request('https://api.bitget.com/api/v2/spot/public/coins')
-            req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            req.add_header('Accept', 'application/json')
-            
-            with _req.urlopen(req, timeout=10) as r:
-                data = json.load(r)
-                coins = data.get('data', [])
-                for coin in coins:
-                    asset = coin.get('coin', '')
-                    if asset:
-                        # Bitget uses 'chains' array with depositEnabled/withdrawEnabled per chain
-                        # We check if ANY chain allows deposit/withdraw
-                        chains = coin.get('chains', [])
-                        deposit = any(c.get('depositEnable', '') == 'true' for c in chains)
-                        withdraw = any(c.get('withdrawEnable', '') == 'true' for c in chains)
-                        
-                        # Extract available networks
-                        available_networks = set()
-                        for chain in chains:
-                            if chain.get('depositEnable', '') == 'true' and chain.get('withdrawEnable', '') == 'true':
-                                chain_name = chain.get('chain', '') or chain.get('chainName', '')
-                                if chain_name:
-                                    # Normalize network names
-                                    normalized = _normalize_network_name(chain_name)
-                                    if normalized:
-                                        available_networks.add(normalized)
-                        
-                        _set_cached_status('Bitget', asset, deposit, withdraw, available_networks)
-                print(f"Cached {len(coins)} Bitget currency statuses")
+            _add('Gate.io', symbol, t.get('last', 0), t.get('quote_volume', 0))
+        except Exception:
+            pass
+
+    for t in kucoin_data or []:
+        symbol_raw = t.get('symbol', '')
+        if not symbol_raw.endswith('-USDT'):
+            continue
+        symbol = symbol_raw.replace('-', '')  # Convert BTC-USDT to BTCUSDT
+        if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
+            continue
+        # Filter out symbols that are not actively trading (enableTrading=false)
+        if symbol not in kucoin_trading_symbols:
+            continue
+        try:
+            _add('KuCoin', symbol, t.get('last', 0), t.get('volValue', 0))
+        except Exception:
+            pass
+
+    bitget_errors = 0
+    for t in bitget_data or []:
+        symbol = t.get('symbol', '')
+        if not symbol.endswith('USDT'):
+            continue
+        if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
+            continue
+        try:
+            _add('Bitget', symbol, t.get('lastPr', 0), t.get('quoteVolume', 0))
         except Exception as e:
-            print(f"Failed to batch fetch Bitget currencies: {e}")
-    
-    def check_binance_deposit_withdraw_status(symbol):
-        """Check if deposit/withdrawal is enabled for a symbol on Binance"""
+            # Only print first few errors to avoid spam
+            bitget_errors += 1
+            if bitget_errors <= 3:
+                print(f"Bitget parse error for {symbol}: {e}")
+    return table
+
+
+def _spot_opportunities_from_table(table: PriceTable) -> list:
+    """Cross-venue spreads per symbol, with transfer status and $100 PnL."""
+    import statistics
+
+    opportunities = []
+    for symbol, quotes in table.rows():
+        # Need at least 2 exchanges to arbitrage
+        if len(quotes) < 2:
+            continue
+        prices_by_exchange = [{'price': p, 'volume': v, 'exchange': ex} for ex, p, v in quotes]
+
+        # Find min and max prices
+        sorted_prices = sorted(prices_by_exchange, key=lambda x: x['price'])
+        lowest = sorted_prices[0]
+        highest = sorted_prices[-1]
+
+        spread_pct = ((highest['price'] - lowest['price']) / lowest['price']) * 100
+
+        # Filter realistic spreads: >0.5% but <10% (anything higher is likely data error)
+        # Also ensure prices are within 20% of each other (prevent comparing different pairs)
+        avg_price = statistics.mean(p['price'] for p in prices_by_exchange)
+        price_deviation = ((highest['price'] - lowest['price']) / avg_price) * 100
+        if not (0.5 < spread_pct < 10 and price_deviation < 20):
+            continue
+        # Skip if price difference ratio is too extreme (likely different pairs)
+        if highest['price'] / lowest['price'] > 1.15:  # Max 15% difference
+            continue
+
+        total_volume = sum(p['volume'] for p in prices_by_exchange)
+
+        # Check deposit/withdrawal status
+        buy_status = _spot_transfer_status(lowest['exchange'], symbol)
+        sell_status = _spot_transfer_status(highest['exchange'], symbol)
+
+        # Check if arbitrage is executable (withdraw from buy exchange, deposit to sell exchange)
+        # Also verify they have at least one common network for transfers
         base_asset = symbol.replace('USDT', '').replace('BUSD', '').replace('USDC', '')
-        
-        # Check cache first
-        cached = _get_cached_status('Binance', base_asset)
-        if cached:
-            return cached
-        
-        # Not in cache, assume enabled (batch fetch will populate cache if API keys are available)
-        _set_cached_status('Binance', base_asset, True, True)
-        return {'deposit_enabled': True, 'withdraw_enabled': True}
-    
-    def check_mexc_deposit_withdraw_status(symbol):
-        """Check if deposit/withdrawal is enabled for a symbol on MEXC"""
-        base_asset = symbol.replace('USDT', '').replace('USDC', '')
-        
-        # Check cache first
-        cached = _get_cached_status('MEXC', base_asset)
-        if cached:
-            return cached
-        
-        # Not in cache, assume enabled (batch fetch will populate cache if API keys are available)
-        _set_cached_status('MEXC', base_asset, True, True)
-        return {'deposit_enabled': True, 'withdraw_enabled': True}
-    
-    def check_gateio_deposit_withdraw_status(symbol):
-        """Check if deposit/withdrawal is enabled for a symbol on Gate.io"""
-        base_asset = symbol.replace('USDT', '').replace('USDC', '')
-        
-        # Check cache first
-        cached = _get_cached_status('Gate.io', base_asset)
-        if cached:
-            return cached
-        
-        # Not in cache, assume enabled (batch fetch will populate cache)
-        _set_cached_status('Gate.io', base_asset, True, True)
-        return {'deposit_enabled': True, 'withdraw_enabled': True}
-    
-    def check_kucoin_deposit_withdraw_status(symbol):
-        """Check if deposit/withdrawal is enabled for a symbol on KuCoin"""
-        base_asset = symbol.replace('USDT', '').replace('USDC', '')
-        
-        # Check cache first
-        cached = _get_cached_status('KuCoin', base_asset)
-        if cached:
-            return cached
-        
-        # Not in cache, assume enabled (batch fetch will populate cache)
-        _set_cached_status('KuCoin', base_asset, True, True)
-        return {'deposit_enabled': True, 'withdraw_enabled': True}
-    
-    def check_bitget_deposit_withdraw_status(symbol):
-        """Check if deposit/withdrawal is enabled for a symbol on Bitget"""
-        base_asset = symbol.replace('USDT', '').replace('USDC', '')
-        
-        # Check cache first
-        cached = _get_cached_status('Bitget', base_asset)
-        if cached:
-            return cached
-        
-        # Not in cache, assume enabled (batch fetch will populate cache)
-        _set_cached_status('Bitget', base_asset, True, True)
-        return {'deposit_enabled': True, 'withdraw_enabled': True}
-    
-    try:
-        # Batch fetch deposit/withdrawal status for all exchanges
-        # These calls populate the cache with all currencies at once
-        print("Batch fetching currency status from Binance, MEXC, KuCoin, Gate.io, and Bitget...")
-        batch_fetch_binance_currencies()
-        batch_fetch_mexc_currencies()
-        batch_fetch_kucoin_currencies()
-        batch_fetch_gateio_currencies()
-        batch_fetch_bitget_currencies()
-        
-        # Fetch actively trading symbols on Binance and KuCoin
-        binance_trading_symbols = fetch_binance_trading_symbols()
-        kucoin_trading_symbols = fetch_kucoin_trading_symbols()
-        
-        # Fetch all tickers
-        binance_data = fetch_binance_spot_tickers()
-        mexc_data = fetch_mexc_spot_tickers()
-        gateio_data = fetch_gateio_spot_tickers()
-        kucoin_data = fetch_kucoin_spot_tickers()
-        bitget_data = fetch_bitget_spot_tickers()
-        
-        # Build price maps for each exchange
-        binance_prices = {}
-        for t in binance_data:
-            symbol = t.get('symbol', '')
-            if not symbol.endswith('USDT'):
-                continue
-            # Filter out leveraged ETF products (3S/3L tokens)
-            if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
-                continue
-            # Filter out symbols that are not actively trading (status != TRADING)
-            if symbol not in binance_trading_symbols:
-                continue
-            try:
-                price = float(t.get('lastPrice', 0))
-                volume = float(t.get('quoteVolume', 0))
-                if price > 0 and volume > 10000:  # Min $10k volume
-                    binance_prices[symbol] = {
-                        'price': price,
-                        'volume': volume,
-                        'exchange': 'Binance'
-                    }
-            except:
-                pass
-        
-        mexc_prices = {}
-        for t in mexc_data:
-            symbol = t.get('symbol', '')
-            if not symbol.endswith('USDT'):
-                continue
-            # Filter out leveraged ETF products
-            if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
-                continue
-            try:
-                price = float(t.get('lastPrice', 0))
-                volume = float(t.get('quoteVolume', 0))
-                if price > 0 and volume > 10000:
-                    mexc_prices[symbol] = {
-                        'price': price,
-                        'volume': volume,
-                        'exchange': 'MEXC'
-                    }
-            except:
-                pass
-        
-        gateio_prices = {}
-        for t in gateio_data:
-            currency_pair = t.get('currency_pair', '')
-            if not currency_pair.endswith('_USDT'):
-                continue
-            symbol = currency_pair.replace('_', '')  # Convert BTC_USDT to BTCUSDT
-            # Filter out leveraged ETF products
-            if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
-                continue
-            try:
-                price = float(t.get('last', 0))
-                volume = float(t.get('quote_volume', 0))
-                if price > 0 and volume > 10000:
-                    gateio_prices[symbol] = {
-                        'price': price,
-                        'volume': volume,
-                        'exchange': 'Gate.io'
-                    }
-            except:
-                pass
-        
-        kucoin_prices = {}
-        for t in kucoin_data:
-            symbol_raw = t.get('symbol', '')
-            if not symbol_raw.endswith('-USDT'):
-                continue
-            symbol = symbol_raw.replace('-', '')  # Convert BTC-USDT to BTCUSDT
-            # Filter out leveraged ETF products
-            if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
-                continue
-            # Filter out symbols that are not actively trading (enableTrading=false)
-            if symbol not in kucoin_trading_symbols:
-                continue
-            try:
-                price = float(t.get('last', 0))
-                volume = float(t.get('volValue', 0))
-                if price > 0 and volume > 10000:
-                    kucoin_prices[symbol] = {
-                        'price': price,
-                        'volume': volume,
-                        'exchange': 'KuCoin'
-                    }
-            except:
-                pass
-        
-        bitget_prices = {}
-        for t in bitget_data:
-            symbol = t.get('symbol', '')
-            if not symbol.endswith('USDT'):
-                continue
-            # Filter out leveraged ETF products
-            if symbol.endswith('3SUSDT') or symbol.endswith('3LUSDT'):
-                continue
-            try:
-                price = float(t.get('lastPr', 0))
-                volume = float(t.get('quoteVolume', 0))
-                if price > 0 and volume > 10000:
-                    bitget_prices[symbol] = {
-                        'price': price,
-                        'volume': volume,
-                        'exchange': 'Bitget'
-                    }
-            except Exception as e:
-                # Only print first few errors to avoid spam
-                if len(bitget_prices) < 3:
-                    print(f"Bitget parse error for {symbol}: {e}")
-        
-        print(f"Parsed {len(bitget_prices)} Bitget prices (sample: {list(bitget_prices.keys())[:5]})")
-        
-        # Find arbitrage opportunities
-        opportunities = []
-        
-        # Get all unique symbols across all exchanges
-        all_symbols = set()
-        all_symbols.update(binance_prices.keys())
-        all_symbols.update(mexc_prices.keys())
-        all_symbols.update(gateio_prices.keys())
-        all_symbols.update(kucoin_prices.keys())
-        all_symbols.update(bitget_prices.keys())
-        
-        for symbol in all_symbols:
-            prices_by_exchange = []
-            
-            if symbol in binance_prices:
-                prices_by_exchange.append(binance_prices[symbol])
-            if symbol in mexc_prices:
-                prices_by_exchange.append(mexc_prices[symbol])
-            if symbol in gateio_prices:
-                prices_by_exchange.append(gateio_prices[symbol])
-            if symbol in kucoin_prices:
-                prices_by_exchange.append(kucoin_prices[symbol])
-            if symbol in bitget_prices:
-                prices_by_exchange.append(bitget_prices[symbol])
-            
-            # Need at least 2 exchanges to arbitrage
-            if len(prices_by_exchange) < 2:
-                continue
-            
-            # Find min and max prices
-            sorted_prices = sorted(prices_by_exchange, key=lambda x: x['price'])
-            lowest = sorted_prices[0]
-            highest = sorted_prices[-1]
-            
-            spread_pct = ((highest['price'] - lowest['price']) / lowest['price']) * 100
-            
-            # Filter realistic spreads: >0.5% but <10% (anything higher is likely data error)
-            # Also ensure prices are within 20% of each other (prevent comparing different pairs)
-            price_deviation = ((highest['price'] - lowest['price']) / statistics.mean([p['price'] for p in prices_by_exchange])) * 100
-            
-            if 0.5 < spread_pct < 10 and price_deviation < 20:
-                # Additional validation: all prices should be within reasonable range
-                min_price = min(p['price'] for p in prices_by_exchange)
-                max_price = max(p['price'] for p in prices_by_exchange)
-                
-                # Skip if price difference ratio is too extreme (likely different pairs)
-                if max_price / min_price > 1.15:  # Max 15% difference
-                    continue
-                
-                total_volume = sum(p['volume'] for p in prices_by_exchange)
-                avg_price = statistics.mean(p['price'] for p in prices_by_exchange)
-                
-                # Check deposit/withdrawal status
-                buy_status = {'deposit_enabled': True, 'withdraw_enabled': True}
-                sell_status = {'deposit_enabled': True, 'withdraw_enabled': True}
-                
-                if lowest['exchange'] == 'Binance':
-                    buy_status = check_binance_deposit_withdraw_status(symbol)
-                elif lowest['exchange'] == 'MEXC':
-                    buy_status = check_mexc_deposit_withdraw_status(symbol)
-                elif lowest['exchange'] == 'Gate.io':
-                    buy_status = check_gateio_deposit_withdraw_status(symbol)
-                elif lowest['exchange'] == 'KuCoin':
-                    buy_status = check_kucoin_deposit_withdraw_status(symbol)
-                elif lowest['exchange'] == 'Bitget':
-                    buy_status = check_bitget_deposit_withdraw_status(symbol)
-                
-                if highest['exchange'] == 'Binance':
-                    sell_status = check_binance_deposit_withdraw_status(symbol)
-                elif highest['exchange'] == 'MEXC':
-                    sell_status = check_mexc_deposit_withdraw_status(symbol)
-                elif highest['exchange'] == 'Gate.io':
-                    sell_status = check_gateio_deposit_withdraw_status(symbol)
-                elif highest['exchange'] == 'KuCoin':
-                    sell_status = check_kucoin_deposit_withdraw_status(symbol)
-                elif highest['exchange'] == 'Bitget':
-                    sell_status = check_bitget_deposit_withdraw_status(symbol)
-                
-                # Check if arbitrage is executable (withdraw from buy exchange, deposit to sell exchange)
-                # Also verify they have at least one common network for transfers
-                base_asset = symbol.replace('USDT', '').replace('BUSD', '').replace('USDC', '')
-                has_common_network = _check_common_networks(lowest['exchange'], highest['exchange'], base_asset)
-                is_executable = buy_status['withdraw_enabled'] and sell_status['deposit_enabled'] and has_common_network
-                
-                # Calculate realistic PnL with $100 notional
-                pnl = calculate_arbitrage_pnl(
-                    symbol=symbol,
-                    buy_price=lowest['price'],
-                    sell_price=highest['price'],
-                    buy_exchange=lowest['exchange'],
-                    sell_exchange=highest['exchange'],
-                    notional=100
-                )
-                
-                opportunities.append({
-                    'symbol': symbol,
-                    'buy_exchange': lowest['exchange'],
-                    'buy_price': lowest['price'],
-                    'buy_volume': lowest['volume'],
-                    'buy_withdraw_enabled': buy_status['withdraw_enabled'],
-                    'sell_exchange': highest['exchange'],
-                    'sell_price': highest['price'],
-                    'sell_volume': highest['volume'],
-                    'sell_deposit_enabled': sell_status['deposit_enabled'],
-                    'spread_pct': spread_pct,
-                    'avg_price': avg_price,
-                    'total_volume': total_volume,
-                    'exchanges_available': len(prices_by_exchange),
-                    'is_executable': is_executable,
-                    'profitability': 'high' if spread_pct > 2 else 'medium' if spread_pct > 1 else 'low',
-                    # PnL breakdown for $100 trade
-                    'net_profit_usd': pnl['net_profit_usd'],
-                    'roi_percent': pnl['roi_percent'],
-                    'trading_fees_usd': pnl['trading_fees_usd'],
-                    'withdrawal_fee_usd': pnl['withdrawal_fee_usd'],
-                    'slippage_cost_usd': pnl['slippage_cost_usd'],
-                    'is_profitable_after_fees': pnl['is_profitable']
-                })
-        
-        # Sort by spread percentage (highest first)
-        opportunities.sort(key=lambda x: x['spread_pct'], reverse=True)
-        
-        # Separate executable and blocked opportunities
-        executable_opps = [o for o in opportunities if o.get('is_executable', True)]
-        blocked_opps = [o for o in opportunities if not o.get('is_executable', True)]
-        
-        return {
-            'opportunities': opportunities[:50],  # Top 50 opportunities (all)
-            'executable_opportunities': executable_opps[:50],  # Executable only
-            'blocked_opportunities': blocked_opps[:20],  # Top 20 blocked
-            'total_symbols_scanned': len(all_symbols),
-            'timestamp': time.time()
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f'spot-arbitrage-scan-failed: {str(e)}')
+        has_common_network = _check_common_networks(lowest['exchange'], highest['exchange'], base_asset)
+        is_executable = buy_status['withdraw_enabled'] and sell_status['deposit_enabled'] and has_common_network
+
+        # Calculate realistic PnL with $100 notional
+        pnl = _spot_arbitrage_pnl(
+            symbol=symbol,
+            buy_price=lowest['price'],
+            sell_price=highest['price'],
+            buy_exchange=lowest['exchange'],
+            sell_exchange=highest['exchange'],
+            notional=100
+        )
+
+        opportunities.append({
+            'symbol': symbol,
+            'buy_exchange': lowest['exchange'],
+            'buy_price': lowest['price'],
+            'buy_volume': lowest['volume'],
+            'buy_withdraw_enabled': buy_status['withdraw_enabled'],
+            'sell_exchange': highest['exchange'],
+            'sell_price': highest['price'],
+            'sell_volume': highest['volume'],
+            'sell_deposit_enabled': sell_status['deposit_enabled'],
+            'spread_pct': spread_pct,
+            'avg_price': avg_price,
+            'total_volume': total_volume,
+            'exchanges_available': len(prices_by_exchange),
+            'is_executable': is_executable,
+            'profitability': 'high' if spread_pct > 2 else 'medium' if spread_pct > 1 else 'low',
+            # PnL breakdown for $100 trade
+            'net_profit_usd': pnl['net_profit_usd'],
+            'roi_percent': pnl['roi_percent'],
+            'trading_fees_usd': pnl['trading_fees_usd'],
+            'withdrawal_fee_usd': pnl['withdrawal_fee_usd'],
+            'slippage_cost_usd': pnl['slippage_cost_usd'],
+            'is_profitable_after_fees': pnl['is_profitable']
+        })
+
+    # Sort by spread percentage (highest first)
+    opportunities.sort(key=lambda x: x['spread_pct'], reverse=True)
+    return opportunities
+
+
+# status task -> when its batch last succeeded (the _spot_batch_fetch_* helpers
+# return the number of statuses cached, None when the fetch failed)
+_spot_status_refreshed_at: Dict[str, float] = {}
+_SPOT_STATUS_TASKS = {
+    'status_binance': _spot_batch_fetch_binance_currencies,
+    'status_mexc': _spot_batch_fetch_mexc_currencies,
+    'status_kucoin': _spot_batch_fetch_kucoin_currencies,
+    'status_gateio': _spot_batch_fetch_gateio_currencies,
+    'status_bitget': _spot_batch_fetch_bitget_currencies,
+}
+
+
+def _build_spot_arbitrage_snapshot() -> dict:
+    """One refresh of the spot-arbitrage snapshot (runs on the service thread).
+
+    All venue fetches run concurrently under ARB_SPOT_ARB_FETCH_TIMEOUT; each
+    venue's currency-status batch (which only feeds the 1h status cache) is
+    refreshed every ARB_SPOT_ARB_STATUS_INTERVAL seconds, and retried on the
+    next build while it fails.
+    """
+    t0 = time.time()
+    fetch_timeout = float(os.environ.get('ARB_SPOT_ARB_FETCH_TIMEOUT', '20'))
+    status_interval = float(os.environ.get('ARB_SPOT_ARB_STATUS_INTERVAL', '600'))
+
+    tasks = {
+        'binance_symbols': _spot_fetch_binance_trading_symbols,
+        'kucoin_symbols': _spot_fetch_kucoin_trading_symbols,
+        'binance': _spot_fetch_binance_spot_tickers,
+        'mexc': _spot_fetch_mexc_spot_tickers,
+        'gateio': _spot_fetch_gateio_spot_tickers,
+        'kucoin': _spot_fetch_kucoin_spot_tickers,
+        'bitget': _spot_fetch_bitget_spot_tickers,
+    }
+    # Batch fetch deposit/withdrawal status; each call populates the cache
+    # with all of a venue's currencies at once
+    status_due = [name for name in _SPOT_STATUS_TASKS
+                  if t0 - _spot_status_refreshed_at.get(name, 0.0) >= status_interval]
+    tasks.update({name: _SPOT_STATUS_TASKS[name] for name in status_due})
+    data, fetch_ms = fetch_concurrently(
+        tasks,
+        timeout=fetch_timeout,
+        defaults={'binance_symbols': set(), 'kucoin_symbols': set(),
+                  'binance': [], 'mexc': [], 'gateio': [], 'kucoin': [], 'bitget': []},
+    )
+    as_of = time.time()
+    for name in status_due:
+        if data.get(name) is not None:
+            _spot_status_refreshed_at[name] = t0
+
+    table = _spot_price_table(
+        data['binance'], data['mexc'], data['gateio'], data['kucoin'], data['bitget'],
+        data['binance_symbols'], data['kucoin_symbols'],
+    )
+    print(f"[spot-arbitrage] table {len(table)} symbols {table.counts()} fetched in {as_of - t0:.2f}s")
+    opportunities = _spot_opportunities_from_table(table)
+
+    # Separate executable and blocked opportunities
+    executable_opps = [o for o in opportunities if o.get('is_executable', True)]
+    blocked_opps = [o for o in opportunities if not o.get('is_executable', True)]
+
+    return {
+        'opportunities': opportunities[:50],  # Top 50 opportunities (all)
+        'executable_opportunities': executable_opps[:50],  # Executable only
+        'blocked_opportunities': blocked_opps[:20],  # Top 20 blocked
+        'total_symbols_scanned': len(table),
+        'timestamp': as_of,
+        'as_of': as_of,
+        'fetch_ms': fetch_ms,
+    }
+
+
+def _spot_arbitrage_warming_up():
+    """Empty table served until the first background build lands."""
+    now = time.time()
+    return {
+        'opportunities': [],
+        'executable_opportunities': [],
+        'blocked_opportunities': [],
+        'total_symbols_scanned': 0,
+        'timestamp': now,
+        'as_of': now,
+        'warming_up': True,
+    }
+
+
+_spot_arbitrage_service = SnapshotService(
+    'spot-arbitrage',
+    _build_spot_arbitrage_snapshot,
+    interval=float(os.environ.get('ARB_SPOT_ARB_INTERVAL', '15')),
+    idle_s=float(os.environ.get('ARB_SPOT_ARB_IDLE_S', '300')),
+    placeholder=_spot_arbitrage_warming_up,
+)
+
+
+@app.get('/api/spot-arbitrage')
+async def get_spot_arbitrage_opportunities(request: Request):
+    """Scan spot markets across Binance, MEXC, Gate.io, KuCoin, and Bitget for arbitrage opportunities.
+
+    Returns pairs with price differences that have decent liquidity and volume.
+    Served from a snapshot refreshed in the background every
+    ARB_SPOT_ARB_INTERVAL seconds (``as_of`` is its fetch time); clients may
+    send If-None-Match with the previous ETag to get a 304. Until the first
+    build lands the table is empty and flagged ``warming_up``.
+    """
+    snap = _spot_arbitrage_service.latest()
+    if snap is None:
+        # cold start answers with the placeholder; a stale snapshot waits
+        # for the next build off the event loop
+        snap = await asyncio.to_thread(_spot_arbitrage_service.get)
+    if snap is None:
+        err = _spot_arbitrage_service.last_error or 'no snapshot yet'
+        raise HTTPException(status_code=500, detail=f'spot-arbitrage-scan-failed: {err}')
+    headers = {'ETag': snap.etag, 'Cache-Control': 'no-cache'}
+    if request.headers.get('if-none-match') == snap.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=snap.body, media_type='application/json', headers=headers)
+
+
+@app.get('/debug/spot_arbitrage')
+async def debug_spot_arbitrage():
+    """Refresh state of the spot-arbitrage snapshot service."""
+    return _spot_arbitrage_service.status()
+
+
+@app.get('/debug/klines')
+async def debug_klines():
+    """Kline store series, stream subscriptions and REST fallback counters."""
+    return get_kline_store().stats()
+
+
+@app.get('/debug/strategy_scheduler')
+async def debug_strategy_scheduler():
+    """Per-strategy queue depth, drops, dispatch counts and signal latency."""
+    from .strategy_scheduler import get_strategy_scheduler
+    return get_strategy_scheduler().stats()
+
+
+@app.get('/debug/ws_broadcast')
+async def debug_ws_broadcast():
+    """Push websocket fan-out: per-client queue depth, drops, send latency and evictions."""
+    return {
+        'opportunities': manager.stats(),
+        'hotcoins': hot_manager.stats(),
+        'liquidations': liquidation_manager.stats(),
+    }
+
+
+@app.get('/debug/user_stream')
+async def debug_user_stream():
+    """Futures user data stream: connection, reconciles, event counts and mirror size."""
+    return get_user_stream().stats()
+
+
+@app.get('/debug/tpsl')
+async def debug_tpsl():
+    """TP/SL trigger engine: armed levels, mark vs REST symbols, fires and trigger latency."""
+    from .tpsl_engine import get_tpsl_engine
+    return get_tpsl_engine().stats()
+
+
+@app.get('/debug/trading_sessions')
+async def debug_trading_sessions():
+    """Pooled order-entry sessions: health, cached leverage and order ack latency."""
+    from .trading_sessions import get_trading_session_pool
+    return get_trading_session_pool().stats()
+
+
+@app.get('/debug/live_hub')
+async def debug_live_hub():
+    """Shared /ws/live-dashboard upstream: clients, queue depth, drops and resyncs."""
+    from .live_account_hub import get_live_account_hub
+    return get_live_account_hub().stats()
+
+
+@app.get('/debug/http')
+async def debug_http():
+    """Shared HTTP client pools, coalescing counters and per-host rate buckets."""
+    return _http.stats()
 
 # -----------------------------------------------------------------------------
 # In-memory state
@@ -1249,9 +1237,10 @@ _scanner_task: Optional[asyncio.Task] = None
 _hotcoins_task: Optional[asyncio.Task] = None
 _vol_index_task: Optional[asyncio.Task] = None
 _position_monitor_task: Optional[asyncio.Task] = None
-manager = ConnectionManager()
-hot_manager = ConnectionManager()
-liquidation_manager = ConnectionManager()
+# per-client queues: snapshots conflate (latest wins), liquidation events drop oldest
+manager = WsBroadcaster('opportunities', policy='latest')
+hot_manager = WsBroadcaster('hotcoins', policy='latest')
+liquidation_manager = WsBroadcaster('liquidations', policy='events')
 _ccxt_instances: Dict[str, object] = {}
 
 # In-memory buffer of recent liquidation events (dicts with ts (ISO), msg)
@@ -1317,20 +1306,17 @@ def get_defi_vaults():
     - Venus (BSC)
     - Benqi (Avalanche)
     """
-    from urllib import request as _req
-    import json as js
-    
     vaults = []
     
     # Fetch real-time data from DeFiLlama Yields API
     try:
         # Fetch pools data from DeFiLlama
         print("[DEBUG] Starting DeFiLlama API request...")
-        req = _req.Request('https://yields.llama.fi/pools')
-        req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        with _req.urlopen(req, timeout=10) as resp:
-            print(f"[DEBUG] API response status: {resp.status}")
-            data = js.loads(resp.read().decode('utf-8'))
+        data = _http.get_json_sync(
+            'https://yields.llama.fi/pools',
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+            timeout=10,
+        )
             
         pools = data.get('data', [])
         print(f"[DEBUG] Fetched {len(pools)} pools from DeFiLlama API")
@@ -1980,7 +1966,6 @@ async def get_wallet_balance(address: str, chains: str = 'ethereum,bsc,polygon,a
         chains: Comma-separated list of chains (default: ethereum,bsc,polygon,arbitrum,optimism,base,avalanche)
     """
     try:
-        import requests
         from decimal import Decimal
         
         chain_list = [c.strip().lower() for c in chains.split(',')]
@@ -2036,8 +2021,8 @@ async def get_wallet_balance(address: str, chains: str = 'ethereum,bsc,polygon,a
         prices = {}
         try:
             price_url = f"https://api.coingecko.com/api/v3/simple/price?ids={','.join(unique_coingecko_ids)}&vs_currencies=usd"
-            price_response = requests.get(price_url, timeout=5)
-            if price_response.ok:
+            price_response = await _http.request('GET', price_url, timeout=5)
+            if price_response.is_success:
                 price_data = price_response.json()
                 for gecko_id, data in price_data.items():
                     prices[gecko_id] = data.get('usd', 0)
@@ -2055,9 +2040,10 @@ async def get_wallet_balance(address: str, chains: str = 'ethereum,bsc,polygon,a
             
             try:
                 # Fetch native token balance via eth_getBalance
-                response = requests.post(
+                response = await _http.request(
+                    'POST',
                     config['rpc'],
-                    json={
+                    json_body={
                         'jsonrpc': '2.0',
                         'method': 'eth_getBalance',
                         'params': [address, 'latest'],
@@ -2066,7 +2052,7 @@ async def get_wallet_balance(address: str, chains: str = 'ethereum,bsc,polygon,a
                     timeout=10
                 )
                 
-                if response.ok:
+                if response.is_success:
                     result = response.json().get('result', '0x0')
                     balance_wei = int(result, 16)
                     balance = balance_wei / (10 ** config['decimals'])
@@ -2236,14 +2222,11 @@ async def _trigger_alert(alert: dict, vault: dict, message: str):
     # Send webhook notification if configured
     if alert.get('notification_method') == 'webhook' and alert.get('webhook_url'):
         try:
-            import json
-            req = _urllib_request.Request(
-                alert['webhook_url'],
-                data=json.dumps(notification_data).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            with _urllib_request.urlopen(req, timeout=5) as resp:
+            resp = await _http.request('POST', alert['webhook_url'], json_body=notification_data, timeout=5)
+            if 200 <= resp.status_code < 300:
                 print(f"[ALERT] Webhook sent successfully to {alert['webhook_url']}")
+            else:
+                print(f"[ALERT] Failed to send webhook: HTTP {resp.status_code}")
         except Exception as e:
             print(f"[ALERT] Failed to send webhook: {e}")
     
@@ -2512,7 +2495,6 @@ async def api_live_check(symbol: str = 'ALPINEUSDT'):
                 # If not present in loaded markets, try Binance Futures REST ticker lookup
                 if not out['symbol_present'] and symbol:
                     try:
-                        import urllib.request as _urlreq, urllib.parse as _urlparse, ssl as _ssl
                         cand = []
                         s = symbol.replace('/', '').upper()
                         cand.append(s)
@@ -2524,23 +2506,21 @@ async def api_live_check(symbol: str = 'ALPINEUSDT'):
                             cand.append(s + 'USDT.P')
                         cand = list(dict.fromkeys(cand))
                         checked = []
-                        ctx = _ssl.create_default_context()
                         for c in cand:
                             try:
-                                qs = _urlparse.urlencode({'symbol': c})
-                                url = BINANCE_FUTURES_TICKER_URL + '?' + qs
-                                with _urlreq.urlopen(url, context=ctx, timeout=5) as resp:
-                                    txt = resp.read().decode('utf8')
-                                    try:
-                                        j = json.loads(txt)
-                                    except Exception:
-                                        j = None
-                                    checked.append({'symbol': c, 'resp': j})
-                                    # typical response: { 'symbol': 'XPLUSUSDT.P', 'price': '0.123' } or list
-                                    if isinstance(j, dict) and (j.get('symbol') or j.get('price')):
-                                        out['symbol_present'] = True
-                                        out['checked_futures_ticker'] = c
-                                        break
+                                resp = await _http.request('GET', BINANCE_FUTURES_TICKER_URL, params={'symbol': c}, timeout=5)
+                                if not (200 <= resp.status_code < 300):
+                                    continue
+                                try:
+                                    j = resp.json()
+                                except Exception:
+                                    j = None
+                                checked.append({'symbol': c, 'resp': j})
+                                # typical response: { 'symbol': 'XPLUSUSDT.P', 'price': '0.123' } or list
+                                if isinstance(j, dict) and (j.get('symbol') or j.get('price')):
+                                    out['symbol_present'] = True
+                                    out['checked_futures_ticker'] = c
+                                    break
                             except Exception:
                                 continue
                         if 'checked_futures_ticker' not in out:
@@ -2790,22 +2770,28 @@ async def api_dashboard(mode: str = 'test'):
             positions = [p for p in positions if getattr(p, 'is_live', False)]
             
             # Reconcile with Binance - check if positions still exist
-            # NOTE: Only reconcile at most once per minute to avoid excessive API calls
+            # NOTE: against the user data stream mirror on every call; over REST at most
+            # once per minute to avoid excessive API calls
             live_enabled = os.environ.get('ARB_ALLOW_LIVE_ORDERS', '0').strip() == '1'
             current_time = time.time()
+            mirror = synced_mirror()
             should_reconcile = (
                 live_enabled 
                 and positions 
-                and (current_time - _reconciliation_cache['timestamp'] >= _reconciliation_cache_ttl)
+                and (mirror is not None
+                     or current_time - _reconciliation_cache['timestamp'] >= _reconciliation_cache_ttl)
             )
             
             if should_reconcile:
                 try:
-                    print(f"[RECONCILE] Running position reconciliation (last check: {int(current_time - _reconciliation_cache['timestamp'])}s ago)")
-                    _reconciliation_cache['timestamp'] = current_time
-                    
-                    # Fetch actual positions from Binance (using sync version in thread pool)
-                    binance_positions = await asyncio.to_thread(_get_binance_positions_sync)
+                    if mirror is not None:
+                        binance_positions = mirror.positions_list()
+                    else:
+                        print(f"[RECONCILE] Running position reconciliation (last check: {int(current_time - _reconciliation_cache['timestamp'])}s ago)")
+                        _reconciliation_cache['timestamp'] = current_time
+                        
+                        # Fetch actual positions from Binance (using sync version in thread pool)
+                        binance_positions = await asyncio.to_thread(_get_binance_positions_sync)
                     
                     # Create a set of normalized symbols from Binance (convert MYX/USDT:USDT -> MYXUSDT)
                     binance_symbols = set()
@@ -2816,15 +2802,19 @@ async def api_dashboard(mode: str = 'test'):
                             normalized = raw_symbol.replace('/', '').replace(':USDT', '')
                             binance_symbols.add(normalized)
                     
-                    print(f"[RECONCILE] Binance positions (normalized): {binance_symbols}")
+                    if mirror is None:
+                        print(f"[RECONCILE] Binance positions (normalized): {binance_symbols}")
                     
                     # Check each local position
                     positions_to_close = []
                     for pos in positions:
                         if pos.symbol not in binance_symbols:
+                            # the stream's ACCOUNT_UPDATE can trail a just-acknowledged entry
+                            if mirror is not None and current_time * 1000 - (pos.entry_time or 0) < 10_000:
+                                continue
                             print(f"[RECONCILE] Position {pos.symbol} not found on Binance - marking as closed")
                             positions_to_close.append(pos)
-                        else:
+                        elif mirror is None:
                             print(f"[RECONCILE] Position {pos.symbol} confirmed on Binance")
                     
                     # Close positions that don't exist on Binance anymore
@@ -3389,6 +3379,11 @@ def _get_binance_order_history(symbol: Optional[str] = None, limit: int = 100, s
 
 def _get_binance_futures_balance():
     """Synchronous function to get Binance Futures balance with caching."""
+    # live user data stream mirror: no REST call
+    mirror = synced_mirror()
+    if mirror is not None:
+        return mirror.balance_info()
+    
     current_time = time.time()
     
     # Check cache first
@@ -3505,6 +3500,11 @@ def _get_binance_positions_sync():
     """
     global _positions_cache
     
+    # live user data stream mirror: no REST call
+    mirror = synced_mirror()
+    if mirror is not None:
+        return mirror.positions_list()
+    
     try:
         import ccxt  # Use regular CCXT, not ccxtpro
         
@@ -3575,6 +3575,18 @@ def _get_binance_positions_sync():
         traceback.print_exc()
         return []
 
+async def _manual_live_entry(symbol, side, size, leverage, market_type, stop_loss, take_profit, use_ws, t_arrival):
+    """Send a manual entry (plus SL/TP) through the pooled, pre-warmed trading session."""
+    from .trading_sessions import credentials, get_trading_session_pool
+    
+    api_key, api_secret = credentials('binance')
+    if not api_key or not api_secret:
+        raise HTTPException(status_code=400, detail='Binance API keys not configured')
+    session = await get_trading_session_pool().get('binance', market_type)
+    return await session.enter(symbol, side, size, leverage=leverage, stop_loss=stop_loss, take_profit=take_profit,
+                               use_ws=use_ws, t_arrival=t_arrival)
+
+
 @app.post('/api/manual-trade')
 async def api_manual_trade(request: dict):
     """Place a manual test trade (paper trading).
@@ -3590,9 +3602,9 @@ async def api_manual_trade(request: dict):
         "entry_price": 97000.50
     }
     """
+    t_arrival = time.perf_counter()
     try:
         from .live_dashboard import get_dashboard, Position
-        import time
         
         dashboard = get_dashboard()
         
@@ -3651,49 +3663,14 @@ async def api_manual_trade(request: dict):
         # Execute real order on Binance if allow_live=True
         binance_order_id = None
         actual_entry_price = entry_price
+        timing = None
         
         if allow_live:
             try:
-                import ccxt
-                
-                # Get API keys
-                api_key = os.environ.get('BINANCE_API_KEY', '')
-                api_secret = os.environ.get('BINANCE_API_SECRET', '')
-                
-                if not api_key or not api_secret:
-                    raise HTTPException(status_code=400, detail='Binance API keys not configured')
-                
-                # Initialize exchange
-                exchange = ccxt.binance({
-                    'apiKey': api_key,
-                    'secret': api_secret,
-                    'options': {
-                        'defaultType': 'future' if market_type == 'futures' else 'spot',
-                    },
-                    'enableRateLimit': True,  # Enable built-in rate limiting
-                })
-                
-                # Set leverage for futures (only if needed)
-                if market_type == 'futures' and leverage > 1:
-                    await asyncio.to_thread(exchange.set_leverage, leverage, symbol)
-                
-                # Place market order
-                order_side = 'buy' if side == 'long' else 'sell'
-                position_side = 'LONG' if side == 'long' else 'SHORT'
-                
-                # For Binance Futures in Hedge Mode, we need to specify positionSide
-                order = await asyncio.to_thread(
-                    exchange.create_order,
-                    symbol,
-                    'market',
-                    order_side,
-                    size,
-                    None,
-                    {
-                        'positionSide': position_side
-                    }
-                )
-                
+                live = await _manual_live_entry(symbol, side, size, leverage, market_type, stop_loss, take_profit,
+                                                use_ws=False, t_arrival=t_arrival)
+                order = live['order']
+                timing = live['timing']
                 binance_order_id = order.get('id')
                 actual_entry_price = order.get('average') or order.get('price') or entry_price
                 
@@ -3702,79 +3679,12 @@ async def api_manual_trade(request: dict):
                 entry_fee = order_value * 0.0004  # Binance Futures taker fee (0.04%)
                 dashboard.add_fee_paid(entry_fee)
                 
-                print(f"[LIVE ORDER] Binance order executed: {binance_order_id}, side={order_side}, size={size}, price={actual_entry_price}")
+                print(f"[LIVE ORDER] Binance order executed: {binance_order_id}, side={side}, size={size}, price={actual_entry_price}")
                 print(f"[LIVE ORDER] Order value: ${order_value:.2f}, Entry fee: ${entry_fee:.4f}")
-                print(f"[TIMING] Main order: {order_time:.0f}ms")
-                
-                # Place Stop-Loss and Take-Profit orders in parallel for speed
-                async def place_sl_order():
-                    if not stop_loss:
-                        return None
-                    try:
-                        sl_side = 'sell' if side == 'long' else 'buy'
-                        start = time.time()
-                        sl_order = await asyncio.to_thread(
-                            exchange.create_order,
-                            symbol,
-                            'STOP_MARKET',
-                            sl_side,
-                            size,
-                            None,
-                            {
-                                'stopPrice': stop_loss,
-                                'positionSide': position_side,
-                                'closePosition': True,
-                                'workingType': 'MARK_PRICE'
-                            }
-                        )
-                        sl_time = (time.time() - start) * 1000
-                        print(f"[LIVE ORDER] Stop-Loss order placed: {sl_order.get('id')} @ ${stop_loss:.2f} ({sl_time:.0f}ms)")
-                        return sl_order
-                    except Exception as e:
-                        print(f"[ERROR] Failed to place Stop-Loss order: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        return None
-                
-                async def place_tp_order():
-                    if not take_profit:
-                        return None
-                    try:
-                        tp_side = 'sell' if side == 'long' else 'buy'
-                        start = time.time()
-                        tp_order = await asyncio.to_thread(
-                            exchange.create_order,
-                            symbol,
-                            'TAKE_PROFIT_MARKET',
-                            tp_side,
-                            size,
-                            None,
-                            {
-                                'stopPrice': take_profit,
-                                'positionSide': position_side,
-                                'closePosition': True,
-                                'workingType': 'MARK_PRICE'
-                            }
-                        )
-                        tp_time = (time.time() - start) * 1000
-                        print(f"[LIVE ORDER] Take-Profit order placed: {tp_order.get('id')} @ ${take_profit:.2f} ({tp_time:.0f}ms)")
-                        return tp_order
-                    except Exception as e:
-                        print(f"[ERROR] Failed to place Take-Profit order: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        return None
-                
-                # Execute SL and TP orders in parallel
-                start_sltp = time.time()
-                sl_result, tp_result = await asyncio.gather(
-                    place_sl_order(),
-                    place_tp_order(),
-                    return_exceptions=True
-                )
-                sltp_time = (time.time() - start_sltp) * 1000
-                print(f"[TIMING] SL/TP orders: {sltp_time:.0f}ms (parallel)")
-                
+                print(f"[TIMING] Main order: {timing['total_ms']:.0f}ms from request (ack {timing['ack_ms']:.0f}ms), "
+                      f"SL/TP: {timing['protect_ms']:.0f}ms (parallel)")
+            except HTTPException:
+                raise
             except Exception as e:
                 print(f"[ERROR] Failed to execute live order on Binance: {e}")
                 raise HTTPException(status_code=500, detail=f'Failed to execute order on Binance: {str(e)}')
@@ -3804,7 +3714,8 @@ async def api_manual_trade(request: dict):
                 'leverage': leverage,
                 'stop_loss': stop_loss,
                 'take_profit': take_profit
-            }
+            },
+            'timing': timing
         }
     except HTTPException:
         raise
@@ -3829,9 +3740,9 @@ async def api_manual_trade_ws(request: dict):
         "allow_live": true
     }
     """
+    t_arrival = time.perf_counter()
     try:
         from .live_dashboard import get_dashboard, Position
-        import time
         
         dashboard = get_dashboard()
         
@@ -3890,158 +3801,30 @@ async def api_manual_trade_ws(request: dict):
         # Execute real order on Binance using WebSocket if allow_live=True
         binance_order_id = None
         actual_entry_price = entry_price
+        timing = None
         
         if allow_live:
-            exchange = None
-            session = None
-            connector = None
             try:
-                import ccxt.pro as ccxtpro
-                import aiohttp
-                from aiohttp.resolver import ThreadedResolver
-                
-                # Get API keys
-                api_key = os.environ.get('BINANCE_API_KEY', '')
-                api_secret = os.environ.get('BINANCE_API_SECRET', '')
-                
-                if not api_key or not api_secret:
-                    raise HTTPException(status_code=400, detail='Binance API keys not configured')
-                
-                # Create resolver, connector, and session (same as dashboard WebSocket)
-                resolver = ThreadedResolver()
-                connector = aiohttp.TCPConnector(
-                    resolver=resolver,
-                    limit=100,
-                    ttl_dns_cache=300,
-                    use_dns_cache=True,
-                    force_close=False,
-                )
-                session = aiohttp.ClientSession(connector=connector)
+                live = await _manual_live_entry(symbol, side, size, leverage, market_type, stop_loss, take_profit,
+                                                use_ws=True, t_arrival=t_arrival)
+                order = live['order']
+                timing = live['timing']
+                binance_order_id = order.get('id')
+                actual_entry_price = order.get('average') or order.get('price') or entry_price
                 
-                # Initialize WebSocket exchange
-                exchange = ccxtpro.binance({
-                    'apiKey': api_key,
-                    'secret': api_secret,
-                    'options': {
-                        'defaultType': 'future' if market_type == 'futures' else 'spot',
-                    },
-                    'enableRateLimit': True,
-                    'session': session,
-                })
+                # Calculate and track entry fee
+                order_value = actual_entry_price * size
+                entry_fee = order_value * 0.0004  # Binance Futures taker fee (0.04%)
+                dashboard.add_fee_paid(entry_fee)
                 
-                try:
-                    # Set leverage for futures (using REST as WS doesn't support this)
-                    if market_type == 'futures' and leverage > 1:
-                        await asyncio.to_thread(exchange.set_leverage, leverage, symbol)
-                    
-                    # Place market order via WebSocket - FASTER!
-                    order_side = 'buy' if side == 'long' else 'sell'
-                    position_side = 'LONG' if side == 'long' else 'SHORT'
-                    
-                    start = time.time()
-                    order = await exchange.create_order_ws(
-                        symbol,
-                        'market',
-                        order_side,
-                        size,
-                        None,
-                        {
-                            'positionSide': position_side
-                        }
-                    )
-                    order_time = (time.time() - start) * 1000
-                    
-                    binance_order_id = order.get('id')
-                    actual_entry_price = order.get('average') or order.get('price') or entry_price
-                    
-                    # Calculate and track entry fee
-                    order_value = actual_entry_price * size
-                    entry_fee = order_value * 0.0004  # Binance Futures taker fee (0.04%)
-                    dashboard.add_fee_paid(entry_fee)
-                    
-                    print(f"[LIVE ORDER WS] ✅ Binance order executed via WebSocket: {binance_order_id}")
-                    print(f"[LIVE ORDER WS] side={order_side}, size={size}, price={actual_entry_price}")
-                    print(f"[TIMING WS] Main order: {order_time:.0f}ms")
-                    
-                    # Place Stop-Loss and Take-Profit orders via HTTP (more reliable than WS for these order types)
-                    # Note: Binance doesn't fully support TP/SL via WebSocket yet, so we use HTTP
-                    async def place_sl_order_http():
-                        if not stop_loss:
-                            return None
-                        try:
-                            sl_side = 'sell' if side == 'long' else 'buy'
-                            start = time.time()
-                            sl_order = await asyncio.to_thread(
-                                exchange.create_order,
-                                symbol,
-                                'STOP_MARKET',
-                                sl_side,
-                                size,
-                                None,
-                                {
-                                    'stopPrice': stop_loss,
-                                    'positionSide': position_side,
-                                    'closePosition': True,
-                                    'workingType': 'MARK_PRICE'
-                                }
-                            )
-                            sl_time = (time.time() - start) * 1000
-                            print(f"[LIVE ORDER WS] ✅ Stop-Loss placed: {sl_order.get('id')} @ ${stop_loss:.2f} ({sl_time:.0f}ms)")
-                            return sl_order
-                        except Exception as e:
-                            print(f"[ERROR WS] Failed to place Stop-Loss: {e}")
-                            return None
-                    
-                    async def place_tp_order_http():
-                        if not take_profit:
-                            return None
-                        try:
-                            tp_side = 'sell' if side == 'long' else 'buy'
-                            start = time.time()
-                            tp_order = await asyncio.to_thread(
-                                exchange.create_order,
-                                symbol,
-                                'TAKE_PROFIT_MARKET',
-                                tp_side,
-                                size,
-                                None,
-                                {
-                                    'stopPrice': take_profit,
-                                    'positionSide': position_side,
-                                    'closePosition': True,
-                                    'workingType': 'MARK_PRICE'
-                                }
-                            )
-                            tp_time = (time.time() - start) * 1000
-                            print(f"[LIVE ORDER WS] ✅ Take-Profit placed: {tp_order.get('id')} @ ${take_profit:.2f} ({tp_time:.0f}ms)")
-                            return tp_order
-                        except Exception as e:
-                            print(f"[ERROR WS] Failed to place Take-Profit: {e}")
-                            return None
-                    
-                    # Execute SL and TP orders in parallel (HTTP method, more reliable)
-                    start_sltp = time.time()
-                    sl_result, tp_result = await asyncio.gather(
-                        place_sl_order_http(),
-                        place_tp_order_http(),
-                        return_exceptions=True
-                    )
-                    sltp_time = (time.time() - start_sltp) * 1000
-                    print(f"[TIMING WS] SL/TP orders: {sltp_time:.0f}ms (parallel HTTP)")
-                    
-                finally:
-                    # Proper cleanup: close in reverse order
-                    if exchange:
-                        await exchange.close()
-                    if session:
-                        await session.close()
-                    if connector:
-                        await connector.close()
-                    
+                print(f"[LIVE ORDER WS] Binance order executed: {binance_order_id}, side={side}, size={size}, price={actual_entry_price}")
+                print(f"[LIVE ORDER WS] Order value: ${order_value:.2f}, Entry fee: ${entry_fee:.4f}")
+                print(f"[TIMING WS] Main order: {timing['total_ms']:.0f}ms from request (ack {timing['ack_ms']:.0f}ms), "
+                      f"SL/TP: {timing['protect_ms']:.0f}ms (parallel)")
+            except HTTPException:
+                raise
             except Exception as e:
-                print(f"[ERROR WS] Failed to execute live order via WebSocket: {e}")
-                import traceback
-                traceback.print_exc()
+                print(f"[ERROR] Failed to execute live order on Binance: {e}")
                 raise HTTPException(status_code=500, detail=f'Failed to execute order via WebSocket: {str(e)}')
         
         position = Position(
@@ -4070,7 +3853,8 @@ async def api_manual_trade_ws(request: dict):
                 'stop_loss': stop_loss,
                 'take_profit': take_profit
             },
-            'method': 'WebSocket'
+            'method': 'WebSocket',
+            'timing': timing
         }
     except HTTPException:
         raise
@@ -4454,24 +4238,21 @@ MAJOR_CAP_USDT = {
 
 def _http_get_json_sync(url: str, timeout: float = 10.0):
     try:
-        req = _urllib_request.Request(url, headers={"User-Agent": "arb-check/1.0"})
-        with _urllib_request.urlopen(req, timeout=timeout) as r:
-            response_text = r.read().decode('utf-8')
-            return json.loads(response_text)
-    except _urllib_error.HTTPError as e:
+        return _http.get_json_sync(url, timeout=timeout)
+    except _http.HttpError as e:
         # HTTP error (4xx, 5xx)
-        error_body = e.read().decode('utf-8') if e.fp else 'No error body'
-        print(f"[ERROR] HTTP {e.code} for {url}: {error_body}")
+        error_body = e.body or 'No error body'
+        print(f"[ERROR] HTTP {e.status} for {url}: {error_body}")
         try:
-            server_logs.append({"ts": _dt.datetime.utcnow().isoformat(), "text": f"http {e.code}: {error_body}"})
+            server_logs.append({"ts": _dt.datetime.utcnow().isoformat(), "text": f"http {e.status}: {error_body}"})
         except Exception:
             pass
         return None
-    except _urllib_error.URLError as e:
+    except (OSError, _http.TransportError) as e:
         # Network error
-        print(f"[ERROR] Network error for {url}: {str(e.reason)}")
+        print(f"[ERROR] Network error for {url}: {str(e)}")
         try:
-            server_logs.append({"ts": _dt.datetime.utcnow().isoformat(), "text": f"network error: {str(e.reason)}"})
+            server_logs.append({"ts": _dt.datetime.utcnow().isoformat(), "text": f"network error: {str(e)}"})
         except Exception:
             pass
         return None
@@ -4485,16 +4266,12 @@ def _http_get_json_sync(url: str, timeout: float = 10.0):
 
 
 def _fetch_klines_sync(symbol: str, interval: str = '1m', limit: int = 100, startTime: Optional[int] = None, market: str = 'spot'):
-    base = BINANCE_KLINES_URL if market == 'spot' else BINANCE_FUTURES_KLINES_URL
-    params = {"symbol": symbol, "interval": interval, "limit": limit}
-    if startTime is not None:
-        params["startTime"] = int(startTime)
-    q = _urllib_parse.urlencode(params)
-    url = f"{base}?{q}"
-    data = _http_get_json_sync(url)
-    if not isinstance(data, list):
+    # served from the shared kline store; REST only for backfills
+    try:
+        return get_kline_store().get_klines(symbol, interval, limit, market=market, start_time=startTime)
+    except Exception as e:
+        print(f"[ERROR] klines {market} {symbol} {interval}: {e}")
         return []
-    return data
 
 
 async def _fetch_ticker_async(symbol: str, market: str = 'spot') -> Optional[float]:
@@ -4510,11 +4287,10 @@ async def _fetch_ticker_async(symbol: str, market: str = 'spot') -> Optional[flo
             return cached_price
     
     try:
-        import httpx
         base = BINANCE_TICKER_URL if market == 'spot' else BINANCE_FUTURES_TICKER_URL
         url = f"{base}?symbol={symbol}"
         
-        async with httpx.AsyncClient(timeout=3.0) as client:
+        async with _http.session(timeout=3.0) as client:
             response = await client.get(url, headers={"User-Agent": "arb-check/1.0"})
             if response.status_code != 200:
                 print(f"[WARNING] HTTP {response.status_code} for {symbol} ({market})")
@@ -4530,7 +4306,7 @@ async def _fetch_ticker_async(symbol: str, market: str = 'spot') -> Optional[flo
             _price_cache[cache_key] = (price, now)
             return price
             
-    except httpx.TimeoutException:
+    except _http.TimeoutException:
         print(f"[WARNING] Timeout fetching ticker for {symbol} ({market})")
         return None
     except Exception as e:
@@ -5059,7 +4835,7 @@ async def _notifier_loop():
                     if batch:
                         payload = {'type': 'server_log_batch', 'count': len(batch), 'logs': batch}
                         try:
-                            _feature_extractor._post_webhook(payload)
+                            await asyncio.to_thread(_feature_extractor._post_webhook, payload)
                         except Exception:
                             pass
                     _last_notified_index = ln
@@ -5174,7 +4950,6 @@ async def api_preview_hedge(request: dict):
 
     # fetch binance funding via async call (best-effort)
     try:
-        import httpx
         params = {
             'symbol': symbol.replace('/', ''),
             'startTime': str(start_ms),
@@ -5183,7 +4958,7 @@ async def api_preview_hedge(request: dict):
         }
         url = 'https://fapi.binance.com/fapi/v1/fundingRate'
         
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        async with _http.session(timeout=5.0) as client:
             response = await client.get(url, params=params)
             if response.status_code == 200:
                 funding = response.json()
@@ -5326,7 +5101,7 @@ async def api_preview_hedge(request: dict):
         except Exception:
             pass
         try:
-            await manager.broadcast(json.dumps(resp))
+            await manager.broadcast(json.dumps(resp), kind='preview_hedge')
         except Exception:
             pass
     except Exception:
@@ -5489,12 +5264,7 @@ async def api_preview_top(limit: int = 20, notional: float | None = None, symbol
             else:
                 # discover top USDT perpetuals by quoteVolume using Binance ticker API
                 try:
-                    import urllib.request, ssl, json
-                    TICKER_API = 'https://fapi.binance.com/fapi/v1/ticker/24hr'
-                    ctx = ssl.create_default_context()
-                    with urllib.request.urlopen(TICKER_API, context=ctx, timeout=10) as resp:
-                        data = resp.read().decode('utf8')
-                    tickers = json.loads(data)
+                    tickers = await _http.get_json('https://fapi.binance.com/fapi/v1/ticker/24hr', timeout=10)
                     usdt = [t for t in tickers if t.get('symbol','').endswith('USDT')]
                     usdt_sorted = sorted(usdt, key=lambda t: float(t.get('quoteVolume') or 0.0), reverse=True)
                     # Only fetch the requested limit (default 20) to avoid slow processing
@@ -5516,7 +5286,6 @@ async def api_preview_top(limit: int = 20, notional: float | None = None, symbol
 
         # Build funding-based ranking similar to tools/binance_3day_revenue.py
         try:
-            import urllib.request, urllib.parse, ssl
             # allow caller to request different lookback window (default 3 days)
             try:
                 days = int(days)
@@ -5547,12 +5316,12 @@ async def api_preview_top(limit: int = 20, notional: float | None = None, symbol
 
             for orig, bin_sym in to_check:
                 try:
-                    qs = urllib.parse.urlencode({'symbol': bin_sym, 'startTime': str(start_ms), 'endTime': str(now_ms), 'limit': 1000})
-                    url = 'https://fapi.binance.com/fapi/v1/fundingRate?' + qs
-                    ctx = ssl.create_default_context()
                     # Reduced timeout from 8s to 5s for faster failure
-                    with urllib.request.urlopen(url, context=ctx, timeout=5) as resp:
-                        funding = json.loads(resp.read().decode('utf8'))
+                    funding = await _http.get_json(
+                        'https://fapi.binance.com/fapi/v1/fundingRate',
+                        params={'symbol': bin_sym, 'startTime': str(start_ms), 'endTime': str(now_ms), 'limit': 1000},
+                        timeout=5,
+                    )
                     total = 0.0
                     last = None
                     count = 0
@@ -5575,11 +5344,10 @@ async def api_preview_top(limit: int = 20, notional: float | None = None, symbol
                     
                     # Fetch current funding rate and next funding time from Binance premiumIndex
                     try:
-                        premium_url = f'https://fapi.binance.com/fapi/v1/premiumIndex?symbol={bin_sym}'
-                        with urllib.request.urlopen(premium_url, context=ctx, timeout=3) as resp:
-                            premium_data = json.loads(resp.read().decode('utf8'))
-                            current_funding_rate = float(premium_data.get('lastFundingRate', current_funding_rate))
-                            next_funding_time = int(premium_data.get('nextFundingTime', 0))
+                        premium_data = await _http.get_json('https://fapi.binance.com/fapi/v1/premiumIndex',
+                                                            params={'symbol': bin_sym}, timeout=3)
+                        current_funding_rate = float(premium_data.get('lastFundingRate', current_funding_rate))
+                        next_funding_time = int(premium_data.get('nextFundingTime', 0))
                     except Exception:
                         # If premium API fails, estimate next funding time (every 8 hours)
                         if last:
@@ -5653,7 +5421,7 @@ async def api_preview_top(limit: int = 20, notional: float | None = None, symbol
                 except Exception:
                     pass
                 try:
-                    await manager.broadcast(json.dumps(payload))
+                    await manager.broadcast(json.dumps(payload), kind='preview_candidates_top')
                 except Exception:
                     pass
             except Exception:
@@ -5774,6 +5542,21 @@ async def _on_startup():
     global _vault_apy_monitor_task
     if _vault_apy_monitor_task is None:
         _vault_apy_monitor_task = asyncio.create_task(_update_vault_apy_monitor())
+    # mirror the futures account from the user data stream instead of REST polling
+    try:
+        if (os.environ.get('ARB_ALLOW_LIVE_ORDERS', '0').strip() == '1'
+                and os.environ.get('ARB_USER_STREAM', '1').strip() != '0'
+                and os.environ.get('BINANCE_API_KEY') and os.environ.get('BINANCE_API_SECRET')):
+            get_user_stream().start()
+    except Exception as e:
+        print(f"[STARTUP] user data stream not started: {e}")
+    # warm the order-entry session so the first manual trade skips DNS/TLS/market loading
+    try:
+        from .trading_sessions import available, credentials, get_trading_session_pool
+        if os.environ.get('ARB_ALLOW_LIVE_ORDERS', '0').strip() == '1' and available() and all(credentials('binance')):
+            asyncio.create_task(get_trading_session_pool().prewarm())
+    except Exception as e:
+        print(f"[STARTUP] trading session prewarm skipped: {e}")
 
 
 @app.on_event('shutdown')
@@ -5802,20 +5585,71 @@ async def _on_shutdown():
         except Exception:
             pass
         _top_futures_task = None
+    try:
+        get_user_stream().stop()
+    except Exception:
+        pass
+    # close pooled order-entry sessions
+    try:
+        from .trading_sessions import get_trading_session_pool
+        await get_trading_session_pool().close_all()
+    except Exception:
+        pass
+    # close the shared HTTP pool bound to the app loop
+    try:
+        await _http.aclose()
+    except Exception:
+        pass
 
 # -----------------------------------------------------------------------------
 # Scanner loop (opportunities)
 # -----------------------------------------------------------------------------
 async def _scanner_loop():
-    """Background scanner loop to compute dry-run opportunities and broadcast."""
+    """Background scanner loop to compute dry-run opportunities and broadcast.
+
+    The loop waits on the book event bus: when feeders report top-of-book
+    changes it rescans only the symbols that moved (after a short debounce)
+    and merges them into the previous result. Rescans are at least
+    ARB_SCAN_MIN_GAP_S (default 0.1s) apart. Venues that publish no book
+    events (REST/mock adapters) are polled every ARB_SCAN_INTERVAL seconds
+    and the symbols whose quotes changed are rescanned the same way (see
+    ``RescanPlanner``). A full scan runs at least every
+    ARB_SCAN_FULL_INTERVAL seconds; ARB_SCAN_EVENTS=0 restores a full scan
+    every ARB_SCAN_INTERVAL.
+    """
     global latest_opportunities
     interval = float(os.environ.get("ARB_SCAN_INTERVAL", "0.8"))
+    full_interval = float(os.environ.get("ARB_SCAN_FULL_INTERVAL", "10.0"))
+    debounce = float(os.environ.get("ARB_SCAN_DEBOUNCE_MS", "50")) / 1000.0
+    min_gap = float(os.environ.get("ARB_SCAN_MIN_GAP_S", "0.1"))
 
     amount = float(os.environ.get("ARB_DEFAULT_AMOUNT", "1.0"))
     min_profit = float(os.environ.get("ARB_MIN_PROFIT_PCT", "0.01"))
     min_price_diff_pct = float(os.environ.get("ARB_MIN_PRICE_DIFF_PCT", "1.0"))
     use_ccxt = os.environ.get("ARB_USE_CCXT", "0").strip() == "1"
 
+    book_sub = None
+    if os.environ.get("ARB_SCAN_EVENTS", "1").strip() != "0":
+        book_sub = get_book_bus().subscribe(loop=asyncio.get_running_loop())
+    changed: dict = {}
+    last_scan = 0.0
+    planner = RescanPlanner(interval, full_interval)
+    # last payload this loop produced (latest_opportunities may be replaced by other endpoints)
+    prev_payload: dict = {}
+
+    async def _next_changes() -> dict:
+        if book_sub is None:
+            await asyncio.sleep(interval)
+            return {}
+        got = await book_sub.wait(timeout=interval)
+        if got:
+            # let a burst of updates coalesce into one rescan, at most one per min_gap
+            pause = max(debounce, min_gap - (time.time() - last_scan))
+            if pause > 0:
+                await asyncio.sleep(pause)
+                got.update(book_sub.drain())
+        return got
+
     try:
         while True:
             # Build demo exchanges
@@ -5846,14 +5680,33 @@ async def _scanner_loop():
                         "text": f"ccxt import/init failed: {str(e)}"
                     })
 
-            # Compute dry-run opportunities in thread
-            opps = await asyncio.to_thread(
-                compute_dryrun_opportunities,
-                exchanges_list,
-                amount,
-                min_profit,
-                min_price_diff_pct
-            )
+            # Compute dry-run opportunities in thread: only the symbols that
+            # moved (book events, or quotes of polled venues), everything on
+            # full scans
+            full_scan, moved = await asyncio.to_thread(planner.plan, exchanges_list, changed)
+            full_scan = full_scan or book_sub is None
+            if not full_scan and not moved:
+                changed = await _next_changes()
+                continue
+            last_scan = time.time()
+            if full_scan:
+                opps = await asyncio.to_thread(
+                    compute_dryrun_opportunities,
+                    exchanges_list,
+                    amount,
+                    min_profit,
+                    min_price_diff_pct
+                )
+            else:
+                fresh = await asyncio.to_thread(
+                    compute_dryrun_opportunities,
+                    exchanges_list,
+                    amount,
+                    min_profit,
+                    min_price_diff_pct,
+                    moved,
+                )
+                opps = merge_rescan(prev_payload.get('opportunities') or [], fresh, moved)
 
             payload = {'opportunities': opps}
 
@@ -5867,6 +5720,13 @@ async def _scanner_loop():
                 preview_top_n = 10
                 preview_notional = 10000.0
 
+            if not full_scan:
+                # previews hit REST endpoints; refresh them on full scans only
+                preview_enabled = False
+                prev_top = prev_payload.get('preview_candidates_top')
+                if prev_top is not None:
+                    payload['preview_candidates_top'] = prev_top
+
             if preview_enabled and opps:
                 # collect top symbols by profit_pct
                 try:
@@ -5885,13 +5745,11 @@ async def _scanner_loop():
                         start_ms = now_ms - 24 * 3600 * 1000
                         # fetch binance funding (best-effort)
                         try:
-                            funding = []
-                            import urllib.request, urllib.parse, ssl
-                            qs = urllib.parse.urlencode({'symbol': symbol.replace('/', ''), 'startTime': str(start_ms), 'endTime': str(now_ms), 'limit': 1000})
-                            url = 'https://fapi.binance.com/fapi/v1/fundingRate?' + qs
-                            ctx = ssl.create_default_context()
-                            with urllib.request.urlopen(url, context=ctx, timeout=10) as resp:
-                                funding = json.loads(resp.read().decode('utf8'))
+                            funding = await _http.get_json(
+                                'https://fapi.binance.com/fapi/v1/fundingRate',
+                                params={'symbol': symbol.replace('/', ''), 'startTime': str(start_ms), 'endTime': str(now_ms), 'limit': 1000},
+                                timeout=10,
+                            )
                             total_fund = sum(float(r.get('fundingRate') or 0.0) for r in funding)
                             avg_interval = total_fund / len(funding) if funding else 0.0
                         except Exception:
@@ -5982,25 +5840,29 @@ async def _scanner_loop():
                     pass
 
             latest_opportunities = payload
+            prev_payload = payload
 
             # Log + broadcast
             try:
                 from datetime import datetime
                 server_logs.append({
                     "ts": datetime.utcnow().isoformat(),
-                    "text": f"scan: {len(opps)} opps, use_ccxt={use_ccxt}"
+                    "text": f"scan: {len(opps)} opps, use_ccxt={use_ccxt}, changed={'all' if full_scan else len(moved)}"
                 })
             except Exception:
                 pass
 
             try:
-                await manager.broadcast(json.dumps(payload))
+                await manager.broadcast(json.dumps(payload), kind='opportunities')
             except Exception:
                 pass
 
-            await asyncio.sleep(interval)
+            changed = await _next_changes()
     except asyncio.CancelledError:
         return
+    finally:
+        if book_sub is not None:
+            book_sub.close()
 
 # -----------------------------------------------------------------------------
 # Hotcoins loop (single, correct implementation)
@@ -6575,71 +6437,16 @@ async def _vol_index_startup_loop():
 # Position Monitor - Auto-close positions when TP/SL hit
 # -----------------------------------------------------------------------------
 async def _monitor_positions():
-    """Background task to monitor positions and auto-close on TP/SL."""
-    print("[POSITION MONITOR] Started")
-    while True:
-        try:
-            await asyncio.sleep(5)  # Check every 5 seconds
-            
-            from .live_dashboard import get_dashboard
-            dashboard = get_dashboard()
-            positions = dashboard.get_all_positions()
-            
-            if not positions:
-                continue
-            
-            for pos in positions:
-                try:
-                    # Fetch current price (using async version - no blocking!)
-                    market = getattr(pos, 'market', None)
-                    if market is None:
-                        current_price = await _fetch_ticker_async(pos.symbol, 'futures')
-                        if not current_price:
-                            current_price = await _fetch_ticker_async(pos.symbol, 'spot')
-                    else:
-                        current_price = await _fetch_ticker_async(pos.symbol, market)
-                    
-                    if not current_price:
-                        continue
-                    
-                    # Check TP/SL
-                    should_close = False
-                    close_reason = None
-                    
-                    if pos.side == 'long':
-                        if pos.stop_loss and current_price <= pos.stop_loss:
-                            should_close = True
-                            close_reason = 'stop_loss'
-                        elif pos.take_profit and current_price >= pos.take_profit:
-                            should_close = True
-                            close_reason = 'take_profit'
-                    else:  # short
-                        if pos.stop_loss and current_price >= pos.stop_loss:
-                            should_close = True
-                            close_reason = 'stop_loss'
-                        elif pos.take_profit and current_price <= pos.take_profit:
-                            should_close = True
-                            close_reason = 'take_profit'
-                    
-                    if should_close:
-                        print(f"[POSITION MONITOR] 🎯 Auto-closing {pos.symbol} {pos.side.upper()} position - {close_reason.upper()} hit!")
-                        print(f"[POSITION MONITOR] Entry: ${pos.entry_price:.2f}, Current: ${current_price:.2f}, SL: ${pos.stop_loss:.2f}, TP: ${pos.take_profit:.2f}")
-                        
-                        # Calculate P&L
-                        if pos.side == 'long':
-                            pnl = (current_price - pos.entry_price) * pos.size
-                        else:
-                            pnl = (pos.entry_price - current_price) * pos.size
-                        
-                        # Close position
-                        dashboard.close_position(pos.symbol, current_price, close_reason)
-                        print(f"[POSITION MONITOR] ✅ Position closed - P&L: ${pnl:.2f}")
-                        
-                except Exception as e:
-                    print(f"[POSITION MONITOR ERROR] Failed to check {pos.symbol}: {e}")
-                    
-        except Exception as e:
-            print(f"[POSITION MONITOR ERROR] Monitor loop failed: {e}")
+    """Background task to auto-close positions on TP/SL.
+
+    Triggers fire on the futures mark price stream (see tpsl_engine); the
+    REST ticker is only polled for spot positions and stale marks.
+    """
+    from .tpsl_engine import get_tpsl_engine
+    engine = get_tpsl_engine()
+    if engine.price_fetcher is None:
+        engine.price_fetcher = _fetch_ticker_async
+    await engine.run()
 
 
 # -----------------------------------------------------------------------------
@@ -6709,7 +6516,7 @@ async def _start_scanner():
                     except Exception:
                         pass
                     try:
-                        await manager.broadcast(json.dumps(payload))
+                        await manager.broadcast(json.dumps(payload), kind='opportunities')
                     except Exception:
                         pass
                 except Exception as e:
@@ -6770,7 +6577,7 @@ async def _start_scanner():
 
                     try:
                         global _auto_feeders
-                        _auto_feeders = feeders_start_all(interval=1.0, symbols=symbols)
+                        _auto_feeders = feeders_start_all(interval=1.0, symbols=symbols, loop=asyncio.get_running_loop())
                         server_logs.append({"ts": __import__('datetime').datetime.utcnow().isoformat(), "text": f"auto-started feeders: {list(_auto_feeders.keys())} (subscribed {len(symbols)} symbols)"})
                     except Exception:
                         _auto_feeders = {}
@@ -6820,6 +6627,10 @@ async def _stop_scanner():
             _auto_feeders = {}
     except Exception:
         pass
+    try:
+        get_kline_store().stop()
+    except Exception:
+        pass
     # stop notifier task
     try:
         global _notifier_task
@@ -6834,39 +6645,20 @@ async def _stop_scanner():
 @app.websocket("/ws/opportunities")
 async def ws_opportunities(websocket: WebSocket):
     await manager.connect(websocket)
-    try:
-        # Send latest snapshot (dict with 'opportunities') or heartbeat
-        if latest_opportunities is not None:
-            try:
-                await websocket.send_text(json.dumps(latest_opportunities))
-            except Exception:
-                pass
-        else:
-            try:
-                from datetime import datetime
-                hb = {"type": "heartbeat", "ts": datetime.utcnow().isoformat()}
-                await websocket.send_text(json.dumps(hb))
-            except Exception:
-                pass
-        while True:
-            await asyncio.sleep(60.0)
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
+    # Send latest snapshot (dict with 'opportunities') or heartbeat
+    if latest_opportunities is not None:
+        manager.send_to(websocket, [json.dumps(latest_opportunities)])
+    else:
+        from datetime import datetime
+        manager.send_to(websocket, [json.dumps({"type": "heartbeat", "ts": datetime.utcnow().isoformat()})])
+    await manager.serve(websocket)
 
 @app.websocket("/ws/hotcoins")
 async def ws_hotcoins(websocket: WebSocket):
     await hot_manager.connect(websocket)
-    try:
-        try:
-            from datetime import datetime
-            hb = {"type": "heartbeat", "ts": datetime.utcnow().isoformat()}
-            await websocket.send_text(json.dumps(hb))
-        except Exception:
-            pass
-        while True:
-            await asyncio.sleep(60.0)
-    except WebSocketDisconnect:
-        hot_manager.disconnect(websocket)
+    from datetime import datetime
+    hot_manager.send_to(websocket, [json.dumps({"type": "heartbeat", "ts": datetime.utcnow().isoformat()})])
+    await hot_manager.serve(websocket)
 
 
 @app.websocket("/ws/liquidations")
@@ -6878,26 +6670,16 @@ async def ws_liquidations(websocket: WebSocket):
     - Keep the connection open; a background tailer (if running) can broadcast new events.
     """
     await liquidation_manager.connect(websocket)
+    # Try to send recent log lines if available
     try:
-        # Try to send recent log lines if available
-        try:
-            log_path = os.path.join(ROOT, 'tools', 'ccxt_out', 'binance_force_orders_ws.log')
-            if os.path.exists(log_path):
-                with open(log_path, 'r', encoding='utf-8') as fh:
-                    lines = fh.readlines()[-200:]
-                for ln in lines:
-                    try:
-                        await websocket.send_text(ln.strip())
-                    except Exception:
-                        break
-        except Exception:
-            pass
-
-        # keep websocket open
-        while True:
-            await asyncio.sleep(60.0)
-    except WebSocketDisconnect:
-        liquidation_manager.disconnect(websocket)
+        log_path = os.path.join(ROOT, 'tools', 'ccxt_out', 'binance_force_orders_ws.log')
+        if os.path.exists(log_path):
+            with open(log_path, 'r', encoding='utf-8') as fh:
+                lines = fh.readlines()[-200:]
+            liquidation_manager.send_to(websocket, [ln.strip() for ln in lines])
+    except Exception:
+        pass
+    await liquidation_manager.serve(websocket)
 
 
 @app.websocket("/ws/live-dashboard")
@@ -6907,673 +6689,66 @@ async def ws_live_dashboard(websocket: WebSocket):
     
     Streams:
     - Balance updates from Binance
-    - Position updates (watch positions)
+    - Position updates
     - Order fills and status
     - P&L updates
     
-    Uses ccxt.pro WebSocket API for low-latency updates.
+    All clients share one upstream ccxt.pro connection (LiveAccountHub); a new
+    client gets the current snapshot immediately and then the live updates.
     """
     await websocket.accept()
     
+    api_key = os.environ.get('BINANCE_API_KEY', '')
+    api_secret = os.environ.get('BINANCE_API_SECRET', '')
+    live_enabled = os.environ.get('ARB_ALLOW_LIVE_ORDERS', '0').strip() == '1'
+    
+    if not live_enabled:
+        await websocket.send_json({
+            'type': 'error',
+            'message': 'Live trading is disabled. Set ARB_ALLOW_LIVE_ORDERS=1'
+        })
+        await websocket.close()
+        return
+    
+    if not api_key or not api_secret:
+        await websocket.send_json({
+            'type': 'error',
+            'message': 'Binance API keys not configured'
+        })
+        await websocket.close()
+        return
+    
+    from .live_account_hub import get_live_account_hub
+    
+    hub = get_live_account_hub()
+    if hub.positions_fetcher is None:
+        hub.positions_fetcher = _get_binance_positions_sync
+    client = None
+    reader = None
     try:
-        import ccxt.pro as ccxtpro
-        from .live_dashboard import get_dashboard
-        
-        # Get API keys
-        api_key = os.environ.get('BINANCE_API_KEY', '')
-        api_secret = os.environ.get('BINANCE_API_SECRET', '')
-        live_enabled = os.environ.get('ARB_ALLOW_LIVE_ORDERS', '0').strip() == '1'
-        
-        # Debug: Check if environment variable is loaded
-        print(f"[WS DEBUG] ARB_ALLOW_LIVE_ORDERS raw value: '{os.environ.get('ARB_ALLOW_LIVE_ORDERS', 'NOT_SET')}'")
-        print(f"[WS DEBUG] live_enabled: {live_enabled}")
+        client = await hub.subscribe()
         
-        if not live_enabled:
-            await websocket.send_json({
-                'type': 'error',
-                'message': 'Live trading is disabled. Set ARB_ALLOW_LIVE_ORDERS=1'
-            })
-            await websocket.close()
-            return
-        
-        if not api_key or not api_secret:
-            await websocket.send_json({
-                'type': 'error',
-                'message': 'Binance API keys not configured'
-            })
-            await websocket.close()
-            return
-        
-        dashboard = get_dashboard()
-        exchange = None
-        session = None
-        connector = None
-        
-        try:
-            # Initialize WebSocket exchange
-            # Use ThreadedResolver instead of aiodns to avoid DNS timeout issues on Windows
-            import aiohttp
-            from aiohttp.resolver import ThreadedResolver
-            
-            print("[WS] Creating exchange with ThreadedResolver to avoid DNS issues...")
-            
-            # Create resolver explicitly
-            resolver = ThreadedResolver()
-            
-            # Create connector with the resolver
-            connector = aiohttp.TCPConnector(
-                resolver=resolver,
-                limit=100,
-                ttl_dns_cache=300,
-                use_dns_cache=True,
-                force_close=False,
-            )
-            
-            # Create custom aiohttp session with our connector
-            session = aiohttp.ClientSession(connector=connector)
-            
-            exchange = ccxtpro.binance({
-                'apiKey': api_key,
-                'secret': api_secret,
-                'options': {
-                    'defaultType': 'future',
-                },
-                'enableRateLimit': True,
-                'session': session,  # Use our custom session instead of connector
-            })
-            
-            # Pre-load markets to avoid delays during watch_* calls
-            print("[WS] Pre-loading market data...")
+        async def read_until_disconnect():
+            # the dashboard does not send anything; this only notices the close
             try:
-                # Add timeout to prevent hanging on slow API calls
-                await asyncio.wait_for(exchange.load_markets(), timeout=10.0)
-                print("[WS] Markets loaded successfully")
-            except asyncio.TimeoutError:
-                print(f"[WS WARNING] Market loading timed out after 10s - continuing without pre-loaded markets")
-                # Continue anyway - markets will load on-demand during watch_ticker calls
-            except Exception as e:
-                print(f"[WS WARNING] Failed to load markets: {e}")
-                # Don't fail the entire WebSocket connection - markets can load lazily
-                # Only fail if it's an authentication error
-                if "authentication" in str(e).lower() or "api" in str(e).lower():
-                    await websocket.send_json({
-                        'type': 'error',
-                        'message': f'Binance API authentication failed: {str(e)}'
-                    })
-                    await websocket.close()
-                    return
-            
-            await websocket.send_json({
-                'type': 'connected',
-                'message': 'Connected to Binance WebSocket',
-                'timestamp': int(time.time() * 1000)
-            })
-            
-            # Helper function to safely send JSON (checks if WS is still open)
-            async def safe_send_json(data):
-                """Send JSON only if websocket is still connected"""
-                try:
-                    # Check connection state first
-                    if websocket.client_state.name != 'CONNECTED':
-                        print(f"[WS] WebSocket not connected (state: {websocket.client_state.name}), skipping send")
-                        return False
-                    
-                    await websocket.send_json(data)
-                    return True
-                except RuntimeError as e:
-                    error_str = str(e)
-                    if "close message has been sent" in error_str or "WebSocket is not connected" in error_str:
-                        print(f"[WS] RuntimeError during send: {error_str}")
-                        return False
-                    print(f"[WS ERROR] Unexpected RuntimeError: {e}")
-                    raise
-                except Exception as e:
-                    # Handle ClientDisconnected, ConnectionClosedError, WebSocketDisconnect
-                    error_msg = str(e).lower()
-                    error_type = type(e).__name__
-                    if "disconnect" in error_msg or "closed" in error_msg or "restart" in error_msg or "WebSocketDisconnect" in error_type:
-                        print(f"[WS] Client disconnected during send: {error_type} - {e}")
-                        return False
-                    print(f"[WS ERROR] Unexpected error during send ({error_type}): {e}")
-                    raise
-            
-            # Start watching balance, positions, and orders
-            async def watch_balance():
-                """Stream balance updates"""
-                print("[WS] 💰 Balance watcher started")
-                
-                # FIRST: Fetch initial balance using REST API (fast!)
-                try:
-                    print("[WS] 💰 Fetching initial balance from REST API...")
-                    initial_balance = await exchange.fetch_balance()
-                    usdt_balance = initial_balance.get('USDT', {})
-                    wallet_balance = usdt_balance.get('total', 0.0)
-                    print(f"[WS] 💰 Initial USDT balance: ${wallet_balance}")
-                    
-                    net_info = dashboard.calculate_net_balance(wallet_balance, live_only=True)
-                    
-                    balance_data = {
-                        'type': 'balance',
-                        'data': {
-                            'wallet_balance': wallet_balance,
-                            'unrealized_pnl': net_info['unrealized_pnl'],
-                            'realized_pnl': net_info['realized_pnl'],
-                            'total_fees_paid': net_info['total_fees_paid'],
-                            'net_balance': net_info['net_balance']
-                        },
-                        'timestamp': int(time.time() * 1000)
-                    }
-                    
-                    print(f"[WS] 💰 Sending initial balance data: {balance_data}")
-                    if await safe_send_json(balance_data):
-                        print("[WS] 💰 Initial balance sent successfully!")
-                    else:
-                        print("[WS] 💰 Failed to send initial balance")
-                        return
-                except Exception as e:
-                    print(f"[WS ERROR] Failed to fetch initial balance: {e}")
-                    import traceback
-                    traceback.print_exc()
-                
-                # THEN: Watch for balance changes via WebSocket (for live updates)
-                try:
-                    while True:
-                        try:
-                            print("[WS] 💰 Waiting for balance updates via WebSocket...")
-                            balance = await exchange.watch_balance()
-                            print(f"[WS] 💰 Received balance update: {balance.keys() if balance else 'None'}")
-                            
-                            usdt_balance = balance.get('USDT', {})
-                            
-                            wallet_balance = usdt_balance.get('total', 0.0)
-                            print(f"[WS] 💰 USDT wallet_balance: ${wallet_balance}")
-                            
-                            net_info = dashboard.calculate_net_balance(wallet_balance, live_only=True)
-                            print(f"[WS] 💰 Net balance info: {net_info}")
-                            
-                            balance_data = {
-                                'type': 'balance',
-                                'data': {
-                                    'wallet_balance': wallet_balance,
-                                    'unrealized_pnl': net_info['unrealized_pnl'],
-                                    'realized_pnl': net_info['realized_pnl'],
-                                    'total_fees_paid': net_info['total_fees_paid'],
-                                    'net_balance': net_info['net_balance']
-                                },
-                                'timestamp': int(time.time() * 1000)
-                            }
-                            
-                            print(f"[WS] 💰 Sending balance data: {balance_data}")
-                            
-                            if not await safe_send_json(balance_data):
-                                print("[WS] 💰 Failed to send balance (connection closed)")
-                                return  # WebSocket closed, exit watcher
-                            
-                            print("[WS] 💰 Balance data sent successfully!")
-                            
-                        except Exception as e:
-                            print(f"[WS ERROR] Balance watch error: {e}")
-                            import traceback
-                            traceback.print_exc()
-                            await asyncio.sleep(2)  # Wait before retry
-                except asyncio.CancelledError:
-                    print("[WS] 💰 Balance watcher cancelled")
-                    raise
-                except Exception as e:
-                    print(f"[WS CRITICAL] Balance watcher crashed: {e}")
-                    import traceback
-                    traceback.print_exc()
-            
-            async def watch_positions():
-                """Fetch positions from Binance and send to frontend"""
-                # Keep track of symbols to watch prices for
-                watched_symbols = set()
-                
-                try:
-                    # STEP 1: Fetch actual positions from Binance to ensure dashboard is up-to-date
-                    print("[WS] Fetching live positions from Binance...")
-                    
-                    try:
-                        binance_positions = await asyncio.to_thread(_get_binance_positions_sync)
-                        print(f"[WS] Found {len(binance_positions)} positions on Binance")
-                        
-                        # Import Binance positions into dashboard if they don't exist
-                        for bp in binance_positions:
-                            contracts = float(bp.get('contracts', 0))
-                            if contracts == 0:
-                                continue  # Skip closed positions
-                            
-                            # Normalize symbol (MYX/USDT:USDT -> MYXUSDT)
-                            raw_symbol = bp['symbol']
-                            normalized_symbol = raw_symbol.replace('/', '').replace(':USDT', '')
-                            side = bp.get('side', 'long').lower()
-                            entry_price = float(bp.get('entryPrice', 0))
-                            
-                            # Check if position already exists in dashboard
-                            existing = None
-                            for pos in dashboard.get_all_positions():
-                                if pos.symbol == normalized_symbol and pos.side == side and getattr(pos, 'is_live', False):
-                                    existing = pos
-                                    break
-                            
-                            if not existing:
-                                # Import this position into the dashboard
-                                print(f"[WS] Importing position {normalized_symbol} {side} from Binance: {contracts} contracts @ ${entry_price}")
-                                
-                                # Create Position object (need to import from live_dashboard)
-                                from .live_dashboard import Position
-                                pos = Position(
-                                    symbol=normalized_symbol,
-                                    side=side,
-                                    entry_price=entry_price,
-                                    size=abs(contracts),
-                                    entry_time=int(time.time() * 1000),  # milliseconds
-                                    stop_loss=None,
-                                    take_profit=None,
-                                    market='futures',
-                                    is_live=True
-                                )
-                                dashboard.open_position(pos)
-                        
-                    except Exception as e:
-                        print(f"[WS WARNING] Failed to fetch/import Binance positions: {e}")
-                        import traceback
-                        traceback.print_exc()
-                    
-                    # STEP 2: Load positions from dashboard (now includes imported ones)
-                    all_dashboard_positions = dashboard.get_all_positions()
-                    # Filter to only live positions (exclude test mode positions)
-                    live_positions = [p for p in all_dashboard_positions if getattr(p, 'is_live', False)]
-                    
-                    print(f"[WS] Found {len(live_positions)} live positions in dashboard")
-                    
-                    # Build position data for frontend from dashboard positions
-                    dashboard_positions = []
-                    for pos in live_positions:
-                        # Convert MYXUSDT -> MYX/USDT:USDT for ticker watching
-                        symbol_base = pos.symbol[:-4]  # Remove 'USDT'
-                        raw_symbol = f"{symbol_base}/USDT:USDT"
-                        watched_symbols.add(raw_symbol)
-                        
-                        # Calculate P&L percentage
-                        unrealized_pnl_pct = 0.0
-                        if pos.entry_price > 0 and pos.size > 0:
-                            unrealized_pnl_pct = (pos.unrealized_pnl / (pos.entry_price * pos.size)) * 100
-                        
-                        # Get leverage (default to 1 if not set)
-                        leverage_value = getattr(pos, 'leverage', 1) or 1
-                        
-                        dashboard_positions.append({
-                            'symbol': pos.symbol,
-                            'side': pos.side,
-                            'entry_price': pos.entry_price,
-                            'size': pos.size,
-                            'unrealized_pnl': pos.unrealized_pnl,
-                            'unrealized_pnl_pct': unrealized_pnl_pct,
-                            'leverage': leverage_value,
-                            'liquidation_price': 0,  # TODO: Calculate from Binance data if needed
-                            'stop_loss': pos.stop_loss,
-                            'take_profit': pos.take_profit,
-                            'entry_time': pos.entry_time,
-                            'current_price': pos.entry_price + (pos.unrealized_pnl / pos.size) if pos.size > 0 else 0,
-                            # Add unique identifier for hedge mode (symbol + side)
-                            'position_id': f"{pos.symbol}_{pos.side.upper()}",
-                        })
-                        
-                        print(f"[WS] ✅ Will watch {raw_symbol} for position {pos.symbol} ({pos.side})")
-                    
-                    # Send initial position data (instant - no HTTP call!)
-                    print(f"[WS] Sending {len(dashboard_positions)} initial positions to frontend...")
-                    send_result = await safe_send_json({
-                        'type': 'positions',
-                        'data': dashboard_positions,
-                        'count': len(dashboard_positions),
-                        'timestamp': int(time.time() * 1000)
-                    })
-                    
-                    if not send_result:
-                        print("[WS] Failed to send - WebSocket closed")
-                        return  # WebSocket closed, exit watcher
-                    
-                    print("[WS] ✅ Initial positions sent successfully")
-                    print("[WS] Position watcher will now wait for order events (no polling)")
-                    
-                    # Keep watcher alive but don't poll - positions update via order fills
-                    while True:
-                        await asyncio.sleep(3600)  # Sleep for 1 hour (essentially idle)
-                        
-                except Exception as e:
-                    print(f"[WS ERROR] Position watch error: {e}")
-                    import traceback
-                    traceback.print_exc()
-            
-            async def watch_orders():
-                """Stream order updates (fills, cancellations, etc.)"""
-                while True:
-                    try:
-                        orders = await exchange.watch_orders()
-                        
-                        # Send order updates
-                        order_updates = []
-                        for order in orders:
-                            order_updates.append({
-                                'id': order.get('id'),
-                                'symbol': order.get('symbol'),
-                                'type': order.get('type'),
-                                'side': order.get('side'),
-                                'status': order.get('status'),
-                                'price': order.get('price'),
-                                'amount': order.get('amount'),
-                                'filled': order.get('filled'),
-                                'remaining': order.get('remaining'),
-                                'timestamp': order.get('timestamp')
-                            })
-                        
-                        if not await safe_send_json({
-                            'type': 'orders',
-                            'data': order_updates,
-                            'timestamp': int(time.time() * 1000)
-                        }):
-                            return  # WebSocket closed, exit watcher
-                    except Exception as e:
-                        print(f"[WS ERROR] Orders watch error: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        await asyncio.sleep(2)  # Wait before retry
-            
-            async def watch_tickers_for_pnl():
-                """
-                Watch ticker price updates for real-time P&L calculation.
-                Uses concurrent tasks to watch multiple symbols simultaneously.
-                """
-                print("[WS] ⚡ Starting ticker watcher for real-time P&L updates")
-                
-                active_watchers = {}  # raw_symbol -> asyncio.Task
-                management_lock = asyncio.Lock()  # Prevent concurrent management
-                
-                async def watch_single_ticker(raw_symbol: str):
-                    """Watch a single ticker continuously with timeout protection"""
-                    print(f"[WS] 📊 Starting continuous ticker stream for {raw_symbol}")
-                    consecutive_errors = 0
-                    max_consecutive_errors = 5
-                    
-                    while True:
-                        try:
-                            # Check if WebSocket is still connected before watching
-                            if websocket.client_state.name != 'CONNECTED':
-                                print(f"[WS] WebSocket not connected, stopping ticker watcher for {raw_symbol}")
-                                break
-                            
-                            # Add timeout to prevent indefinite blocking (5 second timeout)
-                            try:
-                                ticker = await asyncio.wait_for(
-                                    exchange.watch_ticker(raw_symbol),
-                                    timeout=5.0
-                                )
-                            except asyncio.TimeoutError:
-                                print(f"[WS] Ticker watch timeout for {raw_symbol}, retrying...")
-                                consecutive_errors += 1
-                                if consecutive_errors >= max_consecutive_errors:
-                                    print(f"[WS] Too many consecutive errors for {raw_symbol}, stopping watcher")
-                                    break
-                                await asyncio.sleep(1)  # Brief pause before retry
-                                continue
-                            
-                            # Reset error counter on success
-                            consecutive_errors = 0
-                            
-                            current_price = float(ticker.get('last', 0) or ticker.get('mark', 0))
-                            
-                            if current_price == 0:
-                                continue
-                            
-                            # Get all positions for this symbol
-                            all_positions = dashboard.get_all_positions()
-                            
-                            for pos in all_positions:
-                                if not pos.is_live:
-                                    continue
-                                
-                                symbol = pos.symbol
-                                pos_raw_symbol = f"{symbol[:-4]}/{symbol[-4:]}:{symbol[-4:]}"
-                                
-                                if pos_raw_symbol != raw_symbol:
-                                    continue
-                                
-                                # Calculate P&L for this position
-                                side = pos.side
-                                size = pos.size
-                                entry_price = pos.entry_price
-                                
-                                if side == 'long':
-                                    unrealized_pnl = (current_price - entry_price) * size
-                                else:
-                                    unrealized_pnl = (entry_price - current_price) * size
-                                
-                                unrealized_pnl_pct = 0.0
-                                if entry_price > 0 and size > 0:
-                                    unrealized_pnl_pct = (unrealized_pnl / (entry_price * size)) * 100
-                                
-                                position_id = f"{symbol}_{side.upper()}"
-                                
-                                # Send real-time P&L update
-                                if not await safe_send_json({
-                                    'type': 'pnl_update',
-                                    'data': {
-                                        'symbol': symbol,
-                                        'side': side,
-                                        'position_id': position_id,
-                                        'current_price': current_price,
-                                        'unrealized_pnl': unrealized_pnl,
-                                        'unrealized_pnl_pct': unrealized_pnl_pct,
-                                        'stop_loss': pos.stop_loss,
-                                        'take_profit': pos.take_profit,
-                                    },
-                                    'timestamp': int(time.time() * 1000)
-                                }):
-                                    print(f"[WS] WebSocket closed while sending P&L for {raw_symbol}")
-                                    return  # WebSocket closed
-                                
-                        except Exception as e:
-                            # Don't count WebSocket disconnects as errors - just exit gracefully
-                            error_type = type(e).__name__
-                            if "disconnect" in error_type.lower() or "connectionclosed" in error_type.lower():
-                                print(f"[WS] Client disconnected, stopping ticker watcher for {raw_symbol}")
-                                break
-                            
-                            consecutive_errors += 1
-                            if "close message" not in str(e).lower():
-                                print(f"[WS ERROR] Ticker watch error for {raw_symbol} (attempt {consecutive_errors}/{max_consecutive_errors}): {e}")
-                                import traceback
-                                traceback.print_exc()
-                            
-                            # Break after too many errors
-                            if consecutive_errors >= max_consecutive_errors:
-                                print(f"[WS] ❌ Too many consecutive errors for {raw_symbol}, stopping watcher")
-                                break
-                            
-                            await asyncio.sleep(2)  # Wait before retry
-                            continue
-                    
-                    print(f"[WS] 🛑 Ticker watcher stopped for {raw_symbol}")
-                
-                # Main management loop
-                restart_attempts = {}  # Track restart attempts per symbol
-                max_restarts_per_symbol = 10  # Increased from 3 to 10 - give more chances
-                last_log_time = 0  # Track when we last logged position check
-                
-                while True:
-                    try:
-                        # Use lock to prevent concurrent management loop iterations
-                        async with management_lock:
-                            # Check if WebSocket is still connected - stop managing if disconnected
-                            if websocket.client_state.name != 'CONNECTED':
-                                print(f"[WS] WebSocket disconnected, stopping ticker watcher management")
-                                # Cancel all active watchers
-                                for task in active_watchers.values():
-                                    task.cancel()
-                                break
-                        
-                        # Get current positions
-                        all_positions = dashboard.get_all_positions()
-                        
-                        # Only log when there are positions to check (and throttle logging to every 30 seconds)
-                        current_time = time.time()
-                        if len(all_positions) > 0 and (current_time - last_log_time) >= 30:
-                            print(f"[WS] 🔍 Checking positions... Found {len(all_positions)} total")
-                            last_log_time = current_time
-                        
-                        # Find symbols we need to watch
-                        needed_symbols = set()
-                        for pos in all_positions:
-                            # Debug: Show ALL positions and their is_live status
-                            if len(all_positions) > 0 and len(needed_symbols) == 0:
-                                print(f"[WS DEBUG] Position: {pos.symbol} side={pos.side} is_live={pos.is_live}")
-                            
-                            if pos.is_live:
-                                symbol = pos.symbol
-                                raw_symbol = f"{symbol[:-4]}/{symbol[-4:]}:{symbol[-4:]}"
-                                needed_symbols.add(raw_symbol)
-                                print(f"[WS] 📍 Found live position: {symbol} ({pos.side}) - will watch {raw_symbol}")
-                        
-                        # Only log when positions exist or symbols are being watched
-                        if len(all_positions) > 0 or len(needed_symbols) > 0:
-                            print(f"[WS] 📡 Need to watch {len(needed_symbols)} symbols: {needed_symbols}")
-                        
-                        # Start watchers for new symbols
-                        for raw_symbol in needed_symbols:
-                            # Check if watcher exists and is still running
-                            if raw_symbol in active_watchers:
-                                task = active_watchers[raw_symbol]
-                                if task.done():
-                                    # Task completed/crashed - check if we should restart
-                                    restarts = restart_attempts.get(raw_symbol, 0)
-                                    if restarts >= max_restarts_per_symbol:
-                                        print(f"[WS] ❌ Max restarts reached for {raw_symbol}, not restarting")
-                                        del active_watchers[raw_symbol]
-                                        continue
-                                    
-                                    print(f"[WS] ⚠️ Ticker watcher for {raw_symbol} stopped (attempt {restarts+1}/{max_restarts_per_symbol})")
-                                    try:
-                                        exc = task.exception()
-                                        if exc:
-                                            print(f"[WS] ⚠️ Task exception: {type(exc).__name__}: {exc}")
-                                            import traceback
-                                            traceback.print_exception(type(exc), exc, exc.__traceback__)
-                                    except Exception as e:
-                                        print(f"[WS] Could not get task exception: {e}")
-                                    
-                                    # Remove the dead task
-                                    del active_watchers[raw_symbol]
-                                    restart_attempts[raw_symbol] = restarts + 1
-                                    
-                                    # Restart immediately (don't wait in the loop)
-                                    print(f"[WS] ✅ Restarting ticker watcher for {raw_symbol}")
-                                    task = asyncio.create_task(watch_single_ticker(raw_symbol))
-                                    active_watchers[raw_symbol] = task
-                                else:
-                                    # Watcher is still running - do nothing
-                                    pass
-                            else:
-                                # No watcher exists - start a new one
-                                print(f"[WS] ✅ Starting ticker watcher for {raw_symbol}")
-                                task = asyncio.create_task(watch_single_ticker(raw_symbol))
-                                active_watchers[raw_symbol] = task
-                        
-                        # Stop watchers for symbols no longer needed
-                        for raw_symbol in list(active_watchers.keys()):
-                            if raw_symbol not in needed_symbols:
-                                print(f"[WS] Stopping ticker watcher for {raw_symbol}")
-                                active_watchers[raw_symbol].cancel()
-                                del active_watchers[raw_symbol]
-                                # Reset restart counter when position is closed
-                                restart_attempts.pop(raw_symbol, None)
-                        
-                        # Check every 10 seconds for position changes (moved outside the loop)
-                        await asyncio.sleep(10)
-                        
-                    except Exception as e:
-                        if "close message" not in str(e).lower():
-                            print(f"[WS ERROR] Ticker watcher main loop error: {e}")
-                        await asyncio.sleep(2)
-            
-            async def keepalive():
-                """Send periodic ping to keep WebSocket connection alive"""
                 while True:
-                    try:
-                        # Check if still connected
-                        if websocket.client_state.name != 'CONNECTED':
-                            print("[WS] Keepalive: WebSocket disconnected, stopping")
-                            break
-                        
-                        # Send ping every 30 seconds
-                        await asyncio.sleep(30)
-                        
-                        # Send a simple ping message
-                        if not await safe_send_json({
-                            'type': 'ping',
-                            'timestamp': int(time.time() * 1000)
-                        }):
-                            print("[WS] Keepalive: Failed to send ping, connection closed")
-                            break
-                    except Exception as e:
-                        print(f"[WS ERROR] Keepalive error: {e}")
+                    msg = await websocket.receive()
+                    if msg.get('type') == 'websocket.disconnect':
                         break
-            
-            # Run all watchers concurrently (including ticker watcher for real-time P&L and keepalive)
-            print("[WS] Starting all watchers...")
-            try:
-                results = await asyncio.gather(
-                    watch_balance(),
-                    watch_positions(),
-                    watch_orders(),
-                    watch_tickers_for_pnl(),
-                    keepalive(),  # Keep connection alive
-                    return_exceptions=True
-                )
-                
-                # Log any exceptions from watchers
-                for i, result in enumerate(results):
-                    if isinstance(result, Exception):
-                        watcher_names = ['watch_balance', 'watch_positions', 'watch_orders', 'watch_tickers_for_pnl', 'keepalive']
-                        print(f"[WS ERROR] {watcher_names[i]} failed: {result}")
-                        import traceback
-                        traceback.print_exception(type(result), result, result.__traceback__)
-            except Exception as e:
-                print(f"[WS CRITICAL] asyncio.gather failed: {e}")
-                import traceback
-                traceback.print_exc()
-            
-        finally:
-            # Proper cleanup: close in reverse order of creation
-            print("[WS] Cleaning up WebSocket resources...")
-            if exchange:
-                try:
-                    await exchange.close()
-                    print("[WS] Exchange closed")
-                except Exception as e:
-                    print(f"[WS] Error closing exchange: {e}")
-            
-            if session:
-                try:
-                    await session.close()
-                    print("[WS] Session closed")
-                except Exception as e:
-                    print(f"[WS] Error closing session: {e}")
-            
-            if connector:
-                try:
-                    await connector.close()
-                    print("[WS] Connector closed")
-                except Exception as e:
-                    print(f"[WS] Error closing connector: {e}")
-                
-    except WebSocketDisconnect:
+            except Exception:
+                pass
+            client.close()
+        
+        reader = asyncio.create_task(read_until_disconnect())
+        while True:
+            msg = await client.get(timeout=30.0)
+            if msg is None:
+                msg = {'type': 'ping', 'timestamp': int(time.time() * 1000)}
+            await websocket.send_json(msg)
+    except (WebSocketDisconnect, ConnectionError):
         print("[WS] Live dashboard client disconnected")
     except Exception as e:
         print(f"[WS ERROR] Live dashboard error: {e}")
-        import traceback
-        traceback.print_exc()
         try:
             await websocket.send_json({
                 'type': 'error',
@@ -7582,9 +6757,12 @@ async def ws_live_dashboard(websocket: WebSocket):
         except:
             pass
     finally:
+        if reader is not None:
+            reader.cancel()
+        if client is not None:
+            hub.unsubscribe(client)
         try:
             await websocket.close()
-            print("[WS] WebSocket closed")
         except:
             pass
 
@@ -7659,7 +6837,7 @@ async def debug_broadcast_opps(request: Request):
             pass
         # attempt broadcast (best-effort)
         try:
-            await manager.broadcast(json.dumps(data))
+            await manager.broadcast(json.dumps(data), kind='opportunities')
         except Exception:
             pass
         return {'broadcasted': True, 'ok': True}
@@ -7985,16 +7163,13 @@ async def health():
 async def debug_ip(request: Request):
     """Get Railway's public IP address"""
     try:
-        # Try to get IP from various sources
-        import requests
-        
         # Get IP from external service
-        response = requests.get('https://api.ipify.org?format=json', timeout=5)
+        response = await _http.request('GET', 'https://api.ipify.org?format=json', timeout=5)
         external_ip = response.json().get('ip', 'Unknown')
         
         # Get more info about the IP
         try:
-            info_response = requests.get(f'https://ipapi.co/{external_ip}/json/', timeout=5)
+            info_response = await _http.request('GET', f'https://ipapi.co/{external_ip}/json/', timeout=5)
             ip_info = info_response.json()
         except:
             ip_info = {}
@@ -8108,6 +7283,14 @@ async def debug_ccxt_status():
     recent = [e for e in server_logs[-200:] if isinstance(e, dict) and ('ccxt.' in e.get('text', '') or 'scan:' in e.get('text','') or 'initial scan' in e.get('text',''))]
     return {'ccxt_cached_keys': cache_keys, 'recent_ccxt_logs': recent}
 
+@app.get('/debug/feeder_runtime')
+async def debug_feeder_runtime():
+    """Shared feeder loop metrics: loop lag and per-feeder task busy time."""
+    try:
+        return feeders_health()
+    except Exception as e:
+        return {'error': str(e)}
+
 @app.get('/debug/feeder_status')
 async def debug_feeder_status():
     try:
@@ -8329,13 +7512,10 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 hot_candidates = []
 
             # local helpers (same as fallback block below)
-            def fetch_klines_local(symbol: str, interval: str = '1d', limit: int = 30):
+            async def fetch_klines_local(symbol: str, interval: str = '1d', limit: int = 30):
                 """Try several public REST endpoints (Binance, KuCoin, Gate) and
                 return the first successful klines/candles array.
                 """
-                from urllib import request as _r
-                import json as _json
-
                 # Normalize forms
                 s_noslash = symbol.replace('/', '').replace('-', '').replace('_', '')
                 s_dash = symbol.replace('/', '-').replace('_', '-')
@@ -8344,11 +7524,9 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 # 1) Binance
                 try:
                     url_b = 'https://api.binance.com/api/v3/klines?symbol=' + s_noslash + '&interval=' + interval + '&limit=' + str(limit)
-                    req = _r.Request(url_b, headers={'User-Agent': 'arb-vol-index/1.0'})
-                    with _r.urlopen(req, timeout=10) as resp:
-                        data = _json.loads(resp.read().decode('utf-8'))
-                        if isinstance(data, list) and len(data) > 0:
-                            return data
+                    data = await _http.get_json(url_b, headers={'User-Agent': 'arb-vol-index/1.0'}, timeout=10)
+                    if isinstance(data, list) and len(data) > 0:
+                        return data
                 except Exception:
                     pass
 
@@ -8356,16 +7534,14 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 try:
                     ktype = '1day' if interval == '1d' else ('1hour' if interval == '1h' else interval)
                     url_k = 'https://api.kucoin.com/api/v1/market/candles?symbol=' + s_dash + '&type=' + ktype + '&limit=' + str(limit)
-                    req = _r.Request(url_k, headers={'User-Agent': 'arb-vol-index/1.0'})
-                    with _r.urlopen(req, timeout=10) as resp:
-                        data = _json.loads(resp.read().decode('utf-8'))
-                        # KuCoin returns [ [time, open, close, high, low, volume], ... ] or {code:.., data: [...]}
-                        if isinstance(data, dict) and data.get('code') == '200' and isinstance(data.get('data'), list):
-                            rows = data.get('data')
-                            if rows:
-                                return rows
-                        if isinstance(data, list) and data:
-                            return data
+                    data = await _http.get_json(url_k, headers={'User-Agent': 'arb-vol-index/1.0'}, timeout=10)
+                    # KuCoin returns [ [time, open, close, high, low, volume], ... ] or {code:.., data: [...]}
+                    if isinstance(data, dict) and data.get('code') == '200' and isinstance(data.get('data'), list):
+                        rows = data.get('data')
+                        if rows:
+                            return rows
+                    if isinstance(data, list) and data:
+                        return data
                 except Exception:
                     pass
 
@@ -8373,11 +7549,9 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 try:
                     period = '86400' if interval == '1d' else ('3600' if interval == '1h' else interval)
                     url_g = 'https://api.gateio.ws/api/v4/spot/candles?currency_pair=' + s_under + '&interval=' + period + '&limit=' + str(limit)
-                    req = _r.Request(url_g, headers={'User-Agent': 'arb-vol-index/1.0'})
-                    with _r.urlopen(req, timeout=10) as resp:
-                        data = _json.loads(resp.read().decode('utf-8'))
-                        if isinstance(data, list) and len(data) > 0:
-                            return data
+                    data = await _http.get_json(url_g, headers={'User-Agent': 'arb-vol-index/1.0'}, timeout=10)
+                    if isinstance(data, list) and len(data) > 0:
+                        return data
                 except Exception:
                     pass
 
@@ -8432,7 +7606,7 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 ns = norm_sym(sym)
                 if not ns or ns in existing:
                     continue
-                kl = fetch_klines_local(sym, interval='1d', limit=30)
+                kl = await fetch_klines_local(sym, interval='1d', limit=30)
                 prices = close_prices_local(kl)
                 vol = realized_vol_local(prices, 365.0)
                 last = prices[-1] if prices else None
@@ -8481,13 +7655,10 @@ async def api_hotcoins_vol_index(limit: int = 50):
         try:
             # import the helper functions from tools by reading the module file
             # to avoid circular package imports we'll implement a small local logic here
-            def fetch_klines_local(symbol: str, interval: str = '1d', limit: int = 30):
+            async def fetch_klines_local(symbol: str, interval: str = '1d', limit: int = 30):
                 """Try several public REST endpoints (Binance, KuCoin, Gate) and
                 return the first successful klines/candles array.
                 """
-                from urllib import request as _r
-                import json as _json
-
                 # Normalize forms
                 s_noslash = symbol.replace('/', '').replace('-', '').replace('_', '')
                 s_dash = symbol.replace('/', '-').replace('_', '-')
@@ -8496,11 +7667,9 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 # 1) Binance
                 try:
                     url_b = 'https://api.binance.com/api/v3/klines?symbol=' + s_noslash + '&interval=' + interval + '&limit=' + str(limit)
-                    req = _r.Request(url_b, headers={'User-Agent': 'arb-vol-index/1.0'})
-                    with _r.urlopen(req, timeout=10) as resp:
-                        data = _json.loads(resp.read().decode('utf-8'))
-                        if isinstance(data, list) and len(data) > 0:
-                            return data
+                    data = await _http.get_json(url_b, headers={'User-Agent': 'arb-vol-index/1.0'}, timeout=10)
+                    if isinstance(data, list) and len(data) > 0:
+                        return data
                 except Exception:
                     pass
 
@@ -8508,16 +7677,14 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 try:
                     ktype = '1day' if interval == '1d' else ('1hour' if interval == '1h' else interval)
                     url_k = 'https://api.kucoin.com/api/v1/market/candles?symbol=' + s_dash + '&type=' + ktype + '&limit=' + str(limit)
-                    req = _r.Request(url_k, headers={'User-Agent': 'arb-vol-index/1.0'})
-                    with _r.urlopen(req, timeout=10) as resp:
-                        data = _json.loads(resp.read().decode('utf-8'))
-                        # KuCoin returns [ [time, open, close, high, low, volume], ... ] or {code:.., data: [...]}
-                        if isinstance(data, dict) and data.get('code') == '200' and isinstance(data.get('data'), list):
-                            rows = data.get('data')
-                            if rows:
-                                return rows
-                        if isinstance(data, list) and data:
-                            return data
+                    data = await _http.get_json(url_k, headers={'User-Agent': 'arb-vol-index/1.0'}, timeout=10)
+                    # KuCoin returns [ [time, open, close, high, low, volume], ... ] or {code:.., data: [...]}
+                    if isinstance(data, dict) and data.get('code') == '200' and isinstance(data.get('data'), list):
+                        rows = data.get('data')
+                        if rows:
+                            return rows
+                    if isinstance(data, list) and data:
+                        return data
                 except Exception:
                     pass
 
@@ -8525,11 +7692,9 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 try:
                     period = '86400' if interval == '1d' else ('3600' if interval == '1h' else interval)
                     url_g = 'https://api.gateio.ws/api/v4/spot/candles?currency_pair=' + s_under + '&interval=' + period + '&limit=' + str(limit)
-                    req = _r.Request(url_g, headers={'User-Agent': 'arb-vol-index/1.0'})
-                    with _r.urlopen(req, timeout=10) as resp:
-                        data = _json.loads(resp.read().decode('utf-8'))
-                        if isinstance(data, list) and len(data) > 0:
-                            return data
+                    data = await _http.get_json(url_g, headers={'User-Agent': 'arb-vol-index/1.0'}, timeout=10)
+                    if isinstance(data, list) and len(data) > 0:
+                        return data
                 except Exception:
                     pass
 
@@ -8565,7 +7730,7 @@ async def api_hotcoins_vol_index(limit: int = 50):
                 sym = it.get('symbol') if isinstance(it, dict) else None
                 if not sym:
                     continue
-                kl = fetch_klines_local(sym, interval='1d', limit=30)
+                kl = await fetch_klines_local(sym, interval='1d', limit=30)
                 prices = close_prices_local(kl)
                 vol = realized_vol_local(prices, 365.0)
                 last = prices[-1] if prices else None
@@ -8781,7 +7946,7 @@ async def debug_feeder_depths(feeder_name: str = 'binance', levels: int = 5):
         # Fallback: try internal _book_tickers or _books structures
         try:
             books = getattr(f, '_book_tickers', None) or getattr(f, '_books', None) or {}
-            if isinstance(books, dict) and books:
+            if isinstance(books, Mapping) and books:
                 for sym, data in list(books.items())[:1000]:
                     try:
                         # data may be dict with asks/bids or price/size pairs
@@ -0,0 +1,249 @@
+"""Backpressure-aware fan-out for the app's push websockets.
+
+``ConnectionManager.broadcast`` awaited ``send_text`` for every client with a
+1s timeout on every scanner tick, so one slow client stalled the broadcast
+and, with it, ``_scanner_loop``. ``WsBroadcaster`` keeps the same
+``connect`` / ``disconnect`` / ``broadcast`` API but never waits on a client:
+
+- each client has a bounded buffer and its own writer task; ``broadcast``
+  only appends to the buffers
+- ``policy='latest'`` (snapshot channels such as /ws/opportunities and
+  /ws/hotcoins) keeps one pending message per ``kind``: a newer snapshot
+  replaces one of the same kind that has not gone out yet (counted as
+  conflated), so e.g. a scanner tick never replaces an unsent preview
+- ``policy='events'`` (/ws/liquidations) keeps up to ``ARB_WS_QUEUE``
+  (default 256) messages and drops the oldest when full
+- a client is evicted (closed with 1013 "try again later") when a send fails
+  or takes longer than ``ARB_WS_SEND_TIMEOUT_S`` (5s), after
+  ``ARB_WS_SLOW_STRIKES`` (3) consecutive sends slower than
+  ``ARB_WS_SLOW_MS`` (1000ms), or when its buffer stays overflowing for
+  ``ARB_WS_EVICT_S`` (10s)
+
+``stats()`` reports per-client queue depth, drops and send latency.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from .utils.env import env_float, pct
+
+POLICIES = ('latest', 'events')
+
+
+class _Client:
+    __slots__ = ('ws', 'buf', 'ready', 'writer', 'connected_ts', 'sent', 'dropped', 'conflated', 'strikes',
+                 'overflow_since', 'max_depth', 'latency_ms', 'closed')
+
+    def __init__(self, ws: Any, maxlen: Optional[int]):
+        self.ws = ws
+        # events: bounded FIFO; latest: kind -> pending message (maxlen None)
+        self.buf: Any = deque(maxlen=maxlen) if maxlen else OrderedDict()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.connected_ts = time.time()
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.strikes = 0
+        self.overflow_since: Optional[float] = None
+        self.max_depth = 0
+        self.latency_ms: deque = deque(maxlen=100)
+        self.closed = False
+
+
+class WsBroadcaster:
+    """Fan-out of text messages to websocket clients through per-client queues."""
+
+    def __init__(self, name: str, policy: str = 'latest', queue_size: Optional[int] = None,
+                 send_timeout_s: Optional[float] = None, slow_ms: Optional[float] = None,
+                 slow_strikes: Optional[int] = None, evict_after_s: Optional[float] = None):
+        if policy not in POLICIES:
+            raise ValueError(f'unknown policy {policy!r}')
+        self.name = name
+        self.policy = policy
+        self.queue_size = 1 if policy == 'latest' else max(1, int(queue_size or env_float('ARB_WS_QUEUE', 256)))
+        self.send_timeout_s = send_timeout_s if send_timeout_s is not None else env_float('ARB_WS_SEND_TIMEOUT_S', 5.0)
+        self.slow_ms = slow_ms if slow_ms is not None else env_float('ARB_WS_SLOW_MS', 1000.0)
+        self.slow_strikes = int(slow_strikes if slow_strikes is not None else env_float('ARB_WS_SLOW_STRIKES', 3))
+        self.evict_after_s = evict_after_s if evict_after_s is not None else env_float('ARB_WS_EVICT_S', 10.0)
+        self._clients: Dict[Any, _Client] = {}
+        self.published = 0
+        self.evicted = 0
+        self.evictions: deque = deque(maxlen=20)
+
+    @property
+    def active(self) -> set:
+        return set(self._clients)
+
+    async def connect(self, websocket) -> None:
+        await websocket.accept()
+        self.register(websocket)
+
+    def register(self, websocket) -> None:
+        """Track an already accepted websocket and start its writer."""
+        if websocket in self._clients:
+            return
+        client = _Client(websocket, None if self.policy == 'latest' else self.queue_size)
+        client.writer = asyncio.get_running_loop().create_task(self._writer(client))
+        self._clients[websocket] = client
+
+    def disconnect(self, websocket) -> None:
+        client = self._clients.pop(websocket, None)
+        if client is not None:
+            client.closed = True
+            if client.writer is not None and client.writer is not asyncio.current_task():
+                client.writer.cancel()
+
+    # -- producers ---------------------------------------------------------------------
+    def publish(self, message: str, kind: Optional[str] = None) -> None:
+        """Queue ``message`` for every client; never blocks.
+
+        On 'latest' channels ``kind`` names the snapshot slot the message
+        conflates with (payloads of different kinds never replace each other).
+        """
+        self.published += 1
+        now = time.time()
+        for client in list(self._clients.values()):
+            self._offer(client, message, now, kind)
+
+    async def broadcast(self, message: str, kind: Optional[str] = None) -> None:
+        """Compatibility wrapper for ``ConnectionManager.broadcast``; returns immediately."""
+        self.publish(message, kind)
+
+    def send_to(self, websocket, messages: Iterable[str], kind: Optional[str] = None) -> None:
+        """Queue messages (e.g. the initial snapshot) for one client only."""
+        client = self._clients.get(websocket)
+        if client is None:
+            return
+        now = time.time()
+        for m in messages:
+            self._offer(client, m, now, kind)
+
+    def _offer(self, client: _Client, message: str, now: float, kind: Optional[str] = None) -> None:
+        if client.closed:
+            return
+        if self.policy == 'latest':
+            if kind in client.buf:
+                client.conflated += 1
+            client.buf[kind] = message
+            client.max_depth = max(client.max_depth, len(client.buf))
+            client.ready.set()
+            return
+        if len(client.buf) == client.buf.maxlen:
+            client.dropped += 1
+            if client.overflow_since is None:
+                client.overflow_since = now
+            elif now - client.overflow_since > self.evict_after_s:
+                self._evict(client, f'queue overflowing for {now - client.overflow_since:.1f}s')
+                return
+        else:
+            # the writer made room since the last offer: the overflow streak is over
+            client.overflow_since = None
+        client.buf.append(message)  # deque(maxlen) drops the oldest
+        client.max_depth = max(client.max_depth, len(client.buf))
+        client.ready.set()
+
+    # -- per-client writer ------------------------------------------------------------------
+    async def _writer(self, client: _Client) -> None:
+        while not client.closed:
+            if not client.buf:
+                client.overflow_since = None
+                client.ready.clear()
+                await client.ready.wait()
+                continue
+            message = client.buf.popitem(last=False)[1] if self.policy == 'latest' else client.buf.popleft()
+            t0 = time.perf_counter()
+            try:
+                await asyncio.wait_for(client.ws.send_text(message), timeout=self.send_timeout_s)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self._evict(client, f'send took over {self.send_timeout_s:.0f}s')
+                return
+            except Exception as e:
+                # the client went away
+                self._evict(client, f'send failed: {type(e).__name__}', count=False)
+                return
+            ms = (time.perf_counter() - t0) * 1000
+            client.sent += 1
+            client.latency_ms.append(ms)
+            if ms > self.slow_ms:
+                client.strikes += 1
+                if client.strikes >= self.slow_strikes:
+                    self._evict(client, f'{client.strikes} sends over {self.slow_ms:.0f}ms')
+                    return
+            else:
+                client.strikes = 0
+
+    def _evict(self, client: _Client, reason: str, count: bool = True) -> None:
+        if client.closed:
+            return
+        self.disconnect(client.ws)
+        if count:
+            self.evicted += 1
+            self.evictions.append({'ts': time.time(), 'reason': reason, 'sent': client.sent,
+                                   'dropped': client.dropped})
+            print(f'[ws:{self.name}] evicted slow client: {reason}')
+        try:
+            asyncio.get_running_loop().create_task(self._close(client.ws))
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    async def _close(ws) -> None:
+        try:
+            await asyncio.wait_for(ws.close(code=1013), timeout=2.0)
+        except Exception:
+            pass
+
+    async def serve(self, websocket) -> None:
+        """Hold an endpoint open until the client disconnects or is evicted."""
+        client = self._clients.get(websocket)
+        if client is None:
+            return
+
+        async def _incoming():
+            while True:
+                msg = await websocket.receive()
+                if msg.get('type') == 'websocket.disconnect':
+                    return
+
+        reader = asyncio.ensure_future(_incoming())
+        try:
+            await asyncio.wait({reader, client.writer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if reader.done() and not reader.cancelled():
+                # receive() failing on a dropped socket ends the endpoint too;
+                # retrieve it so it is not logged as a never-retrieved exception
+                reader.exception()
+            else:
+                reader.cancel()
+            self.disconnect(websocket)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        clients: List[Dict[str, Any]] = []
+        for c in self._clients.values():
+            clients.append({
+                'age_s': round(now - c.connected_ts, 1),
+                'queued': len(c.buf),
+                'max_queued': c.max_depth,
+                'sent': c.sent,
+                'dropped': c.dropped,
+                'conflated': c.conflated,
+                'slow_strikes': c.strikes,
+                'send_ms_p50': pct(c.latency_ms, 0.5),
+                'send_ms_p95': pct(c.latency_ms, 0.95),
+                'send_ms_max': round(max(c.latency_ms), 1) if c.latency_ms else None,
+            })
+        return {
+            'policy': self.policy,
+            'queue_size': self.queue_size,
+            'clients': clients,
+            'published': self.published,
+            'evicted': self.evicted,
+            'recent_evictions': list(self.evictions),
+        }
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage import backtest_engine
+from arbitrage.executor import DryRunExecutor
+from arbitrage.strategy import QuickScalpStrategy
+
+
+def _walk(n, seed):
+    rnd = random.Random(seed)
+    out, p = [], 100.0
+    for _ in range(n):
+        p *= 1.0 + rnd.gauss(0, 0.003)
+        out.append(round(p, 4))
+    return out
+
+
+@unittest.skipUnless(backtest_engine.available(), "numpy not installed")
+class BacktestEngineParityTests(unittest.TestCase):
+    def assertSameTrades(self, a, b):
+        self.assertEqual(len(a), len(b))
+        self.assertGreater(len(a), 10)
+        for x, y in zip(a, b):
+            self.assertEqual(x.direction, y.direction)
+            self.assertAlmostEqual(x.entry_price, y.entry_price, places=9)
+            self.assertAlmostEqual(x.exit_price, y.exit_price, places=9)
+            self.assertAlmostEqual(x.qty, y.qty, places=9)
+            self.assertAlmostEqual(x.pnl, y.pnl, places=9)
+
+    def test_matches_bar_loop(self):
+        closes = _walk(4000, seed=1)
+        funding = [0.0002 if i % 5 == 0 else None for i in range(len(closes))]
+
+        def make():
+            s = QuickScalpStrategy(entry_threshold=0.002)
+            s.htf_12h_bars, s.htf_24h_bars = 300, 600  # exercise the HTF gates
+            return s, DryRunExecutor(slippage_bps=0.0005)
+
+        ref = backtest_engine.run_quickscalp_loop(closes, funding, *make())
+        res = backtest_engine.run_quickscalp(closes, funding, *make())
+        self.assertSameTrades(ref, res.closed)
+        self.assertEqual(len(res.entries), len(res.exits))
+
+    def test_risk_sizing_and_reduce_cap_match_bar_loop(self):
+        closes = _walk(3000, seed=2)
+
+        def make():
+            s = QuickScalpStrategy(notional_per_trade=50.0, max_notional=200.0, min_notional=25.0,
+                                   round_to=0.1, momentum_window=8)
+            s.risk_per_trade = 0.5
+            ex = DryRunExecutor(min_notional=25.0, round_to=0.1, slippage_bps=0.001, max_partial_reduces=3)
+            return s, ex
+
+        ref = backtest_engine.run_quickscalp_loop(closes, None, *make(), sizing='risk')
+        res = backtest_engine.run_quickscalp(closes, None, *make(), sizing='risk')
+        self.assertSameTrades(ref, res.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
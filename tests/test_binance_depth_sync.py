@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges import binance_depth_feeder, recorder
+from arbitrage.exchanges.binance_depth_feeder import BinanceDepthFeeder
+
+
+def _diff(U, u, asks=(), bids=()):
+    return {"e": "depthUpdate", "s": "BTCUSDT", "U": U, "u": u, "a": [list(a) for a in asks], "b": [list(b) for b in bids]}
+
+
+SNAPSHOT = {
+    "lastUpdateId": 100,
+    "asks": [["101.0", "1.0"], ["102.0", "2.0"]],
+    "bids": [["100.0", "1.5"], ["99.0", "3.0"]],
+}
+
+
+class BinanceDepthSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.feeder = BinanceDepthFeeder(["BTC/USDT"])
+        self.feeder._mark_unsynced("BTCUSDT")
+
+    def test_buffers_until_snapshot_then_replays(self):
+        f = self.feeder
+        self.assertIsNone(f._handle_event(_diff(95, 100, asks=[("101.0", "9.0")])))
+        self.assertIsNone(f._handle_event(_diff(99, 102, asks=[("101.0", "0")])))
+        self.assertIsNone(f._handle_event(_diff(103, 103, bids=[("100.5", "2.0")])))
+        self.assertEqual(f.get_order_book("BTC/USDT"), {"asks": [], "bids": []})
+
+        self.assertTrue(f._install_snapshot("BTCUSDT", SNAPSHOT))
+        ob = f.get_order_book("BTC/USDT", depth=2)
+        # first diff (u <= lastUpdateId) dropped, the other two applied
+        self.assertEqual(ob["asks"], [(102.0, 2.0)])
+        self.assertEqual(ob["bids"], [(100.5, 2.0), (100.0, 1.5)])
+        self.assertEqual(f._l2["BTCUSDT"].seq, 103)
+
+        # diffs accumulate rather than overwrite the book
+        self.assertIsNone(f._handle_event(_diff(104, 104, asks=[("101.5", "4.0")])))
+        ob = f.get_order_book("BTCUSDT", depth=5)
+        self.assertEqual(ob["asks"], [(101.5, 4.0), (102.0, 2.0)])
+        self.assertEqual(len(ob["bids"]), 3)
+
+    def test_gap_clears_book_and_requests_resync(self):
+        f = self.feeder
+        self.assertTrue(f._install_snapshot("BTCUSDT", SNAPSHOT))
+        self.assertIsNone(f._handle_event(_diff(101, 101, asks=[("101.0", "0.5")])))
+        self.assertEqual(f._handle_event(_diff(110, 112, asks=[("103.0", "1.0")])), "BTCUSDT")
+        self.assertEqual(f.resync_count, 1)
+        self.assertEqual(f.get_order_book("BTCUSDT"), {"asks": [], "bids": []})
+        self.assertNotIn("BTCUSDT", f._books)
+
+        # a snapshot older than the buffered diff leaves a gap: refetch needed
+        self.assertFalse(f._install_snapshot("BTCUSDT", dict(SNAPSHOT, lastUpdateId=105)))
+        self.assertTrue(f._install_snapshot("BTCUSDT", dict(SNAPSHOT, lastUpdateId=110)))
+        self.assertEqual(f.get_order_book("BTCUSDT", depth=3)["asks"], [(101.0, 1.0), (102.0, 2.0), (103.0, 1.0)])
+        self.assertEqual(f.get_tickers()["BTC/USDT"]["last"], 100.0)
+
+
+class _IdleSocket:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def recv(self):
+        await asyncio.sleep(3600)
+
+
+class BinanceSnapshotPacingTests(unittest.TestCase):
+    def test_snapshot_is_charged_its_weight(self):
+        calls = []
+
+        class _Resp:
+            status_code = 200
+
+            def json(self):
+                return SNAPSHOT
+
+        def fake_request(method, url, **kw):
+            calls.append((url, kw["params"], kw["weight"]))
+            return _Resp()
+
+        with mock.patch.object(binance_depth_feeder._http, "request_sync", fake_request):
+            self.assertEqual(BinanceDepthFeeder(["BTCUSDT"])._fetch_snapshot("BTCUSDT"), SNAPSHOT)
+        self.assertEqual(calls, [("https://api.binance.com/api/v3/depth", {"symbol": "BTCUSDT", "limit": 1000}, 50)])
+
+    def test_reconnect_staggers_the_resyncs(self):
+        feeder = BinanceDepthFeeder(["AAAUSDT", "BBBUSDT", "CCCUSDT"])
+        feeder.RESYNC_SPACING_S = 0.1
+        fetched = []
+
+        def fetch(sym):
+            fetched.append((sym, time.monotonic()))
+            return dict(SNAPSHOT, lastUpdateId=1)
+
+        feeder._fetch_snapshot = fetch
+
+        async def run():
+            feeder._running = True
+            with mock.patch.object(recorder, "connect", lambda *a, **kw: _IdleSocket()):
+                task = asyncio.create_task(feeder._ws_main())
+                await asyncio.sleep(0.35)
+                feeder._running = False
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(run())
+        self.assertEqual([sym for sym, _ in fetched], ["AAAUSDT", "BBBUSDT", "CCCUSDT"])
+        gaps = [b - a for (_, a), (_, b) in zip(fetched, fetched[1:])]
+        self.assertTrue(all(g >= 0.08 for g in gaps), gaps)
+        self.assertEqual(feeder._pending, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges import binance_user_stream, recorder
+from arbitrage.exchanges.binance_user_stream import AccountMirror, BinanceUserStream, _sign
+
+ACCOUNT = {
+    "availableBalance": "150.0",
+    "updateTime": 1000,
+    "assets": [{"asset": "USDT", "walletBalance": "200.0", "crossWalletBalance": "200.0",
+                "unrealizedProfit": "-5.0", "availableBalance": "150.0"}],
+    "positions": [
+        {"symbol": "BTCUSDT", "positionSide": "LONG", "positionAmt": "0.010", "entryPrice": "60000",
+         "unrealizedProfit": "-5.0", "leverage": "5", "isolated": False},
+        {"symbol": "BTCUSDT", "positionSide": "SHORT", "positionAmt": "0", "entryPrice": "0",
+         "unrealizedProfit": "0", "leverage": "5", "isolated": False},
+        {"symbol": "ETHUSDT", "positionSide": "BOTH", "positionAmt": "0", "entryPrice": "0",
+         "unrealizedProfit": "0", "leverage": "10", "isolated": False},
+    ],
+}
+OPEN_ORDERS = [{"orderId": 7, "symbol": "BTCUSDT", "side": "SELL", "type": "STOP_MARKET", "status": "NEW",
+                "price": "0", "origQty": "0.010", "executedQty": "0", "avgPrice": "0", "positionSide": "LONG",
+                "stopPrice": "58000", "updateTime": 900}]
+
+
+class AccountMirrorTests(unittest.TestCase):
+    def test_snapshot_then_stream_events(self):
+        m = AccountMirror()
+        m.load_account(ACCOUNT, OPEN_ORDERS)
+        self.assertEqual([(p["symbol"], p["side"], p["contracts"]) for p in m.positions_list()],
+                         [("BTC/USDT:USDT", "long", 0.01)])
+        bal = m.balance_info()
+        self.assertEqual((bal["wallet_balance"], bal["unrealized_pnl"], bal["balance"], bal["available"]),
+                         (200.0, -5.0, 195.0, 150.0))
+        self.assertEqual([o["id"] for o in m.open_orders()], ["7"])
+
+        # one-way ETH short opens, BTC long closes, the stop is cancelled
+        m.apply({"e": "ORDER_TRADE_UPDATE", "E": 2000, "o": {
+            "s": "ETHUSDT", "S": "SELL", "o": "MARKET", "x": "TRADE", "X": "FILLED", "i": 8, "p": "0",
+            "q": "1", "z": "1", "ap": "3000", "ps": "BOTH", "l": "1", "L": "3000", "n": "1.2", "N": "USDT",
+            "rp": "0", "m": False, "T": 2000}})
+        m.apply({"e": "ACCOUNT_UPDATE", "E": 2001, "a": {"m": "ORDER", "B": [{"a": "USDT", "wb": "198.8", "cw": "198.8"}],
+                 "P": [{"s": "ETHUSDT", "pa": "-1", "ep": "3000", "up": "2.0", "mt": "cross", "ps": "BOTH"},
+                       {"s": "BTCUSDT", "pa": "0", "ep": "0", "up": "0", "mt": "cross", "ps": "LONG"}]}})
+        m.apply({"e": "ORDER_TRADE_UPDATE", "E": 2002, "o": {
+            "s": "BTCUSDT", "S": "SELL", "o": "STOP_MARKET", "x": "CANCELED", "X": "CANCELED", "i": 7,
+            "q": "0.010", "z": "0", "ps": "LONG"}})
+        m.apply({"e": "ACCOUNT_CONFIG_UPDATE", "E": 2003, "ac": {"s": "ETHUSDT", "l": 20}})
+        self.assertFalse(m.apply({"e": "MARGIN_CALL"}))
+
+        self.assertEqual([(p["symbol"], p["side"], p["contracts"], p["leverage"]) for p in m.positions_list()],
+                         [("ETH/USDT:USDT", "short", 1.0, 20)])
+        bal = m.balance_info()
+        self.assertEqual((bal["wallet_balance"], bal["unrealized_pnl"], bal["balance"]), (198.8, 2.0, 200.8))
+        self.assertEqual(m.open_orders(), [])
+        self.assertEqual([(f["id"], f["last_price"], f["commission"]) for f in m.recent_fills()], [("8", 3000.0, 1.2)])
+        self.assertEqual(m.updated_ms, 2003)
+
+    def test_price_fields_follow_marks_and_stream_derived_available(self):
+        m = AccountMirror()
+        m.load_account(ACCOUNT)
+        self.assertEqual(m.balance_info()["available"], 150.0)
+        # 0.01 BTC long from 60000: mark 61000 -> +10
+        self.assertTrue(m.apply_mark("BTCUSDT", 61000.0))
+        self.assertFalse(m.apply_mark("ETHUSDT", 3000.0))
+        bal = m.balance_info()
+        self.assertEqual((m.positions_list()[0]["unrealizedPnl"], bal["unrealized_pnl"], bal["balance"]),
+                         (10.0, 10.0, 210.0))
+        # available moves by uPnL (+15) less initial margin at 5x (119 -> 122), without a REST poll
+        self.assertAlmostEqual(bal["available"], 162.0)
+        self.assertEqual(bal["available_source"], "stream")
+        # a stream update keeps valuing at the last mark
+        m.apply({"e": "ACCOUNT_UPDATE", "E": 3000, "a": {"B": [], "P": [
+            {"s": "BTCUSDT", "pa": "0.020", "ep": "60500", "up": "1.0", "mt": "cross", "ps": "LONG"}]}})
+        bal = m.balance_info()
+        self.assertEqual(bal["unrealized_pnl"], 10.0)
+        self.assertAlmostEqual(bal["available"], 40.0)
+        m.apply({"e": "ACCOUNT_CONFIG_UPDATE", "E": 3001, "ac": {"s": "BTCUSDT", "l": 10}})
+        self.assertAlmostEqual(m.balance_info()["available"], 162.0)
+
+    def test_events_older_than_the_snapshot_are_skipped(self):
+        m = AccountMirror()
+        account = dict(ACCOUNT, positions=[dict(p, updateTime=5000) for p in ACCOUNT["positions"]])
+        m.load_account(account, OPEN_ORDERS)
+        self.assertEqual(m.snapshot_ms, 5000)
+        # buffered during the reconnect: the snapshot already has newer state
+        self.assertFalse(m.apply({"e": "ACCOUNT_UPDATE", "E": 4000, "a": {"B": [], "P": [
+            {"s": "BTCUSDT", "pa": "0", "ep": "0", "up": "0", "mt": "cross", "ps": "LONG"}]}}))
+        m.apply({"e": "ORDER_TRADE_UPDATE", "E": 4001, "o": {
+            "s": "BTCUSDT", "S": "SELL", "o": "STOP_MARKET", "x": "NEW", "X": "NEW", "i": 9, "q": "0.010", "ps": "LONG"}})
+        self.assertEqual([p["contracts"] for p in m.positions_list()], [0.01])
+        self.assertEqual([o["id"] for o in m.open_orders()], ["7"])
+        self.assertEqual(m.stale_events, 2)
+        self.assertTrue(m.apply({"e": "ACCOUNT_UPDATE", "E": 5001, "a": {"B": [], "P": [
+            {"s": "BTCUSDT", "pa": "0", "ep": "0", "up": "0", "mt": "cross", "ps": "LONG"}]}}))
+        self.assertEqual(m.positions_list(), [])
+
+
+class UserStreamTests(unittest.TestCase):
+    def tearDown(self):
+        binance_user_stream._STREAM = None
+
+    def test_signature_matches_binance_example(self):
+        params = {"symbol": "LTCBTC", "side": "BUY", "type": "LIMIT", "timeInForce": "GTC", "quantity": 1,
+                  "price": 0.1, "recvWindow": 5000, "timestamp": 1499827319559}
+        signed = _sign(params, "NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j")
+        self.assertEqual(signed["signature"], "c8db56825ae71d6d79447849e617115f4a920fa2acdcab2b053c4b2838bd6b71")
+
+    def test_mirror_is_only_served_while_synced(self):
+        stream = BinanceUserStream("k", "s")
+        binance_user_stream._STREAM = stream
+        stream.mirror.load_account(ACCOUNT)
+        self.assertIsNone(binance_user_stream.synced_mirror())
+        stream.connected = stream.reconciled = True
+        self.assertIs(binance_user_stream.synced_mirror(), stream.mirror)
+        self.assertEqual(stream.handle(json.dumps({"e": "listenKeyExpired", "E": 1})), "listenKeyExpired")
+        self.assertIsNone(stream.handle(json.dumps({"result": None, "id": 1})))
+        self.assertEqual(stream.stats()["events"], {"listenKeyExpired": 1})
+        stream.connected = False
+        self.assertIsNone(binance_user_stream.synced_mirror())
+
+    def test_private_stream_is_never_recorded(self):
+        stream = BinanceUserStream("k", "s")
+        frames = [json.dumps({"e": "ACCOUNT_CONFIG_UPDATE", "E": 2000, "ac": {"s": "BTCUSDT", "l": 7}}),
+                  json.dumps({"e": "listenKeyExpired", "E": 2001})]
+        opened = []
+
+        class _Socket:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def recv(self):
+                if len(frames) == 1:
+                    stream._running = False
+                return frames.pop(0)
+
+        def _connect(uri, **kwargs):
+            opened.append(uri)
+            return _Socket()
+
+        async def _request(method, path, params=None, signed=False, weight=None):
+            return {"/fapi/v1/listenKey": {"listenKey": "secret-key"}, "/fapi/v2/account": ACCOUNT,
+                    "/fapi/v1/openOrders": []}[path]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder.start_recording(tmp)
+            try:
+                with mock.patch.object(binance_user_stream, "websockets", SimpleNamespace(connect=_connect)), \
+                        mock.patch.object(stream, "_request", _request), mock.patch.object(stream, "sync_marks"):
+                    stream._running = True
+                    asyncio.run(stream._main())
+            finally:
+                recorder.stop_recording()
+            records = list(recorder.read_records(tmp))
+        self.assertEqual(opened, [binance_user_stream.WS_BASE + "secret-key"])
+        self.assertEqual(stream.mirror.leverage["BTCUSDT"], 7)
+        self.assertEqual(records, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
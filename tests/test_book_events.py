@@ -0,0 +1,136 @@
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.book_events import BookEventBus
+from arbitrage.exchanges.binance_depth_feeder import BinanceDepthFeeder
+from arbitrage.exchanges.l2_book import L2Book
+from arbitrage.exchanges.mock_exchange import MockExchange
+from arbitrage.opportunities import RescanPlanner, compute_dryrun_opportunities, merge_rescan
+from arbitrage.scanner import find_executable_opportunities
+
+
+class BookEventBusTests(unittest.TestCase):
+    def test_unchanged_top_is_suppressed(self):
+        bus = BookEventBus()
+        sub = bus.subscribe()
+        self.assertTrue(bus.publish('binance', 'BTC/USDT', (100.0, 1.0), (101.0, 2.0)))
+        self.assertFalse(bus.publish('binance', 'BTCUSDT', (100.0, 1.0), (101.0, 2.0)))
+        self.assertTrue(bus.publish('binance', 'BTCUSDT', (100.0, 1.5), (101.0, 2.0)))
+        changes = sub.drain()
+        self.assertEqual(list(changes), [('binance', 'BTCUSDT')])
+        self.assertEqual(changes[('binance', 'BTCUSDT')].bid_qty, 1.5)
+        self.assertEqual(sub.drain(), {})
+
+    def test_subscription_coalesces_and_filters(self):
+        bus = BookEventBus()
+        sub = bus.subscribe(exchanges=['kucoin'])
+        for i in range(50):
+            bus.publish('kucoin', 'ETH-USDT', (10.0 + i, 1.0), (11.0 + i, 1.0), seq=i)
+            bus.publish('mexc', 'ETHUSDT', (10.0 + i, 1.0), (11.0 + i, 1.0), seq=i)
+        changes = sub.drain()
+        self.assertEqual(list(changes), [('kucoin', 'ETHUSDT')])
+        self.assertEqual(changes[('kucoin', 'ETHUSDT')].seq, 49)
+        sub.close()
+        self.assertFalse(bus.has_subscribers())
+
+    def test_async_wait_wakes_on_publish_from_another_thread(self):
+        bus = BookEventBus()
+
+        async def _run():
+            sub = bus.subscribe(loop=asyncio.get_running_loop())
+            self.assertEqual(await sub.wait(timeout=0.01), {})
+            t = threading.Timer(0.02, bus.publish, args=('gate', 'SOL/USDT', (1.0, 1.0), (1.1, 1.0)))
+            t.start()
+            changes = await sub.wait(timeout=2.0)
+            t.join()
+            return changes
+
+        changes = asyncio.run(_run())
+        self.assertIn(('gate', 'SOLUSDT'), changes)
+
+    def test_publish_book_uses_top_of_book(self):
+        bus = BookEventBus()
+        sub = bus.subscribe()
+        book = L2Book('BTCUSDT')
+        book.load_snapshot([['101', '2']], [['100', '1']], seq=7)
+        bus.publish_book('binance', book)
+        ev = sub.drain()[('binance', 'BTCUSDT')]
+        self.assertEqual((ev.bid, ev.ask, ev.seq), (100.0, 101.0, 7))
+
+    def test_feeder_publishes_applied_diffs(self):
+        from arbitrage.exchanges import book_events
+        bus = book_events.get_bus()
+        sub = bus.subscribe(exchanges=['binance'])
+        try:
+            feeder = BinanceDepthFeeder(['ZZZUSDT'])
+            feeder._mark_unsynced('ZZZUSDT')
+            feeder._install_snapshot('ZZZUSDT', {'lastUpdateId': 10, 'asks': [['2', '1']], 'bids': [['1', '1']]})
+            sub.drain()
+            feeder._handle_event({'s': 'ZZZUSDT', 'U': 11, 'u': 11, 'a': [], 'b': [['1.5', '3']]})
+            ev = sub.drain()[('binance', 'ZZZUSDT')]
+            self.assertEqual((ev.bid, ev.bid_qty), (1.5, 3.0))
+            # a deep level does not move the top: no event
+            feeder._handle_event({'s': 'ZZZUSDT', 'U': 12, 'u': 12, 'a': [['5', '1']], 'b': []})
+            self.assertEqual(sub.drain(), {})
+        finally:
+            sub.close()
+
+
+class ScannerSymbolFilterTests(unittest.TestCase):
+    def test_symbols_restricts_the_scan(self):
+        ex1 = MockExchange("A", {"FOO-USD": 100.0, "BAR-USD": 10.0})
+        ex2 = MockExchange("B", {"FOO-USD": 105.0, "BAR-USD": 10.5})
+        all_syms = {o.symbol for o in find_executable_opportunities([ex1, ex2], 1.0, 0.1, 1.0)}
+        self.assertEqual(all_syms, {"FOO-USD", "BAR-USD"})
+        only = find_executable_opportunities([ex1, ex2], 1.0, 0.1, 1.0, symbols={"BARUSD"})
+        self.assertEqual({o.symbol for o in only}, {"BAR-USD"})
+
+    def test_merged_rescan_keeps_profit_order(self):
+        prev = [{"symbol": "FOO-USD", "profit_pct": 3.0}, {"symbol": "BAR-USD", "profit_pct": 2.0},
+                {"symbol": "BAZ-USD", "profit_pct": 1.0}]
+        fresh = [{"symbol": "BAZ-USD", "profit_pct": 5.0}]
+        merged = merge_rescan(prev, fresh, {"BAZUSD", "BARUSD"})
+        self.assertEqual([(o["symbol"], o["profit_pct"]) for o in merged], [("BAZ-USD", 5.0), ("FOO-USD", 3.0)])
+
+
+class RescanPlannerTests(unittest.TestCase):
+    def test_one_book_event_rescans_only_its_symbol(self):
+        bus = BookEventBus()
+        sub = bus.subscribe()
+        planner = RescanPlanner(poll_interval=0.8, full_interval=10.0)
+
+        def venues(bar_b=10.5):
+            return [MockExchange("binance", {"FOO-USD": 100.0, "BAR-USD": 10.0}),
+                    MockExchange("kucoin", {"FOO-USD": 105.0, "BAR-USD": bar_b})]
+
+        self.assertEqual(planner.plan(venues(), {}, now=1.0), (True, {"FOOUSD", "BARUSD"}))
+        previous = compute_dryrun_opportunities(venues(), 1.0, 0.1, 1.0)
+        self.assertEqual({o["symbol"] for o in previous}, {"FOO-USD", "BAR-USD"})
+
+        # binance's feeder reports FOO; kucoin is polled and unchanged
+        bus.publish("binance", "FOO-USD", (100.0, 1.0), (100.1, 1.0))
+        full, moved = planner.plan(venues(), sub.drain(), now=2.0)
+        self.assertEqual((full, moved), (False, {"FOOUSD"}))
+        self.assertEqual(planner.evented, {"binance"})
+        fresh = compute_dryrun_opportunities(venues(), 1.0, 0.1, 1.0, moved)
+        self.assertEqual([o["symbol"] for o in fresh], ["FOO-USD"])
+        merged = merge_rescan(previous, fresh, moved)
+        self.assertEqual({o["symbol"] for o in merged}, {"FOO-USD", "BAR-USD"})
+
+        # nothing moved: no rescan until the full interval
+        self.assertEqual(planner.plan(venues(), {}, now=3.0), (False, set()))
+        # a polled quote change only marks its own symbol
+        self.assertEqual(planner.plan(venues(bar_b=11.0), {}, now=4.0), (False, {"BARUSD"}))
+        self.assertEqual(planner.plan(venues(bar_b=11.0), {}, now=12.0), (True, set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage import book_fetcher
+from arbitrage.book_fetcher import fetch_order_books
+
+
+class _Venue:
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+
+
+class FetchOrderBooksTests(unittest.TestCase):
+    def test_slow_exchange_only_holds_its_own_slots(self):
+        slow, fast = _Venue("slow-venue", 0.5), _Venue("fast-venue", 0.0)
+        calls = []
+        lock = threading.Lock()
+
+        def fetch(venue, sym):
+            with lock:
+                calls.append((venue.name, sym))
+            time.sleep(venue.delay)
+            return {"bids": [[1.0, 1.0]], "asks": [[1.1, 1.0]]}, sym
+
+        requests = [(slow, f"S{i}/USDT") for i in range(40)] + [(fast, f"F{i}/USDT") for i in range(40)]
+        requests += [(fast, "F0/USDT")]
+        results = fetch_order_books(requests, fetch, per_exchange_limit=2, deadline_s=0.3)
+
+        self.assertTrue(all(results[(id(fast), f"F{i}/USDT")][0] for i in range(40)))
+        self.assertTrue(all(results[(id(slow), f"S{i}/USDT")] == (None, None) for i in range(40)))
+        # the slow venue never had more than its two slots' worth of work started
+        self.assertEqual(sum(1 for name, _ in calls if name == "slow-venue"), 2)
+        stats = book_fetcher.last_stats
+        self.assertEqual((stats["unique"], stats["completed"], stats["never_started"]), (80.0, 40.0, 38.0))
+
+        # the stuck fetches keep their slots into the next scan until they return
+        again = fetch_order_books([(slow, "S0/USDT")], fetch, per_exchange_limit=2, deadline_s=0.05)
+        self.assertEqual(again[(id(slow), "S0/USDT")], (None, None))
+        time.sleep(0.5)
+        again = fetch_order_books([(slow, "S0/USDT")], fetch, per_exchange_limit=2, deadline_s=1.0)
+        self.assertIsNotNone(again[(id(slow), "S0/USDT")][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
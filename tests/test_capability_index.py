@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.capability_index import CapabilityIndex
+from arbitrage.exchanges.mock_exchange import MockExchange
+from arbitrage.scanner import find_executable_opportunities
+
+
+class _CachedCurrencies:
+    """Adapter stub exposing a pre-loaded fetch_currencies map."""
+
+    def __init__(self, name, currencies):
+        self.name = name
+        self._currency_cache = currencies
+        self.calls = 0
+
+    def supports_withdraw(self, base):
+        self.calls += 1
+        return True
+
+    def supports_deposit(self, base):
+        self.calls += 1
+        return True
+
+
+class CapabilityIndexTests(unittest.TestCase):
+    def test_lookups_come_from_cached_currencies(self):
+        ad = _CachedCurrencies("binance", {"FOO": {"withdraw": False, "deposit": True}})
+        idx = CapabilityIndex()
+        idx.track([ad])
+        idx.stop()
+        self.assertFalse(idx.allows("binance", "FOO/USDT", "withdraw"))
+        self.assertTrue(idx.allows("Binance", "FOO-USDT", "deposit"))
+        self.assertEqual(ad.calls, 0)
+
+    def test_resolved_answers_expire(self):
+        class _Halted:
+            name = "gate"
+
+            def __init__(self):
+                self.withdraw = False
+
+            def supports_withdraw(self, base):
+                return self.withdraw
+
+            def supports_deposit(self, base):
+                return True
+
+        ad = _Halted()
+        idx = CapabilityIndex(refresh_interval=3600, resolved_ttl=60)
+        idx._adapters["gate"] = ad
+        self.assertTrue(idx.allows("gate", "FOO", "withdraw"))
+        idx._resolve_pending()
+        self.assertFalse(idx.allows("gate", "FOO", "withdraw"))
+        # withdrawals reopen; the old answer is kept through rebuilds until it expires
+        ad.withdraw = True
+        idx.rebuild()
+        self.assertFalse(idx.allows("gate", "FOO", "withdraw"))
+        idx._entries[("gate", "FOO")]["_resolved"] -= 61
+        self.assertTrue(idx.allows("gate", "FOO", "withdraw"))
+        idx._resolve_pending()
+        self.assertTrue(idx.allows("gate", "FOO", "withdraw"))
+        ad.withdraw = False
+        idx._resolve_pending()
+        idx.invalidate("Gate.io")
+        self.assertEqual(idx.snapshot(), {})
+
+    def test_unloaded_exchanges_fail_open(self):
+        loaded = _CachedCurrencies("binance", {"FOO": {"withdraw": True, "deposit": True}})
+        unloaded = _CachedCurrencies("kucoin", {})
+        idx = CapabilityIndex()
+        idx._adapters.update(binance=loaded, kucoin=unloaded)
+        idx.rebuild()
+        with mock.patch.dict(os.environ, {"ARB_FAIL_OPEN_WITHDRAW": "0"}):
+            self.assertFalse(idx.allows("binance", "BAR", "withdraw"))
+            self.assertTrue(idx.allows("kucoin", "BAR", "withdraw"))
+            self.assertTrue(idx.allows("okx", "BAR", "deposit"))
+
+    def test_scanner_skips_disabled_withdrawals(self):
+        ex1 = MockExchange("A", {"FOO-USD": 100.0}, withdraw_enabled=False)
+        ex2 = MockExchange("B", {"FOO-USD": 102.0})
+        opps = find_executable_opportunities([ex1, ex2], amount=1.0, min_profit_pct=0.1)
+        self.assertFalse(any(o.buy_exchange == "A" for o in opps))
+
+
+if __name__ == "__main__":
+    unittest.main()
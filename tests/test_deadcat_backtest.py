@@ -0,0 +1,67 @@
+import math
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TOOLS = os.path.join(ROOT, "tools")
+if TOOLS not in sys.path:
+    sys.path.insert(0, TOOLS)
+
+try:
+    import pandas as pd
+    import binance_perps_deadcat_backtest as deadcat
+except ImportError:  # pragma: no cover - optional dependency
+    pd = deadcat = None
+
+
+def _ohlcv(n_days, seed):
+    """15m random walk with a bearish first half, and its daily bars."""
+    rnd = random.Random(seed)
+    rows, p, t0 = [], 100.0, 1_600_000_000_000
+    for i in range(n_days * 96):
+        drift = -0.0006 if i < n_days * 48 else 0.0002
+        o = p
+        p *= 1.0 + drift + rnd.gauss(0, 0.006)
+        hi = max(o, p) * (1 + abs(rnd.gauss(0, 0.002)))
+        lo = min(o, p) * (1 - abs(rnd.gauss(0, 0.002)))
+        rows.append((t0 + i * 900_000, o, hi, lo, p, rnd.randint(100, 1000)))
+    df15 = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    day = df15["timestamp"] // 86_400_000 * 86_400_000
+    df1d = df15.groupby(day).agg(open=("open", "first"), high=("high", "max"), low=("low", "min"),
+                                 close=("close", "last"), volume=("volume", "sum"))
+    return df15, df1d.rename_axis("timestamp").reset_index()
+
+
+@unittest.skipIf(deadcat is None, "pandas not installed")
+class DeadcatParityTests(unittest.TestCase):
+    def assertSameRun(self, cfg, df):
+        eq_ref, trades_ref = deadcat.simulate_iterrows(cfg, df)
+        eq, trades = deadcat.simulate(cfg, df)
+        self.assertEqual(eq_ref.tolist(), eq.tolist())
+        self.assertEqual(len(trades_ref), len(trades))
+        for a, b in zip(trades_ref, trades):
+            for field in ("side", "entry_time", "entry", "size", "sl", "tp", "exit_time", "exit", "pnl", "reason"):
+                self.assertEqual(getattr(a, field), getattr(b, field), field)
+            self.assertTrue(a.r_multiple == b.r_multiple or (math.isnan(a.r_multiple) and math.isnan(b.r_multiple)))
+        return trades
+
+    def test_array_loop_matches_iterrows(self):
+        df15, df1d = _ohlcv(60, seed=3)
+        configs = [
+            {},
+            {"short_rsi_min": 40.0, "short_cross_20": False},
+            {"require_bullish_div": False, "long_rsi_max_oversold": 35.0, "cooldown_bars": 0},
+        ]
+        sides = set()
+        for kw in configs:
+            cfg = deadcat.Config(ema_fast=5, ema_mid=10, ema_slow=20, **kw)
+            df = deadcat.prepare_frames(cfg, df15, df1d)
+            self.assertTrue(df["bearish_day"].any())
+            sides.update(t.side for t in self.assertSameRun(cfg, df))
+        self.assertEqual(sides, {"short", "long"})
+
+
+if __name__ == "__main__":
+    unittest.main()
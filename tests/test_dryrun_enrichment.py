@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.mock_exchange import MockExchange
+from arbitrage.opportunities import compute_dryrun_opportunities
+from arbitrage.scanner import ScanSnapshot
+
+
+class CountingExchange(MockExchange):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticker_calls = 0
+        self.book_calls = 0
+
+    def get_tickers(self):
+        self.ticker_calls += 1
+        return super().get_tickers()
+
+    def get_order_book(self, symbol, depth=10):
+        self.book_calls += 1
+        return super().get_order_book(symbol, depth)
+
+
+class DryrunEnrichmentTests(unittest.TestCase):
+    def _exchanges(self, n_symbols=20):
+        cheap = {f"T{i}-USD": 100.0 for i in range(n_symbols)}
+        rich = {f"T{i}-USD": 105.0 for i in range(n_symbols)}
+        # the third venue lists the same symbols under another spelling
+        other = {f"T{i}USD": 102.0 for i in range(n_symbols)}
+        return [CountingExchange("A", cheap), CountingExchange("B", rich), CountingExchange("mexc-sim", other)]
+
+    def test_enrichment_reuses_scan_data(self):
+        exs = self._exchanges()
+        out = compute_dryrun_opportunities(exs, 1.0, 0.1, 1.0)
+        self.assertGreaterEqual(len(out), 20)
+        # one ticker snapshot per adapter per scan, not one per opportunity
+        for ex in exs:
+            self.assertEqual(ex.ticker_calls, 1)
+        # depth comes from the books phase 2 already fetched
+        books_after_scan = exs[0].book_calls + exs[1].book_calls
+        self.assertLessEqual(books_after_scan, 2 * 20 + 2)
+        row = next(r for r in out if r['symbol'] == 'T3-USD')
+        self.assertEqual(row['price_mexc'], 102.0)
+        self.assertEqual(row['Mexc'], 102.0)
+        self.assertIsNotNone(row['depth_usd'])
+        self.assertIsNone(row['price_binance'])
+
+    def test_snapshot_indexes_by_canonical_symbol(self):
+        ex = MockExchange("X", {"ETH/USDT": 3000.0})
+        snap = ScanSnapshot()
+        snap.add_tickers(ex)
+        self.assertIs(snap.ticker(ex, "ETH-USDT"), snap.ticker(ex, "ETH/USDT"))
+        self.assertIsNone(snap.ticker(ex, "BTC/USDT"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges import feeder_runtime
+from arbitrage.exchanges.feeder_runtime import FeederRuntime, spawn_feeder
+from arbitrage.exchanges.ws_feed_manager import feeder_health, register_feeder, unregister_feeder
+
+
+class _FakeFeeder:
+    def __init__(self):
+        self._running = True
+        self._ts = 0.0
+        self.loop_threads = set()
+        self._handle = None
+
+    async def _ws_main(self):
+        async def child():
+            while self._running:
+                self.loop_threads.add(threading.get_ident())
+                await asyncio.sleep(0.01)
+
+        asyncio.create_task(child())
+        while self._running:
+            self.loop_threads.add(threading.get_ident())
+            self._ts = time.time()
+            await asyncio.sleep(0.01)
+
+
+class FeederRuntimeTests(unittest.TestCase):
+    def setUp(self):
+        self._saved = feeder_runtime._RUNTIME
+        feeder_runtime._RUNTIME = FeederRuntime()
+
+    def tearDown(self):
+        feeder_runtime._RUNTIME = self._saved
+
+    def test_feeders_share_one_loop_and_report_metrics(self):
+        feeders = [_FakeFeeder() for _ in range(3)]
+        for i, f in enumerate(feeders):
+            f._handle = spawn_feeder("fake", f._ws_main)
+        time.sleep(0.2)
+        threads = set().union(*(f.loop_threads for f in feeders))
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.get_ident(), threads)
+
+        metrics = feeder_runtime.get_runtime().metrics()
+        names = sorted(s["name"] for s in metrics["feeders"])
+        self.assertEqual(names, ["fake", "fake#2", "fake#3"])
+        for s in metrics["feeders"]:
+            self.assertEqual(s["state"], "running")
+            self.assertEqual(s["tasks"], 2)
+            self.assertGreater(s["steps"], 0)
+
+        register_feeder("fakeex", feeders[0])
+        try:
+            health = feeder_health()["fakeex"]
+            self.assertTrue(health["alive"])
+            self.assertEqual(health["task"]["name"], "fake")
+            self.assertLess(health["age_s"], 1.0)
+        finally:
+            unregister_feeder("fakeex")
+
+        for f in feeders:
+            f._running = False
+            f._handle.stop(timeout=1.0)
+            self.assertFalse(f._handle.alive())
+        states = {s["state"] for s in feeder_runtime.get_runtime().metrics()["feeders"]}
+        self.assertTrue(states <= {"cancelled", "finished"})
+
+    def test_failed_feeder_records_error(self):
+        async def boom():
+            raise ValueError("bad payload")
+
+        handle = spawn_feeder("boom", boom)
+        deadline = time.time() + 1.0
+        while handle.alive() and time.time() < deadline:
+            time.sleep(0.01)
+        stats = feeder_runtime.get_runtime().stats_for("boom")
+        self.assertEqual(stats["state"], "failed")
+        self.assertIn("bad payload", stats["last_error"])
+
+    def test_task_factory_wraps_into_a_native_coroutine(self):
+        # asyncio.Task on 3.12+ rejects generator-based coroutines
+        runtime = feeder_runtime.get_runtime()
+        stats = feeder_runtime.TaskStats("wrapped")
+        runtime._stats["wrapped"] = stats
+
+        async def work():
+            await asyncio.sleep(0)
+            return 42
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            token = feeder_runtime._CURRENT_FEEDER.set("wrapped")
+            try:
+                task = runtime._task_factory(loop, work())
+            finally:
+                feeder_runtime._CURRENT_FEEDER.reset(token)
+            self.assertTrue(asyncio.iscoroutine(task.get_coro()))
+            return await task
+
+        self.assertEqual(asyncio.run(main()), 42)
+        self.assertEqual((stats.steps, stats.tasks), (2, 0))
+
+    def test_thread_mode_keeps_private_loops(self):
+        os.environ["ARB_FEEDER_LOOP"] = "thread"
+        try:
+            f = _FakeFeeder()
+            handle = spawn_feeder("legacy", f._ws_main)
+            time.sleep(0.05)
+            self.assertTrue(handle.alive())
+            f._running = False
+            handle.stop(timeout=1.0)
+            self.assertFalse(handle.alive())
+            self.assertIsNone(feeder_runtime.get_runtime().stats_for("legacy"))
+        finally:
+            os.environ.pop("ARB_FEEDER_LOOP", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
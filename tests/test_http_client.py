@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.utils import http_client
+from arbitrage.utils.http_client import HttpError, TokenBucket, request_weight
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.end_headers()
+            self.wfile.write(b'nope')
+            return
+        time.sleep(0.2)
+        body = json.dumps({'path': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_identical_gets_are_coalesced(self):
+        _Handler.hits = 0
+
+        async def run():
+            try:
+                return await asyncio.gather(*[http_client.get_json(self.base + '/a') for _ in range(5)])
+            finally:
+                await http_client.aclose()
+
+        out = asyncio.run(run())
+        self.assertEqual(out, [{'path': '/a'}] * 5)
+        self.assertEqual(_Handler.hits, 1)
+
+    def test_cancelling_the_first_caller_keeps_the_shared_request(self):
+        _Handler.hits = 0
+
+        async def run():
+            try:
+                first = asyncio.create_task(http_client.get_json(self.base + '/c'))
+                await asyncio.sleep(0.02)
+                second = asyncio.create_task(http_client.get_json(self.base + '/c'))
+                await asyncio.sleep(0.02)
+                first.cancel()
+                return await asyncio.wait_for(second, 2.0), first.cancelled()
+            finally:
+                await http_client.aclose()
+
+        self.assertEqual(asyncio.run(run()), ({'path': '/c'}, True))
+        self.assertEqual(_Handler.hits, 1)
+
+    def test_pool_is_closed_with_its_loop(self):
+        async def run():
+            return http_client.get_client()
+
+        client = asyncio.run(run())
+        if client._client is not None:
+            self.assertTrue(client._client.is_closed)
+        self.assertNotIn(client, list(http_client._CLIENTS.values()))
+
+    def test_list_params_are_coalesced(self):
+        _Handler.hits = 0
+        params = {'symbols': ['BTCUSDT', 'ETHUSDT']}
+
+        async def run():
+            try:
+                return await asyncio.gather(*[http_client.get_json(self.base + '/l', params=params)
+                                              for _ in range(3)])
+            finally:
+                await http_client.aclose()
+
+        out = asyncio.run(run())
+        self.assertEqual(out, [{'path': '/l?symbols=BTCUSDT&symbols=ETHUSDT'}] * 3)
+        self.assertEqual(_Handler.hits, 1)
+        # values that can't be keyed just skip coalescing
+        self.assertIsNone(http_client._coalesce_key('/x', {'f': {'a': 1}}, None))
+
+    def test_sync_shim(self):
+        self.assertEqual(http_client.get_json_sync(self.base + '/b', params={'x': 1}), {'path': '/b?x=1'})
+        with self.assertRaises(HttpError) as ctx:
+            http_client.get_json_sync(self.base + '/missing')
+        self.assertEqual(ctx.exception.status, 404)
+
+
+class RateLimitTests(unittest.TestCase):
+    def test_bucket_delays_past_burst(self):
+        b = TokenBucket(rate=10.0, capacity=2.0)
+        self.assertEqual(b.reserve(), 0.0)
+        self.assertEqual(b.reserve(), 0.0)
+        self.assertAlmostEqual(b.reserve(), 0.1, delta=0.02)
+        b.pause(1.0)
+        self.assertGreater(b.reserve(), 0.9)
+
+    def test_binance_weights(self):
+        self.assertEqual(request_weight('https://api.binance.com/api/v3/ticker/24hr'), ('api.binance.com', 80.0))
+        self.assertEqual(request_weight('https://api.binance.com/api/v3/ticker/24hr?symbol=BTCUSDT')[1], 2.0)
+        self.assertEqual(request_weight('https://fapi.binance.com/fapi/v1/klines', {'limit': 1000})[1], 5.0)
+        self.assertEqual(request_weight('https://api.gateio.ws/api/v4/spot/tickers'), ('api.gateio.ws', 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import math
+import os
+import random
+import sys
+import unittest
+from collections import deque
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.indicators import (
+    ATR, RSI, Bollinger, RollingMax, RollingMean, RollingMin, RollingStats, latest_pivots,
+)
+from arbitrage.strategy import QuickScalpStrategy, RangeGridStrategy
+
+
+def _walk(n, seed=7, start=100.0):
+    rnd = random.Random(seed)
+    out, p = [], start
+    for _ in range(n):
+        p *= 1.0 + rnd.gauss(0, 0.004)
+        out.append(round(p, 4))
+    return out
+
+
+def _pivots_bruteforce(data, radius, min_distance, prominence_pct):
+    highs, lows = [], []
+    n = len(data)
+    for i in range(n):
+        others = data[max(0, i - radius):i] + data[i + 1:min(n, i + radius + 1)]
+        if not others:
+            continue
+        v, mx, mn = data[i], max(others), min(others)
+        if v > mx and (v - mx) / mx >= prominence_pct and (not highs or i - highs[-1][0] >= min_distance):
+            highs.append((i, v))
+        if v < mn and (mn - v) / mn >= prominence_pct and (not lows or i - lows[-1][0] >= min_distance):
+            lows.append((i, v))
+    return (highs[-1][1] if highs else None), (lows[-1][1] if lows else None)
+
+
+class IndicatorTests(unittest.TestCase):
+    def test_rolling_windows_match_recomputation(self):
+        xs = _walk(3000)
+        mean, stats, hi, lo = RollingMean(25), RollingStats(25), RollingMax(25), RollingMin(25)
+        for i, x in enumerate(xs):
+            for ind in (mean, stats, hi, lo):
+                ind.push(x)
+            w = xs[max(0, i - 24):i + 1]
+            self.assertAlmostEqual(mean.value, sum(w) / len(w), places=9)
+            self.assertEqual((hi.value, lo.value), (max(w), min(w)))
+            if len(w) >= 2:
+                m = sum(w) / len(w)
+                self.assertAlmostEqual(stats.std, math.sqrt(sum((v - m) ** 2 for v in w) / (len(w) - 1)), places=9)
+
+    def test_bollinger_atr_rsi(self):
+        xs = _walk(200, seed=3)
+        bb, atr, rsi = Bollinger(20, 2.0), ATR(14), RSI(14)
+        for x in xs:
+            bb.update(x)
+            atr.update(x)
+            rsi.update(x)
+        w = xs[-20:]
+        m = sum(w) / 20
+        sd = math.sqrt(sum((v - m) ** 2 for v in w) / 20)
+        mid, up, low = bb.bands
+        self.assertAlmostEqual(mid, m, places=9)
+        self.assertAlmostEqual(up - low, 4 * sd, places=9)
+        trs = [abs(b - a) / a for a, b in zip(xs[-15:-1], xs[-14:])]
+        self.assertAlmostEqual(atr.value, sum(trs) / 14, places=12)
+        self.assertTrue(0.0 < rsi.value < 100.0)
+        self.assertIsNone(RSI(14).value)
+
+    def test_pivots_match_bruteforce(self):
+        for seed in range(20):
+            data = _walk(20, seed=seed)
+            for radius in (1, 3, 10):
+                self.assertEqual(latest_pivots(data, radius, 5, 0.001),
+                                 _pivots_bruteforce(data, radius, 5, 0.001))
+
+
+class StrategyParityTests(unittest.TestCase):
+    def test_quickscalp_streaming_matches_list_helpers(self):
+        strat = QuickScalpStrategy(entry_threshold=0.002)
+        strat.htf_12h_bars, strat.htf_24h_bars = 120, 240
+        closes = []
+        for p in _walk(600, seed=11):
+            closes.append(p)
+            strat.decide(p, closes, 0.0001)
+            vol = strat.compute_volatility(closes)
+            self.assertAlmostEqual(strat._vol.std or 0.0, vol or 0.0, places=12)
+            if len(closes) >= 3:
+                self.assertAlmostEqual(strat._atr.value, strat.compute_atr_like(closes), places=12)
+            self.assertAlmostEqual(strat._mom.value or 0.0, strat.compute_momentum(closes, strat.momentum_window) or 0.0, places=12)
+            self.assertEqual(latest_pivots(strat._sr_window, 10, strat.pivot_min_distance, strat.pivot_prominence_pct),
+                             strat.find_latest_pivots(closes, 10))
+
+    def test_decisions_do_not_depend_on_how_history_is_passed(self):
+        for cls, kw in ((QuickScalpStrategy, {'entry_threshold': 0.002}),
+                        (RangeGridStrategy, {'min_range_size': 0.005, 'max_volatility': 0.05})):
+            def make():
+                s = cls(**kw)
+                if cls is QuickScalpStrategy:
+                    s.htf_12h_bars, s.htf_24h_bars = 120, 240
+                return s
+
+            grow = make()
+            closes, acted = [], 0
+            for p in _walk(500, seed=5):
+                closes.append(p)
+                a = grow.decide(p, closes, 0.0)
+                # a new instance warms up from the list tail
+                b = make().decide(p, closes, 0.0)
+                self.assertEqual((a.action, a.direction, a.size), (b.action, b.direction, b.size))
+                acted += a.action == 'enter'
+            self.assertGreater(acted, 0, cls.__name__)
+
+
+    def test_sliding_window_is_never_taken_for_an_extension(self):
+        from arbitrage.indicators import CloseCursor
+
+        cur = CloseCursor()
+        self.assertEqual(cur.new_closes([1, 1, 2, 1], 10), (True, [1, 1, 2, 1]))
+        # same first value and same value at the old last index, but slid
+        self.assertEqual(cur.new_closes([1, 2, 1, 1], 10), (True, [1, 2, 1, 1]))
+        grown = [1, 2, 1, 1]
+        cur.new_closes(grown, 10)
+        grown.append(3)
+        self.assertEqual(cur.new_closes(grown, 10), (False, [3]))
+        self.assertTrue(cur.new_closes(grown, 10)[0])  # unchanged length: not provably new
+
+        # 2-decimal walks repeat values often; a fixed-length window slides every bar
+        for cls, kw in ((QuickScalpStrategy, {'entry_threshold': 0.002}),
+                        (RangeGridStrategy, {'min_range_size': 0.005, 'max_volatility': 0.05})):
+            s = cls(**kw)
+            if cls is QuickScalpStrategy:
+                s.htf_12h_bars, s.htf_24h_bars = 20, 40
+            window = deque(maxlen=60)
+            for p in _walk(1500, seed=3, start=1.0):
+                p = round(p, 2)
+                window.append(p)
+                closes = list(window)
+                a = s.decide(p, closes, 0.0)
+                fresh = cls(**kw)
+                if cls is QuickScalpStrategy:
+                    fresh.htf_12h_bars, fresh.htf_24h_bars = 20, 40
+                b = fresh.decide(p, closes, 0.0)
+                self.assertEqual((a.action, a.direction, a.size, a.reason), (b.action, b.direction, b.size, b.reason))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.kline_store import (
+    INTERVAL_MS, MINUTE_MS, KlineRing, KlineStore, aggregate, to_row,
+)
+
+
+def _minute(t):
+    # deterministic bar for the minute opening at t (ms)
+    i = t // MINUTE_MS
+    p = 100.0 + (i % 37)
+    return [t, str(p), str(p + 2), str(p - 1), str(p + 1), '10', t + MINUTE_MS - 1, str(10 * p), 5, '4', str(4 * p), '0']
+
+
+class FakeBinance:
+    """REST stand-in: klines of any interval aggregated from ``_minute``."""
+
+    def __init__(self, now_ms):
+        self.now_ms = now_ms
+        self.calls = []
+
+    def __call__(self, market, symbol, interval, limit, start_time=None):
+        self.calls.append((market, symbol, interval, limit, start_time))
+        ms = INTERVAL_MS[interval]
+        cur = self.now_ms - self.now_ms % ms
+        if start_time is None:
+            start = cur - (limit - 1) * ms
+        else:
+            start = start_time - start_time % ms + (ms if start_time % ms else 0)
+        out = []
+        b = start
+        while b <= cur and len(out) < limit:
+            mins = [to_row(_minute(t)) for t in range(b, min(b + ms, self.now_ms - self.now_ms % MINUTE_MS + MINUTE_MS), MINUTE_MS)]
+            bar = aggregate(mins, b, ms)
+            out.append([int(bar[0])] + [str(x) for x in bar[1:6]] + [int(bar[6]), str(bar[7]), int(bar[8]), str(bar[9]), str(bar[10]), '0'])
+            b += ms
+        return out
+
+
+class KlineRingTests(unittest.TestCase):
+    def test_ring_wraps_and_merges(self):
+        r = KlineRing(3)
+        for t in range(5):
+            r.put((float(t),) + (1.0,) * 10)
+        self.assertEqual([x[0] for x in r.rows()], [2.0, 3.0, 4.0])
+        r.put((4.0,) + (2.0,) * 10)
+        self.assertEqual(r.row(-1)[1], 2.0)
+        r.merge([(3.0,) + (0.5,) * 10])  # lower volume: existing bar kept
+        self.assertEqual(r.row(1)[1], 1.0)
+        self.assertEqual(r.index_at(3.5), 2)
+
+
+class KlineStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.now = int(time.time() * 1000)
+        self.fake = FakeBinance(self.now)
+        self.store = KlineStore(fetch=self.fake, stream=False)
+        self.store.rest_ttl = 3600.0
+
+    def test_repeated_reads_are_served_from_the_ring(self):
+        a = self.store.get_klines('BTC/USDT', '1m', 50)
+        b = self.store.get_klines('BTCUSDT', '1m', 20, market='spot')
+        self.assertEqual(len(self.fake.calls), 1)
+        self.assertEqual(a[-20:], b)
+        self.assertEqual(b[-1][0], self.now - self.now % MINUTE_MS)
+        self.assertEqual(len(self.store.get_klines('BTCUSDT', '1m', 10, market='futures')), 10)
+        self.assertEqual(len(self.fake.calls), 2)
+
+    def test_derived_interval_matches_rest(self):
+        for interval in ('5m', '1h', '4h'):
+            got = self.store.get_klines('ETHUSDT', interval, 12)
+            want = self.fake('spot', 'ETHUSDT', interval, 12)
+            self.assertEqual(len(got), 12)
+            for g, w in zip(got, want):
+                self.assertEqual(g[0], w[0])
+                self.assertAlmostEqual(g[4], float(w[4]))
+                self.assertAlmostEqual(g[2], float(w[2]))
+                self.assertAlmostEqual(g[5], float(w[5]))
+
+    def test_stream_updates_roll_derived_bars(self):
+        self.store.get_klines('SOLUSDT', '5m', 3)
+        calls = len(self.fake.calls)
+        bucket = self.now - self.now % (5 * MINUTE_MS)
+        # a minute past the current 5m bucket arrives on the stream
+        t = bucket + 5 * MINUTE_MS
+        self.store.on_minute('spot', 'SOLUSDT', (float(t), 1.0, 5.0, 0.5, 2.0, 7.0, float(t + MINUTE_MS - 1), 7.0, 1.0, 1.0, 1.0))
+        self.store.on_minute('spot', 'SOLUSDT', (float(t), 1.0, 6.0, 0.5, 3.0, 8.0, float(t + MINUTE_MS - 1), 8.0, 1.0, 1.0, 1.0))
+        bars = self.store.get_klines('SOLUSDT', '5m', 3)
+        self.assertEqual(len(self.fake.calls), calls)
+        self.assertEqual(bars[-1][0], t)
+        self.assertEqual((bars[-1][2], bars[-1][4], bars[-1][5]), (6.0, 3.0, 8.0))
+        # the bucket that just closed was rolled forward from the 1m ring
+        self.assertEqual(bars[-2][0], bucket)
+
+    def test_start_time_filters(self):
+        start = self.now - 10 * MINUTE_MS
+        rows = self.store.get_klines('XRPUSDT', '1m', 11, start_time=start)
+        self.assertTrue(all(r[0] >= start for r in rows))
+        self.assertEqual(len(rows), 10)
+
+    def test_reads_past_the_rest_page_page_backwards_once(self):
+        from arbitrage.exchanges import kline_store
+        from arbitrage.utils import http_client
+
+        calls = []
+
+        def fake_get(url, params=None, timeout=None):
+            calls.append(dict(params))
+            end = params.get("endTime", self.now)
+            cur = end - end % MINUTE_MS
+            return [_minute(t) for t in range(cur - (params["limit"] - 1) * MINUTE_MS, cur + 1, MINUTE_MS)]
+
+        saved = http_client.get_json_sync
+        http_client.get_json_sync = fake_get
+        try:
+            rows = kline_store._rest_fetch("spot", "BTCUSDT", "1m", 2500)
+            self.assertEqual(len(calls), 3)
+            self.assertNotIn("endTime", calls[0])
+            opens = [r[0] for r in rows]
+            self.assertEqual(len(opens), 2500)
+            self.assertEqual(opens[-1], self.now - self.now % MINUTE_MS)
+            self.assertTrue(all(b - a == MINUTE_MS for a, b in zip(opens, opens[1:])))
+
+            store = KlineStore(stream=False)
+            store.rest_ttl = 3600.0
+            del calls[:]
+            self.assertEqual(len(store.get_klines("BTCUSDT", "1m", 1500)), 1500)
+            self.assertEqual(len(store.get_klines("BTCUSDT", "1m", 1500)), 1500)
+            self.assertEqual(len(calls), 2)  # one paged backfill, no refetch on the second read
+        finally:
+            http_client.get_json_sync = saved
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.l2_book import APPLIED, GAP, STALE, BookViews, L2Book
+from arbitrage.exchanges.kucoin_depth_feeder import KucoinDepthFeeder
+
+
+def _reference(levels, reverse):
+    return sorted(((p, q) for p, q in levels.items()), key=lambda x: x[0], reverse=reverse)
+
+
+class L2BookTests(unittest.TestCase):
+    def test_random_updates_match_dict_and_sort(self):
+        rnd = random.Random(3)
+        book = L2Book("BTCUSDT", max_levels=None)
+        ref = {"asks": {}, "bids": {}}
+        for _ in range(5000):
+            side = rnd.choice(("asks", "bids"))
+            base = 100.0 if side == "asks" else 99.0
+            price = round(base + (rnd.randint(0, 200) * 0.01) * (1 if side == "asks" else -1), 2)
+            qty = 0.0 if rnd.random() < 0.3 else round(rnd.uniform(0.1, 5.0), 3)
+            book.update(side, price, qty)
+            if qty == 0.0:
+                ref[side].pop(price, None)
+            else:
+                ref[side][price] = qty
+        self.assertEqual(book.top("asks", 50), _reference(ref["asks"], False)[:50])
+        self.assertEqual(book.top("bids", 50), _reference(ref["bids"], True)[:50])
+        self.assertEqual(book.depth(), (len(ref["asks"]), len(ref["bids"])))
+
+    def test_sequence_rules(self):
+        book = L2Book("BTCUSDT")
+        book.load_snapshot([["101", "1"], ["102", "2"]], [["100", "1"]], seq=10)
+        self.assertEqual(book.apply_diff([["101", "0"]], first_seq=5, last_seq=10), STALE)
+        self.assertEqual(book.best_ask(), (101.0, 1.0))
+        self.assertEqual(book.apply_diff([["101", "0"]], first_seq=9, last_seq=12), APPLIED)
+        self.assertEqual(book.seq, 12)
+        self.assertEqual(book.best_ask(), (102.0, 2.0))
+        self.assertEqual(book.apply_diff(bids=[["100.5", "3"]], first_seq=14, last_seq=15), GAP)
+        self.assertEqual(book.best_bid(), (100.0, 1.0))
+
+    def test_max_levels_trims_far_side(self):
+        book = L2Book("X", max_levels=10)
+        book.apply(bids=[[float(p), 1.0] for p in range(1, 101)])
+        levels = book.top("bids", 100)
+        self.assertLessEqual(len(levels), 13)
+        self.assertEqual(levels[0][0], 100.0)
+
+    def test_views_are_cached_until_change(self):
+        book = L2Book("X")
+        book.apply(asks=[[2.0, 1.0]], bids=[[1.0, 1.0]])
+        v1 = book.view(5)
+        self.assertIs(book.view(5), v1)
+        book.update("asks", 1.5, 2.0)
+        v2 = book.view(5)
+        self.assertIsNot(v2, v1)
+        self.assertEqual(v2["asks"][0], (1.5, 2.0))
+
+    def test_feeder_exposes_book_views(self):
+        feeder = KucoinDepthFeeder(["BTC/USDT"])
+        book = L2Book("BTCUSDT")
+        book.load_snapshot([["101", "1"]], [["100", "2"]], seq=1)
+        feeder._l2["BTCUSDT"] = book
+        feeder._l2["ETHUSDT"] = L2Book("ETHUSDT")
+        self.assertIsInstance(feeder._books, BookViews)
+        self.assertEqual(list(feeder._books.keys()), ["BTCUSDT"])
+        self.assertEqual(feeder.get_order_book("BTC/USDT", depth=1), {"asks": [(101.0, 1.0)], "bids": [(100.0, 2.0)]})
+        self.assertEqual(feeder.get_tickers()["BTC/USDT"]["last"], 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
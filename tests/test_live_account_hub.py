@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.live_account_hub import LiveAccountHub
+from arbitrage.live_dashboard import LiveDashboard, Position
+
+
+class FakeExchange:
+    """ccxt.pro stand-in: watch_* calls block on queues the test feeds."""
+
+    def __init__(self):
+        self.balances = asyncio.Queue()
+        self.orders = asyncio.Queue()
+        self.tickers = {}
+        self.ticker_calls = []
+        self.market_loads = 0
+        self.cancel_gate = None
+
+    async def load_markets(self):
+        self.market_loads += 1
+        await asyncio.sleep(0)
+
+    async def fetch_balance(self):
+        return {"USDT": {"total": 1000.0}}
+
+    async def watch_balance(self):
+        return await self.balances.get()
+
+    async def watch_orders(self):
+        try:
+            return await self.orders.get()
+        except asyncio.CancelledError:
+            # closing the socket takes a while
+            if self.cancel_gate is not None:
+                await self.cancel_gate.wait()
+            raise
+
+    async def watch_ticker(self, symbol):
+        self.ticker_calls.append(symbol)
+        return await self.tickers.setdefault(symbol, asyncio.Queue()).get()
+
+
+class LiveAccountHubTests(unittest.TestCase):
+    def setUp(self):
+        self.dashboard = LiveDashboard()
+        self.dashboard.open_position(Position(symbol="MYXUSDT", side="long", entry_price=2.0, size=10.0,
+                                              entry_time=0, market="futures", is_live=True))
+        self.exchanges = []
+        self.cleanups = 0
+
+    async def _factory(self):
+        ex = FakeExchange()
+        self.exchanges.append(ex)
+
+        async def cleanup():
+            self.cleanups += 1
+
+        return ex, cleanup
+
+    def _hub(self, **kw):
+        kw.setdefault("idle_s", 0.05)
+        return LiveAccountHub(exchange_factory=self._factory, dashboard=self.dashboard, **kw)
+
+    @staticmethod
+    def _types(client):
+        out = []
+        while not client.queue.empty():
+            out.append(client.queue.get_nowait())
+        return out
+
+    def test_clients_share_one_upstream_and_get_a_snapshot(self):
+        async def run():
+            hub = self._hub()
+            a = await hub.subscribe()
+            await asyncio.sleep(0.05)  # initial balance, positions, ticker watcher
+            b = await hub.subscribe()
+            self.assertEqual(len(self.exchanges), 1)
+            ex = self.exchanges[0]
+            self.assertEqual(ex.ticker_calls, ["MYX/USDT:USDT"])
+
+            # late joiner: full current state straight away
+            snap = self._types(b)
+            self.assertEqual([m["type"] for m in snap], ["connected", "balance", "positions"])
+            self.assertEqual(snap[1]["data"]["wallet_balance"], 1000.0)
+            self.assertEqual(snap[2]["data"][0]["position_id"], "MYXUSDT_LONG")
+
+            ex.tickers["MYX/USDT:USDT"].put_nowait({"last": 2.5})
+            await asyncio.sleep(0.01)
+            for c in (a, b):
+                pnl = [m for m in self._types(c) if m["type"] == "pnl_update"]
+                self.assertEqual(pnl[-1]["data"]["unrealized_pnl"], 5.0)
+            # the latest P&L is part of the snapshot
+            self.assertEqual(hub.snapshot()[-1]["data"]["current_price"], 2.5)
+
+            hub.unsubscribe(a)
+            hub.unsubscribe(b)
+            with self.assertRaises(ConnectionError):
+                await a.get(0.1)
+            await asyncio.sleep(0.15)
+            self.assertFalse(hub.running)
+            self.assertEqual(self.cleanups, 1)
+
+            c = await hub.subscribe()
+            self.assertEqual(len(self.exchanges), 2)
+            hub.unsubscribe(c)
+            await hub.stop()
+
+        asyncio.run(run())
+
+    def test_subscribe_during_stop_gets_a_fresh_upstream(self):
+        async def run():
+            hub = self._hub()
+            a = await hub.subscribe()
+            await asyncio.sleep(0.01)
+            self.exchanges[0].cancel_gate = gate = asyncio.Event()
+            hub.unsubscribe(a)
+            stopping = asyncio.create_task(hub.stop())
+            await asyncio.sleep(0.01)  # stop() is waiting on the watcher
+            subscribing = asyncio.create_task(hub.subscribe())
+            await asyncio.sleep(0.01)
+            gate.set()
+            b = await asyncio.wait_for(subscribing, 1.0)
+            await stopping
+            self.assertTrue(hub.running)
+            self.assertEqual((len(self.exchanges), self.cleanups), (2, 1))
+            self.assertIs(hub._exchange, self.exchanges[1])
+            hub.unsubscribe(b)
+            await hub.stop()
+
+        asyncio.run(run())
+
+    def test_slow_client_is_resynced_instead_of_blocking(self):
+        async def run():
+            hub = self._hub(queue_size=8)
+            slow = await hub.subscribe()
+            await asyncio.sleep(0.05)
+            fast = await hub.subscribe()
+            self._types(fast)
+            for i in range(20):
+                hub.publish({"type": "orders", "data": [{"id": i}], "timestamp": i})
+                self._types(fast)
+            self.assertGreater(slow.resyncs, 0)
+            self.assertGreater(slow.drops, 0)
+            self.assertLessEqual(slow.queue.qsize(), 8)
+            self.assertEqual(fast.drops, 0)
+            msgs = self._types(slow)
+            self.assertIn("connected", [m["type"] for m in msgs])
+            self.assertEqual(msgs[-1]["data"], [{"id": 19}])
+            stats = hub.stats()
+            self.assertEqual(len(stats["clients"]), 2)
+            hub.unsubscribe(slow)
+            hub.unsubscribe(fast)
+            await hub.stop()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
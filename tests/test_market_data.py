@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import numpy as np
+
+from arbitrage import market_data
+
+MIN = 60_000
+T0 = 1_700_000_000_000 - 1_700_000_000_000 % MIN
+
+
+def _kline(ts):
+    p = 100.0 + (ts - T0) / MIN
+    return [ts, str(p), str(p + 1), str(p - 1), str(p + 0.5), '10.0', ts + MIN - 1]
+
+
+class FakeFetch:
+    def __init__(self, now):
+        self.now = now
+        self.calls = []
+
+    def __call__(self, market, symbol, interval, limit, start_time=None):
+        self.calls.append((start_time, limit))
+        last = self.now - self.now % MIN  # the open bar
+        first = last - (limit - 1) * MIN if start_time is None else start_time
+        return [_kline(t) for t in range(first, min(first + limit * MIN, last + MIN), MIN)]
+
+
+class MarketDataTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_incremental_update_fetches_only_missing_bars(self):
+        fetch = FakeFetch(now=T0 + 100 * MIN + 30_000)
+        added = market_data.update_ohlcv('MYX/USDT', '1m', start=T0 + 50 * MIN, fetch=fetch,
+                                         root=self.root, now_ms=fetch.now)
+        self.assertEqual(added, 50)  # the open bar at T0+100m is not stored
+        self.assertEqual(market_data.coverage('MYXUSDT', '1m', root=self.root),
+                         (T0 + 50 * MIN, T0 + 99 * MIN, 50))
+
+        fetch.now += 10 * MIN
+        fetch.calls.clear()
+        added = market_data.update_ohlcv('MYXUSDT', '1m', start=T0 + 40 * MIN, fetch=fetch,
+                                         root=self.root, now_ms=fetch.now)
+        self.assertEqual(added, 20)
+        self.assertEqual(fetch.calls, [(T0 + 40 * MIN, 10), (T0 + 100 * MIN, 11)])
+
+        data = market_data.load_ohlcv('MYXUSDT', '1m', start=T0 + 45 * MIN, end=T0 + 54 * MIN, root=self.root)
+        self.assertIsInstance(data['close'], np.memmap)
+        self.assertFalse(data['close'].flags.writeable)
+        self.assertEqual(data['timestamp'].tolist(), [float(T0 + i * MIN) for i in range(45, 55)])
+        self.assertEqual(data['close'][0], 145.5)
+        full = market_data.load_ohlcv('MYXUSDT', '1m', root=self.root)
+        self.assertTrue(np.all(np.diff(full['timestamp']) == MIN))
+
+    def test_append_merges_and_replaces_duplicates(self):
+        market_data.append_ohlcv('BTCUSDT', '15m', [[3, 1, 1, 1, 1, 1], [1, 1, 1, 1, 1, 1]],
+                                 market='spot', root=self.root)
+        n = market_data.append_ohlcv('BTCUSDT', '15m', [[2, 2, 2, 2, 2, 2], [3, 9, 9, 9, 9, 9]],
+                                     market='spot', root=self.root)
+        self.assertEqual(n, 1)
+        data = market_data.load_ohlcv('BTCUSDT', '15m', market='spot', root=self.root)
+        self.assertEqual(data['timestamp'].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(data['close'].tolist(), [1.0, 2.0, 9.0])
+        self.assertEqual(market_data.load_ohlcv('ETHUSDT', '15m', root=self.root)['close'].size, 0)
+
+    def test_csv_roundtrip_and_frame(self):
+        src = os.path.join(self.root, 'in.csv')
+        with open(src, 'w') as f:
+            f.write('dt,ts,open,high,low,close,volume\n')
+            f.write('x,1759250400000,6.941,7.262,6.915,7.246,223660.08\n')
+            f.write('x,1759250460000,7.244,7.409,6.967,7.358,144700.14\n')
+        self.assertEqual(market_data.import_csv(src, 'ALPINEUSDT', '1m', root=self.root), 2)
+        out = os.path.join(self.root, 'out.csv')
+        market_data.export_csv(market_data.load_ohlcv('ALPINEUSDT', '1m', root=self.root), out)
+        with open(out) as f:
+            self.assertEqual(f.read().splitlines()[1], '1759250400000,6.941,7.262,6.915,7.246,223660.08')
+        df = market_data.load_ohlcv('ALPINEUSDT', '1m', as_frame=True, root=self.root)
+        self.assertEqual(list(df.columns), list(market_data.COLUMNS))
+        self.assertEqual(str(df['timestamp'].dtype), 'int64')
+        self.assertEqual([s['symbol'] for s in market_data.list_series(self.root)], ['ALPINEUSDT'])
+
+
+if __name__ == "__main__":
+    unittest.main()
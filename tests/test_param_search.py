@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import numpy as np
+
+from arbitrage.param_search import (
+    MedianPruner, SharedArrays, grid, load_results, run_grid, walk_forward_windows,
+)
+
+
+def _window_sums(trial):
+    x = trial.data['x']
+    if trial.params.get('fail'):
+        raise ValueError('boom')
+    total = 0.0
+    for i, (lo, hi) in enumerate(walk_forward_windows(len(x), 10, 10, 10)):
+        v = float(x[lo:hi].sum()) * trial.params['k']
+        total += v
+        trial.report(i, v)
+    return {'total': total, 'pid': os.getpid(), 'writeable': bool(x.flags.writeable)}
+
+
+def _crash(trial):
+    if trial.params['k'] == 2:
+        os._exit(1)  # the worker dies: the pool breaks
+    return trial.params['k']
+
+
+class ParamSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.x = np.arange(50, dtype=np.float64)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'grid.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _expected(self, k):
+        return sum(float(self.x[lo:hi].sum()) * k for lo, hi in walk_forward_windows(50, 10, 10, 10))
+
+    def test_shared_arrays_roundtrip(self):
+        data = {'a': np.arange(7, dtype=np.int64), 'b': np.linspace(0, 1, 5).reshape(5, 1)}
+        shared = SharedArrays(data)
+        try:
+            shm, views = SharedArrays.attach(shared.spec)
+            np.testing.assert_array_equal(views['a'], data['a'])
+            np.testing.assert_array_equal(views['b'], data['b'])
+            self.assertFalse(views['b'].flags.writeable)
+            del views
+            shm.close()
+        finally:
+            shared.close()
+
+    def test_pool_run_streams_and_resumes(self):
+        combos = grid(k=[1, 2, 3, 4], fail=[False])
+        recs = run_grid(_window_sums, combos, data={'x': self.x}, results_path=self.path,
+                        workers=2, verbose=False)
+        self.assertEqual(len(recs), 4)
+        for r in recs:
+            self.assertEqual(r['status'], 'ok')
+            self.assertEqual(r['result']['total'], self._expected(r['params']['k']))
+            self.assertNotEqual(r['result']['pid'], os.getpid())
+            self.assertFalse(r['result']['writeable'])
+        self.assertEqual(len(load_results(self.path)), 4)
+
+        # a second run only evaluates the new combos; errors are recorded, not raised
+        more = combos + [{'k': 5, 'fail': False}, {'k': 6, 'fail': True}]
+        recs = run_grid(_window_sums, more, data={'x': self.x}, results_path=self.path,
+                        workers=2, verbose=False)
+        self.assertEqual(len(recs), 6)
+        lines = load_results(self.path)
+        self.assertEqual(len(lines), 6)
+        self.assertEqual({r['params']['k']: r['status'] for r in lines}[6], 'error')
+
+        # failed combos are retried on resume
+        recs = run_grid(_window_sums, more, data={'x': self.x}, results_path=self.path,
+                        workers=1, verbose=False)
+        self.assertEqual(len(load_results(self.path)), 7)
+
+    def test_dead_worker_fails_its_combos_instead_of_the_run(self):
+        combos = grid(k=[1, 2, 3, 4, 5, 6])
+        recs = run_grid(_crash, combos, results_path=self.path, workers=2, verbose=False)
+        self.assertEqual(sorted(r['params']['k'] for r in recs), [1, 2, 3, 4, 5, 6])
+        by_k = {r['params']['k']: r for r in recs}
+        self.assertEqual(by_k[2]['status'], 'error')
+        self.assertIn('BrokenProcessPool', by_k[2]['error'])
+        self.assertEqual(len(load_results(self.path)), 6)
+
+    def test_median_pruner_stops_trailing_trials(self):
+        # inline run: each trial sees every finished one
+        combos = [{'k': k, 'fail': False} for k in (4, 5, 6, 7, 1)]
+        recs = run_grid(_window_sums, combos, data={'x': self.x}, workers=1, verbose=False,
+                        pruner=MedianPruner(warmup_steps=1, min_trials=3))
+        status = {r['params']['k']: r['status'] for r in recs}
+        self.assertEqual(status, {4: 'ok', 5: 'ok', 6: 'ok', 7: 'ok', 1: 'pruned'})
+        pruned = [r for r in recs if r['status'] == 'pruned'][0]
+        self.assertEqual(list(pruned['intermediate']), ['0', '1'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage import replay
+from arbitrage.exchanges import feeder_runtime, recorder
+from arbitrage.exchanges.binance_depth_feeder import BinanceDepthFeeder
+from arbitrage.exchanges.feeder_runtime import FeederRuntime, run_blocking
+from arbitrage.exchanges.kline_store import KlineStore
+from arbitrage.exchanges.recorder import BINARY, CLOSE, OPEN, REST, TEXT, Record, Recorder
+
+
+def _diff(U, u, asks=(), bids=()):
+    data = {"e": "depthUpdate", "s": "BTCUSDT", "U": U, "u": u, "a": [list(a) for a in asks], "b": [list(b) for b in bids]}
+    return json.dumps({"stream": "btcusdt@depth@100ms", "data": data})
+
+
+SNAPSHOT = {
+    "lastUpdateId": 100,
+    "asks": [["101.0", "1.0"], ["102.0", "2.0"]],
+    "bids": [["100.0", "1.5"], ["99.0", "3.0"]],
+}
+URL = "wss://stream.binance.com:9443/stream?streams=btcusdt@depth@100ms"
+
+
+class RecorderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_segments_rotate_and_reannounce_open_connections(self):
+        rec = Recorder(self.tmp.name, segment_mb=0.0002, sources=["binance"]).start()
+        self.assertFalse(rec.wants("kucoin-depth"))
+        conn = rec.open_conn("binance-depth", URL)
+        frames = [_diff(i, i) for i in range(1, 9)]
+        for msg in frames:
+            rec.frame(conn, "binance-depth", msg)
+        rec.frame(conn, "binance-depth", b"\x00\x01proto")
+        rec.rest("binance-depth", "BinanceDepthFeeder._fetch_snapshot", ("BTCUSDT",), SNAPSHOT)
+        rec.rest("binance-depth", "f", (), object())  # not JSON: skipped
+        rec.close_conn(conn, "binance-depth")
+        rec.stop()
+
+        paths = recorder.segment_paths(self.tmp.name)
+        self.assertGreater(len(paths), 1)
+        records = list(recorder.read_records(self.tmp.name))
+        self.assertEqual([r.payload for r in records if r.kind == TEXT], frames)
+        self.assertEqual([r.payload for r in records if r.kind == BINARY], [b"\x00\x01proto"])
+        self.assertEqual([r.payload["result"] for r in records if r.kind == REST], [SNAPSHOT])
+        self.assertEqual(records[-1].kind, CLOSE)
+        for p in paths:
+            first = next(iter(recorder.read_records(p)))
+            self.assertEqual((first.kind, first.conn, first.payload), (OPEN, conn, URL))
+
+        # a segment cut short (crash) reads up to the damage
+        with open(paths[-1], "rb") as f:
+            raw = f.read()
+        with open(paths[-1], "wb") as f:
+            f.write(raw[:len(raw) // 2])
+        self.assertLess(len(list(recorder.read_records(self.tmp.name))), len(records))
+
+    def test_full_queue_drops_frames_but_keeps_open_and_close(self):
+        rec = Recorder(self.tmp.name, max_queue=1)
+        conn = rec.open_conn("binance-depth", URL)
+        rec.frame(conn, "binance-depth", _diff(1, 1))
+        rec.close_conn(conn, "binance-depth")
+        self.assertEqual(rec.dropped, 1)
+        rec.start().stop()
+        self.assertEqual([r.kind for r in recorder.read_records(self.tmp.name)], [OPEN, CLOSE])
+
+
+class ReplayTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._saved = feeder_runtime._RUNTIME
+        feeder_runtime._RUNTIME = FeederRuntime()
+
+    def tearDown(self):
+        recorder.install_replay(None)
+        feeder_runtime._RUNTIME = self._saved
+        self.tmp.cleanup()
+
+    def test_binance_feeder_rebuilds_its_book_from_a_recording(self):
+        rec = Recorder(self.tmp.name).start()
+        conn = rec.open_conn("binance-depth", URL)
+        rec.frame(conn, "binance-depth", _diff(95, 100, asks=[("101.0", "9.0")]))
+        rec.frame(conn, "binance-depth", _diff(99, 102, asks=[("101.0", "0")]))
+        rec.rest("binance-depth", "BinanceDepthFeeder._fetch_snapshot", ("BTCUSDT",), SNAPSHOT)
+        rec.frame(conn, "binance-depth", _diff(103, 103, bids=[("100.5", "2.0")]))
+        rec.frame(conn, "binance-depth", _diff(104, 104, bids=[("99.0", "0")]))
+        rec.stop()
+
+        session = replay.ReplaySession(self.tmp.name, claim_timeout=5.0).start()
+        feeder = BinanceDepthFeeder(["BTC/USDT"])
+        feeder.start()
+        try:
+            # the dispatcher only finishes once the feeder has handled the last frame
+            self.assertTrue(session.wait(10.0))
+            ob = feeder.get_order_book("BTC/USDT", depth=5)
+            # book times come from the simulated clock, not the replay's wall time
+            self.assertEqual(recorder.now(), session.last_ts)
+            self.assertEqual(feeder._ts, session.last_ts)
+        finally:
+            session.stop()
+            feeder.stop()
+        self.assertEqual(ob["asks"], [(102.0, 2.0)])
+        self.assertEqual(ob["bids"], [(100.5, 2.0), (100.0, 1.5)])
+        stats = session.stats()
+        self.assertEqual((stats["frames"], stats["unclaimed"], stats["rest_served"]), (4, 0, 1))
+        self.assertEqual(session.sources, {"binance-depth": 1})
+        self.assertEqual(replay._binance_symbols(session.urls["binance-depth"]), ["BTCUSDT"])
+
+
+class _FakeStrategy:
+    symbol = "BTCUSDT"
+    mode = "bear"
+    interval = "15m"
+
+    def __init__(self):
+        self.bars = []
+        self.ticks = []
+
+    def _bars_needed(self):
+        return 2
+
+    async def on_bar(self, closes, bar_close_ms=None):
+        self.bars.append((closes, bar_close_ms))
+        await self._emit_action({"id": "x", "action": "open_short", "price_hint": closes[-1], "pos_size": 1.0, "reason": "test"})
+
+    async def on_tick(self, price, ts_ms=None):
+        self.ticks.append((price, ts_ms))
+
+
+class StrategyDriverTests(unittest.TestCase):
+    def test_closed_minutes_become_interval_bars(self):
+        t0 = 1_700_000_100_000 - 1_700_000_100_000 % 900_000
+        strat = _FakeStrategy()
+        driver = replay.StrategyDriver([strat])
+        for i in range(46):
+            k = {"t": t0 + i * 60_000, "T": t0 + (i + 1) * 60_000 - 1, "s": "BTCUSDT", "c": str(100 + i), "x": True}
+            msg = json.dumps({"stream": "btcusdt@kline_1m", "data": {"e": "kline", "s": "BTCUSDT", "k": k}})
+            driver.on_record(Record((t0 + (i + 1) * 60_000) / 1000.0, 1, TEXT, "klines-futures", msg))
+        mark = json.dumps({"data": {"e": "markPriceUpdate", "s": "BTCUSDT", "p": "150.5", "E": t0 + 2_760_500}})
+        driver.on_record(Record(t0 / 1000.0 + 2760.5, 1, TEXT, "klines-futures", mark))
+        driver.on_record(Record(0.0, 2, TEXT, "binance-depth", mark))
+        driver.close()
+
+        self.assertEqual(strat.bars, [([114.0], t0 + 900_000), ([114.0, 129.0], t0 + 1_800_000),
+                                      ([129.0, 144.0], t0 + 2_700_000)])
+        self.assertEqual(strat.ticks, [(150.5, t0 + 2_760_500)])
+        self.assertEqual([(a["ts"], a["action"], a["price"]) for a in driver.actions],
+                         [(t0 + 900_000, "open_short", 114.0), (t0 + 1_800_000, "open_short", 129.0),
+                          (t0 + 2_700_000, "open_short", 144.0)])
+
+    def test_recorded_marks_are_read_on_the_simulated_clock(self):
+        store = KlineStore(stream=False)
+        driver = replay.StrategyDriver([_FakeStrategy()], store=store)
+        ts_ms = 1_700_000_000_000
+        mark = json.dumps({"data": {"e": "markPriceUpdate", "s": "BTCUSDT", "p": "150.5", "r": "0.0001", "E": ts_ms}})
+        driver.on_record(Record(ts_ms / 1000.0, 1, TEXT, "klines-futures", mark))
+        driver.close()
+
+        session = _OfflineSession()
+        recorder.install_replay(session)
+        try:
+            session.clock.set(ts_ms / 1000.0 + 2.0)
+            self.assertEqual(store.mark("BTC/USDT"), (150.5, 0.0001))
+            session.clock.set(ts_ms / 1000.0 + 60.0)
+            self.assertIsNone(store.mark("BTCUSDT"))
+        finally:
+            recorder.install_replay(None)
+
+
+class _OfflineSession:
+    """A replay with no recorded REST results."""
+
+    def __init__(self):
+        self.clock = replay.SimClock()
+
+    def rest_result(self, call, args):
+        return False, None
+
+
+class RunBlockingReplayTests(unittest.TestCase):
+    def test_unrecorded_calls_do_not_run_during_a_replay(self):
+        calls = []
+
+        def _fetch(sym):
+            calls.append(sym)
+            return {"live": True}
+
+        recorder.install_replay(_OfflineSession())
+        try:
+            self.assertIsNone(asyncio.run(run_blocking(_fetch, "BTCUSDT")))
+        finally:
+            recorder.install_replay(None)
+        self.assertEqual(calls, [])
+        self.assertEqual(asyncio.run(run_blocking(_fetch, "BTCUSDT")), {"live": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from arbitrage.scanner import vwap_price_from_orderbook, find_executable_opportunities
@@ -29,6 +30,29 @@ class ExecutableScannerTests(unittest.TestCase):
         self.assertEqual(top.buy_exchange, "A")
         self.assertEqual(top.sell_exchange, "B")
 
+    def test_order_books_are_fetched_concurrently(self):
+        class SlowBookExchange(MockExchange):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.book_calls = 0
+
+            def get_order_book(self, symbol, depth=10):
+                self.book_calls += 1
+                time.sleep(0.2)
+                return super().get_order_book(symbol, depth)
+
+        prices_a = {f"T{i}-USD": 100.0 for i in range(8)}
+        prices_b = {f"T{i}-USD": 103.0 for i in range(8)}
+        ex1 = SlowBookExchange("A", prices_a)
+        ex2 = SlowBookExchange("B", prices_b)
+        t0 = time.time()
+        opps = find_executable_opportunities([ex1, ex2], amount=1.0, min_profit_pct=0.1)
+        elapsed = time.time() - t0
+        self.assertEqual(len(opps), 8)
+        # 16 books at 0.2s each would take 3.2s sequentially
+        self.assertLess(elapsed, 1.6)
+        self.assertEqual(ex1.book_calls + ex2.book_calls, 16)
+
 
 if __name__ == "__main__":
     unittest.main()
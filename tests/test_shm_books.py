@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.book_events import BookEventBus
+from arbitrage.exchanges.kucoin_depth_feeder import KucoinDepthFeeder
+from arbitrage.exchanges.l2_book import L2Book
+from arbitrage.exchanges.shm_books import BookPublisher, BookSegment, SharedBookFeeder
+
+
+class SharedBookTests(unittest.TestCase):
+    def setUp(self):
+        self.segment = BookSegment.create(capacity=8, depth=5)
+        # a second mapping of the same segment, as the web process would see it
+        self.reader_segment = BookSegment.attach(self.segment.name)
+
+    def tearDown(self):
+        self.reader_segment.close()
+        self.segment.close()
+
+    def _feeder(self):
+        feeder = KucoinDepthFeeder(["BTC/USDT"])
+        book = L2Book("BTCUSDT")
+        book.load_snapshot([[101 + i, 1 + i] for i in range(8)], [[100 - i, 2 + i] for i in range(8)], seq=1)
+        feeder._l2["BTCUSDT"] = book
+        return feeder, book
+
+    def test_reader_sees_published_books_and_tickers(self):
+        feeder, _ = self._feeder()
+        publisher = BookPublisher(self.segment)
+        self.assertEqual(publisher.publish(feeder), 1)
+        proxy = SharedBookFeeder("kucoin", self.reader_segment)
+
+        for sym in ("BTC/USDT", "BTC-USDT", "BTCUSDT"):
+            self.assertEqual(proxy.get_order_book(sym, depth=2), feeder.get_order_book(sym, depth=2))
+        # capped at the segment depth
+        self.assertEqual(len(proxy.get_order_book("BTC/USDT", depth=50)["asks"]), 5)
+        tickers = proxy.get_tickers()
+        self.assertEqual(tickers["BTC/USDT"]["last"], 100.0)
+        self.assertEqual(tickers["BTC/USDT"]["ask"], 101.0)
+        self.assertEqual(proxy.get_order_book("ETH/USDT"), {"asks": [], "bids": []})
+
+    def test_held_slot_serves_the_last_consistent_book(self):
+        feeder, _ = self._feeder()
+        BookPublisher(self.segment).publish(feeder)
+        proxy = SharedBookFeeder("kucoin", self.reader_segment)
+        before = proxy.get_order_book("BTC/USDT", depth=5)
+        self.assertEqual(proxy.get_book_tickers()["BTC/USDT"]["bid_sz"], 2.0)
+
+        # the writer stalls mid-update: seq stays odd through every retry
+        slot = self.segment.lookup("BTC/USDT")
+        data, base = self.segment._data, slot * self.segment.slot_len
+        data[base] += 1.0
+        t0 = time.perf_counter()
+        held = proxy.get_order_book("BTC/USDT", depth=5)
+        self.assertGreaterEqual(time.perf_counter() - t0, 7 * BookSegment.READ_BACKOFF_S)
+        self.assertEqual(held, before)
+        self.assertEqual(proxy.get_book_tickers()["BTC/USDT"]["ask"], 101.0)
+        self.assertEqual(self.reader_segment.stale_reads, 2)
+        data[base] += 1.0
+        self.assertEqual(proxy.get_order_book("BTC/USDT", depth=5), before)
+
+        # a slot this reader never saw consistent has no fallback
+        fresh = SharedBookFeeder("kucoin", BookSegment.attach(self.segment.name))
+        data[base] += 1.0
+        try:
+            self.assertEqual(fresh.get_order_book("BTC/USDT"), {"asks": [], "bids": []})
+        finally:
+            data[base] += 1.0
+            fresh.segment.close()
+
+    def test_book_tickers_match_the_gate_feeder_shape(self):
+        feeder, _ = self._feeder()
+        BookPublisher(self.segment).publish(feeder)
+        proxy = SharedBookFeeder("kucoin", self.reader_segment)
+        top = proxy.get_book_tickers()["BTC/USDT"]
+        self.assertEqual((top["bid"], top["bid_sz"], top["ask"], top["ask_sz"]), (100.0, 2.0, 101.0, 1.0))
+        self.assertIsNotNone(top["ts"])
+
+    def test_unchanged_symbols_are_skipped_and_updates_flow(self):
+        feeder, book = self._feeder()
+        publisher = BookPublisher(self.segment)
+        publisher.publish(feeder)
+        self.assertEqual(publisher.publish(feeder), 0)
+        time.sleep(0.001)
+        book.update("bids", 100.5, 7.0)
+        self.assertEqual(publisher.publish(feeder), 1)
+        proxy = SharedBookFeeder("kucoin", self.reader_segment)
+        self.assertEqual(proxy.get_order_book("BTC/USDT", depth=1)["bids"], [(100.5, 7.0)])
+
+    def test_rewritten_books_are_relayed_to_the_bus(self):
+        feeder, book = self._feeder()
+        publisher = BookPublisher(self.segment)
+        proxy = SharedBookFeeder("kucoin", self.reader_segment)
+        bus = BookEventBus()
+        sub = bus.subscribe()
+        self.assertEqual(proxy.publish_changes(bus), 0)
+        publisher.publish(feeder)
+        self.assertEqual(proxy.publish_changes(bus), 1)
+        ev = sub.drain()[("kucoin", "BTCUSDT")]
+        self.assertEqual((ev.bid, ev.ask), (100.0, 101.0))
+        # nothing rewritten since: nothing forwarded
+        self.assertEqual(proxy.publish_changes(bus), 0)
+        time.sleep(0.001)
+        book.update("asks", 100.8, 1.0)
+        publisher.publish(feeder)
+        self.assertEqual(proxy.publish_changes(bus), 1)
+        self.assertEqual(sub.drain()[("kucoin", "BTCUSDT")].ask, 100.8)
+
+    def test_segment_full_drops_new_symbols(self):
+        for i in range(8):
+            self.assertTrue(self.segment.write(f"T{i}/USDT", [(1.0, 1.0)], [(0.9, 1.0)], None, time.time()))
+        self.assertFalse(self.segment.write("EXTRA/USDT", [], [], 1.0, None))
+        self.assertEqual(len(self.reader_segment.symbols()), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import math
+import os
+import sys
+import threading
+import time
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.spot_snapshot import PriceTable, SnapshotService, fetch_concurrently
+
+
+class FetchConcurrentlyTests(unittest.TestCase):
+    def test_runs_in_parallel_under_deadline(self):
+        def slow(v, d):
+            def _f():
+                time.sleep(d)
+                return v
+            return _f
+
+        def boom():
+            raise RuntimeError('venue down')
+
+        t0 = time.time()
+        out, ms = fetch_concurrently(
+            {'a': slow(1, 0.2), 'b': slow(2, 0.2), 'c': slow(3, 5.0), 'd': boom},
+            timeout=0.5,
+            defaults={'c': [], 'd': []},
+        )
+        self.assertLess(time.time() - t0, 1.0)
+        self.assertEqual(out, {'a': 1, 'b': 2, 'c': [], 'd': []})
+        self.assertEqual(ms['c'], -1.0)
+        self.assertGreater(ms['a'], 0)
+
+
+class PriceTableTests(unittest.TestCase):
+    def test_rows_only_list_quoting_venues(self):
+        t = PriceTable(['X', 'Y', 'Z'])
+        t.add('Y', 'BTCUSDT', 100.0, 5e6)
+        t.add('X', 'BTCUSDT', 101.0, 1e6)
+        t.add('Z', 'ETHUSDT', 10.0, 2e5)
+        self.assertEqual(len(t), 2)
+        rows = dict(t.rows())
+        self.assertEqual(rows['BTCUSDT'], [('X', 101.0, 1e6), ('Y', 100.0, 5e6)])
+        self.assertEqual(rows['ETHUSDT'], [('Z', 10.0, 2e5)])
+        self.assertTrue(math.isnan(t.price[0][1]))
+        self.assertEqual(t.counts(), {'X': 1, 'Y': 1, 'Z': 1})
+
+
+class SnapshotServiceTests(unittest.TestCase):
+    def test_serves_prebuilt_snapshot_and_refreshes(self):
+        calls = []
+
+        def build():
+            calls.append(threading.current_thread().name)
+            return {'n': len(calls), 'as_of': time.time()}
+
+        svc = SnapshotService('test', build, interval=0.05, idle_s=0.2)
+        first = svc.get(timeout=2.0)
+        self.assertIsNotNone(first)
+        self.assertEqual(first.payload['n'], 1)
+        self.assertTrue(first.etag.startswith('"'))
+        self.assertTrue(calls[0].startswith('snapshot-'))
+        deadline = time.time() + 2.0
+        while svc.builds < 3 and time.time() < deadline:
+            time.sleep(0.01)
+            svc.latest()
+        self.assertGreaterEqual(svc.builds, 3)
+        self.assertNotEqual(svc.latest().etag, first.etag)
+
+    def test_goes_idle_and_rebuilds_stale_snapshot(self):
+        svc = SnapshotService('idle', lambda: {'as_of': time.time()}, interval=0.02, idle_s=0.05, max_age=0.1)
+        svc.get(timeout=2.0)
+        deadline = time.time() + 2.0
+        while svc.status()['running'] and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertFalse(svc.status()['running'])
+        time.sleep(0.15)
+        self.assertGreater(svc.status()['age_s'], svc.max_age)
+        snap = svc.get(timeout=2.0)
+        self.assertLess(time.time() - snap.as_of, 0.1)
+
+    def test_cold_start_serves_placeholder_without_waiting(self):
+        release = threading.Event()
+
+        def build():
+            release.wait(5.0)
+            return {'rows': [1, 2], 'as_of': time.time()}
+
+        svc = SnapshotService('cold', build, interval=10.0, idle_s=5.0,
+                              placeholder=lambda: {'rows': [], 'warming_up': True})
+        t0 = time.time()
+        snap = svc.get(timeout=5.0)
+        self.assertLess(time.time() - t0, 1.0)
+        self.assertEqual(snap.payload, {'rows': [], 'warming_up': True})
+        self.assertIsNone(svc.latest())
+        release.set()
+        deadline = time.time() + 2.0
+        while svc.latest() is None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(svc.get(timeout=1.0).payload['rows'], [1, 2])
+
+    def test_failed_build_reports_error(self):
+        def build():
+            raise ValueError('no data')
+
+        svc = SnapshotService('fail', build, interval=10.0, idle_s=0.0)
+        self.assertIsNone(svc.get(timeout=2.0))
+        self.assertIn('no data', svc.status()['last_error'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import time
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage import spread_matrix
+from arbitrage.scanner import _price_candidates_scalar
+from arbitrage.exchanges.mock_exchange import MockExchange
+
+
+def _random_market(exchanges, n_symbols, seed=7):
+    rnd = random.Random(seed)
+    now = time.time()
+    market = {}
+    for s in range(n_symbols):
+        sym = f"T{s}/USDT"
+        base = rnd.uniform(0.01, 500.0)
+        for ex in exchanges:
+            if rnd.random() < 0.2:
+                continue
+            price = base * rnd.uniform(0.97, 1.03)
+            # keep ages clear of the 5s freshness boundary so clock drift
+            # between the two runs cannot flip a pair
+            age = rnd.choice((rnd.uniform(0.0, 4.0), rnd.uniform(6.0, 10.0)))
+            ts = None if rnd.random() < 0.3 else now - age
+            market.setdefault(sym, []).append((ex, ex.name, price, ts))
+    return market
+
+
+@unittest.skipUnless(spread_matrix.available(), "numpy not installed")
+class SpreadMatrixTests(unittest.TestCase):
+    def test_matches_scalar_loop(self):
+        exchanges = [
+            MockExchange("A", {}, fee_rate=0.001),
+            MockExchange("B", {}, fee_rate=0.002, withdraw_fee=0.05),
+            MockExchange("C", {}, fee_rate=0.0),
+            MockExchange("D", {}, fee_rate=0.001),
+        ]
+        market = _random_market(exchanges, 500)
+        filters = dict(min_profit_pct=0.1, min_price_diff_pct=0.5, min_notional=1.0)
+        expected = _price_candidates_scalar(market, **filters)
+        got = spread_matrix.SpreadMatrix.from_market(market, exchanges).candidates(**filters)
+        self.assertTrue(len(expected) > 0)
+        key = lambda c: (c[0], c[2], c[5], round(c[3], 9), round(c[6], 9))
+        self.assertEqual([key(c) for c in got], [key(c) for c in expected])
+
+    def test_stale_quotes_are_dropped(self):
+        ex1 = MockExchange("A", {})
+        ex2 = MockExchange("B", {})
+        now = time.time()
+        market = {"FOO/USDT": [(ex1, "A", 100.0, now - 60.0), (ex2, "B", 110.0, now)]}
+        got = spread_matrix.SpreadMatrix.from_market(market, [ex1, ex2]).candidates(min_profit_pct=0.1, min_price_diff_pct=1.0, now=now)
+        self.assertEqual(got, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+from collections import deque
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.kline_store import MINUTE_MS, MarketEvent
+from arbitrage.strategy_scheduler import StrategyScheduler
+
+
+class FakeStore:
+    def __init__(self):
+        self.listeners = []
+        self.watched = []
+
+    def watch(self, symbol, market='futures', mark=False):
+        self.watched.append(symbol)
+        return True
+
+    def unwatch(self, symbol, market='futures', mark=False):
+        self.watched.remove(symbol)
+
+    def add_listener(self, fn):
+        self.listeners.append(fn)
+
+    def remove_listener(self, fn):
+        self.listeners.remove(fn)
+
+    def emit(self, ev):
+        for fn in self.listeners:
+            fn(ev)
+
+
+class FakeStrategy:
+    def __init__(self, symbol, interval='5m', delay=0.0):
+        self.symbol = symbol
+        self.interval = interval
+        self.mode = 'scalp'
+        self.delay = delay
+        self.bars = []
+        self.ticks = []
+        self.signal_latency_ms = deque(maxlen=10)
+
+    def _bars_needed(self):
+        return 3
+
+    def _fetch_klines(self, limit):
+        return [[0, '1', '1', '1', str(100 + i)] for i in range(limit)]
+
+    async def on_bar(self, closes, bar_close_ms=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.bars.append((closes, bar_close_ms))
+        if bar_close_ms:
+            self.signal_latency_ms.append(time.time() * 1000 - bar_close_ms)
+
+    async def on_tick(self, price, ts_ms=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.ticks.append(price)
+
+
+def _kline(symbol, close_ms):
+    return MarketEvent('kline', 'futures', symbol, close_ms - 1, 1.0, None)
+
+
+class StrategySchedulerTests(unittest.TestCase):
+    def test_dispatches_bar_close_and_ticks_per_symbol(self):
+        store = FakeStore()
+        sched = StrategyScheduler(store=store, grace_s=3600)
+        btc, eth = FakeStrategy('BTCUSDT'), FakeStrategy('ETHUSDT', interval='1m')
+
+        async def run():
+            sched.register(btc)
+            sched.register(eth)
+            await asyncio.sleep(0.05)
+            self.assertEqual(len(btc.bars), 1)  # initial evaluation
+            self.assertEqual(btc.bars[0][0], [100.0, 101.0, 102.0])
+            now = time.time() * 1000
+            nxt = now - now % (5 * MINUTE_MS) + 5 * MINUTE_MS
+            # a 1m close inside the 5m bar only reaches the 1m strategy
+            store.emit(_kline('BTCUSDT', nxt - MINUTE_MS))
+            store.emit(_kline('ETHUSDT', nxt + MINUTE_MS))
+            store.emit(_kline('BTCUSDT', nxt))
+            store.emit(_kline('BTCUSDT', nxt))  # duplicate close is ignored
+            store.emit(MarketEvent('mark', 'futures', 'ETHUSDT', now, 2000.0))
+            await asyncio.sleep(0.05)
+            self.assertEqual([b[1] for b in btc.bars[1:]], [nxt])
+            self.assertEqual([b[1] for b in eth.bars[1:]], [nxt + MINUTE_MS])
+            self.assertEqual(eth.ticks, [2000.0])
+            self.assertEqual(btc.ticks, [])
+            stats = sched.stats()
+            self.assertEqual(stats['symbols'], ['BTCUSDT', 'ETHUSDT'])
+            self.assertEqual(stats['strategies'][0]['signal_latency_ms']['n'], 1)
+            await sched.unregister(btc)
+            await sched.unregister(eth)
+
+        asyncio.run(run())
+        self.assertEqual(store.watched, [])
+        self.assertEqual(store.listeners, [])
+
+    def test_slow_strategy_queue_is_bounded_and_ticks_conflate(self):
+        store = FakeStore()
+        sched = StrategyScheduler(store=store, queue_size=2, grace_s=3600)
+        slow, fast = FakeStrategy('BTCUSDT', delay=0.2), FakeStrategy('BTCUSDT')
+
+        async def run():
+            sched.register(slow)
+            sched.register(fast)
+            await asyncio.sleep(0.01)
+            now = time.time() * 1000
+            for i in range(10):
+                store.emit(MarketEvent('mark', 'futures', 'BTCUSDT', now + i, 100.0 + i))
+            await asyncio.sleep(0.01)
+            base = now - now % (5 * MINUTE_MS)
+            for i in range(1, 5):
+                store.emit(_kline('BTCUSDT', base + i * 5 * MINUTE_MS))
+                await asyncio.sleep(0.01)
+            self.assertEqual(len(fast.bars), 5)
+            self.assertEqual(fast.ticks, [109.0])
+            self.assertLessEqual(sched.stats()['strategies'][0]['queue_depth'], 2)
+            self.assertGreater(sched.stats()['strategies'][0]['drops'], 0)
+            await sched.unregister(slow)
+            await sched.unregister(fast)
+
+        asyncio.run(run())
+
+    def test_clock_dispatches_missing_bar_close(self):
+        store = FakeStore()
+        sched = StrategyScheduler(store=store, grace_s=0.0)
+        s = FakeStrategy('SOLUSDT', interval='1m')
+
+        async def run():
+            sched.register(s)
+            await asyncio.sleep(0.05)
+            sched._slots[id(s)].last_bar_ms -= MINUTE_MS  # pretend the last close was missed
+            await asyncio.sleep(1.2)
+            await sched.unregister(s)
+
+        asyncio.run(run())
+        self.assertEqual(len(s.bars), 2)
+        self.assertEqual(s.bars[1][1] % MINUTE_MS, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
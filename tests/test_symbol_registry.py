@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.symbol_registry import SymbolRegistry, parse_symbol
+from arbitrage.hotcoins import _parse_binance_symbol
+
+
+class SymbolRegistryTests(unittest.TestCase):
+    def test_spellings_share_one_interned_id(self):
+        reg = SymbolRegistry()
+        ids = [reg.canonical(s) for s in ('BTC/USDT', 'BTC-USDT', 'btc_usdt', 'BTCUSDT', 'BTC/USDT:USDT')]
+        self.assertEqual(set(ids), {'BTC/USDT'})
+        self.assertTrue(all(i is ids[0] for i in ids))
+        self.assertEqual(reg.key('BTC-USDT'), 'BTCUSDT')
+        self.assertEqual(reg.split('ETHBTC'), ('ETH', 'BTC'))
+
+    def test_listing_overrides_heuristic(self):
+        reg = SymbolRegistry()
+        # unknown quote: heuristic guesses a 3-char quote
+        self.assertEqual(reg.canonical('WBTCDAI'), 'WBTC/DAI')
+        self.assertEqual(reg.canonical('ABCDEFG'), 'ABCD/EFG')
+        reg.register('kucoin', 'ABC-DEFG', 'ABC', 'DEFG')
+        self.assertEqual(reg.canonical('ABCDEFG'), 'ABC/DEFG')
+        self.assertEqual(reg.native('kucoin', 'abc/defg'), 'ABC-DEFG')
+        self.assertEqual(reg.native('kucoin', 'ABCDEFG'), 'ABC-DEFG')
+        self.assertIsNone(reg.native('binance', 'ABC/DEFG'))
+
+    def test_exchange_native_lookup(self):
+        reg = SymbolRegistry()
+        reg.register_many('gate', [('BTC_USDT', 'BTC', 'USDT'), ('', 'X', 'Y')])
+        self.assertEqual(reg.canonical('BTC_USDT', 'gate'), 'BTC/USDT')
+        self.assertEqual(reg.native('gate', 'BTCUSDT'), 'BTC_USDT')
+
+    def test_lru_is_bounded(self):
+        reg = SymbolRegistry(lru_size=16)
+        for i in range(100):
+            reg.canonical(f'T{i}USDT')
+        self.assertLessEqual(reg.stats()['lru'], 16)
+        self.assertEqual(reg.canonical('T5USDT'), 'T5/USDT')
+
+    def test_matches_previous_binance_parser(self):
+        for sym, want in (('BTCUSDT', ('BTC', 'USDT')), ('ETHBTC', ('ETH', 'BTC')),
+                          ('BTC/USDT', ('BTC', 'USDT')), ('XRPUSD', ('XRP', 'USD')),
+                          ('BNBBUSD', ('BNB', 'BUSD')), ('SOLUSDC', ('SOL', 'USDC'))):
+            self.assertEqual(_parse_binance_symbol(sym), want)
+            self.assertEqual(parse_symbol(sym), want)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.kline_store import MarketEvent
+from arbitrage.live_dashboard import Position
+from arbitrage.tpsl_engine import TpSlEngine, TriggerIndex, triggers_for
+
+
+class FakeStore:
+    def __init__(self, stream=True):
+        self.stream = stream
+        self.listeners = []
+        self.watched = []
+        self.marks = {}
+
+    def watch(self, symbol, market="futures", mark=False):
+        self.watched.append(symbol)
+        return self.stream
+
+    def unwatch(self, symbol, market="futures", mark=False):
+        self.watched.remove(symbol)
+
+    def mark(self, symbol, max_age_s=10.0):
+        return self.marks.get(symbol)
+
+    def add_listener(self, fn):
+        self.listeners.append(fn)
+
+    def remove_listener(self, fn):
+        self.listeners.remove(fn)
+
+    def emit(self, symbol, price, ts=1.0):
+        self.marks[symbol] = (price, None)
+        for fn in self.listeners:
+            fn(MarketEvent("mark", "futures", symbol, ts, price))
+
+
+class FakeDashboard:
+    def __init__(self, *positions):
+        self.positions = {p.symbol: p for p in positions}
+        self.closed = []
+
+    def get_all_positions(self):
+        return list(self.positions.values())
+
+    def get_position(self, symbol):
+        return self.positions.get(symbol)
+
+    def close_position(self, symbol, exit_price, reason="manual"):
+        self.positions.pop(symbol)
+        self.closed.append((symbol, exit_price, reason))
+
+
+def _pos(symbol, side, sl, tp, market="futures", entry_time=1):
+    return Position(symbol=symbol, side=side, entry_price=100.0, size=1.0, entry_time=entry_time,
+                    stop_loss=sl, take_profit=tp, market=market, is_live=True)
+
+
+class TriggerIndexTests(unittest.TestCase):
+    def test_only_crossed_levels_fire_and_take_their_sibling_leg(self):
+        idx = TriggerIndex()
+        for i, pos in enumerate([_pos("A", "long", 95.0, 110.0, entry_time=1),
+                                 _pos("A", "short", 105.0, 90.0, entry_time=2),
+                                 _pos("A", "long", 80.0, 120.0, entry_time=3)]):
+            for direction, trig in triggers_for(pos, i):
+                idx.add(direction, trig)
+        self.assertEqual(idx.crossed(100.0), [])
+        hit = idx.crossed(105.0)
+        self.assertEqual([(t.reason, t.key[2]) for t in hit], [("stop_loss", 2)])
+        self.assertEqual(len(idx), 4)
+        hit = idx.crossed(94.0)
+        self.assertEqual([(t.reason, t.key[2]) for t in hit], [("stop_loss", 1)])
+        self.assertEqual(sorted(t.level for t in idx.up + idx.down), [80.0, 120.0])
+
+
+class TpSlEngineTests(unittest.TestCase):
+    def test_mark_updates_close_positions_without_rest(self):
+        async def run():
+            store = FakeStore()
+            dash = FakeDashboard(_pos("BTCUSDT", "long", 95.0, 110.0), _pos("ETHUSDT", "short", 105.0, 90.0))
+            polled = []
+
+            async def fetch(symbol, market):
+                polled.append(symbol)
+                return None
+
+            engine = TpSlEngine(dashboard=dash, store=store, price_fetcher=fetch, sync_s=0.01, poll_s=0.0)
+            task = asyncio.create_task(engine.run())
+            await asyncio.sleep(0.05)
+            self.assertEqual(sorted(store.watched), ["BTCUSDT", "ETHUSDT"])
+            store.emit("BTCUSDT", 100.0)
+            store.emit("ETHUSDT", 100.0)
+            polled.clear()
+            await asyncio.sleep(0.03)
+            self.assertEqual(polled, [])  # fresh marks: no REST
+
+            # marks arrive on the stream thread; the close happens on the app loop
+            t = threading.Thread(target=store.emit, args=("BTCUSDT", 110.5))
+            t.start()
+            t.join()
+            await asyncio.sleep(0.02)
+            self.assertEqual(dash.closed, [("BTCUSDT", 110.5, "take_profit")])
+            store.emit("BTCUSDT", 90.0)  # already closed: nothing more
+            await asyncio.sleep(0.03)
+            self.assertEqual(store.watched, ["ETHUSDT"])
+            self.assertEqual(len(dash.closed), 1)
+
+            stats = engine.stats()
+            self.assertEqual(stats["fired"], {"stop_loss": 0, "take_profit": 1})
+            self.assertIsNotNone(stats["latency_ms_p50"])
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self.assertEqual((store.listeners, store.watched), ([], []))
+
+        asyncio.run(run())
+
+    def test_spot_and_unstreamed_symbols_fall_back_to_rest(self):
+        async def run():
+            store = FakeStore(stream=False)
+            dash = FakeDashboard(_pos("SOLUSDT", "long", 95.0, None, market="spot"),
+                                 _pos("XRPUSDT", "short", 105.0, None))
+            prices = {"SOLUSDT": 94.0, "XRPUSDT": 100.0}
+
+            async def fetch(symbol, market):
+                return prices[symbol]
+
+            engine = TpSlEngine(dashboard=dash, store=store, price_fetcher=fetch)
+            engine.sync()
+            self.assertEqual(store.watched, ["XRPUSDT"])
+            await engine.poll_once()
+            self.assertEqual(dash.closed, [("SOLUSDT", 94.0, "stop_loss")])
+            self.assertEqual(engine.rest_polls, 2)
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
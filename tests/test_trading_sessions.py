@@ -0,0 +1,155 @@
+import asyncio
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges import binance_user_stream
+from arbitrage.exchanges.binance_user_stream import BinanceUserStream
+from arbitrage.trading_sessions import TradingSession, TradingSessionPool
+
+
+class FakeClient:
+    def __init__(self, hedged=True):
+        self.has = {"fetchPositionMode": True, "createOrderWs": True}
+        self.hedged = hedged
+        self.calls = []
+        self.fail_pings = False
+        self.check_mode = False
+
+    async def load_markets(self):
+        self.calls.append(("load_markets",))
+
+    async def fetch_position_mode(self):
+        return {"hedged": self.hedged}
+
+    async def set_leverage(self, leverage, symbol):
+        self.calls.append(("set_leverage", leverage, symbol))
+
+    async def fetch_time(self):
+        if self.fail_pings:
+            raise ConnectionError("down")
+        self.calls.append(("fetch_time",))
+
+    async def _order(self, via, symbol, type, side, amount, price, params):
+        self.calls.append((via, symbol, type, side, params))
+        if self.check_mode and ("positionSide" in params) != self.hedged:
+            raise Exception('binance {"code":-4061,"msg":"Order\'s position side does not match user\'s setting."}')
+        return {"id": str(len(self.calls)), "average": 100.0}
+
+    async def create_order(self, *args):
+        return await self._order("rest", *args)
+
+    async def create_order_ws(self, *args):
+        return await self._order("ws", *args)
+
+
+class TradingSessionTests(unittest.TestCase):
+    def setUp(self):
+        self.clients = []
+        self.closed = 0
+        self.hedged = True
+
+    async def _factory(self, exchange_id, market):
+        client = FakeClient(self.hedged)
+        self.clients.append(client)
+
+        async def cleanup():
+            self.closed += 1
+
+        return client, cleanup
+
+    def test_warm_session_caches_leverage_and_position_mode(self):
+        async def run():
+            pool = TradingSessionPool(client_factory=self._factory)
+            sess = await pool.get("binance", "futures")
+            self.assertIs(await pool.get("binance", "futures"), sess)
+            self.assertTrue(sess.hedged)
+
+            r1 = await sess.enter("BTCUSDT", "long", 0.01, leverage=5, stop_loss=95.0, take_profit=110.0, use_ws=True)
+            r2 = await sess.enter("BTCUSDT", "short", 0.01, leverage=5, use_ws=True)
+            client = self.clients[0]
+            self.assertEqual([c for c in client.calls if c[0] == "set_leverage"], [("set_leverage", 5, "BTCUSDT")])
+            self.assertEqual(client.calls.count(("load_markets",)), 1)
+            entries = [c for c in client.calls if len(c) > 2 and c[2] == "market"]
+            self.assertEqual([(c[0], c[3], c[4]) for c in entries],
+                             [("ws", "buy", {"positionSide": "LONG"}), ("ws", "sell", {"positionSide": "SHORT"})])
+            protect = {c[2]: (c[0], c[3], c[4]["stopPrice"]) for c in client.calls if len(c) > 2 and c[2].endswith("_MARKET")}
+            self.assertEqual(protect, {"STOP_MARKET": ("rest", "sell", 95.0), "TAKE_PROFIT_MARKET": ("rest", "sell", 110.0)})
+            self.assertIsNone(r2["stop_loss_order"])
+            self.assertTrue(r1["timing"]["ws"])
+            self.assertGreaterEqual(r1["timing"]["total_ms"], r1["timing"]["ack_ms"])
+            stats = pool.stats()["binance/futures"]
+            self.assertEqual((stats["orders"], stats["leverage_sets"]), (4, 1))
+            await pool.close_all()
+            self.assertEqual(self.closed, 1)
+
+        asyncio.run(run())
+
+    def test_leverage_follows_the_user_stream_mirror(self):
+        async def run():
+            stream = BinanceUserStream("k", "s")
+            stream.connected = stream.reconciled = True
+            stream.mirror.leverage["BTCUSDT"] = 5
+            binance_user_stream._STREAM = stream
+            try:
+                sess = await TradingSession(client_factory=self._factory).start()
+                await sess.ensure_leverage("BTC/USDT:USDT", 5)
+                # changed in the Binance UI: the stream reports it, the next order resets it
+                stream.handle('{"e": "ACCOUNT_CONFIG_UPDATE", "E": 1, "ac": {"s": "BTCUSDT", "l": 20}}')
+                await sess.ensure_leverage("BTC/USDT:USDT", 5)
+                await sess.ensure_leverage("BTC/USDT:USDT", 5)
+                calls = [c for c in self.clients[0].calls if c[0] == "set_leverage"]
+                self.assertEqual(calls, [("set_leverage", 5, "BTC/USDT:USDT")])
+                self.assertEqual(stream.mirror.leverage["BTCUSDT"], 5)
+                await sess.close()
+            finally:
+                binance_user_stream._STREAM = None
+
+        asyncio.run(run())
+
+    def test_one_way_mode_and_rebuild_after_failed_health_checks(self):
+        async def run():
+            self.hedged = False
+            sess = TradingSession("binance", "futures", client_factory=self._factory, ping_s=0.01, max_fails=2)
+            await sess.start()
+            self.assertEqual(sess.position_params("long"), {})
+            self.clients[0].fail_pings = True
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if sess.rebuilds:
+                    break
+            self.assertEqual((len(self.clients), self.closed, sess.rebuilds), (2, 1, 1))
+            self.assertTrue(sess.ready)
+            await sess.close()
+
+        asyncio.run(run())
+
+    def test_entry_retries_once_after_the_position_mode_changed(self):
+        async def run():
+            sess = await TradingSession(client_factory=self._factory).start()
+            self.assertTrue(sess.hedged)
+            client = self.clients[0]
+            # switched to one-way mode in the Binance UI after the session started
+            client.hedged = False
+            client.check_mode = True
+            r = await sess.enter("BTCUSDT", "long", 0.01, stop_loss=95.0, take_profit=110.0)
+            self.assertFalse(sess.hedged)
+            entries = [c[4] for c in client.calls if len(c) > 2 and c[2] == "market"]
+            self.assertEqual(entries, [{"positionSide": "LONG"}, {}])
+            self.assertNotIsInstance(r["stop_loss_order"], Exception)
+            self.assertNotIsInstance(r["take_profit_order"], Exception)
+            stats = sess.stats()
+            # protective orders are counted but kept out of the latency stats
+            self.assertEqual((stats["orders"], stats["order_errors"], len(sess._ack_ms)), (3, 1, 1))
+            await sess.close()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
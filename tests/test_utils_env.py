@@ -0,0 +1,28 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.utils.env import env_float, pct
+
+
+class EnvHelperTests(unittest.TestCase):
+    def test_env_float_falls_back_on_unset_or_malformed(self):
+        with mock.patch.dict(os.environ, {"ARB_TEST_X": "2.5", "ARB_TEST_BAD": "fast"}):
+            self.assertEqual(env_float("ARB_TEST_X", 1.0), 2.5)
+            self.assertEqual(env_float("ARB_TEST_BAD", 1.0), 1.0)
+            self.assertEqual(env_float("ARB_TEST_UNSET", 3), 3)
+
+    def test_pct_is_nearest_rank(self):
+        self.assertIsNone(pct([], 0.5))
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual((pct(values, 0.5), pct(values, 0.95), pct(values, 1.0)), (51.0, 96.0, 100.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
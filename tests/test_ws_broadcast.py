@@ -0,0 +1,175 @@
+import asyncio
+import gc
+import os
+import sys
+import time
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.ws_broadcast import WsBroadcaster
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_code = None
+        self.incoming = asyncio.Queue()
+        self.gate = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_code = code
+
+    async def receive(self):
+        return await self.incoming.get()
+
+
+class WsBroadcasterTests(unittest.TestCase):
+    def test_slow_client_is_conflated_without_stalling_the_others(self):
+        async def run():
+            b = WsBroadcaster("snap", policy="latest", slow_ms=10_000)
+            fast, slow = FakeWebSocket(), FakeWebSocket()
+            slow.gate = asyncio.Event()
+            await b.connect(fast)
+            await b.connect(slow)
+            t0 = time.perf_counter()
+            for i in range(50):
+                await b.broadcast(str(i))
+                await asyncio.sleep(0)
+            self.assertLess(time.perf_counter() - t0, 0.5)
+            await asyncio.sleep(0.01)
+            self.assertEqual(fast.sent[-1], "49")
+            slow.gate.set()
+            await asyncio.sleep(0.01)
+            # one send was in flight, then only the newest snapshot
+            self.assertEqual(slow.sent, ["0", "49"])
+            stats = b.stats()
+            self.assertEqual(sorted(c["conflated"] for c in stats["clients"])[-1], 48)
+            self.assertEqual(stats["evicted"], 0)
+            b.disconnect(fast)
+            b.disconnect(slow)
+
+        asyncio.run(run())
+
+    def test_latest_conflates_per_kind(self):
+        async def run():
+            b = WsBroadcaster("snap", policy="latest", slow_ms=10_000)
+            ws = FakeWebSocket()
+            ws.gate = asyncio.Event()
+            await b.connect(ws)
+            b.publish("scan-0", kind="opportunities")
+            await asyncio.sleep(0)  # scan-0 is in flight
+            b.publish("preview", kind="preview_candidates_top")
+            b.publish("scan-1", kind="opportunities")
+            b.publish("scan-2", kind="opportunities")
+            ws.gate.set()
+            await asyncio.sleep(0.01)
+            self.assertEqual(ws.sent, ["scan-0", "preview", "scan-2"])
+            self.assertEqual(b.stats()["clients"][0]["conflated"], 1)
+            b.disconnect(ws)
+
+        asyncio.run(run())
+
+    def test_event_channel_drops_oldest_then_evicts_a_stuck_client(self):
+        async def run():
+            b = WsBroadcaster("events", policy="events", queue_size=4, evict_after_s=0.05)
+            ws = FakeWebSocket()
+            ws.gate = asyncio.Event()
+            await b.connect(ws)
+            b.send_to(ws, ["a", "b"])
+            await asyncio.sleep(0)
+            for i in range(6):
+                b.publish(str(i))
+            self.assertEqual(list(b._clients[ws].buf), ["2", "3", "4", "5"])
+            self.assertEqual(b.stats()["clients"][0]["dropped"], 3)
+            await asyncio.sleep(0.06)
+            b.publish("late")
+            self.assertEqual(b.active, set())
+            self.assertEqual(b.evicted, 1)
+            await asyncio.sleep(0.01)
+            self.assertEqual(ws.closed_code, 1013)
+
+        asyncio.run(run())
+
+    def test_overflow_streak_ends_when_the_writer_makes_room(self):
+        async def run():
+            b = WsBroadcaster("events", policy="events", queue_size=2, evict_after_s=5.0)
+            ws = FakeWebSocket()
+            ws.gate = asyncio.Event()
+            await b.connect(ws)
+            client = b._clients[ws]
+            b._offer(client, "a", 0.0)
+            await asyncio.sleep(0)  # the writer takes "a" and blocks on the gate
+            for i, now in enumerate((0.0, 0.0, 1.0)):
+                b._offer(client, str(i), now)
+            self.assertEqual(client.overflow_since, 1.0)
+            client.buf.popleft()  # the writer drained one message, not all of them
+            b._offer(client, "x", 2.0)
+            self.assertIsNone(client.overflow_since)
+            # a fresh overflow much later is a new streak, not 19s of overflow
+            b._offer(client, "y", 20.0)
+            self.assertEqual((b.active, client.overflow_since), ({ws}, 20.0))
+            ws.gate.set()
+            b.disconnect(ws)
+
+        asyncio.run(run())
+
+    def test_reader_failure_ends_serve_without_leaking_its_exception(self):
+        async def run():
+            errors = []
+            asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: errors.append(ctx))
+            b = WsBroadcaster("snap", policy="latest")
+            ws = FakeWebSocket()
+
+            async def broken_receive():
+                raise RuntimeError("socket is not connected")
+
+            ws.receive = broken_receive
+            await b.connect(ws)
+            await asyncio.wait_for(b.serve(ws), 1.0)
+            self.assertEqual(b.active, set())
+            gc.collect()
+            await asyncio.sleep(0)
+            return errors
+
+        self.assertEqual(asyncio.run(run()), [])
+
+    def test_repeatedly_slow_sends_evict_and_end_serve(self):
+        async def run():
+            b = WsBroadcaster("snap", policy="latest", slow_ms=5, slow_strikes=2)
+            ws = FakeWebSocket(delay=0.01)
+            await b.connect(ws)
+            serving = asyncio.create_task(b.serve(ws))
+            for i in range(3):
+                b.publish(str(i))
+                await asyncio.sleep(0.02)
+            await asyncio.wait_for(serving, 1.0)
+            self.assertEqual((b.evicted, len(ws.sent)), (1, 2))
+
+            # a normal disconnect ends serve() without counting as an eviction
+            ok = FakeWebSocket()
+            await b.connect(ok)
+            serving = asyncio.create_task(b.serve(ok))
+            await ok.incoming.put({"type": "websocket.disconnect"})
+            await asyncio.wait_for(serving, 1.0)
+            self.assertEqual((b.active, b.evicted), (set(), 1))
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,14 @@
 """Small backtest harness for QuickScalpStrategy using DryRunExecutor.
 
 Usage:
-    python tools/backtest_quickscalp.py <csv_file>
+    python tools/backtest_quickscalp.py <csv_file> [--loop]
 
 CSV format expected: timestamp,close,funding_rate (funding_rate optional)
 
-The script runs a simple bar-by-bar loop, feeding closes to the strategy and applying decisions to the executor.
+By default the vectorized engine (src/arbitrage/backtest_engine.py) is used
+when numpy is installed; it produces the same trades as the bar-by-bar loop.
+``--loop`` forces the loop, which feeds closes to the strategy and applies
+decisions to the executor one bar at a time.
 """
 import csv
 import sys
@@ -13,6 +16,7 @@ from typing import List, Optional
 from pathlib import Path
 from src.arbitrage.strategy import QuickScalpStrategy
 from src.arbitrage.executor import DryRunExecutor
+from src.arbitrage import backtest_engine
 
 
 def load_csv(path: str):
@@ -29,10 +33,16 @@ def load_csv(path: str):
     return rows
 
 
-def run_backtest(rows, symbol: str = "BTC/USDT"):
+def run_backtest(rows, symbol: str = "BTC/USDT", engine: bool = True):
     strat = QuickScalpStrategy()
     execer = DryRunExecutor()
 
+    if engine and backtest_engine.available():
+        res = backtest_engine.run_quickscalp(
+            [r[1] for r in rows], [r[2] for r in rows], strat, execer, symbol=symbol)
+        _report(res.closed)
+        return res.closed
+
     recent = []
     bars_held = 0
     for ts, close, fr in rows:
@@ -58,15 +68,21 @@ def run_backtest(rows, symbol: str = "BTC/USDT"):
     last_price = rows[-1][1]
     execer.liquidate_all({symbol: last_price})
 
-    total_pnl = sum(p.pnl for p in execer.closed)
-    print(f"Closed trades: {len(execer.closed)}, total_pnl={total_pnl:.4f}")
-    for p in execer.closed:
+    _report(execer.closed)
+    return execer.closed
+
+
+def _report(closed):
+    total_pnl = sum(p.pnl for p in closed)
+    print(f"Closed trades: {len(closed)}, total_pnl={total_pnl:.4f}")
+    for p in closed:
         print(p)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python tools/backtest_quickscalp.py <data.csv>")
+    args = [a for a in sys.argv[1:] if a != "--loop"]
+    if not args:
+        print("Usage: python tools/backtest_quickscalp.py <data.csv> [--loop]")
         sys.exit(1)
-    rows = load_csv(sys.argv[1])
-    run_backtest(rows)
+    rows = load_csv(args[0])
+    run_backtest(rows, engine="--loop" not in sys.argv)
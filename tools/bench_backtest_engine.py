@@ -0,0 +1,59 @@
+"""Benchmark the QuickScalp backtest: bar-by-bar loop vs vectorized engine.
+
+Usage:
+    python tools/bench_backtest_engine.py [n_bars] [seed]
+
+Generates a synthetic 1m random walk of `n_bars` closes (default 100000),
+runs backtest_engine.run_quickscalp_loop (the tools' per-bar loop) and
+backtest_engine.run_quickscalp on it, checks both produce the same trades and
+prints timings.
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage import backtest_engine
+from arbitrage.executor import DryRunExecutor
+from arbitrage.strategy import QuickScalpStrategy
+
+
+def random_walk(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    out, p = [], 100.0
+    for _ in range(n):
+        p *= 1.0 + rnd.gauss(0, 0.003)
+        out.append(round(p, 4))
+    return out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    if not backtest_engine.available():
+        print('numpy is not installed; nothing to compare')
+        return
+    closes = random_walk(n, seed)
+
+    t0 = time.perf_counter()
+    ref = backtest_engine.run_quickscalp_loop(closes, None, QuickScalpStrategy(entry_threshold=0.002), DryRunExecutor())
+    t1 = time.perf_counter()
+    res = backtest_engine.run_quickscalp(closes, None, QuickScalpStrategy(entry_threshold=0.002), DryRunExecutor())
+    t2 = time.perf_counter()
+
+    same = len(ref) == len(res.closed) and all(
+        a.direction == b.direction and abs(a.pnl - b.pnl) < 1e-9 and abs(a.entry_price - b.entry_price) < 1e-9
+        for a, b in zip(ref, res.closed))
+    loop_s, engine_s = t1 - t0, t2 - t1
+    print(f'bars={n} trades={len(ref)} identical={same} total_pnl={res.total_pnl:.4f}')
+    print(f'bar loop: {loop_s:.2f}s ({loop_s / n * 1e6:.1f}us/bar)')
+    print(f'engine:   {engine_s:.3f}s ({engine_s / n * 1e6:.2f}us/bar)  speedup x{loop_s / engine_s:.0f}')
+
+
+if __name__ == '__main__':
+    main()
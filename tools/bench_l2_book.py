@@ -0,0 +1,97 @@
+"""Benchmark per-message apply cost: dict + full re-sort vs incremental L2Book.
+
+Usage:
+    python tools/bench_l2_book.py [n_messages] [book_levels] [changes_per_msg]
+
+Replays a synthetic level2 diff stream (defaults: 20000 messages against a
+~400-level book, 3 changes per message, skewed toward the top of the book
+like real traffic) through the feeders' old approach (apply into a price
+dict, then sort both sides and keep the top 200) and through L2Book
+(incremental ladder update, top-200 view materialised lazily), checks both
+end with the same top of book and prints microseconds per message.
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges.l2_book import L2Book
+
+
+def build_stream(n_messages: int, levels: int, changes: int, seed: int = 1):
+    rnd = random.Random(seed)
+    tick = 0.01
+    mid = 100.0
+    half = levels // 2
+    snapshot = {
+        'asks': [[round(mid + tick * (i + 1), 2), 1.0] for i in range(half)],
+        'bids': [[round(mid - tick * i, 2), 1.0] for i in range(half)],
+    }
+    msgs = []
+    for _ in range(n_messages):
+        asks, bids = [], []
+        for _ in range(changes):
+            # most changes land in the first few dozen levels
+            depth = min(int(rnd.expovariate(1 / 15.0)), half + 20)
+            qty = 0.0 if rnd.random() < 0.25 else round(rnd.uniform(0.1, 5.0), 3)
+            if rnd.random() < 0.5:
+                asks.append([round(mid + tick * (depth + 1), 2), qty])
+            else:
+                bids.append([round(mid - tick * depth, 2), qty])
+        msgs.append({'asks': asks, 'bids': bids})
+    return snapshot, msgs
+
+
+def run_dict_sort(snapshot, msgs):
+    lm = {side: {float(p): float(q) for p, q in snapshot[side]} for side in ('asks', 'bids')}
+    book = None
+    for m in msgs:
+        for side in ('asks', 'bids'):
+            for p, q in m[side]:
+                p = float(p)
+                q = float(q)
+                if q == 0.0:
+                    lm[side].pop(p, None)
+                else:
+                    lm[side][p] = q
+        a_list = sorted(((p, q) for p, q in lm['asks'].items()), key=lambda x: x[0])[:200]
+        b_list = sorted(((p, q) for p, q in lm['bids'].items()), key=lambda x: x[0], reverse=True)[:200]
+        book = {'asks': a_list, 'bids': b_list, 'timestamp': time.time()}
+    return book
+
+
+def run_l2_book(snapshot, msgs):
+    book = L2Book('BENCH')
+    book.load_snapshot(snapshot['asks'], snapshot['bids'], seq=1)
+    for m in msgs:
+        book.apply(m['asks'], m['bids'])
+    return book.view(200)
+
+
+def main() -> None:
+    n_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    levels = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    changes = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    snapshot, msgs = build_stream(n_messages, levels, changes)
+
+    t0 = time.perf_counter()
+    ref = run_dict_sort(snapshot, msgs)
+    t_sort = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = run_l2_book(snapshot, msgs)
+    t_l2 = time.perf_counter() - t0
+
+    same = ref['asks'][:50] == got['asks'][:50] and ref['bids'][:50] == got['bids'][:50]
+    print(f'messages={n_messages} levels~{levels} changes/msg={changes}')
+    print(f'dict + sort : {t_sort / n_messages * 1e6:8.2f} us/msg')
+    print(f'L2Book      : {t_l2 / n_messages * 1e6:8.2f} us/msg')
+    print(f'speedup     : {t_sort / t_l2 if t_l2 else float("inf"):8.1f}x   top-50 identical: {same}')
+
+
+if __name__ == '__main__':
+    main()
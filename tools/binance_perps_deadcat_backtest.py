@@ -24,6 +24,7 @@ from typing import Optional, List, Tuple
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 # Optional: CCXT for live fetch
 try:
@@ -61,11 +62,22 @@ def atr(df: pd.DataFrame, length: int = 14) -> pd.Series:
 def slope(series: pd.Series, window: int = 3) -> pd.Series:
     return series.diff(window) / window
 
+def _centered_extreme_flags(series: pd.Series, window: int, fn) -> pd.Series:
+    # rolling(window, center=True).apply(lambda x: x[window//2] == fn(x)) without a Python call per window
+    vals = series.to_numpy(dtype=float)
+    out = np.full(len(vals), np.nan)
+    if window >= 1 and len(vals) >= window:
+        win = sliding_window_view(vals, window)
+        flags = (win[:, window // 2] == fn(win, axis=1)).astype(float)
+        off = window // 2
+        out[off:off + len(flags)] = flags
+    return pd.Series(out, index=series.index)
+
 def local_minima(series: pd.Series, window: int = 5) -> pd.Series:
-    return series[(series.shift(1) > series) & (series.shift(-1) > series)].rolling(window, center=True).apply(lambda x: x[window//2] == np.min(x), raw=False)
+    return _centered_extreme_flags(series[(series.shift(1) > series) & (series.shift(-1) > series)], window, np.min)
 
 def local_maxima(series: pd.Series, window: int = 5) -> pd.Series:
-    return series[(series.shift(1) < series) & (series.shift(-1) < series)].rolling(window, center=True).apply(lambda x: x[window//2] == np.max(x), raw=False)
+    return _centered_extreme_flags(series[(series.shift(1) < series) & (series.shift(-1) < series)], window, np.max)
 
 
 # ---------- Data fetching ----------
@@ -141,21 +153,16 @@ def bullish_divergence(prices: pd.Series, rsi_series: pd.Series, lookback: int =
     price_min = (prices.shift(1) > prices) & (prices.shift(-1) > prices)
     rsi_min = (rsi_series.shift(1) > rsi_series) & (rsi_series.shift(-1) > rsi_series)
 
-    div = pd.Series(False, index=prices.index)
-    last_low_idx: Optional[int] = None
-    last_low_price: Optional[float] = None
-    last_low_rsi: Optional[float] = None
-
-    for i in range(len(prices)):
-        if price_min.iloc[i] and rsi_min.iloc[i]:
-            if last_low_idx is not None and (i - last_low_idx) <= lookback:
-                # price makes lower low AND RSI makes higher low
-                if prices.iloc[i] < last_low_price and rsi_series.iloc[i] > last_low_rsi:
-                    div.iloc[i] = True
-            last_low_idx = i
-            last_low_price = prices.iloc[i]
-            last_low_rsi = rsi_series.iloc[i]
-    return div.ffill().fillna(False)
+    # each joint price/RSI low is compared with the previous joint low
+    p = prices.to_numpy(dtype=float)
+    r = rsi_series.to_numpy(dtype=float)
+    lows = np.flatnonzero((price_min & rsi_min).to_numpy(dtype=bool))
+    div = np.zeros(len(p), dtype=bool)
+    if len(lows) > 1:
+        prev, cur = lows[:-1], lows[1:]
+        hit = ((cur - prev) <= lookback) & (p[cur] < p[prev]) & (r[cur] > r[prev])
+        div[cur[hit]] = True
+    return pd.Series(div, index=prices.index)
 
 
 # ---------- Backtest Engine ----------
@@ -174,7 +181,11 @@ class Trade:
     reason: str = ""
 
 
-def run_backtest(cfg: Config, df15: pd.DataFrame, df1d: pd.DataFrame) -> Tuple[pd.DataFrame, List[Trade], dict]:
+TRADE_COLS = ['side','entry_time','entry','size','sl','tp','exit_time','exit','pnl','r_multiple','reason']
+
+
+def prepare_frames(cfg: Config, df15: pd.DataFrame, df1d: pd.DataFrame) -> pd.DataFrame:
+    """15m frame indexed by UTC time with the daily bear flag and entry indicators."""
     # Prepare time index
     df15 = df15.copy()
     df15['timestamp'] = pd.to_datetime(df15['timestamp'], unit='ms', utc=True)
@@ -210,7 +221,7 @@ def run_backtest(cfg: Config, df15: pd.DataFrame, df1d: pd.DataFrame) -> Tuple[p
     df15['ema20'] = ema(df15['close'], cfg.ema_entry_mid)
     df15['ema50'] = ema(df15['close'], cfg.ema_entry_slow)
     df15['rsi']   = rsi(df15['close'], cfg.rsi_len)
-    df15['atr']   = atr(df15, cfg.atr_len).fillna(method='bfill')  # seed early values
+    df15['atr']   = atr(df15, cfg.atr_len).bfill()  # seed early values
 
     # Divergence series for bounce longs
     if cfg.enable_long_bounce:
@@ -218,6 +229,127 @@ def run_backtest(cfg: Config, df15: pd.DataFrame, df1d: pd.DataFrame) -> Tuple[p
     else:
         df15['bull_div'] = False
 
+    return df15
+
+
+def _close_position(cfg: Config, trades: List[Trade], equity: float, pos_side: str, size: float,
+                    entry_price: float, entry_time, sl: float, tp: float, exit_time, exit_px: float,
+                    reason: str) -> float:
+    # PnL = size*(exit - entry) for long; for short it's size*(entry - exit)
+    if pos_side == 'long':
+        gross = size * (exit_px - entry_price)
+    else:
+        gross = size * (entry_price - exit_px)
+    fees = (abs(size) * entry_price * cfg.fee_pct) + (abs(size) * exit_px * cfg.fee_pct)
+    pnl = gross - fees
+    equity += pnl
+    # R multiple (risk in $ is |size| * |entry - sl|)
+    risk_per_unit = abs(entry_price - sl)
+    risk_dollars = abs(size) * risk_per_unit if risk_per_unit > 0 else np.nan
+    r_mult = pnl / risk_dollars if risk_dollars and risk_dollars > 0 else np.nan
+    trades.append(Trade(
+        side=pos_side, entry_time=entry_time, entry=entry_price, size=size,
+        sl=sl, tp=tp, exit_time=exit_time, exit=exit_px, pnl=pnl, r_multiple=r_mult,
+        reason=reason
+    ))
+    return equity
+
+
+def simulate(cfg: Config, df15: pd.DataFrame) -> Tuple[np.ndarray, List[Trade]]:
+    """Bar loop over pre-extracted columns (plain lists: scalar reads from numpy
+    arrays or pandas rows are several times slower). Returns the per-bar
+    equity and the trades, including one closed 'EOD' at the last bar."""
+    index = df15.index
+    n = len(index)
+    close = df15['close'].to_numpy(dtype=float)
+    prev_close = np.concatenate([[np.nan], close[:-1]]).tolist()
+    ema20_a = df15['ema20'].to_numpy(dtype=float)
+    prev_ema20 = np.concatenate([[np.nan], ema20_a[:-1]]).tolist()
+    close = close.tolist()
+    ema9 = df15['ema9'].to_numpy(dtype=float).tolist()
+    ema20 = ema20_a.tolist()
+    ema50 = df15['ema50'].to_numpy(dtype=float).tolist()
+    rsi_l = df15['rsi'].to_numpy(dtype=float).tolist()
+    atr_l = df15['atr'].to_numpy(dtype=float).tolist()
+    bearish = [bool(v) for v in df15['bearish_day'].tolist()]
+    bull_div = [bool(v) for v in df15['bull_div'].tolist()]
+
+    equity = cfg.initial_equity
+    trades: List[Trade] = []
+    in_position = False
+    pos_side = None
+    size = 0.0
+    entry_price = 0.0
+    sl = 0.0
+    tp = 0.0
+    entry_time = None
+    cooldown = 0
+    equity_curve = np.empty(n)
+
+    for i in range(n):
+        price = close[i]
+        atr_v = max(atr_l[i], 1e-6)  # guard
+        rsi_v = rsi_l[i] if rsi_l[i] == rsi_l[i] else 50.0
+
+        if cooldown > 0:
+            cooldown -= 1
+
+        # Update open position; if TP and SL both hit in the same bar, assume SL first
+        if in_position:
+            if pos_side == 'short':
+                hit_tp, hit_sl = price <= tp, price >= sl
+            else:
+                hit_tp, hit_sl = price >= tp, price <= sl
+            if hit_sl or hit_tp:
+                exit_px, reason = (sl, 'SL') if hit_sl else (tp, 'TP')
+                equity = _close_position(cfg, trades, equity, pos_side, size, entry_price, entry_time,
+                                         sl, tp, index[i], exit_px, reason)
+                in_position = False
+                pos_side = None
+                size = 0.0
+                cooldown = cfg.cooldown_bars
+
+        # Entry logic
+        if not in_position and cooldown == 0 and bearish[i]:
+            # SHORT continuation setup
+            short_cond = price < ema50[i] and rsi_v >= cfg.short_rsi_min
+            if short_cond and cfg.short_cross_20:
+                short_cond = prev_close[i] > prev_ema20[i] and price < ema20[i]
+
+            # LONG bounce scalp (optional)
+            long_cond = False
+            if cfg.enable_long_bounce:
+                long_cond = (rsi_v < cfg.long_rsi_max_oversold
+                             and (bull_div[i] or not cfg.require_bullish_div)
+                             and price > ema9[i])  # momentum confirmation
+
+            # Priority: shorts first; if both trigger, prefer short in a bear day
+            if short_cond or long_cond:
+                pos_side = 'short' if short_cond else 'long'
+                sl_atr = cfg.short_sl_atr if short_cond else cfg.long_sl_atr
+                tp_atr = cfg.short_tp_atr if short_cond else cfg.long_tp_atr
+                sign = 1.0 if short_cond else -1.0
+                entry_price = price
+                risk_per_unit = sl_atr * atr_v
+                dollar_risk = equity * cfg.risk_per_trade
+                size = max(dollar_risk / max(risk_per_unit, 1e-6), 0.0)
+                sl = entry_price + sign * (sl_atr * atr_v)
+                tp = entry_price - sign * (tp_atr * atr_v)
+                in_position = True
+                entry_time = index[i]
+
+        equity_curve[i] = equity
+
+    # If position still open at the end, close at last price
+    if in_position:
+        equity = _close_position(cfg, trades, equity, pos_side, size, entry_price, entry_time,
+                                 sl, tp, index[-1], close[-1], 'EOD')
+    return equity_curve, trades
+
+
+def simulate_iterrows(cfg: Config, df15: pd.DataFrame) -> Tuple[np.ndarray, List[Trade]]:
+    """The original row-by-row loop, kept as the reference for parity checks
+    and tools/bench_deadcat_backtest.py."""
     equity = cfg.initial_equity
     trades: List[Trade] = []
     in_position = False
@@ -331,29 +463,14 @@ def run_backtest(cfg: Config, df15: pd.DataFrame, df1d: pd.DataFrame) -> Tuple[p
 
     # If position still open at the end, close at last price
     if in_position:
-        last_ts = df15.index[-1]
-        last_px = float(df15['close'].iloc[-1])
-        if pos_side == 'long':
-            gross = size * (last_px - entry_price)
-        else:
-            gross = size * (entry_price - last_px)
-        fees = (abs(size) * entry_price * cfg.fee_pct) + (abs(size) * last_px * cfg.fee_pct)
-        pnl = gross - fees
-        equity += pnl
-        risk_per_unit = abs(entry_price - sl)
-        risk_dollars = abs(size) * risk_per_unit if risk_per_unit > 0 else np.nan
-        r_mult = pnl / risk_dollars if risk_dollars and risk_dollars > 0 else np.nan
-
-        trades.append(Trade(
-            side=pos_side, entry_time=entry_time, entry=entry_price, size=size,
-            sl=sl, tp=tp, exit_time=last_ts, exit=last_px, pnl=pnl, r_multiple=r_mult,
-            reason='EOD'
-        ))
-
-    # Build outputs
-    eq_df = pd.DataFrame(equity_curve, columns=['timestamp', 'equity']).set_index('timestamp')
-    trades_df = pd.DataFrame([t.__dict__ for t in trades])
-    trades_df = trades_df[['side','entry_time','entry','size','sl','tp','exit_time','exit','pnl','r_multiple','reason']]
+        equity = _close_position(cfg, trades, equity, pos_side, size, entry_price, entry_time,
+                                 sl, tp, df15.index[-1], float(df15['close'].iloc[-1]), 'EOD')
+    return np.array([e for _, e in equity_curve], dtype=float), trades
+
+
+def build_outputs(cfg: Config, df15: pd.DataFrame, equity: np.ndarray, trades: List[Trade]) -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
+    eq_df = pd.DataFrame({'equity': equity}, index=pd.Index(df15.index, name='timestamp'))
+    trades_df = pd.DataFrame([t.__dict__ for t in trades], columns=TRADE_COLS)
 
     # Metrics
     pnl_series = trades_df['pnl'].fillna(0.0)
@@ -386,6 +503,15 @@ def run_backtest(cfg: Config, df15: pd.DataFrame, df1d: pd.DataFrame) -> Tuple[p
     return eq_df, trades_df, summary
 
 
+def run_backtest(cfg: Config, df15: pd.DataFrame, df1d: pd.DataFrame, engine: str = 'arrays') -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """Returns (equity curve, trades, summary); ``engine='iterrows'`` runs the
+    original row loop instead of the array one (same outputs, much slower)."""
+    df15 = prepare_frames(cfg, df15, df1d)
+    sim = simulate_iterrows if engine == 'iterrows' else simulate
+    equity, trades = sim(cfg, df15)
+    return build_outputs(cfg, df15, equity, trades)
+
+
 # ---------- CLI & IO ----------
 def load_csv(path: str) -> pd.DataFrame:
     df = pd.read_csv(path)
@@ -2,15 +2,27 @@
 """Run a small grid over the external dead-cat backtest for MYX using local CSVs.
 Grid over: short_rsi_min, short_cross_20, enable_long_bounce
 Saves results to var/myx_deadcat_grid_results.json
+
+Combos run in parallel through arbitrage.param_search: the 15m / 1d OHLCV
+arrays are loaded once into shared memory and every worker rebuilds its
+frames from them. Each finished combo is appended to
+var/myx_deadcat_grid_results.jsonl, so an interrupted run resumes where it
+stopped (--fresh to start over, --workers / ARB_GRID_WORKERS for the pool).
 """
 import sys
 import os
 import json
-import inspect
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
 
 script_dir = r'c:\cointistreact\public\assets\guidesgemin'
 if script_dir not in sys.path:
     sys.path.insert(0, script_dir)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     import binance_perps_deadcat_backtest as mod
@@ -18,118 +30,86 @@ except Exception as e:
     print('Failed to import external module:', e)
     sys.exit(1)
 
-# helper to patch run_backtest like earlier if it throws KeyError on empty trades
-import types
+import pandas as pd
 
-def ensure_patch(mod):
-    # if mod.run_backtest already patched (we can detect by name), skip
-    src = inspect.getsource(mod.run_backtest)
-    if "expected_cols = ['side'" in src:
-        return
-    old = """
-    trades_df = pd.DataFrame([t.__dict__ for t in trades])
-    trades_df = trades_df[['side','entry_time','entry','size','sl','tp','exit_time','exit','pnl','r_multiple','reason']]
+from arbitrage.param_search import grid, run_grid
 
-    # Metrics
-"""
-    if old not in src:
-        # can't apply patch safely
-        return
-    new = """
-    trades_df = pd.DataFrame([t.__dict__ for t in trades])
-    # Guard: if empty, create empty df with expected columns
-    expected_cols = ['side','entry_time','entry','size','sl','tp','exit_time','exit','pnl','r_multiple','reason']
-    if trades_df.empty:
-        trades_df = pd.DataFrame(columns=expected_cols)
-    else:
-        present = [c for c in expected_cols if c in trades_df.columns]
-        trades_df = trades_df[present]
-
-    # Metrics
-"""
-    patched = src.replace(old, new)
-    g = mod.__dict__
-    exec(patched, g)
-
-# load CSVs using module's loader
-csv15 = 'var/myx_15m.csv'
-csv1d = 'var/myx_1d.csv'
-if not os.path.exists(csv15) or not os.path.exists(csv1d):
-    print('CSV files missing; please run tools/fetch_myx_klines_csv.py first')
-    sys.exit(1)
+OHLCV = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+CSV15 = 'var/myx_15m.csv'
+CSV1D = 'var/myx_1d.csv'
+
+
+def _frame(data, prefix):
+    # views into shared memory are read-only; run_backtest copies before mutating
+    return pd.DataFrame({c: data[f'{prefix}_{c}'] for c in OHLCV})
+
+
+def deadcat_objective(trial):
+    """One grid combo: rebuild the frames from the shared arrays and backtest."""
+    p = trial.params
+    df15 = _frame(trial.data, 'm15')
+    df1d = _frame(trial.data, 'd1')
+    cfg = mod.Config()
+    cfg.symbol = 'MYX/USDT'
+    cfg.csv_15m = CSV15
+    cfg.csv_1d = CSV1D
+    cfg.short_rsi_min = p['short_rsi_min']
+    cfg.short_cross_20 = p['short_cross_20']
+    cfg.enable_long_bounce = p['enable_long_bounce']
+    _, _, summary = mod.run_backtest(cfg, df15, df1d)
+    return {'trades': int(summary.get('trades', 0)), 'summary': summary}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--fresh', action='store_true', help='ignore results of a previous run')
+    args = ap.parse_args()
+
+    if not os.path.exists(CSV15) or not os.path.exists(CSV1D):
+        print('CSV files missing; please run tools/fetch_myx_klines_csv.py first')
+        sys.exit(1)
+
+    try:
+        df15 = mod.load_csv(CSV15)
+        df1d = mod.load_csv(CSV1D)
+    except Exception as e:
+        print('Failed to load CSVs via module loader:', e)
+        sys.exit(1)
+
+    data = {}
+    for prefix, df in (('m15', df15), ('d1', df1d)):
+        for c in OHLCV:
+            data[f'{prefix}_{c}'] = df[c].to_numpy(dtype='int64' if c == 'timestamp' else 'float64')
+
+    combos = grid(short_rsi_min=[40, 50, 60], short_cross_20=[True, False], enable_long_bounce=[True, False])
+    os.makedirs('var', exist_ok=True)
+    stream_path = 'var/myx_deadcat_grid_results.jsonl'
+    if args.fresh and os.path.exists(stream_path):
+        os.remove(stream_path)
+    records = run_grid(deadcat_objective, combos, data=data, results_path=stream_path, workers=args.workers)
+
+    by_key = {json.dumps(r['params'], sort_keys=True): r for r in records}
+    results = []
+    for c in combos:
+        r = by_key.get(json.dumps(c, sort_keys=True))
+        if r is None:
+            continue
+        if r.get('status') == 'ok':
+            results.append(dict(c, **r['result']))
+            summary = r['result'].get('summary') or {}
+            print(f"rsi={c['short_rsi_min']} cross={c['short_cross_20']} long_bounce={c['enable_long_bounce']} "
+                  f"-> trades={r['result'].get('trades')} return={summary.get('return_pct')}")
+        else:
+            print('Failed for', c, '->', r.get('error'))
+            results.append(dict(c, error=r.get('error') or r.get('status')))
+
+    out_path = 'var/myx_deadcat_grid_results.json'
+    with open(out_path, 'w', encoding='utf8') as f:
+        json.dump({'symbol': 'MYX/USDT', 'results': results}, f, indent=2, default=str)
+
+    print('Wrote', out_path)
 
-try:
-    df15 = mod.load_csv(csv15)
-    df1d = mod.load_csv(csv1d)
-except Exception as e:
-    print('Failed to load CSVs via module loader:', e)
-    sys.exit(1)
 
-short_rsi_vals = [40, 50, 60]
-short_cross_opts = [True, False]
-long_bounce_opts = [True, False]
-
-results = []
-for rsi in short_rsi_vals:
-    for cross in short_cross_opts:
-        for lb in long_bounce_opts:
-            cfg = mod.Config()
-            cfg.symbol = 'MYX/USDT'
-            cfg.csv_15m = csv15
-            cfg.csv_1d = csv1d
-            cfg.short_rsi_min = rsi
-            cfg.short_cross_20 = cross
-            cfg.enable_long_bounce = lb
-            try:
-                out = mod.run_backtest(cfg, df15, df1d)
-            except KeyError as ke:
-                # try patching and re-running
-                try:
-                    ensure_patch(mod)
-                    out = mod.run_backtest(cfg, df15, df1d)
-                except Exception as e:
-                    print('Failed after patch for', rsi, cross, lb, '->', e)
-                    results.append({'short_rsi_min': rsi, 'short_cross_20': cross, 'enable_long_bounce': lb, 'error': str(e)})
-                    continue
-            except Exception as e:
-                # try patch then retry
-                try:
-                    ensure_patch(mod)
-                    out = mod.run_backtest(cfg, df15, df1d)
-                except Exception as e2:
-                    print('Failed for', rsi, cross, lb, '->', e2)
-                    results.append({'short_rsi_min': rsi, 'short_cross_20': cross, 'enable_long_bounce': lb, 'error': str(e2)})
-                    continue
-
-            # out is (eq_df, trades_df, summary)
-            try:
-                eq_df, trades_df, summary = out
-            except Exception:
-                # some versions return tuple differently; try to unpack
-                try:
-                    eq_df = out[0]
-                    trades_df = out[1]
-                    summary = out[2]
-                except Exception as e:
-                    print('Unexpected output format for', rsi, cross, lb, '->', e)
-                    results.append({'short_rsi_min': rsi, 'short_cross_20': cross, 'enable_long_bounce': lb, 'error': 'bad output'})
-                    continue
-
-            trades_count = 0
-            try:
-                trades_count = int(summary.get('trades', 0))
-            except Exception:
-                try:
-                    trades_count = len(trades_df)
-                except Exception:
-                    trades_count = 0
-
-            results.append({'short_rsi_min': rsi, 'short_cross_20': cross, 'enable_long_bounce': lb, 'trades': trades_count, 'summary': summary})
-            print(f"rsi={rsi} cross={cross} long_bounce={lb} -> trades={trades_count} return={summary.get('return_pct')}")
-
-os.makedirs('var', exist_ok=True)
-out_path = 'var/myx_deadcat_grid_results.json'
-with open(out_path, 'w', encoding='utf8') as f:
-    json.dump({'symbol': 'MYX/USDT', 'results': results}, f, indent=2)
-
-print('Wrote', out_path)
+if __name__ == '__main__':
+    main()
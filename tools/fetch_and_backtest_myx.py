@@ -3,32 +3,31 @@
 Usage:
     python tools/fetch_and_backtest_myx.py
 
-This script uses only the Python standard library (urllib) so it works without extra deps.
+Klines come from the local market data store (arbitrage.market_data, needs numpy).
 """
 import json
 import sys
-from urllib.request import urlopen, Request
-from urllib.parse import urlencode
-from time import sleep
+from time import time
 
+from arbitrage import market_data
+from arbitrage.exchanges.kline_store import INTERVAL_MS
 from arbitrage.strategy import QuickScalpStrategy
 from arbitrage.executor import DryRunExecutor
 
 
-API = "https://fapi.binance.com/fapi/v1/klines"
 SYMBOL = "MYXUSDT"
 INTERVAL = "1m"
 LIMIT = 240  # last 4 hours
 
 
 def fetch_klines(symbol=SYMBOL, interval=INTERVAL, limit=LIMIT):
-    q = {"symbol": symbol, "interval": interval, "limit": str(limit)}
-    url = API + "?" + urlencode(q)
-    req = Request(url, headers={"User-Agent": "arbitrage-backtest/1.0"})
+    # served from the local market data store; only bars closed since the
+    # last run are downloaded
     try:
-        with urlopen(req, timeout=20) as r:
-            data = r.read()
-            return json.loads(data)
+        start = int(time() * 1000) - limit * INTERVAL_MS[interval]
+        data = market_data.load_ohlcv(symbol, interval, 'futures', start=start, fetch=True)
+        return [[int(ts), o, h, l, c, v] for ts, o, h, l, c, v in
+                zip(*(data[col].tolist() for col in market_data.COLUMNS))]
     except Exception as e:
         print(f"Error fetching klines: {e}")
         return None
@@ -5,40 +5,31 @@ Writes:
   var/myx_1d.csv
 
 These CSVs match the format expected by the backtest script: timestamp(ms),open,high,low,close,volume
+
+Klines go through the local market data store (arbitrage.market_data), so a
+re-run only downloads the bars closed since the previous one.
 """
-import json
-from urllib.request import Request, urlopen
-from urllib.parse import urlencode
-import csv
 import os
+import sys
+import time
 
-API = 'https://fapi.binance.com/fapi/v1/klines'
-SYMBOL = 'MYXUSDT'
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
 
+from arbitrage import market_data
+from arbitrage.exchanges.kline_store import INTERVAL_MS
 
-def fetch(symbol, interval, limit=1500):
-    q = {'symbol': symbol, 'interval': interval, 'limit': str(limit)}
-    url = API + '?' + urlencode(q)
-    req = Request(url, headers={'User-Agent': 'fetch-myx-klines/1.0'})
-    with urlopen(req, timeout=30) as r:
-        return json.loads(r.read())
+SYMBOL = 'MYXUSDT'
+BARS = 1500
 
 
 os.makedirs('var', exist_ok=True)
-print('Fetching 15m...')
-kl_15 = fetch(SYMBOL, '15m', limit=1500)
-with open('var/myx_15m.csv', 'w', newline='', encoding='utf8') as f:
-    writer = csv.writer(f)
-    writer.writerow(['timestamp','open','high','low','close','volume'])
-    for k in kl_15:
-        writer.writerow([k[0], k[1], k[2], k[3], k[4], k[5]])
-print('Wrote var/myx_15m.csv rows=', len(kl_15))
-
-print('Fetching 1d...')
-kl_1d = fetch(SYMBOL, '1d', limit=1500)
-with open('var/myx_1d.csv', 'w', newline='', encoding='utf8') as f:
-    writer = csv.writer(f)
-    writer.writerow(['timestamp','open','high','low','close','volume'])
-    for k in kl_1d:
-        writer.writerow([k[0], k[1], k[2], k[3], k[4], k[5]])
-print('Wrote var/myx_1d.csv rows=', len(kl_1d))
+for interval in ('15m', '1d'):
+    start = int(time.time() * 1000) - BARS * INTERVAL_MS[interval]
+    print(f'Fetching {interval}...')
+    n = market_data.update_ohlcv(SYMBOL, interval, 'futures', start=start)
+    path = f'var/myx_{interval}.csv'
+    rows = market_data.export_csv(market_data.load_ohlcv(SYMBOL, interval, 'futures', start=start), path)
+    print(f'Wrote {path} rows= {rows} (new bars: {n})')
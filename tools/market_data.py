@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Manage the local OHLCV store (arbitrage.market_data).
+
+Usage:
+    python tools/market_data.py fetch MYXUSDT 15m [--market futures] [--days 30]
+    python tools/market_data.py import var/myx_15m.csv MYXUSDT 15m [--market futures] [--exchange binance]
+    python tools/market_data.py export MYXUSDT 15m out.csv [--days 30]
+    python tools/market_data.py info
+
+`fetch` downloads only the bars missing from the stored series (Binance
+REST); `import` migrates an existing timestamp/ts,open,high,low,close,volume
+CSV; `export` writes the stored bars back out as such a CSV.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage import market_data
+
+
+def _start(days):
+    return int(time.time() * 1000 - days * 86_400_000) if days else None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    for name in ('fetch', 'import', 'export'):
+        p = sub.add_parser(name)
+        if name == 'import':
+            p.add_argument('csv')
+        p.add_argument('symbol')
+        p.add_argument('interval')
+        if name == 'export':
+            p.add_argument('csv')
+        p.add_argument('--market', default='futures')
+        p.add_argument('--exchange', default='binance')
+        if name != 'import':
+            p.add_argument('--days', type=float, default=None)
+    sub.add_parser('info')
+    args = ap.parse_args()
+
+    if not market_data.available():
+        print('numpy is not installed; the market data store needs it')
+        sys.exit(1)
+
+    if args.cmd == 'fetch':
+        t0 = time.perf_counter()
+        try:
+            n = market_data.update_ohlcv(args.symbol, args.interval, args.market, args.exchange, start=_start(args.days))
+        except Exception as e:
+            print('fetch failed:', e)
+            sys.exit(1)
+        print(f'added {n} bars in {time.perf_counter() - t0:.2f}s ->',
+              market_data.path_for(args.symbol, args.interval, args.market, args.exchange))
+    elif args.cmd == 'import':
+        n = market_data.import_csv(args.csv, args.symbol, args.interval, args.market, args.exchange)
+        print(f'imported {n} new bars from {args.csv}')
+    elif args.cmd == 'export':
+        data = market_data.load_ohlcv(args.symbol, args.interval, args.market, args.exchange, start=_start(args.days))
+        n = market_data.export_csv(data, args.csv)
+        print(f'wrote {args.csv} rows={n}')
+    else:
+        for s in market_data.list_series():
+            cov = market_data.coverage(s['symbol'], s['interval'], s['market'], s['exchange'])
+            if cov is None:
+                print(s['exchange'], s['market'], s['symbol'], s['interval'], 'empty')
+                continue
+            first, last, n = cov
+            fmt = lambda ms: time.strftime('%Y-%m-%d %H:%M', time.gmtime(ms / 1000))
+            print(s['exchange'], s['market'], s['symbol'], s['interval'], f'bars={n}', fmt(first), '->', fmt(last))
+
+
+if __name__ == '__main__':
+    main()
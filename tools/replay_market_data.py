@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Record feeder traffic and replay it offline (arbitrage.exchanges.recorder / arbitrage.replay).
+
+Usage:
+    python tools/replay_market_data.py record var/recordings/run1 --exchanges binance,gate --minutes 30
+    python tools/replay_market_data.py info var/recordings/run1
+    python tools/replay_market_data.py run var/recordings/run1 [--speed 0|1|N] [--scan-every 1]
+        [--strategy MYXUSDT:bear ...] [--out var/replay_report.json]
+    python tools/replay_market_data.py diff var/replay_a.json var/replay_b.json
+
+`record` starts the feeders with recording on (same as ARB_RECORD_DIR with
+the app). `run` re-drives the feeders from the recording; speed 0 replays as
+fast as the feeders consume frames and prints the throughput. `diff` compares
+the opportunities, strategy actions and final books of two run reports.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from arbitrage.exchanges import recorder
+
+
+def _csv(s):
+    return [x.strip() for x in s.split(',') if x.strip()] if s else None
+
+
+def cmd_record(args):
+    from arbitrage import feeder_utils
+
+    feeders = feeder_utils.start_all(symbols=_csv(args.symbols), exchanges=_csv(args.exchanges), record=args.dir)
+    print('recording', sorted(feeders), '->', args.dir)
+    end = time.time() + args.minutes * 60
+    try:
+        while time.time() < end:
+            time.sleep(10)
+            rec = recorder.get_recorder()
+            if rec is not None:
+                print(rec.stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        feeder_utils.stop_all(feeders)
+
+
+def cmd_info(args):
+    kinds = {recorder.OPEN: 'open', recorder.TEXT: 'text', recorder.BINARY: 'binary',
+             recorder.CLOSE: 'close', recorder.REST: 'rest'}
+    per_source = {}
+    first = last = None
+    n = 0
+    for rec in recorder.read_records(args.path):
+        n += 1
+        first = rec.ts if first is None else first
+        last = rec.ts
+        counts = per_source.setdefault(rec.source or '-', {})
+        name = kinds.get(rec.kind, str(rec.kind))
+        counts[name] = counts.get(name, 0) + 1
+    fmt = lambda ts: time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts))
+    print(f'segments={len(recorder.segment_paths(args.path))} records={n}')
+    if first is not None:
+        print(f'{fmt(first)} -> {fmt(last)} ({last - first:.1f}s)')
+    for source, counts in sorted(per_source.items()):
+        print(' ', source, counts)
+
+
+def cmd_run(args):
+    from arbitrage import replay
+
+    strategies = []
+    if args.strategy:
+        from arbitrage.live_strategy import LiveStrategy
+
+        for spec in args.strategy:
+            sym, _, mode = spec.partition(':')
+            strategies.append(LiveStrategy(sym, mode or 'bear'))
+    report = replay.run_replay(args.path, speed=args.speed, exchanges=_csv(args.exchanges),
+                               symbols=_csv(args.symbols), strategies=strategies, scan_every_s=args.scan_every)
+    print(json.dumps(report['stats'], indent=2))
+    print(f"opportunities={len(report['opportunities'])} actions={len(report['actions'])}")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print('wrote', args.out)
+
+
+def cmd_diff(args):
+    with open(args.a, encoding='utf-8') as f:
+        a = json.load(f)
+    with open(args.b, encoding='utf-8') as f:
+        b = json.load(f)
+    same = True
+    for key in ('opportunities', 'actions', 'books'):
+        if a.get(key) == b.get(key):
+            print(f'{key}: identical')
+            continue
+        same = False
+        if isinstance(a.get(key), list):
+            print(f'{key}: differ ({len(a[key])} vs {len(b[key])})')
+            for i, (x, y) in enumerate(zip(a[key], b[key])):
+                if x != y:
+                    print('  first difference at', i)
+                    print('  a:', x)
+                    print('  b:', y)
+                    break
+        else:
+            print(f'{key}: differ')
+    sys.exit(0 if same else 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('record')
+    p.add_argument('dir')
+    p.add_argument('--exchanges', default=None)
+    p.add_argument('--symbols', default=None)
+    p.add_argument('--minutes', type=float, default=10.0)
+    p = sub.add_parser('info')
+    p.add_argument('path')
+    p = sub.add_parser('run')
+    p.add_argument('path')
+    p.add_argument('--speed', type=float, default=0.0)
+    p.add_argument('--exchanges', default=None)
+    p.add_argument('--symbols', default=None)
+    p.add_argument('--scan-every', type=float, default=1.0)
+    p.add_argument('--strategy', action='append', help='SYMBOL:mode, may be repeated')
+    p.add_argument('--out', default=None)
+    p = sub.add_parser('diff')
+    p.add_argument('a')
+    p.add_argument('b')
+    args = ap.parse_args()
+    {'record': cmd_record, 'info': cmd_info, 'run': cmd_run, 'diff': cmd_diff}[args.cmd](args)
+
+
+if __name__ == '__main__':
+    main()
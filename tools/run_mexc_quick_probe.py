@@ -20,7 +20,7 @@ print(f.get_order_book('BTCUSDT', depth=5))
 # Look for sample bin files
 samples = sorted(glob.glob('mexc_sample_*.bin'))
 if not samples:
-    print('\nNo mexc_sample_*.bin files found in repo root; check mexc_raw_messages.log for raw frames.')
+    print('\nNo mexc_sample_*.bin files found in repo root; record the feed (ARB_RECORD_DIR) and inspect it with tools/replay_market_data.py info.')
 else:
     print(f'\nFound {len(samples)} sample files. Trying to decode first one: {samples[0]}')
     path = samples[0]
@@ -46,6 +46,15 @@ except Exception:
     except Exception:
         find_hot_coins = None
 
+# Shared kline store (stream-fed ring buffers) when running inside the app
+try:
+    from src.arbitrage.exchanges.kline_store import get_kline_store
+except Exception:
+    try:
+        from arbitrage.exchanges.kline_store import get_kline_store
+    except Exception:
+        get_kline_store = None
+
 
 BINANCE_KLINES_URL = 'https://api.binance.com/api/v3/klines'
 
@@ -62,6 +71,12 @@ def _http_get_json(url: str, timeout: float = 10.0) -> Optional[dict]:
 
 
 def fetch_klines(symbol: str, interval: str = '1h', limit: int = 100) -> List[List]:
+    if get_kline_store is not None:
+        try:
+            return get_kline_store().get_klines(symbol, interval, limit)
+        except Exception as e:
+            print('kline store error for', symbol, '->', e, file=sys.stderr)
+            return []
     params = {'symbol': symbol.replace('/', '').replace('-', ''), 'interval': interval, 'limit': limit}
     url = BINANCE_KLINES_URL + '?' + parse.urlencode(params)
     data = _http_get_json(url)
@@ -4,6 +4,8 @@ Usage: python tools/walkforward_for_top.py results.json --top 3
 
 This script fetches 1000 1m klines, then for each selected combo runs the strategy on rolling test windows
 and reports aggregated metrics (mean pnl, std, win rate, windows tested).
+Combos run in parallel on a process pool (arbitrage.param_search) with the closes in shared memory;
+--prune stops combos whose window pnl trails the median of finished ones.
 """
 import json
 import sys
@@ -13,8 +15,12 @@ from urllib.request import Request, urlopen
 from urllib.parse import urlencode
 from statistics import mean, stdev
 
+import numpy as np
+
 from arbitrage.strategy import QuickScalpStrategy
 from arbitrage.executor import DryRunExecutor
+from arbitrage import backtest_engine
+from arbitrage.param_search import MedianPruner, run_grid, walk_forward_windows
 
 API = "https://fapi.binance.com/fapi/v1/klines"
 SYMBOL = "MYXUSDT"
@@ -56,6 +62,12 @@ def run_single_backtest(rows, combo, conservative=True):
 
     execer = DryRunExecutor(entry_fee_rate=0.0004, exit_fee_rate=0.0004, min_notional=25.0 if conservative else 1.0, round_to=0.1 if conservative else 0.0001, slippage_bps=0.001, max_partial_reduces=3)
 
+    if backtest_engine.available():
+        # same trades as the loop below, sized with size_by_risk on entry
+        res = backtest_engine.run_quickscalp([r[1] for r in rows], [r[2] for r in rows], strat, execer,
+                                             symbol="MYX/USDT", sizing='risk')
+        return _summary(res.closed)
+
     recent = []
     bars_held = 0
     for ts, close, fr in rows:
@@ -81,7 +93,10 @@ def run_single_backtest(rows, combo, conservative=True):
 
     last_price = rows[-1][1]
     execer.liquidate_all({"MYX/USDT": last_price})
-    closed = execer.closed
+    return _summary(execer.closed)
+
+
+def _summary(closed):
     pnls = [p.pnl for p in closed]
     total = sum(pnls)
     win_count = sum(1 for p in pnls if p > 0)
@@ -90,6 +105,24 @@ def run_single_backtest(rows, combo, conservative=True):
     return {"closed_trades": len(pnls), "total_pnl": total, "win_rate": win_rate, "pnls": pnls}
 
 
+def walkforward_objective(trial):
+    """Run one combo over every test window, reporting each window's pnl so a
+    pruner can stop combos that trail the others early."""
+    p = dict(trial.params)
+    windows = walk_forward_windows(len(trial.data['close']), p.pop('wf_train'), p.pop('wf_test'), p.pop('wf_step'))
+    closes = trial.data['close'].tolist()
+    out = {"windows": []}
+    for i, (lo, hi) in enumerate(windows):
+        res = run_single_backtest([(None, c, None) for c in closes[lo:hi]], p, conservative=True)
+        out['windows'].append(res)
+        trial.report(i, res['total_pnl'])
+    pnls = [w['total_pnl'] for w in out['windows']]
+    out['mean_pnl'] = mean(pnls) if pnls else 0.0
+    out['std_pnl'] = stdev(pnls) if len(pnls) > 1 else 0.0
+    out['n_windows'] = len(pnls)
+    return out
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('input_json')
@@ -98,6 +131,10 @@ def main():
     p.add_argument('--train', type=int, default=600)
     p.add_argument('--test', type=int, default=200)
     p.add_argument('--step', type=int, default=200)
+    p.add_argument('--workers', type=int, default=None, help='process pool size (default: ARB_GRID_WORKERS or all cores)')
+    p.add_argument('--prune', action='store_true', help='stop combos whose window pnl trails the median early')
+    p.add_argument('--results', default=None, help='stream per-combo results to this JSONL file')
+    p.add_argument('--resume', action='store_true', help='skip combos already in --results')
     args = p.parse_args()
 
     with open(args.input_json, 'r', encoding='utf-8') as f:
@@ -125,22 +162,29 @@ def main():
         print('Not enough data for train+test (have', n, 'need', train+test, ')')
         return
 
-    outputs = {}
+    keys = {}
+    combos = []
     for combo in selected:
         combo_key = f"htf{combo.get('htf_momentum_threshold')}_mw{combo.get('momentum_window')}"
-        outputs[combo_key] = {"windows": []}
-        start = 0
-        while start + train + test <= n:
-            test_rows = rows[start + train : start + train + test]
-            res = run_single_backtest(test_rows, combo, conservative=True)
-            outputs[combo_key]['windows'].append(res)
-            start += step
-
-        # aggregate
-        pnls = [w['total_pnl'] for w in outputs[combo_key]['windows']]
-        outputs[combo_key]['mean_pnl'] = mean(pnls) if pnls else 0.0
-        outputs[combo_key]['std_pnl'] = stdev(pnls) if len(pnls) > 1 else 0.0
-        outputs[combo_key]['n_windows'] = len(pnls)
+        params = dict(combo, wf_train=train, wf_test=test, wf_step=step)
+        keys[json.dumps(params, sort_keys=True, default=str)] = combo_key
+        combos.append(params)
+    if args.results and not args.resume and os.path.exists(args.results):
+        os.remove(args.results)
+    records = run_grid(walkforward_objective, combos, data={'close': np.array([r[1] for r in rows])},
+                       results_path=args.results, workers=args.workers, resume=args.resume,
+                       pruner=MedianPruner(warmup_steps=1, min_trials=2) if args.prune else None)
+
+    outputs = {}
+    for rec in records:
+        combo_key = keys.get(rec['key'])
+        if combo_key is None:
+            continue
+        if rec['status'] == 'ok':
+            outputs[combo_key] = rec['result']
+        else:
+            print(combo_key, rec['status'], rec.get('error') or rec.get('pruned_at'))
+    outputs = {k: outputs[k] for k in keys.values() if k in outputs}
 
     out_path = 'var/myx_walkforward_summary.json'
     with open(out_path, 'w', encoding='utf-8') as f: